@@ -1815,12 +1815,16 @@ def statistics_summary_view(request):
         return redirect_to_sign_in_page(request, authority_required)
 
     google_civic_api_counter_manager = GoogleCivicApiCounterManager()
-    google_civic_daily_summary_list = google_civic_api_counter_manager.retrieve_daily_summaries()
+    google_civic_results = google_civic_api_counter_manager.retrieve_summaries()
     vote_smart_api_counter_manager = VoteSmartApiCounterManager()
-    vote_smart_daily_summary_list = vote_smart_api_counter_manager.retrieve_daily_summaries()
+    vote_smart_results = vote_smart_api_counter_manager.retrieve_summaries()
     template_values = {
-        'google_civic_daily_summary_list':  google_civic_daily_summary_list,
-        'vote_smart_daily_summary_list':    vote_smart_daily_summary_list,
+        'google_civic_daily_summary_list':      google_civic_results['daily_summaries'],
+        'google_civic_weekly_summary_list':     google_civic_results['weekly_summaries'],
+        'google_civic_monthly_summary_list':    google_civic_results['monthly_summaries'],
+        'vote_smart_daily_summary_list':        vote_smart_results['daily_summaries'],
+        'vote_smart_weekly_summary_list':       vote_smart_results['weekly_summaries'],
+        'vote_smart_monthly_summary_list':      vote_smart_results['monthly_summaries'],
     }
     response = render(request, 'admin_tools/statistics_summary.html', template_values)
 
@@ -1841,6 +1845,7 @@ def sync_data_with_master_servers_view(request):
 
     google_civic_election_id = request.GET.get('google_civic_election_id', '')
     state_code = request.GET.get('state_code', '')
+    start_over = positive_value_exists(request.GET.get('start_over', False))
 
     election_list = Election.objects.order_by('-election_day_text')
 
@@ -1850,6 +1855,7 @@ def sync_data_with_master_servers_view(request):
     template_values = {
         'election_list':                election_list,
         'google_civic_election_id':     google_civic_election_id,
+        'start_over':                   start_over,
         'state_list':                   sorted_state_list,
         'state_code':                   state_code,
 
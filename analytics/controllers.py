@@ -2,65 +2,132 @@
 # Brought to you by We Vote. Be good.
 # -*- coding: UTF-8 -*-
 
-from .models import AnalyticsAction, AnalyticsCountManager, AnalyticsManager, \
-    ACTIONS_THAT_REQUIRE_ORGANIZATION_IDS
-from candidate.models import CandidateCampaignManager
+from .models import AnalyticsAction, AnalyticsCountManager, AnalyticsDailyRollup, AnalyticsDailyRollupFirstSeen, \
+    AnalyticsManager, SitewideDailyMetrics, ACTION_BALLOT_VISIT, ACTION_VOTER_GUIDE_VISIT, \
+    ACTIONS_THAT_REQUIRE_ORGANIZATION_IDS, \
+    ROLLUP_AUTHENTICATED_VISITORS, ROLLUP_BALLOT_VIEWERS, ROLLUP_ELECTION_VISITORS, \
+    ROLLUP_ELECTION_VOTER_GUIDES_VIEWED, ROLLUP_ORGANIZATION_AUTHENTICATED_VISITORS, ROLLUP_ORGANIZATION_VISITORS, \
+    ROLLUP_VISITORS, ROLLUP_VOTER_GUIDES_VIEWED, SITEWIDE_ROLLUP_KINDS
+from candidate.models import CandidateCampaign
 from config.base import get_environment_variable
 from datetime import timedelta
-from django.db.models import Q
+from django.db.models import Min, Q
+from django.utils.timezone import localtime, now
+from exception.models import handle_exception
 from follow.models import FollowMetricsManager, FollowOrganizationList
-from measure.models import ContestMeasureManager
+from measure.models import ContestMeasure
 from position.models import PositionMetricsManager
 from voter.models import VoterManager, VoterMetricsManager
 import wevote_functions.admin
 from wevote_functions.functions import convert_to_int, positive_value_exists
+from wevote_settings.models import WeVoteSettingsManager
 
 logger = wevote_functions.admin.get_logger(__name__)
 
 WE_VOTE_API_KEY = get_environment_variable("WE_VOTE_API_KEY")
 
+# WeVoteSetting holding the last AnalyticsAction id we have filled in election ids for
+ELECTION_ID_BACKFILL_LAST_ACTION_ID = 'analytics_election_id_backfill_last_action_id'
+# How many AnalyticsAction ids we look at in each pass of the election id backfill
+ELECTION_ID_BACKFILL_CHUNK_SIZE = 50000
+# While a day is still going on, we build its AnalyticsDailyRollups again at most this often
+ANALYTICS_DAILY_ROLLUP_REFRESH_MINUTES = 15
+
+
+def augment_analytics_action_election_ids_from_ballot_items(action_query):
+    """
+    Entries about a candidate or measure, without an election, get the election of that candidate or measure. One
+    UPDATE per election. The rollups of the days we change are marked incomplete, so they are built again.
+    :param action_query: The AnalyticsAction entries to look at
+    :return: The number of entries updated
+    """
+    action_query = action_query.filter(Q(google_civic_election_id=None) | Q(google_civic_election_id=0))
+    action_query = action_query.exclude(Q(ballot_item_we_vote_id=None) | Q(ballot_item_we_vote_id=""))
+    ballot_item_we_vote_id_list = list(action_query.values_list('ballot_item_we_vote_id', flat=True).distinct())
+    if not len(ballot_item_we_vote_id_list):
+        return 0
+
+    ballot_item_list = list(CandidateCampaign.objects.filter(
+        we_vote_id__in=[we_vote_id for we_vote_id in ballot_item_we_vote_id_list if "cand" in we_vote_id]).values_list(
+        'we_vote_id', 'google_civic_election_id'))
+    ballot_item_list += list(ContestMeasure.objects.filter(
+        we_vote_id__in=[we_vote_id for we_vote_id in ballot_item_we_vote_id_list if "meas" in we_vote_id]).values_list(
+        'we_vote_id', 'google_civic_election_id'))
+    ballot_item_we_vote_ids_by_election_id = {}
+    for ballot_item_we_vote_id, google_civic_election_id in ballot_item_list:
+        google_civic_election_id = convert_to_int(google_civic_election_id)
+        if positive_value_exists(google_civic_election_id):
+            ballot_item_we_vote_ids_by_election_id.setdefault(google_civic_election_id, []).append(
+                ballot_item_we_vote_id)
+
+    analytics_updated_count = 0
+    changed_date_as_integer_list = []
+    for google_civic_election_id, we_vote_id_list in ballot_item_we_vote_ids_by_election_id.items():
+        election_action_query = action_query.filter(ballot_item_we_vote_id__in=we_vote_id_list)
+        changed_date_as_integer_list += list(election_action_query.values_list('date_as_integer', flat=True).distinct())
+        analytics_updated_count += election_action_query.update(google_civic_election_id=google_civic_election_id)
+    AnalyticsManager().mark_analytics_daily_rollups_incomplete(changed_date_as_integer_list)
+    return analytics_updated_count
+
 
 def augment_voter_analytics_action_entries_without_election_id(date_as_integer):
     """
-    Retrieve list of voters with AnalyticsAction entries that have an empty google_civic_election_id
-     and then loop through those entries to do the following:
-     1) Look for the oldest entry with an election_id
-     2) For that day, loop forward (while on the same day) and fill in the empty google_civic_election_ids
-        until we find a new election id
-     3) Then continue looping forward using the different election_id (while on the same day)
-     4) Mark all of the entries prior to the first election entry as NULL
+    Fill in empty google_civic_election_ids on AnalyticsAction entries added since the last time we ran:
+     1) Entries about a candidate or measure get the election of that candidate or measure
+     2) Other entries get the election the voter was looking at earlier the same day
+     3) Entries before the voter's first election of the day get that first election
+    We work through new entries in chunks of ids, and remember the last id done, so each run only looks at new entries
+     (and the earlier entries on the same voter-days).
+    :param date_as_integer: Ignore entries before this day
     :return:
     """
-    success = False
+    success = True
     status = ""
+    analytics_updated_count = 0
+    analytics_manager = AnalyticsManager()
+    we_vote_settings_manager = WeVoteSettingsManager()
 
-    # Get distinct voters in the time period
-    voter_list = []
+    after_action_id = convert_to_int(we_vote_settings_manager.fetch_setting(ELECTION_ID_BACKFILL_LAST_ACTION_ID))
+    action_id_query = AnalyticsAction.objects.using('analytics').filter(date_as_integer__gte=date_as_integer)
     try:
-        voter_list_query = AnalyticsAction.objects.using('analytics').all()
-        voter_list_query = voter_list_query.filter(date_as_integer__gte=date_as_integer)
-        # Find entries where there is at least one empty google_civic_election_id
-        voter_list_query = voter_list_query.filter(Q(google_civic_election_id=None) | Q(google_civic_election_id=0))
-        voter_list_query = voter_list_query.values('voter_we_vote_id').distinct()
-        # voter_list_query = voter_list_query[:5]  # TEMP limit to 5
-        voter_list = list(voter_list_query)
-        voter_list_found = True
+        if positive_value_exists(date_as_integer):
+            # Start at the first entry of that day, unless we have already gone past it
+            first_action_id = convert_to_int(action_id_query.aggregate(Min('id'))['id__min'])
+            after_action_id = max(after_action_id, first_action_id - 1)
     except Exception as e:
-        voter_list_found = False
-
-    simple_voter_list = []
-    for voter_dict in voter_list:
-        if positive_value_exists(voter_dict['voter_we_vote_id']):
-            simple_voter_list.append(voter_dict['voter_we_vote_id'])
+        success = False
+        status += "AUGMENT_ELECTION_IDS-COULD_NOT_RETRIEVE_FIRST_ACTION_ID "
+        handle_exception(e, logger=logger, exception_message=status)
+
+    while success:
+        try:
+            # The chunk ends at the last entry we actually read, so we never move past ids we haven't seen
+            action_id_list = list(action_id_query.filter(id__gt=after_action_id).order_by('id').values_list(
+                'id', flat=True)[:ELECTION_ID_BACKFILL_CHUNK_SIZE])
+        except Exception as e:
+            success = False
+            status += "AUGMENT_ELECTION_IDS-COULD_NOT_RETRIEVE_ACTION_IDS "
+            handle_exception(e, logger=logger, exception_message=status)
+            break
+        if not len(action_id_list):
+            break
+        last_action_id = action_id_list[-1]
+        try:
+            action_query = AnalyticsAction.objects.using('analytics').filter(
+                id__gt=after_action_id, id__lte=last_action_id, date_as_integer__gte=date_as_integer)
+            analytics_updated_count += augment_analytics_action_election_ids_from_ballot_items(action_query)
+            analytics_updated_count += analytics_manager.update_missing_election_ids_for_action_id_range(
+                after_action_id, last_action_id, date_as_integer)
+        except Exception as e:
+            success = False
+            status += "AUGMENT_ELECTION_IDS-UPDATE_FAILED_AFTER_ACTION_ID " + str(after_action_id) + " "
+            handle_exception(e, logger=logger, exception_message=status)
+            break
+        after_action_id = last_action_id
+        we_vote_settings_manager.save_setting(ELECTION_ID_BACKFILL_LAST_ACTION_ID, after_action_id)
 
-    # Loop through each voter that has at least one empty google_civic_election_id entry
-    analytics_updated_count = 0
-    for voter_we_vote_id in simple_voter_list:
-        results = augment_one_voter_analytics_action_entries_without_election_id(voter_we_vote_id)
-        analytics_updated_count += results['analytics_updated_count']
+    # 2017-09-21 As of now, we are not going to guess the election if there wasn't any election-related activity.
 
-    # TODO Outside of this function, call it recursively as long as we break out due to too much time passing
-    #  between entries
     results = {
         'success':                  success,
         'status':                   status,
@@ -69,110 +136,21 @@ def augment_voter_analytics_action_entries_without_election_id(date_as_integer):
     return results
 
 
-def augment_one_voter_analytics_action_entries_without_election_id(voter_we_vote_id, starting_analytics_action_id=0):
+def augment_one_voter_analytics_action_entries_without_election_id(voter_we_vote_id):
     success = True
     status = ""
-    voter_history_list = []
     analytics_updated_count = 0
+
     try:
-        voter_history_query = AnalyticsAction.objects.using('analytics').all()
-        voter_history_query = voter_history_query.filter(voter_we_vote_id__iexact=voter_we_vote_id)
-        if positive_value_exists(starting_analytics_action_id):
-            voter_history_query = voter_history_query.filter(id__gte=starting_analytics_action_id)
-        voter_history_query = voter_history_query.order_by("id")  # order by oldest first
-        voter_history_list = list(voter_history_query)
+        action_query = AnalyticsAction.objects.using('analytics').filter(voter_we_vote_id__iexact=voter_we_vote_id)
+        analytics_updated_count += augment_analytics_action_election_ids_from_ballot_items(action_query)
+        analytics_manager = AnalyticsManager()
+        analytics_updated_count += analytics_manager.update_missing_election_ids(
+            "UPPER(voter_we_vote_id) = UPPER(%s)", [voter_we_vote_id])
     except Exception as e:
-        pass
-
-    # First loop through and assign election for candidates and measures associated with specific election
-    candidate_campaign_manager = CandidateCampaignManager()
-    contest_measure_manager = ContestMeasureManager()
-    for analytics_action in voter_history_list:
-        if positive_value_exists(analytics_action.ballot_item_we_vote_id) \
-                and not positive_value_exists(analytics_action.google_civic_election_id):
-            if "cand" in analytics_action.ballot_item_we_vote_id:
-                # If we are looking at a candidate without a google_civic_election_id
-                results = candidate_campaign_manager.retrieve_candidate_campaign_from_we_vote_id(
-                    analytics_action.ballot_item_we_vote_id)
-                if results['candidate_campaign_found']:
-                    candidate_campaign = results['candidate_campaign']
-                    try:
-                        analytics_action.google_civic_election_id = candidate_campaign.google_civic_election_id
-                        analytics_action.save()
-                        analytics_updated_count += 1
-                    except Exception as e:
-                        pass
-            elif "meas" in analytics_action.ballot_item_we_vote_id:
-                # If we are looking at a measure without a google_civic_election_id
-                results = contest_measure_manager.retrieve_contest_measure_from_we_vote_id(
-                    analytics_action.ballot_item_we_vote_id)
-                if results['contest_measure_found']:
-                    contest_measure = results['contest_measure']
-                    try:
-                        analytics_action.google_civic_election_id = contest_measure.google_civic_election_id
-                        analytics_action.save()
-                        analytics_updated_count += 1
-                    except Exception as e:
-                        pass
-
-    # Now "fill-in-the-gaps"
-    leading_edge_google_civic_election_id = 0  # The very first google_civic_election_id found
-    latest_google_civic_election_id = 0  # As we go from oldest-to-newest, update this to the next id found
-    analytics_action_list_before_first_election = []
-    datetime_of_last_analytics_action_entry = None
-    one_week = timedelta(days=7)
-    for analytics_action in voter_history_list:
-        if positive_value_exists(analytics_action.google_civic_election_id):
-            # If the next-newest analytics_action entry has a google_civic_election_id,
-            #  reset the latest_google_civic_election_id
-            latest_google_civic_election_id = analytics_action.google_civic_election_id
-            if not positive_value_exists(leading_edge_google_civic_election_id):
-                # Only set this once
-                leading_edge_google_civic_election_id = analytics_action.google_civic_election_id
-        else:
-            if positive_value_exists(latest_google_civic_election_id):
-                # If within 1 week of last analytics_action entry, set the google_civic_election_id
-                # to the leading_edge_google_civic_election_id
-                is_within_one_week = False
-                if datetime_of_last_analytics_action_entry:
-                    time_passed_since_last_entry = \
-                        analytics_action.exact_time - datetime_of_last_analytics_action_entry
-                    if time_passed_since_last_entry < one_week:
-                        is_within_one_week = True
-
-                if is_within_one_week:
-                    try:
-                        analytics_action.google_civic_election_id = latest_google_civic_election_id
-                        analytics_action.save()
-                        analytics_updated_count += 1
-                    except Exception as e:
-                        pass
-                else:
-                    # Recursively start up the process starting from this entry, and then break out of this loop
-                    new_starting_analytics_action_id = analytics_action.id
-                    results = augment_one_voter_analytics_action_entries_without_election_id(
-                        voter_we_vote_id, new_starting_analytics_action_id)
-                    analytics_updated_count += results['analytics_updated_count']
-                    break
-            else:
-                # If here, we have not set the leading_edge_google_civic_election_id yet
-                #  so we want to save these entries into a "precursor" list
-                analytics_action_list_before_first_election.append(analytics_action)
-
-        datetime_of_last_analytics_action_entry = analytics_action.exact_time
-
-    if positive_value_exists(leading_edge_google_civic_election_id):
-        for analytics_action in analytics_action_list_before_first_election:
-            # Loop through these and set to leading_edge_google_civic_election_id
-            if not positive_value_exists(analytics_action.google_civic_election_id):  # Make sure it is empty
-                try:
-                    analytics_action.google_civic_election_id = leading_edge_google_civic_election_id
-                    analytics_action.save()
-                    analytics_updated_count += 1
-                except Exception as e:
-                    pass
-
-    # 2017-09-21 As of now, we are not going to guess the election if there wasn't any election-related activity.
+        success = False
+        status += "AUGMENT_ELECTION_IDS-UPDATE_FAILED_FOR_VOTER "
+        handle_exception(e, logger=logger, exception_message=status)
 
     results = {
         'success': success,
@@ -364,28 +342,167 @@ def calculate_organization_election_metrics(google_civic_election_id, organizati
     return results
 
 
+def build_analytics_daily_rollups():
+    """
+    Roll up every day since the last day we finished, one pass over each day's AnalyticsAction entries. The running
+    totals start from the latest rollup before the first day we build, instead of counting the whole history again,
+    and who is new on each day comes from AnalyticsDailyRollupFirstSeen.
+    Missing election ids are filled in first, and the days that changes are built again.
+    :return:
+    """
+    status = ""
+    success = True
+    date_as_integer_built_list = []
+    analytics_manager = AnalyticsManager()
+    today_as_integer = convert_to_int(localtime(now()).strftime("%Y%m%d"))
+
+    # Only looks at entries added since the last run
+    augment_results = augment_voter_analytics_action_entries_without_election_id(0)
+    status += augment_results['status']
+
+    date_as_integer_list = []
+    ids_total_by_rollup_key = {}
+    try:
+        first_date_as_integer = analytics_manager.retrieve_first_date_without_complete_analytics_daily_rollup()
+        if first_date_as_integer == today_as_integer:
+            # Only today is left. Don't build it again if we just did.
+            recently_built_query = AnalyticsDailyRollup.objects.using('analytics').filter(
+                date_as_integer=today_as_integer, kind_of_rollup=ROLLUP_VISITORS,
+                date_last_updated__gte=now() - timedelta(minutes=ANALYTICS_DAILY_ROLLUP_REFRESH_MINUTES))
+            if recently_built_query.exists():
+                first_date_as_integer = 0
+        if positive_value_exists(first_date_as_integer):
+            date_results = analytics_manager.retrieve_list_of_dates_with_actions(first_date_as_integer)
+            date_as_integer_list = sorted(date_results['date_as_integer_list'])
+            ids_total_by_rollup_key = \
+                analytics_manager.retrieve_analytics_daily_rollup_ids_total_before(first_date_as_integer)
+    except Exception as e:
+        success = False
+        status += "ANALYTICS_DAILY_ROLLUPS-COULD_NOT_RETRIEVE_DAYS "
+        handle_exception(e, logger=logger, exception_message=status)
+
+    # Days are built oldest first, and we stop at the first problem, so the running totals never skip a day
+    for one_date_as_integer in date_as_integer_list:
+        try:
+            id_sets_by_rollup_key = calculate_analytics_daily_rollup_id_sets(one_date_as_integer)
+            ids_seen_by_rollup_key = analytics_manager.retrieve_analytics_daily_rollup_ids_seen_before(
+                one_date_as_integer, set().union(*id_sets_by_rollup_key.values()))
+        except Exception as e:
+            success = False
+            status += "ANALYTICS_DAILY_ROLLUPS-COULD_NOT_CALCULATE_DAY " + str(one_date_as_integer) + " "
+            handle_exception(e, logger=logger, exception_message=status)
+            break
+
+        analytics_daily_rollup_list = []
+        first_seen_list = []
+        for rollup_key, id_set in id_sets_by_rollup_key.items():
+            kind_of_rollup, organization_we_vote_id, google_civic_election_id = rollup_key
+            new_id_set = id_set - ids_seen_by_rollup_key.get(rollup_key, set())
+            ids_total = ids_total_by_rollup_key.get(rollup_key, 0) + len(new_id_set)
+            ids_total_by_rollup_key[rollup_key] = ids_total
+            analytics_daily_rollup_list.append(AnalyticsDailyRollup(
+                date_as_integer=one_date_as_integer,
+                kind_of_rollup=kind_of_rollup,
+                organization_we_vote_id=organization_we_vote_id,
+                google_civic_election_id=google_civic_election_id,
+                sorted_id_list="\n".join(sorted(id_set)),
+                ids_today=len(id_set),
+                new_ids_today=len(new_id_set),
+                ids_total=ids_total,
+                day_was_complete=one_date_as_integer < today_as_integer,
+            ))
+            for we_vote_id in new_id_set:
+                first_seen_list.append(AnalyticsDailyRollupFirstSeen(
+                    kind_of_rollup=kind_of_rollup,
+                    organization_we_vote_id=organization_we_vote_id,
+                    google_civic_election_id=google_civic_election_id,
+                    we_vote_id=we_vote_id,
+                    first_seen_date_as_integer=one_date_as_integer,
+                ))
+        save_results = analytics_manager.save_analytics_daily_rollups(
+            one_date_as_integer, analytics_daily_rollup_list, first_seen_list)
+        if not save_results['success']:
+            success = False
+            status += save_results['status']
+            break
+        date_as_integer_built_list.append(one_date_as_integer)
+
+    results = {
+        'success':                      success,
+        'status':                       status,
+        'date_as_integer_built_list':   date_as_integer_built_list,
+    }
+    return results
+
+
+def calculate_analytics_daily_rollup_id_sets(date_as_integer):
+    """
+    One pass over one day's AnalyticsAction entries, collecting who was seen for every kind of rollup
+    :param date_as_integer:
+    :return: A set of we_vote_ids for each (kind_of_rollup, organization_we_vote_id, google_civic_election_id)
+    """
+    id_sets_by_rollup_key = {}
+    for kind_of_rollup in SITEWIDE_ROLLUP_KINDS:
+        id_sets_by_rollup_key[(kind_of_rollup, "", 0)] = set()
+
+    action_query = AnalyticsAction.objects.using('analytics').filter(date_as_integer=date_as_integer)
+    action_query = action_query.values_list('voter_we_vote_id', 'is_signed_in', 'action_constant',
+                                            'organization_we_vote_id', 'google_civic_election_id').distinct()
+    for voter_we_vote_id, is_signed_in, action_constant, organization_we_vote_id, google_civic_election_id in \
+            action_query.iterator():
+        google_civic_election_id = convert_to_int(google_civic_election_id)
+        is_voter_guide_visit = action_constant == ACTION_VOTER_GUIDE_VISIT \
+            and positive_value_exists(organization_we_vote_id)
+        if is_voter_guide_visit:
+            id_sets_by_rollup_key[(ROLLUP_VOTER_GUIDES_VIEWED, "", 0)].add(organization_we_vote_id)
+            if positive_value_exists(google_civic_election_id):
+                id_sets_by_rollup_key.setdefault(
+                    (ROLLUP_ELECTION_VOTER_GUIDES_VIEWED, "", google_civic_election_id), set()).add(
+                    organization_we_vote_id)
+        if not positive_value_exists(voter_we_vote_id):
+            continue
+
+        id_sets_by_rollup_key[(ROLLUP_VISITORS, "", 0)].add(voter_we_vote_id)
+        if is_signed_in:
+            id_sets_by_rollup_key[(ROLLUP_AUTHENTICATED_VISITORS, "", 0)].add(voter_we_vote_id)
+        if action_constant == ACTION_BALLOT_VISIT:
+            id_sets_by_rollup_key[(ROLLUP_BALLOT_VIEWERS, "", 0)].add(voter_we_vote_id)
+        if positive_value_exists(google_civic_election_id):
+            id_sets_by_rollup_key.setdefault(
+                (ROLLUP_ELECTION_VISITORS, "", google_civic_election_id), set()).add(voter_we_vote_id)
+        if is_voter_guide_visit:
+            id_sets_by_rollup_key.setdefault(
+                (ROLLUP_ORGANIZATION_VISITORS, organization_we_vote_id, 0), set()).add(voter_we_vote_id)
+            if is_signed_in:
+                id_sets_by_rollup_key.setdefault(
+                    (ROLLUP_ORGANIZATION_AUTHENTICATED_VISITORS, organization_we_vote_id, 0), set()).add(
+                    voter_we_vote_id)
+    return id_sets_by_rollup_key
+
+
 def calculate_organization_daily_metrics(organization_we_vote_id, limit_to_one_date_as_integer):
     status = ""
     success = False
-    google_civic_election_id_zero = 0
-    limit_to_authenticated = True
 
-    analytics_count_manager = AnalyticsCountManager()
+    analytics_manager = AnalyticsManager()
     follow_count_manager = FollowMetricsManager()
     position_metrics_manager = PositionMetricsManager()
     follow_organization_list = FollowOrganizationList()
 
-    date_as_integer = convert_to_int(date)
-    visitors_total = analytics_count_manager.fetch_visitors(google_civic_election_id_zero, organization_we_vote_id)
-    authenticated_visitors_total = analytics_count_manager.fetch_visitors(
-        google_civic_election_id_zero, organization_we_vote_id, 0, 0, limit_to_authenticated)
+    date_as_integer = convert_to_int(limit_to_one_date_as_integer)
+    visitors = analytics_manager.retrieve_analytics_daily_rollup_counts(
+        date_as_integer, ROLLUP_ORGANIZATION_VISITORS, organization_we_vote_id)
+    status += visitors['status']
+    authenticated_visitors = analytics_manager.retrieve_analytics_daily_rollup_counts(
+        date_as_integer, ROLLUP_ORGANIZATION_AUTHENTICATED_VISITORS, organization_we_vote_id)
+    status += authenticated_visitors['status']
 
-    visitors_today = analytics_count_manager.fetch_visitors(
-        google_civic_election_id_zero, organization_we_vote_id, limit_to_one_date_as_integer)
-    authenticated_visitors_today = analytics_count_manager.fetch_visitors(
-        google_civic_election_id_zero, organization_we_vote_id, limit_to_one_date_as_integer, 0, limit_to_authenticated)
+    visitors_total = visitors['ids_total']
+    visitors_today = visitors['ids_today']
+    authenticated_visitors_total = authenticated_visitors['ids_total']
+    authenticated_visitors_today = authenticated_visitors['ids_today']
 
-    new_visitors_today = None
+    new_visitors_today = visitors['new_ids_today']
     voter_guide_entrants_today = None
     entrants_visiting_ballot = None
     followers_visiting_ballot = None
@@ -428,38 +545,31 @@ def calculate_sitewide_daily_metrics(limit_to_one_date_as_integer):
     status = ""
     success = False
 
-    analytics_count_manager = AnalyticsCountManager()
+    analytics_manager = AnalyticsManager()
     follow_metrics_manager = FollowMetricsManager()
 
-    google_civic_election_id_zero = 0
-    organization_we_vote_id_empty = ""
     voter_we_vote_id_empty = ""
-    limit_to_authenticated = True
     date_as_integer_zero = 0
     limit_to_one_date_as_integer = convert_to_int(limit_to_one_date_as_integer)
     count_through_this_date_as_integer = limit_to_one_date_as_integer
 
-    visitors_total = analytics_count_manager.fetch_visitors(
-        google_civic_election_id_zero, organization_we_vote_id_empty, date_as_integer_zero,
-        count_through_this_date_as_integer)
-    visitors_today = analytics_count_manager.fetch_visitors(
-        google_civic_election_id_zero, organization_we_vote_id_empty, limit_to_one_date_as_integer)
-    new_visitors_today = None
+    rollup_counts = {}
+    for kind_of_rollup in SITEWIDE_ROLLUP_KINDS:
+        rollup_counts[kind_of_rollup] = analytics_manager.retrieve_analytics_daily_rollup_counts(
+            limit_to_one_date_as_integer, kind_of_rollup)
+        status += rollup_counts[kind_of_rollup]['status']
+
+    visitors_total = rollup_counts[ROLLUP_VISITORS]['ids_total']
+    visitors_today = rollup_counts[ROLLUP_VISITORS]['ids_today']
+    new_visitors_today = rollup_counts[ROLLUP_VISITORS]['new_ids_today']
     voter_guide_entrants_today = None
     welcome_page_entrants_today = None
     friend_entrants_today = None
-    authenticated_visitors_total = analytics_count_manager.fetch_visitors(
-        google_civic_election_id_zero, organization_we_vote_id_empty,
-        date_as_integer_zero, count_through_this_date_as_integer, limit_to_authenticated)
-    authenticated_visitors_today = analytics_count_manager.fetch_visitors(
-        google_civic_election_id_zero, organization_we_vote_id_empty,
-        limit_to_one_date_as_integer, date_as_integer_zero, limit_to_authenticated)
-    ballot_views_today = analytics_count_manager.fetch_ballot_views(
-        google_civic_election_id_zero, limit_to_one_date_as_integer)
-    voter_guides_viewed_total = analytics_count_manager.fetch_voter_guides_viewed(
-        google_civic_election_id_zero, date_as_integer_zero, count_through_this_date_as_integer)
-    voter_guides_viewed_today = analytics_count_manager.fetch_voter_guides_viewed(
-        google_civic_election_id_zero, limit_to_one_date_as_integer)
+    authenticated_visitors_total = rollup_counts[ROLLUP_AUTHENTICATED_VISITORS]['ids_total']
+    authenticated_visitors_today = rollup_counts[ROLLUP_AUTHENTICATED_VISITORS]['ids_today']
+    ballot_views_today = rollup_counts[ROLLUP_BALLOT_VIEWERS]['ids_today']
+    voter_guides_viewed_total = rollup_counts[ROLLUP_VOTER_GUIDES_VIEWED]['ids_total']
+    voter_guides_viewed_today = rollup_counts[ROLLUP_VOTER_GUIDES_VIEWED]['ids_today']
 
     issues_followed_total = follow_metrics_manager.fetch_issues_followed(
         voter_we_vote_id_empty, date_as_integer_zero, count_through_this_date_as_integer)
@@ -530,15 +640,23 @@ def calculate_sitewide_election_metrics(google_civic_election_id):
     success = False
 
     analytics_count_manager = AnalyticsCountManager()
+    analytics_manager = AnalyticsManager()
     follow_metrics_manager = FollowMetricsManager()
     position_metrics_manager = PositionMetricsManager()
     voter_metrics_manager = VoterMetricsManager()
 
     google_civic_election_id = convert_to_int(google_civic_election_id)
-    visitors_total = analytics_count_manager.fetch_visitors(google_civic_election_id)
+    latest_date_as_integer = 0
+    visitors = analytics_manager.retrieve_analytics_daily_rollup_counts(
+        latest_date_as_integer, ROLLUP_ELECTION_VISITORS, "", google_civic_election_id)
+    status += visitors['status']
+    voter_guides = analytics_manager.retrieve_analytics_daily_rollup_counts(
+        latest_date_as_integer, ROLLUP_ELECTION_VOTER_GUIDES_VIEWED, "", google_civic_election_id)
+    status += voter_guides['status']
+    visitors_total = visitors['ids_total']
     voter_guide_entries = None
     voter_guide_views = None
-    voter_guides_viewed = analytics_count_manager.fetch_voter_guides_viewed(google_civic_election_id)
+    voter_guides_viewed = voter_guides['ids_total']
     issues_followed = None
     unique_voters_that_followed_organizations = analytics_count_manager.fetch_new_followers_in_election(
         google_civic_election_id)
@@ -730,6 +848,9 @@ def save_organization_daily_metrics(organization_we_vote_id, date):
     status = ""
     success = False
 
+    rollup_results = build_analytics_daily_rollups()
+    status += rollup_results['status']
+
     results = calculate_organization_daily_metrics(organization_we_vote_id, date)
     status += results['status']
     if results['success']:
@@ -772,15 +893,37 @@ def save_organization_election_metrics(google_civic_election_id, organization_we
 
 
 def save_sitewide_daily_metrics(date_as_integer, date_as_integer_end=0):
+    """
+    Save SitewideDailyMetrics for the days we just rolled up, and for any day in this range without metrics yet.
+    Days whose metrics are already saved from complete rollups are not touched again.
+    :param date_as_integer:
+    :param date_as_integer_end:
+    :return:
+    """
     status = ""
     success = False
     date_as_integer_list = []
 
-    analytics_manager = AnalyticsManager()
-    date_as_integer_results = \
-        analytics_manager.retrieve_list_of_dates_with_actions(date_as_integer, date_as_integer_end)
-    if positive_value_exists(date_as_integer_results['date_as_integer_list_found']):
-        date_as_integer_list = date_as_integer_results['date_as_integer_list']
+    rollup_results = build_analytics_daily_rollups()
+    status += rollup_results['status']
+    date_as_integer_built_list = rollup_results['date_as_integer_built_list']
+    try:
+        rolled_up_date_query = AnalyticsDailyRollup.objects.using('analytics').filter(
+            kind_of_rollup=ROLLUP_VISITORS, date_as_integer__gte=date_as_integer)
+        saved_date_query = SitewideDailyMetrics.objects.using('analytics').filter(
+            date_as_integer__gte=date_as_integer)
+        if positive_value_exists(date_as_integer_end):
+            rolled_up_date_query = rolled_up_date_query.filter(date_as_integer__lte=date_as_integer_end)
+            saved_date_query = saved_date_query.filter(date_as_integer__lte=date_as_integer_end)
+        saved_date_as_integer_list = set(saved_date_query.values_list('date_as_integer', flat=True))
+        for one_date_as_integer in rolled_up_date_query.order_by('date_as_integer').values_list(
+                'date_as_integer', flat=True):
+            if one_date_as_integer in date_as_integer_built_list \
+                    or one_date_as_integer not in saved_date_as_integer_list:
+                date_as_integer_list.append(one_date_as_integer)
+    except Exception as e:
+        status += "SITEWIDE_DAILY_METRICS-COULD_NOT_RETRIEVE_DAYS "
+        handle_exception(e, logger=logger, exception_message=status)
 
     sitewide_daily_metrics_saved_count = 0
     for one_date_as_integer in date_as_integer_list:
@@ -808,6 +951,9 @@ def save_sitewide_election_metrics(google_civic_election_id):
     status = ""
     success = False
 
+    rollup_results = build_analytics_daily_rollups()
+    status += rollup_results['status']
+
     results = calculate_sitewide_election_metrics(google_civic_election_id)
     status += results['status']
     if results['success']:
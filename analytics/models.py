@@ -2,12 +2,19 @@
 # Brought to you by We Vote. Be good.
 # -*- coding: UTF-8 -*-
 
-from django.db import models
-from django.db.models import Q
+import atexit
+from collections import OrderedDict
+from django.db import connections, models, transaction
+from django.db.models import Max, Min, Q
 from django.utils.timezone import localtime, now
 from election.models import Election
+from exception.models import handle_exception
 from follow.models import FollowOrganizationList
 from organization.models import Organization
+import os
+import queue
+import threading
+import time
 import wevote_functions.admin
 from wevote_functions.functions import convert_to_int, positive_value_exists
 
@@ -160,6 +167,275 @@ class AnalyticsAction(models.Model):
         return organization
 
 
+# How many actions can wait to be written before save_action starts pushing back on the requests saving them
+ANALYTICS_ACTION_QUEUE_MAXIMUM_SIZE = 20000
+# How long a request will wait for room in a full queue before we drop its action
+ANALYTICS_ACTION_QUEUE_PUT_TIMEOUT_SECONDS = 0.05
+# We write a batch when we have this many actions waiting, or when the oldest has waited this long
+ANALYTICS_ACTION_WRITE_BATCH_SIZE = 500
+ANALYTICS_ACTION_WRITE_SECONDS = 2.0
+# How many (voter, day) pairs the writer remembers having seen, so it can mark first_visit_today as actions arrive
+ANALYTICS_RECENT_VISITOR_CACHE_SIZE = 50000
+
+
+class AnalyticsActionWriteBehindQueue(object):
+    """
+    AnalyticsAction entries are saved on every page view, so instead of inserting each one during the request, we
+    queue them in memory and a background thread writes them to the analytics database with bulk_create. A request
+    never waits on the analytics database: when the queue is full, it waits a moment for room, and then drops the
+    action. Whatever is still queued is written when the process exits.
+    Before writing a batch, we mark each voter's first action of the day with first_visit_today, so we don't need to
+    run update_first_visit_today_for_all_voters_since_date for new actions. Another process can mark the same voter on
+    the same day, so after writing we settle those voter-days in the database with update_first_visit_today.
+    """
+    def __init__(self, maximum_size=ANALYTICS_ACTION_QUEUE_MAXIMUM_SIZE, batch_size=ANALYTICS_ACTION_WRITE_BATCH_SIZE,
+                 write_seconds=ANALYTICS_ACTION_WRITE_SECONDS,
+                 put_timeout_seconds=ANALYTICS_ACTION_QUEUE_PUT_TIMEOUT_SECONDS):
+        self.maximum_size = maximum_size
+        self.batch_size = batch_size
+        self.write_seconds = write_seconds
+        self.put_timeout_seconds = put_timeout_seconds
+        self.lock = threading.Lock()
+        self.action_queue = queue.Queue(maxsize=maximum_size)
+        self.stopping = threading.Event()
+        self.writer_thread = None
+        self.writer_process_id = None
+        # (voter_we_vote_id, date_as_integer) pairs we know already have an action, most recently seen last
+        self.recent_visitor_lock = threading.Lock()
+        self.recent_visitors = OrderedDict()
+        self.counters = {
+            'actions_queued':           0,
+            'actions_written':          0,
+            'actions_backpressured':    0,  # Had to wait for room in the queue
+            'actions_dropped':          0,  # Still no room after waiting
+            'actions_not_written':      0,  # The analytics database refused the batch
+            'batches_written':          0,
+        }
+        atexit.register(self.stop)
+
+    def count(self, counter_name, number=1):
+        with self.lock:
+            self.counters[counter_name] += number
+
+    def fetch_counters(self):
+        with self.lock:
+            counters = dict(self.counters)
+        counters['actions_waiting'] = self.action_queue.qsize()
+        return counters
+
+    def start_writer_if_needed(self):
+        # Servers that fork workers after importing our code don't inherit the writer thread, so each process
+        #  starts its own
+        if self.writer_process_id == os.getpid() and self.writer_thread.is_alive():
+            return
+        with self.lock:
+            if self.writer_process_id == os.getpid() and self.writer_thread.is_alive():
+                return
+            if self.writer_process_id != os.getpid():
+                # Actions queued in the parent process before the fork belong to the parent
+                self.action_queue = queue.Queue(maxsize=self.maximum_size)
+            self.stopping.clear()
+            self.writer_thread = threading.Thread(target=self.write_actions_until_stopped,
+                                                  name='analytics_action_writer')
+            self.writer_thread.daemon = True
+            self.writer_process_id = os.getpid()
+            self.writer_thread.start()
+
+    def put(self, action):
+        """
+        Queue one unsaved AnalyticsAction to be written
+        :param action:
+        :return: False if the queue was full and we dropped the action
+        """
+        self.start_writer_if_needed()
+        try:
+            self.action_queue.put_nowait(action)
+        except queue.Full:
+            self.count('actions_backpressured')
+            try:
+                self.action_queue.put(action, timeout=self.put_timeout_seconds)
+            except queue.Full:
+                self.count('actions_dropped')
+                return False
+        self.count('actions_queued')
+        return True
+
+    def take_batch(self, wait_seconds):
+        action_list = []
+        give_up_time = time.time() + wait_seconds
+        while len(action_list) < self.batch_size:
+            try:
+                if self.stopping.is_set():
+                    action_list.append(self.action_queue.get_nowait())
+                else:
+                    action_list.append(self.action_queue.get(timeout=max(0, give_up_time - time.time())))
+            except queue.Empty:
+                break
+        return action_list
+
+    def mark_first_visits_today(self, action_list):
+        """
+        Set first_visit_today on the first action of the day for each voter. Voters we haven't seen recently are
+        looked up in the analytics database with one query for the whole batch.
+        :param action_list:
+        :return:
+        """
+        action_list = [action for action in action_list if positive_value_exists(action.voter_we_vote_id)]
+        with self.recent_visitor_lock:
+            unknown_visitor_list = set((action.voter_we_vote_id, action.date_as_integer) for action in action_list
+                                       if (action.voter_we_vote_id, action.date_as_integer) not in self.recent_visitors)
+            if len(unknown_visitor_list):
+                visitor_query = AnalyticsAction.objects.using('analytics').filter(
+                    voter_we_vote_id__in=set(voter_we_vote_id for voter_we_vote_id, day in unknown_visitor_list),
+                    date_as_integer__in=set(day for voter_we_vote_id, day in unknown_visitor_list))
+                for visitor in visitor_query.values_list('voter_we_vote_id', 'date_as_integer').distinct():
+                    if visitor in unknown_visitor_list:
+                        self.recent_visitors[visitor] = True
+
+            for action in action_list:
+                visitor = (action.voter_we_vote_id, action.date_as_integer)
+                if visitor in self.recent_visitors:
+                    self.recent_visitors.move_to_end(visitor)
+                else:
+                    action.first_visit_today = True
+                    self.recent_visitors[visitor] = True
+            while len(self.recent_visitors) > ANALYTICS_RECENT_VISITOR_CACHE_SIZE:
+                self.recent_visitors.popitem(last=False)
+
+    def write_batch(self, action_list):
+        try:
+            self.mark_first_visits_today(action_list)
+            AnalyticsAction.objects.using('analytics').bulk_create(action_list)
+            self.count('actions_written', len(action_list))
+            self.count('batches_written')
+        except Exception as e:
+            self.count('actions_not_written', len(action_list))
+            handle_exception(e, logger=logger, exception_message="ANALYTICS_ACTION_BATCH_NOT_WRITTEN ")
+            # Start over with a fresh connection, in case this one is broken
+            connections['analytics'].close()
+            return
+
+        marked_visitor_list = set((action.voter_we_vote_id, action.date_as_integer) for action in action_list
+                                  if action.first_visit_today)
+        if len(marked_visitor_list):
+            # If another process wrote an action for one of these voters today, only the earliest stays marked
+            try:
+                AnalyticsManager().update_first_visit_today(
+                    "voter_we_vote_id = ANY(%s) AND date_as_integer = ANY(%s)",
+                    [list(set(voter_we_vote_id for voter_we_vote_id, day in marked_visitor_list)),
+                     list(set(day for voter_we_vote_id, day in marked_visitor_list))])
+            except Exception as e:
+                handle_exception(e, logger=logger, exception_message="ANALYTICS_ACTION_FIRST_VISITS_NOT_SETTLED ")
+                connections['analytics'].close()
+
+    def flush(self):
+        """
+        Write everything that is queued right now, on this thread
+        :return:
+        """
+        while True:
+            action_list = self.take_batch(wait_seconds=0)
+            if not len(action_list):
+                return
+            self.write_batch(action_list)
+
+    def write_actions_until_stopped(self):
+        try:
+            while not self.stopping.is_set():
+                action_list = self.take_batch(wait_seconds=self.write_seconds)
+                if len(action_list):
+                    self.write_batch(action_list)
+            self.flush()
+        finally:
+            connections['analytics'].close()
+
+    def stop(self, timeout_seconds=10):
+        """
+        Write what is left in the queue, and stop the writer thread. Called when the process exits.
+        :param timeout_seconds:
+        :return:
+        """
+        self.stopping.set()
+        if self.writer_thread is not None and self.writer_process_id == os.getpid():
+            self.writer_thread.join(timeout_seconds)
+
+
+analytics_action_queue = AnalyticsActionWriteBehindQueue()
+
+
+# Each AnalyticsDailyRollup holds the distinct voters (or voter guides) seen on one day for one of these
+ROLLUP_VISITORS = 'VISITORS'
+ROLLUP_AUTHENTICATED_VISITORS = 'AUTHENTICATED_VISITORS'
+ROLLUP_BALLOT_VIEWERS = 'BALLOT_VIEWERS'
+ROLLUP_VOTER_GUIDES_VIEWED = 'VOTER_GUIDES_VIEWED'
+ROLLUP_ORGANIZATION_VISITORS = 'ORGANIZATION_VISITORS'
+ROLLUP_ORGANIZATION_AUTHENTICATED_VISITORS = 'ORGANIZATION_AUTHENTICATED_VISITORS'
+ROLLUP_ELECTION_VISITORS = 'ELECTION_VISITORS'
+ROLLUP_ELECTION_VOTER_GUIDES_VIEWED = 'ELECTION_VOTER_GUIDES_VIEWED'
+KIND_OF_ROLLUP_CHOICES = (
+    (ROLLUP_VISITORS,                               'Visitors'),
+    (ROLLUP_AUTHENTICATED_VISITORS,                 'Signed in visitors'),
+    (ROLLUP_BALLOT_VIEWERS,                         'Voters who viewed a ballot'),
+    (ROLLUP_VOTER_GUIDES_VIEWED,                    'Voter guides viewed'),
+    (ROLLUP_ORGANIZATION_VISITORS,                  'Visitors to one voter guide'),
+    (ROLLUP_ORGANIZATION_AUTHENTICATED_VISITORS,    'Signed in visitors to one voter guide'),
+    (ROLLUP_ELECTION_VISITORS,                      'Visitors in one election'),
+    (ROLLUP_ELECTION_VOTER_GUIDES_VIEWED,           'Voter guides viewed in one election'),
+)
+# These are saved every day, even when empty, so there is always a row to read the running total from
+SITEWIDE_ROLLUP_KINDS = (ROLLUP_VISITORS, ROLLUP_AUTHENTICATED_VISITORS, ROLLUP_BALLOT_VIEWERS,
+                         ROLLUP_VOTER_GUIDES_VIEWED)
+# How many ids we look up, or save, in one AnalyticsDailyRollupFirstSeen query
+ANALYTICS_DAILY_ROLLUP_FIRST_SEEN_CHUNK_SIZE = 5000
+
+
+class AnalyticsDailyRollup(models.Model):
+    """
+    The distinct voter_we_vote_ids (or organization_we_vote_ids, for voter guides viewed) seen on one day, for the
+    whole site, one organization or one election. Built once per day from AnalyticsAction, so the metrics can count
+    "today" and "through this day" without scanning the whole AnalyticsAction history again. Who is new on a day comes
+    from AnalyticsDailyRollupFirstSeen, and the running total from the latest row before the day for each key.
+    """
+    date_as_integer = models.PositiveIntegerField(verbose_name="YYYYMMDD of the actions", null=True, db_index=True)
+    kind_of_rollup = models.CharField(max_length=50, choices=KIND_OF_ROLLUP_CHOICES, default=ROLLUP_VISITORS)
+    organization_we_vote_id = models.CharField(max_length=255, default="", blank=True)
+    google_civic_election_id = models.PositiveIntegerField(default=0)
+
+    # Sorted, one we_vote_id per line
+    sorted_id_list = models.TextField(default="", blank=True)
+    ids_today = models.PositiveIntegerField(default=0)
+    # Seen today for the first time
+    new_ids_today = models.PositiveIntegerField(default=0)
+    # Seen on this day or any day before
+    ids_total = models.PositiveIntegerField(default=0)
+
+    # False while the day is still going on, so we build the day again later
+    day_was_complete = models.BooleanField(default=False)
+    date_last_updated = models.DateTimeField(null=True, auto_now=True)
+
+    class Meta:
+        index_together = [('kind_of_rollup', 'organization_we_vote_id', 'google_civic_election_id', 'date_as_integer')]
+
+    def id_set(self):
+        return set(self.sorted_id_list.split("\n")) if self.sorted_id_list else set()
+
+
+class AnalyticsDailyRollupFirstSeen(models.Model):
+    """
+    The first day each we_vote_id was seen for one kind of rollup, for the whole site, one organization or one
+    election. One row per id and key, however many days the id comes back, so telling who is new on a day never needs
+    every id seen before it.
+    """
+    kind_of_rollup = models.CharField(max_length=50, choices=KIND_OF_ROLLUP_CHOICES, default=ROLLUP_VISITORS)
+    organization_we_vote_id = models.CharField(max_length=255, default="", blank=True)
+    google_civic_election_id = models.PositiveIntegerField(default=0)
+    we_vote_id = models.CharField(max_length=255, default="", db_index=True)
+    first_seen_date_as_integer = models.PositiveIntegerField(verbose_name="YYYYMMDD first seen", db_index=True)
+
+    class Meta:
+        index_together = [('kind_of_rollup', 'organization_we_vote_id', 'google_civic_election_id', 'we_vote_id')]
+
+
 class AnalyticsCountManager(models.Model):
 
     def fetch_ballot_views(self, google_civic_election_id=0, limit_to_one_date_as_integer=0):
@@ -511,29 +787,30 @@ class AnalyticsManager(models.Model):
             }
             return results
 
-        try:
-            action = AnalyticsAction.objects.using('analytics').create(
-                action_constant=action_constant,
-                voter_we_vote_id=voter_we_vote_id,
-                voter_id=voter_id,
-                is_signed_in=is_signed_in,
-                state_code=state_code,
-                organization_we_vote_id=organization_we_vote_id,
-                organization_id=organization_id,
-                google_civic_election_id=google_civic_election_id,
-                ballot_item_we_vote_id=ballot_item_we_vote_id,
-                user_agent=user_agent_string,
-                is_bot=is_bot,
-                is_mobile=is_mobile,
-                is_desktop=is_desktop,
-                is_tablet=is_tablet
-            )
-            success = True
-            action_saved = True
-            status += 'ACTION_TYPE1_SAVED '
-        except Exception as e:
+        action = AnalyticsAction(
+            action_constant=action_constant,
+            voter_we_vote_id=voter_we_vote_id,
+            voter_id=voter_id,
+            is_signed_in=is_signed_in,
+            state_code=state_code,
+            organization_we_vote_id=organization_we_vote_id,
+            organization_id=organization_id,
+            google_civic_election_id=google_civic_election_id,
+            ballot_item_we_vote_id=ballot_item_we_vote_id,
+            user_agent=user_agent_string,
+            is_bot=is_bot,
+            is_mobile=is_mobile,
+            is_desktop=is_desktop,
+            is_tablet=is_tablet
+        )
+        # bulk_create doesn't call save(), so we fill in date_as_integer now
+        action.generate_date_as_integer()
+        action_saved = analytics_action_queue.put(action)
+        if action_saved:
+            status += 'ACTION_TYPE1_QUEUED '
+        else:
             success = False
-            status += 'COULD_NOT_SAVE_ACTION_TYPE1 '
+            status += 'COULD_NOT_QUEUE_ACTION_TYPE1-QUEUE_FULL '
 
         results = {
             'success':      success,
@@ -572,27 +849,28 @@ class AnalyticsManager(models.Model):
             }
             return results
 
-        try:
-            action = AnalyticsAction.objects.using('analytics').create(
-                action_constant=action_constant,
-                voter_we_vote_id=voter_we_vote_id,
-                voter_id=voter_id,
-                is_signed_in=is_signed_in,
-                state_code=state_code,
-                google_civic_election_id=google_civic_election_id,
-                ballot_item_we_vote_id=ballot_item_we_vote_id,
-                user_agent=user_agent_string,
-                is_bot=is_bot,
-                is_mobile=is_mobile,
-                is_desktop=is_desktop,
-                is_tablet=is_tablet
-            )
-            success = True
-            action_saved = True
-            status += 'ACTION_TYPE2_SAVED '
-        except Exception as e:
+        action = AnalyticsAction(
+            action_constant=action_constant,
+            voter_we_vote_id=voter_we_vote_id,
+            voter_id=voter_id,
+            is_signed_in=is_signed_in,
+            state_code=state_code,
+            google_civic_election_id=google_civic_election_id,
+            ballot_item_we_vote_id=ballot_item_we_vote_id,
+            user_agent=user_agent_string,
+            is_bot=is_bot,
+            is_mobile=is_mobile,
+            is_desktop=is_desktop,
+            is_tablet=is_tablet
+        )
+        # bulk_create doesn't call save(), so we fill in date_as_integer now
+        action.generate_date_as_integer()
+        action_saved = analytics_action_queue.put(action)
+        if action_saved:
+            status += 'ACTION_TYPE2_QUEUED '
+        else:
             success = False
-            status += 'COULD_NOT_SAVE_ACTION_TYPE2 '
+            status += 'COULD_NOT_QUEUE_ACTION_TYPE2-QUEUE_FULL '
 
         results = {
             'success':      success,
@@ -671,6 +949,120 @@ class AnalyticsManager(models.Model):
         }
         return results
 
+    def retrieve_analytics_daily_rollup_counts(self, date_as_integer, kind_of_rollup, organization_we_vote_id="",
+                                               google_civic_election_id=0):
+        """
+        How many were seen on this day, how many of those for the first time, and how many through this day
+        :param date_as_integer: Use 0 for the latest day we have
+        :param kind_of_rollup:
+        :param organization_we_vote_id:
+        :param google_civic_election_id:
+        :return:
+        """
+        status = ""
+        ids_today = 0
+        new_ids_today = 0
+        ids_total = 0
+        try:
+            rollup_query = AnalyticsDailyRollup.objects.using('analytics').filter(
+                kind_of_rollup=kind_of_rollup,
+                organization_we_vote_id=organization_we_vote_id,
+                google_civic_election_id=google_civic_election_id)
+            if positive_value_exists(date_as_integer):
+                rollup_query = rollup_query.filter(date_as_integer__lte=date_as_integer)
+            # The latest day up to this one has the running total, even if nobody was seen on this day
+            rollup_list = list(rollup_query.order_by('-date_as_integer').values(
+                'date_as_integer', 'ids_today', 'new_ids_today', 'ids_total')[:1])
+            if len(rollup_list):
+                ids_total = rollup_list[0]['ids_total']
+                if rollup_list[0]['date_as_integer'] == date_as_integer or not positive_value_exists(date_as_integer):
+                    ids_today = rollup_list[0]['ids_today']
+                    new_ids_today = rollup_list[0]['new_ids_today']
+            success = True
+        except Exception as e:
+            success = False
+            status += "COULD_NOT_RETRIEVE_ANALYTICS_DAILY_ROLLUP "
+            handle_exception(e, logger=logger, exception_message=status)
+
+        results = {
+            'success':          success,
+            'status':           status,
+            'ids_today':        ids_today,
+            'new_ids_today':    new_ids_today,
+            'ids_total':        ids_total,
+        }
+        return results
+
+    def retrieve_analytics_daily_rollup_ids_total_before(self, date_as_integer):
+        """
+        The running total through the day before this one, read from the latest rollup before it for each key
+        :param date_as_integer:
+        :return: ids_total for each (kind_of_rollup, organization_we_vote_id, google_civic_election_id)
+        """
+        ids_total_by_rollup_key = {}
+        rollup_key_fields = ('kind_of_rollup', 'organization_we_vote_id', 'google_civic_election_id')
+        rollup_query = AnalyticsDailyRollup.objects.using('analytics').filter(date_as_integer__lt=date_as_integer)
+        rollup_query = rollup_query.order_by(*(rollup_key_fields + ('-date_as_integer',)))
+        rollup_query = rollup_query.distinct(*rollup_key_fields)
+        rollup_query = rollup_query.values_list(*(rollup_key_fields + ('ids_total',)))
+        for kind_of_rollup, organization_we_vote_id, google_civic_election_id, ids_total in rollup_query.iterator():
+            ids_total_by_rollup_key[(kind_of_rollup, organization_we_vote_id, google_civic_election_id)] = ids_total
+        return ids_total_by_rollup_key
+
+    def retrieve_analytics_daily_rollup_ids_seen_before(self, date_as_integer, we_vote_id_list):
+        """
+        Which of these ids were already seen before this day, so we can tell who is new on it
+        :param date_as_integer:
+        :param we_vote_id_list: Everyone seen on this day
+        :return: A set of we_vote_ids for each (kind_of_rollup, organization_we_vote_id, google_civic_election_id)
+        """
+        ids_seen_by_rollup_key = {}
+        we_vote_id_list = list(we_vote_id_list)
+        for start_index in range(0, len(we_vote_id_list), ANALYTICS_DAILY_ROLLUP_FIRST_SEEN_CHUNK_SIZE):
+            first_seen_query = AnalyticsDailyRollupFirstSeen.objects.using('analytics').filter(
+                first_seen_date_as_integer__lt=date_as_integer,
+                we_vote_id__in=we_vote_id_list[start_index:start_index + ANALYTICS_DAILY_ROLLUP_FIRST_SEEN_CHUNK_SIZE])
+            first_seen_query = first_seen_query.values_list(
+                'kind_of_rollup', 'organization_we_vote_id', 'google_civic_election_id', 'we_vote_id')
+            for kind_of_rollup, organization_we_vote_id, google_civic_election_id, we_vote_id in \
+                    first_seen_query.iterator():
+                ids_seen_by_rollup_key.setdefault(
+                    (kind_of_rollup, organization_we_vote_id, google_civic_election_id), set()).add(we_vote_id)
+        return ids_seen_by_rollup_key
+
+    def retrieve_first_date_without_complete_analytics_daily_rollup(self):
+        """
+        Days up to the last one we finished rolling up don't change, so we start after it, unless an earlier day was
+        marked incomplete because its actions were rewritten (see mark_analytics_daily_rollups_incomplete). Running
+        totals need every day before, so the very first run starts at the first day with actions.
+        :return: 0 if every day with actions is rolled up
+        """
+        visitors_rollup_query = AnalyticsDailyRollup.objects.using('analytics').filter(kind_of_rollup=ROLLUP_VISITORS)
+        last_complete_date_as_integer = convert_to_int(visitors_rollup_query.filter(day_was_complete=True).aggregate(
+            Max('date_as_integer'))['date_as_integer__max'])
+        first_incomplete_date_as_integer = convert_to_int(visitors_rollup_query.filter(
+            day_was_complete=False, date_as_integer__lt=last_complete_date_as_integer).aggregate(
+            Min('date_as_integer'))['date_as_integer__min'])
+        if positive_value_exists(first_incomplete_date_as_integer):
+            return first_incomplete_date_as_integer
+        action_query = AnalyticsAction.objects.using('analytics').filter(
+            date_as_integer__gt=last_complete_date_as_integer)
+        return convert_to_int(action_query.aggregate(Min('date_as_integer'))['date_as_integer__min'])
+
+    def mark_analytics_daily_rollups_incomplete(self, date_as_integer_list):
+        """
+        The actions on these days were changed after they were rolled up (like by a backfill), so build these days,
+        and the running totals of every day after them, again
+        :param date_as_integer_list:
+        :return: The number of rollups marked
+        """
+        date_as_integer_list = [one_date_as_integer for one_date_as_integer in set(date_as_integer_list)
+                                if positive_value_exists(one_date_as_integer)]
+        if not len(date_as_integer_list):
+            return 0
+        return AnalyticsDailyRollup.objects.using('analytics').filter(
+            date_as_integer__in=date_as_integer_list, day_was_complete=True).update(day_was_complete=False)
+
     def retrieve_list_of_dates_with_actions(self, date_as_integer, date_as_integer_end=0):
         success = False
         status = ""
@@ -780,6 +1172,35 @@ class AnalyticsManager(models.Model):
                                             user_agent_string, is_bot, is_mobile, is_desktop, is_tablet,
                                             ballot_item_we_vote_id, voter_device_id)
 
+    def save_analytics_daily_rollups(self, date_as_integer, analytics_daily_rollup_list, first_seen_list):
+        """
+        Replace all of the rollups for one day, and the ids first seen on that day
+        :param date_as_integer:
+        :param analytics_daily_rollup_list:
+        :param first_seen_list: AnalyticsDailyRollupFirstSeen entries for this day
+        :return:
+        """
+        status = ""
+        try:
+            with transaction.atomic(using='analytics'):
+                AnalyticsDailyRollup.objects.using('analytics').filter(date_as_integer=date_as_integer).delete()
+                AnalyticsDailyRollup.objects.using('analytics').bulk_create(analytics_daily_rollup_list)
+                AnalyticsDailyRollupFirstSeen.objects.using('analytics').filter(
+                    first_seen_date_as_integer=date_as_integer).delete()
+                AnalyticsDailyRollupFirstSeen.objects.using('analytics').bulk_create(
+                    first_seen_list, batch_size=ANALYTICS_DAILY_ROLLUP_FIRST_SEEN_CHUNK_SIZE)
+            success = True
+        except Exception as e:
+            success = False
+            status += "ANALYTICS_DAILY_ROLLUPS_NOT_SAVED "
+            handle_exception(e, logger=logger, exception_message=status)
+
+        results = {
+            'success':  success,
+            'status':   status,
+        }
+        return results
+
     def save_organization_daily_metrics_values(self, organization_daily_metrics_values):
         success = False
         status = ""
@@ -933,66 +1354,61 @@ class AnalyticsManager(models.Model):
         }
         return results
 
+    def update_first_visit_today(self, where_sql, where_params):
+        """
+        Mark the first action of each voter on each day with first_visit_today, and unmark every other action, in one
+        UPDATE. Django can't express ROW_NUMBER() OVER (...), so this is raw SQL.
+        :param where_sql: Limits the actions we rank. Always cover whole days, or the first action of a day is missed
+        :param where_params:
+        :return: The number of actions that changed
+        """
+        table_name = AnalyticsAction._meta.db_table
+        update_sql = """
+            UPDATE {table_name} SET first_visit_today = (ranked.visit_number = 1)
+            FROM (
+                SELECT id,
+                    ROW_NUMBER() OVER (PARTITION BY voter_we_vote_id, date_as_integer ORDER BY id) AS visit_number
+                FROM {table_name}
+                WHERE voter_we_vote_id IS NOT NULL AND voter_we_vote_id <> '' AND {where_sql}
+            ) AS ranked
+            WHERE {table_name}.id = ranked.id
+              AND {table_name}.first_visit_today IS DISTINCT FROM (ranked.visit_number = 1)
+            RETURNING {table_name}.date_as_integer
+        """.format(table_name=table_name, where_sql=where_sql)
+        return self.update_analytics_actions_and_mark_days(update_sql, where_params)
+
     def update_first_visit_today_for_all_voters_since_date(self, date_as_integer=0):
-        success = False
+        """
+        Backfill first_visit_today for every action since date_as_integer, one UPDATE per day
+        :param date_as_integer:
+        :return:
+        """
+        success = True
         status = ""
-        distinct_days_list = []
         first_visit_today_count = 0
 
-        # Get distinct days
         try:
             distinct_days_query = AnalyticsAction.objects.using('analytics').all()
             distinct_days_query = distinct_days_query.filter(date_as_integer__gte=date_as_integer)
-            distinct_days_query = distinct_days_query.values('date_as_integer').distinct()
-            # distinct_days_query = distinct_days_query[:5]  # TEMP limit to 5
-            distinct_days_list = list(distinct_days_query)
-            distinct_days_found = True
+            distinct_days_query = distinct_days_query.order_by('date_as_integer').values_list(
+                'date_as_integer', flat=True).distinct()
+            simple_distinct_days_list = [one_date_as_integer for one_date_as_integer in distinct_days_query
+                                         if positive_value_exists(one_date_as_integer)]
         except Exception as e:
-            distinct_days_found = False
-
-        simple_distinct_days_list = []
-        for day_dict in distinct_days_list:
-            if positive_value_exists(day_dict['date_as_integer']):
-                simple_distinct_days_list.append(day_dict['date_as_integer'])
+            simple_distinct_days_list = []
+            success = False
+            status += "FIRST_VISIT_TODAY-COULD_NOT_RETRIEVE_DAYS "
+            handle_exception(e, logger=logger, exception_message=status)
 
-        # Loop through each day
+        # One day per statement keeps each UPDATE (and the locks it holds) small
         for one_date_as_integer in simple_distinct_days_list:
-            # Get distinct voters on that day
-            voter_list = []
             try:
-                voter_list_query = AnalyticsAction.objects.using('analytics').all()
-                voter_list_query = voter_list_query.filter(date_as_integer=one_date_as_integer)
-                voter_list_query = voter_list_query.values('voter_we_vote_id').distinct()
-                # voter_list_query = voter_list_query[:5]  # TEMP limit to 5
-                voter_list = list(voter_list_query)
-                voter_list_found = True
+                first_visit_today_count += self.update_first_visit_today(
+                    "date_as_integer = %s", [one_date_as_integer])
             except Exception as e:
-                voter_list_found = False
-
-            simple_voter_list = []
-            for voter_dict in voter_list:
-                if positive_value_exists(voter_dict['voter_we_vote_id']):
-                    simple_voter_list.append(voter_dict['voter_we_vote_id'])
-
-            if not voter_list_found:
-                continue
-
-            # Loop through each voter per day, and update the first entry for that day with "first_visit_today=True"
-            for voter_we_vote_id in simple_voter_list:
-                try:
-                    first_visit_query = AnalyticsAction.objects.using('analytics').all()
-                    first_visit_query = first_visit_query.order_by("id")  # order by oldest first
-                    first_visit_query = first_visit_query.filter(date_as_integer=one_date_as_integer)
-                    first_visit_query = first_visit_query.filter(voter_we_vote_id__iexact=voter_we_vote_id)
-                    analytics_action = first_visit_query.first()
-
-                    analytics_action.first_visit_today = True
-                    analytics_action.save()
-                    first_visit_saved = True
-                    first_visit_today_count += 1
-                except Exception as e:
-                    first_visit_found = False
-                    pass
+                success = False
+                status += "FIRST_VISIT_TODAY-UPDATE_FAILED_FOR_DAY " + str(one_date_as_integer) + " "
+                handle_exception(e, logger=logger, exception_message=status)
 
         results = {
             'success':                  success,
@@ -1002,39 +1418,17 @@ class AnalyticsManager(models.Model):
         return results
 
     def update_first_visit_today_for_one_voter(self, voter_we_vote_id):
-        success = False
+        success = True
         status = ""
-        distinct_days_list = []
         first_visit_today_count = 0
 
-        # Get distinct days
         try:
-            distinct_days_query = AnalyticsAction.objects.using('analytics').all()
-            distinct_days_query = distinct_days_query.filter(voter_we_vote_id__iexact=voter_we_vote_id)
-            distinct_days_query = distinct_days_query.values('date_as_integer').distinct()
-            distinct_days_list = list(distinct_days_query)
+            first_visit_today_count = self.update_first_visit_today(
+                "UPPER(voter_we_vote_id) = UPPER(%s)", [voter_we_vote_id])
         except Exception as e:
-            pass
-
-        simple_distinct_days_list = []
-        for day_dict in distinct_days_list:
-            if positive_value_exists(day_dict['date_as_integer']):
-                simple_distinct_days_list.append(day_dict['date_as_integer'])
-
-        # Loop through each day
-        for one_date_as_integer in simple_distinct_days_list:
-            try:
-                first_visit_query = AnalyticsAction.objects.using('analytics').all()
-                first_visit_query = first_visit_query.order_by("id")  # order by oldest first
-                first_visit_query = first_visit_query.filter(date_as_integer=one_date_as_integer)
-                first_visit_query = first_visit_query.filter(voter_we_vote_id__iexact=voter_we_vote_id)
-                analytics_action = first_visit_query.first()
-
-                analytics_action.first_visit_today = True
-                analytics_action.save()
-                first_visit_today_count += 1
-            except Exception as e:
-                pass
+            success = False
+            status += "FIRST_VISIT_TODAY-UPDATE_FAILED_FOR_VOTER "
+            handle_exception(e, logger=logger, exception_message=status)
 
         results = {
             'success': success,
@@ -1043,6 +1437,78 @@ class AnalyticsManager(models.Model):
         }
         return results
 
+    def update_missing_election_ids(self, where_sql, where_params):
+        """
+        Fill in empty google_civic_election_ids with the election the voter was looking at earlier the same day. Entries
+        before the voter's first election of the day get that first election. One UPDATE, using window functions, which
+        Django can't express, so this is raw SQL.
+        :param where_sql: Limits the actions we look at. Always cover whole voter-days, or elections are missed
+        :param where_params:
+        :return: The number of actions that changed
+        """
+        table_name = AnalyticsAction._meta.db_table
+        # election_group counts the elections seen so far today, so each election and the empty entries after it share
+        #  a group, and the group's first entry holds the election
+        update_sql = """
+            UPDATE {table_name} SET google_civic_election_id = filled.election_id
+            FROM (
+                SELECT id, COALESCE(
+                    FIRST_VALUE(known_election_id) OVER (
+                        PARTITION BY voter_we_vote_id, date_as_integer, election_group ORDER BY id),
+                    first_election_id_today) AS election_id
+                FROM (
+                    SELECT id, voter_we_vote_id, date_as_integer,
+                        NULLIF(google_civic_election_id, 0) AS known_election_id,
+                        COUNT(NULLIF(google_civic_election_id, 0)) OVER (
+                            PARTITION BY voter_we_vote_id, date_as_integer ORDER BY id) AS election_group,
+                        FIRST_VALUE(NULLIF(google_civic_election_id, 0)) OVER (
+                            PARTITION BY voter_we_vote_id, date_as_integer
+                            ORDER BY NULLIF(google_civic_election_id, 0) IS NULL, id) AS first_election_id_today
+                    FROM {table_name}
+                    WHERE voter_we_vote_id IS NOT NULL AND {where_sql}
+                ) AS numbered
+            ) AS filled
+            WHERE {table_name}.id = filled.id
+              AND COALESCE({table_name}.google_civic_election_id, 0) = 0
+              AND filled.election_id IS NOT NULL
+            RETURNING {table_name}.date_as_integer
+        """.format(table_name=table_name, where_sql=where_sql)
+        return self.update_analytics_actions_and_mark_days(update_sql, where_params)
+
+    def update_analytics_actions_and_mark_days(self, update_sql, params):
+        """
+        Run an UPDATE of AnalyticsAction that ends with RETURNING date_as_integer, and mark the rollups of the days it
+        changed as incomplete, so those days are built again
+        :param update_sql:
+        :param params:
+        :return: The number of actions that changed
+        """
+        count_sql = """
+            WITH changed AS ({update_sql})
+            SELECT date_as_integer, COUNT(*) FROM changed GROUP BY date_as_integer
+        """.format(update_sql=update_sql)
+        with connections['analytics'].cursor() as cursor:
+            cursor.execute(count_sql, params)
+            changed_count_by_date = dict(cursor.fetchall())
+        self.mark_analytics_daily_rollups_incomplete(list(changed_count_by_date.keys()))
+        return sum(changed_count_by_date.values())
+
+    def update_missing_election_ids_for_action_id_range(self, after_action_id, last_action_id, date_as_integer=0):
+        """
+        Fill in empty google_civic_election_ids for every voter-day with an action in this range of ids. Earlier
+        entries on those days are included, since they hold the election the new entries inherit.
+        :param after_action_id:
+        :param last_action_id:
+        :param date_as_integer: Ignore actions before this day
+        :return: The number of actions that changed
+        """
+        table_name = AnalyticsAction._meta.db_table
+        where_sql = """date_as_integer >= %s AND (voter_we_vote_id, date_as_integer) IN (
+                SELECT voter_we_vote_id, date_as_integer FROM {table_name}
+                WHERE id > %s AND id <= %s AND date_as_integer >= %s)""".format(table_name=table_name)
+        return self.update_missing_election_ids(
+            where_sql, [date_as_integer, after_action_id, last_action_id, date_as_integer])
+
 
 class OrganizationDailyMetrics(models.Model):
     """
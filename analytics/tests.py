@@ -0,0 +1,117 @@
+# analytics/tests.py
+# Brought to you by We Vote. Be good.
+# -*- coding: UTF-8 -*-
+
+from django.test import SimpleTestCase, TestCase
+from unittest import mock
+
+from analytics.models import AnalyticsAction, AnalyticsActionWriteBehindQueue, AnalyticsManager
+
+
+class AnalyticsActionWriteBehindQueueTestCase(SimpleTestCase):
+
+    def setUp(self):
+        self.analytics_action_queue = AnalyticsActionWriteBehindQueue(maximum_size=2, batch_size=2,
+                                                                      put_timeout_seconds=0)
+        self.written_batches = []
+        # No writer thread or analytics database: we write what is queued by calling flush
+        self.start_writer_patch = mock.patch.object(self.analytics_action_queue, 'start_writer_if_needed')
+        self.start_writer_patch.start()
+        # The analytics database has no earlier actions for these voters
+        analytics_database = mock.Mock(bulk_create=self.written_batches.append)
+        analytics_database.filter.return_value.values_list.return_value.distinct.return_value = []
+        self.bulk_create_patch = mock.patch.object(AnalyticsAction.objects, 'using', return_value=analytics_database)
+        self.bulk_create_patch.start()
+        self.update_first_visit_today_patch = mock.patch.object(AnalyticsManager, 'update_first_visit_today')
+        self.update_first_visit_today = self.update_first_visit_today_patch.start()
+
+    def tearDown(self):
+        self.update_first_visit_today_patch.stop()
+        self.bulk_create_patch.stop()
+        self.start_writer_patch.stop()
+
+    def test_full_queue_drops_actions_instead_of_waiting(self):
+        for action_constant in range(3):
+            self.analytics_action_queue.put(AnalyticsAction(action_constant=action_constant))
+        counters = self.analytics_action_queue.fetch_counters()
+        self.assertEqual(counters['actions_queued'], 2)
+        self.assertEqual(counters['actions_backpressured'], 1)
+        self.assertEqual(counters['actions_dropped'], 1)
+        self.assertEqual(counters['actions_waiting'], 2)
+
+        self.analytics_action_queue.flush()
+        self.assertEqual([[action.action_constant for action in batch] for batch in self.written_batches], [[0, 1]])
+        counters = self.analytics_action_queue.fetch_counters()
+        self.assertEqual(counters['actions_written'], 2)
+        self.assertEqual(counters['batches_written'], 1)
+        self.assertEqual(counters['actions_waiting'], 0)
+
+    def test_first_action_of_the_day_is_marked(self):
+        self.analytics_action_queue.maximum_size = 10
+        self.analytics_action_queue.action_queue.maxsize = 10
+        for voter_we_vote_id, date_as_integer in [('wv01voter1', 20181105), ('wv01voter1', 20181105),
+                                                  ('wv01voter2', 20181105), ('wv01voter1', 20181106)]:
+            self.analytics_action_queue.put(AnalyticsAction(
+                action_constant=1, voter_we_vote_id=voter_we_vote_id, date_as_integer=date_as_integer))
+        self.analytics_action_queue.flush()
+
+        written_action_list = [action for batch in self.written_batches for action in batch]
+        self.assertEqual([action.first_visit_today for action in written_action_list], [True, False, True, True])
+        # Each batch settles the voter-days it marked, in case another process marked them too
+        self.assertEqual(self.update_first_visit_today.call_count, 2)
+
+    def test_actions_without_a_voter_are_not_marked(self):
+        self.analytics_action_queue.put(AnalyticsAction(
+            action_constant=1, voter_we_vote_id='', date_as_integer=20181105))
+        self.analytics_action_queue.flush()
+
+        self.assertFalse(self.written_batches[0][0].first_visit_today)
+        self.assertEqual(self.update_first_visit_today.call_count, 0)
+
+
+class FirstVisitTodayTestCase(TestCase):
+    multi_db = True
+
+    def setUp(self):
+        self.analytics_manager = AnalyticsManager()
+
+    def create_action(self, voter_we_vote_id, date_as_integer, first_visit_today=False):
+        return AnalyticsAction.objects.using('analytics').create(
+            action_constant=1, voter_we_vote_id=voter_we_vote_id, date_as_integer=date_as_integer,
+            first_visit_today=first_visit_today)
+
+    def test_update_first_visit_today_marks_only_the_first_action_of_each_voter_day(self):
+        action_list = [
+            self.create_action('wv01voter1', 20181105),
+            self.create_action('wv01voter1', 20181105, first_visit_today=True),
+            self.create_action('wv01voter2', 20181105, first_visit_today=True),
+            self.create_action('wv01voter1', 20181106),
+            self.create_action('', 20181105, first_visit_today=False),
+        ]
+        changed_count = self.analytics_manager.update_first_visit_today("date_as_integer >= %s", [20181105])
+
+        self.assertEqual(changed_count, 3)
+        first_visit_today_by_id = dict(
+            AnalyticsAction.objects.using('analytics').values_list('id', 'first_visit_today'))
+        self.assertEqual([first_visit_today_by_id[action.id] for action in action_list],
+                         [True, False, True, True, False])
+        # Running it again changes nothing
+        self.assertEqual(self.analytics_manager.update_first_visit_today("date_as_integer >= %s", [20181105]), 0)
+
+    def test_two_processes_marking_the_same_voter_day_leave_one_first_visit(self):
+        # Each queue stands in for a worker process. Both look the voter up before either has written.
+        first_queue = AnalyticsActionWriteBehindQueue()
+        second_queue = AnalyticsActionWriteBehindQueue()
+        first_action = AnalyticsAction(action_constant=1, voter_we_vote_id='wv01voter1', date_as_integer=20181105)
+        second_action = AnalyticsAction(action_constant=1, voter_we_vote_id='wv01voter1', date_as_integer=20181105)
+        first_queue.mark_first_visits_today([first_action])
+        second_queue.mark_first_visits_today([second_action])
+        self.assertTrue(first_action.first_visit_today and second_action.first_visit_today)
+
+        first_queue.write_batch([first_action])
+        second_queue.write_batch([second_action])
+
+        action_list = list(AnalyticsAction.objects.using('analytics').order_by('id').values_list(
+            'first_visit_today', flat=True))
+        self.assertEqual(action_list, [True, False])
+
@@ -6,7 +6,7 @@ from .controllers import augment_one_voter_analytics_action_entries_without_elec
     augment_voter_analytics_action_entries_without_election_id, \
     save_organization_daily_metrics, save_organization_election_metrics, \
     save_sitewide_daily_metrics, save_sitewide_election_metrics, save_sitewide_voter_metrics
-from .models import ACTION_WELCOME_VISIT, AnalyticsAction, AnalyticsManager, \
+from .models import ACTION_WELCOME_VISIT, AnalyticsAction, analytics_action_queue, AnalyticsManager, \
     OrganizationDailyMetrics, OrganizationElectionMetrics, \
     SitewideDailyMetrics, SitewideElectionMetrics, SitewideVoterMetrics
 from admin_tools.views import redirect_to_sign_in_page
@@ -93,6 +93,8 @@ def analytics_index_view(request):
         'google_civic_election_id':                     google_civic_election_id,
         'election_list':                                election_list,
         'date_to_process':                              date_to_process,
+        # Only for the server process that answered this request
+        'analytics_action_queue_counters':              analytics_action_queue.fetch_counters(),
     }
     return render(request, 'analytics/index.html', template_values)
 
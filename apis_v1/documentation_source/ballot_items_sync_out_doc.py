@@ -2,6 +2,8 @@
 # Brought to you by We Vote. Be good.
 # -*- coding: UTF-8 -*-
 
+from .sync_out_paging_doc import SYNC_OUT_PAGING_QUERY_PARAMETER_LIST
+
 
 def ballot_items_sync_out_doc_template_values(url_root):
     """
@@ -21,7 +23,7 @@ def ballot_items_sync_out_doc_template_values(url_root):
             'description':  'The us state the ballot item is for. At least one of these variables is needed'
                             ' so we do not overwhelm the API server. '
         },
-    ]
+    ] + SYNC_OUT_PAGING_QUERY_PARAMETER_LIST
 
     potential_status_codes_list = [
     ]
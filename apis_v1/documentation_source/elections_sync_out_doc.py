@@ -2,6 +2,8 @@
 # Brought to you by We Vote. Be good.
 # -*- coding: UTF-8 -*-
 
+from .sync_out_paging_doc import SYNC_OUT_PAGING_QUERY_PARAMETER_LIST
+
 
 def elections_sync_out_doc_template_values(url_root):
     """
@@ -54,6 +56,7 @@ def elections_sync_out_doc_template_values(url_root):
         'url_root': url_root,
         'get_or_post': 'GET',
         'required_query_parameter_list': required_query_parameter_list,
+        'optional_query_parameter_list': SYNC_OUT_PAGING_QUERY_PARAMETER_LIST,
         'api_response': api_response,
         'api_response_notes':
             "NOTE: Success returns a single entry in a json list, "
@@ -2,6 +2,8 @@
 # Brought to you by We Vote. Be good.
 # -*- coding: UTF-8 -*-
 
+from .sync_out_paging_doc import SYNC_OUT_PAGING_QUERY_PARAMETER_LIST
+
 
 def measures_sync_out_doc_template_values(url_root):
     """
@@ -18,7 +20,7 @@ def measures_sync_out_doc_template_values(url_root):
             'value':        'string',  # boolean, integer, long, string
             'description':  'Limit the measures entries retrieved to those in a particular state.',
         },
-    ]
+    ] + SYNC_OUT_PAGING_QUERY_PARAMETER_LIST
 
     potential_status_codes_list = [
     ]
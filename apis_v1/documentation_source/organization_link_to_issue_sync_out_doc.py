@@ -2,13 +2,15 @@
 # Brought to you by We Vote. Be good.
 # -*- coding: UTF-8 -*-
 
+from .sync_out_paging_doc import SYNC_OUT_PAGING_QUERY_PARAMETER_LIST
+
 
 def organization_link_to_issue_sync_out_doc_template_values(url_root):
     """
     Show documentation about organizationLinkToIssueSyncOut
     """
     optional_query_parameter_list = [
-    ]
+    ] + SYNC_OUT_PAGING_QUERY_PARAMETER_LIST
 
     potential_status_codes_list = [
     ]
@@ -26,6 +26,17 @@ def positions_count_for_all_ballot_items_doc_template_values(url_root):
             'description':  'The unique identifier for a particular election. If not provided, return all positions'
                             ' for this voter.',
         },
+        {
+            'name':         'force_recount',
+            'value':        'boolean',  # boolean, integer, long, string
+            'description':  'Recalculate the counts from the position tables before returning them.',
+        },
+        {
+            'name':         'use_bulk_recompute',
+            'value':        'boolean',  # boolean, integer, long, string
+            'description':  'When recalculating, retrieve the positions for the whole ballot at once and replace the '
+                            'cached counts in one transaction, instead of working one ballot item at a time.',
+        },
     ]
 
     potential_status_codes_list = [
@@ -2,6 +2,8 @@
 # Brought to you by We Vote. Be good.
 # -*- coding: UTF-8 -*-
 
+from .sync_out_paging_doc import SYNC_OUT_PAGING_QUERY_PARAMETER_LIST
+
 
 def positions_sync_out_doc_template_values(url_root):
     """
@@ -20,7 +22,7 @@ def positions_sync_out_doc_template_values(url_root):
         },
     ]
     optional_query_parameter_list = [
-    ]
+    ] + SYNC_OUT_PAGING_QUERY_PARAMETER_LIST
 
     potential_status_codes_list = [
     ]
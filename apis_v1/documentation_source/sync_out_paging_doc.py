@@ -0,0 +1,26 @@
+# apis_v1/documentation_source/sync_out_paging_doc.py
+# Brought to you by We Vote. Be good.
+# -*- coding: UTF-8 -*-
+
+# Every *SyncOut API streams its results and accepts these variables (see sync_out_json_response)
+SYNC_OUT_PAGING_QUERY_PARAMETER_LIST = [
+    {
+        'name':         'after_id',
+        'value':        'integer',  # boolean, integer, long, string
+        'description':  'Only return entries with an id greater than this. Start with 0, then pass the id of the '
+                        'last entry you received to get the next page. When after_id or limit is used, every '
+                        'entry includes its "id", and a page with no entries comes back as [].',
+    },
+    {
+        'name':         'limit',
+        'value':        'integer',  # boolean, integer, long, string
+        'description':  'Return at most this many entries.',
+    },
+    {
+        'name':         'updated_since',
+        'value':        'string',  # boolean, integer, long, string
+        'description':  'Only return entries changed on or after this date (YYYY-MM-DD) or date and time '
+                        '(YYYY-MM-DD HH:MM:SS). Ignored for data that does not track when it was changed. '
+                        'Send "Accept-Encoding: gzip" to receive a compressed response.',
+    },
+]
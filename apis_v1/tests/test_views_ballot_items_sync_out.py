@@ -0,0 +1,52 @@
+# apis_v1/test_views_ballot_items_sync_out.py
+# Brought to you by We Vote. Be good.
+# -*- coding: UTF-8 -*-
+
+from ballot.models import BallotItem
+from django.core.urlresolvers import reverse
+from django.test import TestCase
+import gzip
+import json
+
+
+class WeVoteAPIsV1TestsBallotItemsSyncOut(TestCase):
+
+    def setUp(self):
+        self.ballot_items_sync_out_url = reverse("apis_v1:ballotItemsSyncOutView")
+        for ballot_item_number in range(3):
+            BallotItem.objects.create(google_civic_election_id=4184, state_code='MS',
+                                      polling_location_we_vote_id='wv01ploc1',
+                                      ballot_item_display_name='Measure {}'.format(ballot_item_number))
+
+    def retrieve_json(self, **params):
+        params['google_civic_election_id'] = 4184
+        response = self.client.get(self.ballot_items_sync_out_url, params)
+        if response.streaming:
+            return json.loads(b''.join(response.streaming_content).decode())
+        return json.loads(response.content.decode())
+
+    def test_full_list_is_streamed_without_ids(self):
+        json_data = self.retrieve_json()
+        self.assertEqual([one_ballot_item['ballot_item_display_name'] for one_ballot_item in json_data],
+                         ['Measure 0', 'Measure 1', 'Measure 2'])
+        self.assertNotIn('id', json_data[0])
+
+    def test_keyset_pages(self):
+        first_page = self.retrieve_json(limit=2)
+        self.assertEqual(len(first_page), 2)
+        second_page = self.retrieve_json(limit=2, after_id=first_page[-1]['id'])
+        self.assertEqual([one_ballot_item['ballot_item_display_name'] for one_ballot_item in second_page],
+                         ['Measure 2'])
+        self.assertEqual(self.retrieve_json(limit=2, after_id=second_page[-1]['id']), [])
+
+    def test_updated_since(self):
+        self.assertEqual(len(self.retrieve_json(updated_since='2000-01-01')), 3)
+        json_data = self.retrieve_json(updated_since='2999-01-01 00:00:00')
+        self.assertEqual(json_data, {'success': False, 'status': 'BALLOT_ITEM_LIST_MISSING'})
+
+    def test_gzip(self):
+        response = self.client.get(self.ballot_items_sync_out_url, {'google_civic_election_id': 4184},
+                                   HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        json_data = json.loads(gzip.decompress(b''.join(response.streaming_content)).decode())
+        self.assertEqual(len(json_data), 3)
@@ -3,10 +3,12 @@
 # -*- coding: UTF-8 -*-
 from config.base import get_environment_variable
 from django.http import HttpResponse
+from django.views.decorators.gzip import gzip_page
 from election.controllers import elections_retrieve_for_api, elections_sync_out_list_for_api
 import json
 import wevote_functions.admin
-from wevote_functions.functions import convert_to_int, get_voter_device_id, positive_value_exists
+from wevote_functions.functions import convert_to_int, get_voter_device_id, positive_value_exists, \
+    sync_out_json_response
 
 logger = wevote_functions.admin.get_logger(__name__)
 
@@ -28,6 +30,7 @@ def elections_retrieve_view(request):  # electionsRetrieve
     return HttpResponse(json.dumps(json_data), content_type='application/json')
 
 
+@gzip_page
 def elections_sync_out_view(request):  # electionsSyncOut
     voter_device_id = get_voter_device_id(request)  # We standardize how we take in the voter_device_id
     results = elections_sync_out_list_for_api(voter_device_id)
@@ -40,15 +43,11 @@ def elections_sync_out_view(request):  # electionsSyncOut
         return HttpResponse(json.dumps(json_data), content_type='application/json')
     else:
         election_list = results['election_list']
-        election_list_dict = election_list.values('google_civic_election_id', 'election_name', 'election_day_text',
-                                                  'ocd_division_id', 'state_code', 'include_in_list_for_voters')
-        if election_list_dict:
-            election_list_json = list(election_list_dict)
-            return HttpResponse(json.dumps(election_list_json), content_type='application/json')
-        else:
-            json_data = {
-                'success': False,
-                'status': 'ELECTION_LIST_MISSING',
-                'voter_device_id': voter_device_id
-            }
-            return HttpResponse(json.dumps(json_data), content_type='application/json')
+        election_field_list = ['google_civic_election_id', 'election_name', 'election_day_text',
+                               'ocd_division_id', 'state_code', 'include_in_list_for_voters']
+        json_data = {
+            'success': False,
+            'status': 'ELECTION_LIST_MISSING',
+            'voter_device_id': voter_device_id
+        }
+        return sync_out_json_response(request, election_list, election_field_list, json_data)
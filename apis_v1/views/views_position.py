@@ -368,12 +368,14 @@ def positions_count_for_all_ballot_items_view(request):  # positionsCountForAllB
     voter_device_id = get_voter_device_id(request)  # We standardize how we take in the voter_device_id
     google_civic_election_id = request.GET.get('google_civic_election_id', 0)
     force_recount = request.GET.get('force_recount', 0)
+    use_bulk_recompute = positive_value_exists(request.GET.get('use_bulk_recompute', False))
 
     if positive_value_exists(force_recount):
         # Calculate the positions from source tables
         calculate_results = calculate_positions_count_for_all_ballot_items_for_api(
             voter_device_id=voter_device_id,
-            google_civic_election_id=google_civic_election_id)
+            google_civic_election_id=google_civic_election_id,
+            use_bulk_recompute=use_bulk_recompute)
         if not positive_value_exists(google_civic_election_id):
             google_civic_election_id = calculate_results['google_civic_election_id']
 
@@ -389,7 +391,8 @@ def positions_count_for_all_ballot_items_view(request):  # positionsCountForAllB
         # Calculate the positions from source tables
         calculate_results = calculate_positions_count_for_all_ballot_items_for_api(
             voter_device_id=voter_device_id,
-            google_civic_election_id=google_civic_election_id)
+            google_civic_election_id=google_civic_election_id,
+            use_bulk_recompute=use_bulk_recompute)
         if positive_value_exists(calculate_results['support_or_oppose_exists']):
             # Try again to pull the positions count from cache tables
             results = count_for_all_ballot_items_from_position_network_score_for_api(
@@ -5,7 +5,7 @@
 from .models import BallotItemListManager, BallotItemManager, BallotReturnedListManager, BallotReturnedManager, \
     CANDIDATE, copy_existing_ballot_items_from_stored_ballot, OFFICE, MEASURE, \
     refresh_ballot_items_for_voter_copied_from_one_polling_location, VoterBallotSaved, VoterBallotSavedManager
-from candidate.models import CandidateCampaignListManager
+from candidate.models import CANDIDATE_BALLOT_ITEM_DISPLAY_FIELDS, CandidateCampaignListManager
 from config.base import get_environment_variable
 from datetime import datetime, timedelta
 from election.models import ElectionManager, fetch_next_election_for_state
@@ -21,7 +21,8 @@ import pytz
 from voter.models import BALLOT_ADDRESS, VoterAddress, VoterAddressManager, VoterDeviceLinkManager
 import wevote_functions.admin
 from wevote_functions.functions import convert_to_int, extract_state_code_from_address_string, positive_value_exists, \
-    process_request_from_master
+    process_pages_from_master
+from wevote_settings.models import GEOCODER_SOURCE_GOOGLE, GeocodedAddressManager
 from geopy.geocoders import get_geocoder_for_service
 
 logger = wevote_functions.admin.get_logger(__name__)
@@ -33,7 +34,7 @@ BALLOT_ITEMS_SYNC_URL = get_environment_variable("BALLOT_ITEMS_SYNC_URL")  # bal
 BALLOT_RETURNED_SYNC_URL = get_environment_variable("BALLOT_RETURNED_SYNC_URL")  # ballotReturnedSyncOut
 
 
-def ballot_items_import_from_master_server(request, google_civic_election_id, state_code):
+def ballot_items_import_from_master_server(request, google_civic_election_id, state_code, start_over=False):
     """
     Get the json data, and either create new entries or update existing
     :return:
@@ -63,36 +64,31 @@ def ballot_items_import_from_master_server(request, google_civic_election_id, st
         }
         return import_results
 
-    import_results, structured_json = \
-        process_request_from_master(request, "Loading Ballot Items from We Vote Master servers",
-                                    BALLOT_ITEMS_SYNC_URL, params)
+    duplicate_index = None
+    if positive_value_exists(google_civic_election_id):
+        # One duplicate index for the whole run, instead of one for every page
+        index_results = BallotItemListManager().retrieve_possible_duplicate_ballot_items_index(
+            [convert_to_int(google_civic_election_id)])
+        if index_results['success']:
+            duplicate_index = index_results['duplicate_index']
+
+    import_results = process_pages_from_master(
+        request, "Loading Ballot Items from We Vote Master servers",
+        BALLOT_ITEMS_SYNC_URL, params,
+        import_function=ballot_items_import_from_structured_json,
+        filter_function=filter_ballot_items_structured_json_for_local_duplicates,
+        sync_name='ballot_items',
+        start_over=start_over,
+        duplicate_index=duplicate_index)
 
     if not import_results['success']:
-        return import_results
-
-    try:
-        if 'success' in structured_json:  # On error, you get: {'success': False, 'status': 'BALLOT_ITEM_LIST_MISSING'}
-            import_results = {
-                'success': False,
-                'status': structured_json['status'] + ": Did you set the correct state for syncing this election?",
-            }
-        else:
-            results = filter_ballot_items_structured_json_for_local_duplicates(structured_json)
-            filtered_structured_json = results['structured_json']
-            duplicates_removed = results['duplicates_removed']
-
-            import_results = ballot_items_import_from_structured_json(filtered_structured_json)
-            import_results['duplicates_removed'] = duplicates_removed
-    except Exception as e:
-        import_results = {
-            'success': False,
-            'status': "FAILED_TO_GET_JSON_FROM_MASTER_SERVER",
-        }
+        # On error, you get: {'success': False, 'status': 'BALLOT_ITEM_LIST_MISSING'}
+        import_results['status'] += ": Did you set the correct state for syncing this election?"
 
     return import_results
 
 
-def ballot_returned_import_from_master_server(request, google_civic_election_id, state_code):
+def ballot_returned_import_from_master_server(request, google_civic_election_id, state_code, start_over=False):
     """
     Get the json data, and either create new entries or update existing
     Request json file from We Vote servers
@@ -102,42 +98,58 @@ def ballot_returned_import_from_master_server(request, google_civic_election_id,
     :param state_code:
     :return:
     """
+    duplicate_index = None
+    if positive_value_exists(google_civic_election_id):
+        # One duplicate index for the whole run, instead of one for every page
+        index_results = BallotReturnedListManager().retrieve_possible_duplicate_ballot_returned_index(
+            [convert_to_int(google_civic_election_id)])
+        if index_results['success']:
+            duplicate_index = index_results['duplicate_index']
 
-    import_results, structured_json = process_request_from_master(
+    import_results = process_pages_from_master(
         request, "Loading Ballot Returned entries (saved ballots, specific to one location) from WeVote Master servers",
         BALLOT_RETURNED_SYNC_URL,
         {
             "key": WE_VOTE_API_KEY,  # This comes from an environment variable
             "google_civic_election_id": str(google_civic_election_id),
             "state_code": str(state_code),
-        }
-    )
-
-    print("... the master server returned " + str(len(structured_json)) + " polling locations for election " +
-          str(google_civic_election_id) + " in state " + str(state_code))
-
-    if import_results['success']:
-        results = filter_ballot_returned_structured_json_for_local_duplicates(structured_json)
-        filtered_structured_json = results['structured_json']
-        duplicates_removed = results['duplicates_removed']
-
-        import_results = ballot_returned_import_from_structured_json(filtered_structured_json)
-        import_results['duplicates_removed'] = duplicates_removed
+        },
+        import_function=ballot_returned_import_from_structured_json,
+        filter_function=filter_ballot_returned_structured_json_for_local_duplicates,
+        sync_name='ballot_returned',
+        start_over=start_over,
+        duplicate_index=duplicate_index)
 
     return import_results
 
 
-def filter_ballot_items_structured_json_for_local_duplicates(structured_json):
+def filter_ballot_items_structured_json_for_local_duplicates(structured_json, per_record_lookup=False,
+                                                             duplicate_index=None):
     """
     With this function, we remove ballot_items that seem to be duplicates, but have different we_vote_id's.
     We do not check to see if we have a matching office or measure in the database this routine --
     that is done elsewhere.
     :param structured_json:
+    :param per_record_lookup: Query the database once per ballot item, instead of loading the existing ballot items
+     for these elections into memory up front
+    :param duplicate_index: Built once for the whole run by the caller. Without it, we build one for these entries.
     :return:
     """
     duplicates_removed = 0
     filtered_structured_json = []
     ballot_item_list_manager = BallotItemListManager()
+    if duplicate_index is None and not per_record_lookup:
+        google_civic_election_id_list = list(set(
+            convert_to_int(one_ballot_item['google_civic_election_id']) for one_ballot_item in structured_json
+            if positive_value_exists(one_ballot_item.get('google_civic_election_id', ''))))
+        index_results = ballot_item_list_manager.retrieve_possible_duplicate_ballot_items_index(
+            google_civic_election_id_list)
+        if index_results['success']:
+            duplicate_index = index_results['duplicate_index']
+        else:
+            # Fall back to looking for duplicates one at a time
+            per_record_lookup = True
+
     for one_ballot_item in structured_json:
         ballot_item_display_name = one_ballot_item['ballot_item_display_name'] \
             if 'ballot_item_display_name' in one_ballot_item else ''
@@ -158,12 +170,26 @@ def filter_ballot_items_structured_json_for_local_duplicates(structured_json):
         # contest_measure_we_vote_id = one_ballot_item['contest_measure_we_vote_id'] \
         #     if 'contest_measure_we_vote_id' in one_ballot_item else ''
         voter_id = 0
-        results = ballot_item_list_manager.retrieve_possible_duplicate_ballot_items(
-            ballot_item_display_name, google_civic_election_id,
-            polling_location_we_vote_id, voter_id,
-            contest_office_we_vote_id, contest_measure_we_vote_id, state_code)
+        if per_record_lookup:
+            results = ballot_item_list_manager.retrieve_possible_duplicate_ballot_items(
+                ballot_item_display_name, google_civic_election_id,
+                polling_location_we_vote_id, voter_id,
+                contest_office_we_vote_id, contest_measure_we_vote_id, state_code)
+            duplicate_found = results['ballot_item_list_found']
+        elif not positive_value_exists(google_civic_election_id) \
+                or not positive_value_exists(polling_location_we_vote_id) \
+                or not positive_value_exists(ballot_item_display_name):
+            # retrieve_possible_duplicate_ballot_items won't look for duplicates without these
+            duplicate_found = False
+        elif positive_value_exists(state_code):
+            duplicate_found = duplicate_index.has_duplicate([(
+                convert_to_int(google_civic_election_id), polling_location_we_vote_id, state_code,
+                ballot_item_display_name)])
+        else:
+            duplicate_found = duplicate_index.has_duplicate([(
+                convert_to_int(google_civic_election_id), polling_location_we_vote_id, ballot_item_display_name)])
 
-        if results['ballot_item_list_found']:
+        if duplicate_found:
             # There seems to be a duplicate already in this database using a different we_vote_id
             duplicates_removed += 1
         else:
@@ -182,17 +208,33 @@ def filter_ballot_items_structured_json_for_local_duplicates(structured_json):
     return ballot_items_results
 
 
-def filter_ballot_returned_structured_json_for_local_duplicates(structured_json):
+def filter_ballot_returned_structured_json_for_local_duplicates(structured_json, per_record_lookup=False,
+                                                                duplicate_index=None):
     """
     With this function, we remove ballot_returned entries that seem to be duplicates,
     but have different polling_location_we_vote_id's.
     We do not check to see if we have a local entry for polling_location_we_vote_id -- that is done elsewhere.
     :param structured_json:
+    :param per_record_lookup: Query the database once per entry, instead of loading the existing ballot_returned
+     entries for these elections into memory up front
+    :param duplicate_index: Built once for the whole run by the caller. Without it, we build one for these entries.
     :return:
     """
     duplicates_removed = 0
     filtered_structured_json = []
     ballot_returned_list_manager = BallotReturnedListManager()
+    if duplicate_index is None and not per_record_lookup:
+        google_civic_election_id_list = list(set(
+            convert_to_int(one_ballot_returned['google_civic_election_id']) for one_ballot_returned in structured_json
+            if positive_value_exists(one_ballot_returned.get('google_civic_election_id', ''))))
+        index_results = ballot_returned_list_manager.retrieve_possible_duplicate_ballot_returned_index(
+            google_civic_election_id_list)
+        if index_results['success']:
+            duplicate_index = index_results['duplicate_index']
+        else:
+            # Fall back to looking for duplicates one at a time
+            per_record_lookup = True
+
     for one_ballot_returned in structured_json:
         polling_location_we_vote_id = one_ballot_returned['polling_location_we_vote_id'] \
             if 'polling_location_we_vote_id' in one_ballot_returned else ''
@@ -202,10 +244,18 @@ def filter_ballot_returned_structured_json_for_local_duplicates(structured_json)
         normalized_zip = one_ballot_returned['normalized_zip'] if 'normalized_zip' in one_ballot_returned else ''
 
         # Check to see if there is an entry that matches in all critical ways, minus the polling_location_we_vote_id
-        results = ballot_returned_list_manager.retrieve_possible_duplicate_ballot_returned(
-            google_civic_election_id, normalized_line1, normalized_zip, polling_location_we_vote_id)
+        if per_record_lookup:
+            results = ballot_returned_list_manager.retrieve_possible_duplicate_ballot_returned(
+                google_civic_election_id, normalized_line1, normalized_zip, polling_location_we_vote_id)
+            duplicate_found = results['ballot_returned_list_found']
+        elif not positive_value_exists(normalized_line1) and not positive_value_exists(normalized_zip):
+            duplicate_found = False
+        else:
+            duplicate_found = duplicate_index.has_duplicate(
+                [(convert_to_int(google_civic_election_id), normalized_line1, normalized_zip)],
+                polling_location_we_vote_id)
 
-        if results['ballot_returned_list_found']:
+        if duplicate_found:
             # There seems to be a duplicate already in this database using a different we_vote_id
             duplicates_removed += 1
         else:
@@ -414,8 +464,14 @@ def heal_geo_coordinates(text_for_map_search):
     longitude = None
     latitude = None
     try:
-        google_client = get_geocoder_for_service('google')(GOOGLE_MAPS_API_KEY)
-        location = google_client.geocode(text_for_map_search, sensor=False)
+        geocoded_address_manager = GeocodedAddressManager()
+        geocoded_address_results = geocoded_address_manager.retrieve_geocoded_address(text_for_map_search)
+        if geocoded_address_results['geocoded_address_found']:
+            location = geocoded_address_results['location']
+        else:
+            google_client = get_geocoder_for_service('google')(GOOGLE_MAPS_API_KEY)
+            location = google_client.geocode(text_for_map_search, sensor=False)
+            geocoded_address_manager.save_geocoded_address(text_for_map_search, location, GEOCODER_SOURCE_GOOGLE)
         if location is None:
             status = 'Could not find location matching "{}" '.format(text_for_map_search)
             logger.debug(status)
@@ -1799,18 +1855,34 @@ def voter_ballot_items_retrieve_for_one_election_for_api(voter_device_id, voter_
 
     if success:
         status += "BALLOT_ITEM_LIST_FOUND "
+        # Retrieve the candidates for every office on this ballot at once
+        office_id_list = []
+        office_we_vote_id_list = []
+        for ballot_item in ballot_item_list:
+            if ballot_item.contest_office_we_vote_id:
+                if positive_value_exists(ballot_item.contest_office_id):
+                    office_id_list.append(ballot_item.contest_office_id)
+                else:
+                    office_we_vote_id_list.append(ballot_item.contest_office_we_vote_id)
+        candidate_list_object = CandidateCampaignListManager()
+        candidate_results = candidate_list_object.retrieve_candidates_for_office_list(
+            office_id_list, office_we_vote_id_list, only_fields=CANDIDATE_BALLOT_ITEM_DISPLAY_FIELDS)
+        if not candidate_results['success']:
+            status += candidate_results['status']
+
         for ballot_item in ballot_item_list:
             if ballot_item.contest_office_we_vote_id:
                 kind_of_ballot_item = OFFICE
                 ballot_item_id = ballot_item.contest_office_id
                 office_we_vote_id = ballot_item.contest_office_we_vote_id
                 try:
-                    candidate_list_object = CandidateCampaignListManager()
-                    results = candidate_list_object.retrieve_all_candidates_for_office(
-                        ballot_item_id, office_we_vote_id)
+                    if positive_value_exists(ballot_item_id):
+                        candidate_list = candidate_results['candidate_list_by_office_id'].get(ballot_item_id, [])
+                    else:
+                        candidate_list = \
+                            candidate_results['candidate_list_by_office_we_vote_id'].get(office_we_vote_id, [])
                     candidates_to_display = []
-                    if results['candidate_list_found']:
-                        candidate_list = results['candidate_list']
+                    if len(candidate_list):
                         for candidate in candidate_list:
                             # This should match values returned in candidates_retrieve_for_api
                             one_candidate = {
@@ -1834,8 +1906,6 @@ def voter_ballot_items_retrieve_for_one_election_for_api(voter_device_id, voter_
                     # status = 'FAILED candidates_retrieve. ' \
                     #          '{error} [type: {error_type}]'.format(error=e.message, error_type=type(e))
                     candidates_to_display = []
-                    if hasattr(results, 'status'):
-                        status += results['status'] + " "
 
                 if len(candidates_to_display):
                     one_ballot_item = {
@@ -7,6 +7,8 @@ from config.base import get_environment_variable
 from datetime import date, datetime
 from django.db import models
 from django.db.models import F, Q, Count
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 from election.models import ElectionManager
 from exception.models import handle_exception, handle_record_found_more_than_one_exception
 from geopy.geocoders import get_geocoder_for_service
@@ -15,8 +17,10 @@ from measure.models import ContestMeasureManager
 from office.models import ContestOfficeManager
 from polling_location.models import PollingLocationManager
 import wevote_functions.admin
-from wevote_functions.functions import convert_date_to_date_as_integer, convert_to_int, positive_value_exists
-from wevote_settings.models import fetch_next_we_vote_id_ballot_returned_integer, fetch_site_unique_id_prefix
+from wevote_functions.functions import convert_date_to_date_as_integer, convert_to_int, LeastRecentlyUsedCache, \
+    LocalDuplicateIndex, NearestLocationIndex, positive_value_exists
+from wevote_settings.models import fetch_next_we_vote_id_ballot_returned_integer, fetch_site_unique_id_prefix, \
+    GEOCODER_SOURCE_GOOGLE, GEOCODER_SOURCE_GOOGLE_WITHOUT_KEY, GeocodedAddressManager
 
 OFFICE = 'OFFICE'
 CANDIDATE = 'CANDIDATE'
@@ -31,6 +35,13 @@ KIND_OF_BALLOT_ITEM_CHOICES = (
 
 GOOGLE_MAPS_API_KEY = get_environment_variable("GOOGLE_MAPS_API_KEY")
 
+# find_closest_ballot_returned keeps a NearestLocationIndex of polling location ballots for each election and state.
+# Moving, adding or deleting one of those ballots bumps the version of the indexes it is in (in the
+# BallotReturnedLocationIndexVersion table), so every process rebuilds just those indexes.
+BALLOT_RETURNED_LOCATION_INDEX_MAX_IN_MEMORY = 50
+# Never use an index older than this, even if its version hasn't changed
+BALLOT_RETURNED_LOCATION_INDEX_MAX_AGE_SECONDS = 600
+
 logger = wevote_functions.admin.get_logger(__name__)
 
 
@@ -83,6 +94,7 @@ class BallotItem(models.Model):
     measure_url = models.URLField(verbose_name='url of measure', blank=True, null=True)
     yes_vote_description = models.TextField(verbose_name="what a yes vote means", null=True, blank=True, default=None)
     no_vote_description = models.TextField(verbose_name="what a no vote means", null=True, blank=True, default=None)
+    date_last_changed = models.DateTimeField(verbose_name='date last changed', null=True, auto_now=True)
 
     def is_contest_office(self):
         if positive_value_exists(self.contest_office_id) or positive_value_exists(self.contest_office_we_vote_id):
@@ -1271,6 +1283,46 @@ class BallotItemListManager(models.Model):
         return results
 
 
+    def retrieve_possible_duplicate_ballot_items_index(self, google_civic_election_id_list):
+        """
+        Load the identifying values of every polling location ballot item in these elections in one query, so that
+        filter_ballot_items_structured_json_for_local_duplicates can check each incoming ballot item in memory.
+        Keys: (google_civic_election_id, polling_location_we_vote_id, ballot_item_display_name) and
+        (google_civic_election_id, polling_location_we_vote_id, state_code, ballot_item_display_name)
+        :param google_civic_election_id_list:
+        :return:
+        """
+        duplicate_index = LocalDuplicateIndex()
+        try:
+            ballot_item_queryset = BallotItem.objects.filter(
+                google_civic_election_id__in=google_civic_election_id_list)
+            ballot_item_queryset = ballot_item_queryset.exclude(polling_location_we_vote_id__isnull=True)
+            ballot_item_queryset = ballot_item_queryset.values_list(
+                'id', 'google_civic_election_id', 'polling_location_we_vote_id', 'state_code',
+                'ballot_item_display_name')
+            for ballot_item_id, google_civic_election_id, polling_location_we_vote_id, state_code, \
+                    ballot_item_display_name in ballot_item_queryset.iterator():
+                google_civic_election_id = convert_to_int(google_civic_election_id)
+                duplicate_index.add(ballot_item_id, (
+                    google_civic_election_id, polling_location_we_vote_id, ballot_item_display_name))
+                duplicate_index.add(ballot_item_id, (
+                    google_civic_election_id, polling_location_we_vote_id, state_code, ballot_item_display_name))
+            status = 'DUPLICATE_BALLOT_ITEMS_INDEX_RETRIEVED '
+            success = True
+        except Exception as e:
+            handle_exception(e, logger=logger)
+            status = 'FAILED retrieve_possible_duplicate_ballot_items_index ' \
+                     '{error} [type: {error_type}]'.format(error=e, error_type=type(e))
+            success = False
+
+        results = {
+            'success':          success,
+            'status':           status,
+            'duplicate_index':  duplicate_index,
+        }
+        return results
+
+
 class BallotReturned(models.Model):
     """
     This is a generated table with a summary of address + election combinations returned ballot data
@@ -1319,6 +1371,7 @@ class BallotReturned(models.Model):
                                         verbose_name='normalized state returned from Google')
     normalized_zip = models.CharField(max_length=255, blank=True, null=True,
                                       verbose_name='normalized zip returned from Google')
+    date_last_changed = models.DateTimeField(verbose_name='date last changed', null=True, auto_now=True)
 
     # We override the save function so we can auto-generate we_vote_id
     def save(self, *args, **kwargs):
@@ -1329,6 +1382,17 @@ class BallotReturned(models.Model):
             self.generate_new_we_vote_id()
         super(BallotReturned, self).save(*args, **kwargs)
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        ballot_returned = super(BallotReturned, cls).from_db(db, field_names, values)
+        # Remember where this ballot was when we loaded it, so saving it only rebuilds location indexes if it moved
+        ballot_returned.location_index_values_loaded = ballot_returned.location_index_values()
+        return ballot_returned
+
+    def location_index_values(self):
+        return (self.polling_location_we_vote_id, self.google_civic_election_id, self.normalized_state,
+                self.latitude, self.longitude)
+
     def generate_new_we_vote_id(self):
         # ...generate a new id
         site_unique_id_prefix = fetch_site_unique_id_prefix()
@@ -1352,6 +1416,113 @@ class BallotReturned(models.Model):
             return ""
 
 
+class BallotReturnedLocationIndexVersion(models.Model):
+    """
+    Bumped whenever a polling location ballot in one election and state is moved, added or deleted, so that every
+    process knows to rebuild its NearestLocationIndex for them (see retrieve_ballot_returned_location_index)
+    """
+    # Like "4184_ms". See generate_ballot_returned_location_index_version_key
+    index_version_key = models.CharField(max_length=255, unique=True)
+    version = models.PositiveIntegerField(default=0)
+
+
+# (google_civic_election_id, state_code) -> (version, index)
+ballot_returned_location_index_cache = LeastRecentlyUsedCache(
+    max_entries=BALLOT_RETURNED_LOCATION_INDEX_MAX_IN_MEMORY,
+    timeout_seconds=BALLOT_RETURNED_LOCATION_INDEX_MAX_AGE_SECONDS)
+
+
+def generate_ballot_returned_location_index_key(google_civic_election_id, state_code):
+    return convert_to_int(google_civic_election_id), (state_code or '').lower()
+
+
+def generate_ballot_returned_location_index_version_key(index_key):
+    return "{google_civic_election_id}_{state_code}".format(
+        google_civic_election_id=index_key[0],
+        state_code=index_key[1],
+    )
+
+
+def fetch_ballot_returned_location_index_version(index_key):
+    version = BallotReturnedLocationIndexVersion.objects.filter(
+        index_version_key=generate_ballot_returned_location_index_version_key(index_key)).values_list(
+        'version', flat=True).first()
+    return version or 0
+
+
+def invalidate_ballot_returned_location_indexes(google_civic_election_id, state_code):
+    """
+    Rebuild the indexes a polling location ballot in this election and state is in: the one for this election and
+    state, and the ones searched when the election or the state isn't known
+    :param google_civic_election_id:
+    :param state_code:
+    :return:
+    """
+    google_civic_election_id, state_code = \
+        generate_ballot_returned_location_index_key(google_civic_election_id, state_code)
+    index_key_list = set([(google_civic_election_id, state_code), (google_civic_election_id, ''),
+                          (0, state_code), (0, '')])
+    index_version_key_list = [generate_ballot_returned_location_index_version_key(index_key)
+                              for index_key in index_key_list]
+    updated_count = BallotReturnedLocationIndexVersion.objects.filter(
+        index_version_key__in=index_version_key_list).update(version=F('version') + 1)
+    if updated_count < len(index_version_key_list):
+        # The first change to some of these indexes
+        for index_version_key in index_version_key_list:
+            BallotReturnedLocationIndexVersion.objects.get_or_create(
+                index_version_key=index_version_key, defaults={'version': 1})
+    for index_key in index_key_list:
+        ballot_returned_location_index_cache.delete(index_key)
+
+
+def retrieve_ballot_returned_location_index(ballot_returned_query, google_civic_election_id, state_code):
+    """
+    The NearestLocationIndex for the polling location ballots in ballot_returned_query, built the first time it is
+    needed and rebuilt after one of those ballots changes
+    :param ballot_returned_query: Already limited to this election and state
+    :param google_civic_election_id: 0 if ballot_returned_query isn't limited to one election
+    :param state_code: '' if ballot_returned_query isn't limited to one state
+    :return:
+    """
+    index_key = generate_ballot_returned_location_index_key(google_civic_election_id, state_code)
+    version = fetch_ballot_returned_location_index_version(index_key)
+    cached_index = ballot_returned_location_index_cache.get(index_key)
+    if cached_index is not None:
+        cached_version, location_index = cached_index
+        if cached_version == version:
+            return location_index
+
+    location_list = ballot_returned_query \
+        .filter(latitude__isnull=False, longitude__isnull=False) \
+        .values_list('id', 'latitude', 'longitude')
+    location_index = NearestLocationIndex(location_list)
+    ballot_returned_location_index_cache.set(index_key, (version, location_index))
+    return location_index
+
+
+@receiver(post_save, sender=BallotReturned)
+def save_ballot_returned_location_signal(sender, instance, created, **kwargs):
+    location_index_values = instance.location_index_values()
+    # Not set when the ballot was created here, or saved without being loaded first
+    location_index_values_loaded = getattr(instance, 'location_index_values_loaded', None)
+    instance.location_index_values_loaded = location_index_values
+    if not created and location_index_values_loaded == location_index_values:
+        return
+    # Ballots for one voter are never used by find_closest_ballot_returned
+    if positive_value_exists(instance.polling_location_we_vote_id):
+        invalidate_ballot_returned_location_indexes(instance.google_civic_election_id, instance.normalized_state)
+    if location_index_values_loaded is not None and positive_value_exists(location_index_values_loaded[0]) \
+            and location_index_values_loaded[:3] != location_index_values[:3]:
+        # Take it out of the indexes it was in before
+        invalidate_ballot_returned_location_indexes(location_index_values_loaded[1], location_index_values_loaded[2])
+
+
+@receiver(post_delete, sender=BallotReturned)
+def delete_ballot_returned_location_signal(sender, instance, **kwargs):
+    if positive_value_exists(instance.polling_location_we_vote_id):
+        invalidate_ballot_returned_location_indexes(instance.google_civic_election_id, instance.normalized_state)
+
+
 class BallotReturnedManager(models.Model):
     """
     Scenario where we get an incomplete address and Google Civic can't find it:
@@ -1800,35 +1971,45 @@ class BallotReturnedManager(models.Model):
                 'ballot_returned': ballot_returned,
             }
 
-        if not hasattr(self, 'google_client') or not self.google_client:
-            self.google_client = get_geocoder_for_service('google')(GOOGLE_MAPS_API_KEY)
-
-        try:
-            location = self.google_client.geocode(text_for_map_search, sensor=False)
-        except GeocoderQuotaExceeded:
-            try_without_maps_key = True
-            status += "GEOCODER_QUOTA_EXCEEDED "
-        except Exception as e:
-            try_without_maps_key = True
-            status += 'GEOCODER_ERROR {error} [type: {error_type}] '.format(error=e, error_type=type(e))
-            logger.info(status + " @ " + text_for_map_search + "  google_civic_election_id=" +
-                        str(google_civic_election_id))
+        # We only ask the geocoder about each distinct address once
+        geocoded_address_manager = GeocodedAddressManager()
+        geocoded_address_results = geocoded_address_manager.retrieve_geocoded_address(text_for_map_search)
+        if geocoded_address_results['geocoded_address_found']:
+            location = geocoded_address_results['location']
+            status += "GEOCODED_ADDRESS_FROM_CACHE "
+        else:
+            if not hasattr(self, 'google_client') or not self.google_client:
+                self.google_client = get_geocoder_for_service('google')(GOOGLE_MAPS_API_KEY)
 
-        if try_without_maps_key:
-            # If we have exceeded our account, try without a maps key
             try:
-                temp_google_client = get_geocoder_for_service('google')()
-                location = temp_google_client.geocode(text_for_map_search, sensor=False)
+                location = self.google_client.geocode(text_for_map_search, sensor=False)
+                geocoded_address_manager.save_geocoded_address(text_for_map_search, location, GEOCODER_SOURCE_GOOGLE)
             except GeocoderQuotaExceeded:
-                results = {
-                    'status':                   status,
-                    'geocoder_quota_exceeded':  True,
-                    'ballot_returned_found':    ballot_returned_found,
-                    'ballot_returned':          ballot_returned,
-                }
-                return results
+                try_without_maps_key = True
+                status += "GEOCODER_QUOTA_EXCEEDED "
             except Exception as e:
-                location = None
+                try_without_maps_key = True
+                status += 'GEOCODER_ERROR {error} [type: {error_type}] '.format(error=e, error_type=type(e))
+                logger.info(status + " @ " + text_for_map_search + "  google_civic_election_id=" +
+                            str(google_civic_election_id))
+
+            if try_without_maps_key:
+                # If we have exceeded our account, try without a maps key
+                try:
+                    temp_google_client = get_geocoder_for_service('google')()
+                    location = temp_google_client.geocode(text_for_map_search, sensor=False)
+                    geocoded_address_manager.save_geocoded_address(
+                        text_for_map_search, location, GEOCODER_SOURCE_GOOGLE_WITHOUT_KEY)
+                except GeocoderQuotaExceeded:
+                    results = {
+                        'status':                   status,
+                        'geocoder_quota_exceeded':  True,
+                        'ballot_returned_found':    ballot_returned_found,
+                        'ballot_returned':          ballot_returned,
+                    }
+                    return results
+                except Exception as e:
+                    location = None
 
         ballot = None
         if location is None:
@@ -1884,8 +2065,10 @@ class BallotReturnedManager(models.Model):
                 # This search for normalized_state is NOT redundant because some elections are in many states
                 ballot_returned_query = ballot_returned_query.filter(normalized_state__iexact=state_code)
 
+            google_civic_election_id_searched = 0
             if positive_value_exists(google_civic_election_id):
                 ballot_returned_query = ballot_returned_query.filter(google_civic_election_id=google_civic_election_id)
+                google_civic_election_id_searched = google_civic_election_id
             else:
                 # If we have an active election coming up, including today
                 # fetch_next_upcoming_election_in_this_state returns next election with ballot items
@@ -1893,16 +2076,18 @@ class BallotReturnedManager(models.Model):
                 if positive_value_exists(upcoming_google_civic_election_id):
                     ballot_returned_query = ballot_returned_query.filter(
                         google_civic_election_id=upcoming_google_civic_election_id)
+                    google_civic_election_id_searched = upcoming_google_civic_election_id
                 else:
                     past_google_civic_election_id = self.fetch_last_election_in_this_state(state_code)
                     if positive_value_exists(past_google_civic_election_id):
                         # Limit the search to the most recent election with ballot items
                         ballot_returned_query = ballot_returned_query.filter(
                             google_civic_election_id=past_google_civic_election_id)
+                        google_civic_election_id_searched = past_google_civic_election_id
 
-            ballot_returned_query = ballot_returned_query.annotate(distance=(F('latitude') - location.latitude) ** 2 +
-                                                                            (F('longitude') - location.longitude) ** 2)
-            ballot = ballot_returned_query.order_by('distance').first()
+            ballot = self.find_closest_ballot_returned_in_query(
+                ballot_returned_query, location.latitude, location.longitude, google_civic_election_id_searched,
+                state_code)
 
         if ballot is not None:
             ballot_returned = ballot
@@ -1918,6 +2103,36 @@ class BallotReturnedManager(models.Model):
             'ballot_returned':          ballot_returned,
         }
 
+    def find_closest_ballot_returned_in_query(self, ballot_returned_query, latitude, longitude,
+                                              google_civic_election_id, state_code):
+        """
+        The polling location ballot in ballot_returned_query closest (by great-circle distance) to this latitude and
+        longitude. Ballots without a latitude and longitude are only returned if none of them have one.
+        :param ballot_returned_query: Already limited to this election and state
+        :param latitude:
+        :param longitude:
+        :param google_civic_election_id: The election ballot_returned_query is limited to, or 0
+        :param state_code: The state ballot_returned_query is limited to, or ''
+        :return:
+        """
+        try:
+            location_index = retrieve_ballot_returned_location_index(
+                ballot_returned_query, google_civic_election_id, state_code)
+            ballot_returned_id = location_index.find_nearest(latitude, longitude)
+            if ballot_returned_id is None:
+                return ballot_returned_query.order_by('id').first()
+            ballot = ballot_returned_query.filter(id=ballot_returned_id).first()
+            if ballot is not None:
+                return ballot
+            # Deleted by another process since the index was built
+            invalidate_ballot_returned_location_indexes(google_civic_election_id, state_code)
+        except Exception as e:
+            handle_exception(e, logger=logger, exception_message="FIND_CLOSEST_BALLOT_RETURNED_INDEX_FAILED ")
+
+        ballot_returned_query = ballot_returned_query.annotate(distance=(F('latitude') - latitude) ** 2 +
+                                                                        (F('longitude') - longitude) ** 2)
+        return ballot_returned_query.order_by('distance').first()
+
     def should_election_search_data_be_saved(self, google_civic_election_id):
         if not positive_value_exists(google_civic_election_id):
             return False
@@ -2012,10 +2227,6 @@ class BallotReturnedManager(models.Model):
         :return:
         """
         status = ""
-        # We try to use existing google_client
-        if not hasattr(self, 'google_client') or not self.google_client:
-            self.google_client = get_geocoder_for_service('google')(GOOGLE_MAPS_API_KEY)
-
         if not hasattr(ballot_returned_object, "normalized_line1"):
             results = {
                 'status':                   "POPULATE_LATITUDE_AND_LONGITUDE-NOT_A_BALLOT_RETURNED_OBJECT ",
@@ -2041,8 +2252,17 @@ class BallotReturnedManager(models.Model):
             ballot_returned_object.normalized_city,
             ballot_returned_object.normalized_state,
             ballot_returned_object.normalized_zip)
+        geocoded_address_manager = GeocodedAddressManager()
+        geocoded_address_results = geocoded_address_manager.retrieve_geocoded_address(full_ballot_address)
         try:
-            location = self.google_client.geocode(full_ballot_address, sensor=False)
+            if geocoded_address_results['geocoded_address_found']:
+                location = geocoded_address_results['location']
+            else:
+                # We try to use existing google_client
+                if not hasattr(self, 'google_client') or not self.google_client:
+                    self.google_client = get_geocoder_for_service('google')(GOOGLE_MAPS_API_KEY)
+                location = self.google_client.geocode(full_ballot_address, sensor=False)
+                geocoded_address_manager.save_geocoded_address(full_ballot_address, location, GEOCODER_SOURCE_GOOGLE)
         except GeocoderQuotaExceeded:
             status += "GeocoderQuotaExceeded "
             results = {
@@ -2337,6 +2557,40 @@ class BallotReturnedListManager(models.Model):
         return results
 
 
+    def retrieve_possible_duplicate_ballot_returned_index(self, google_civic_election_id_list):
+        """
+        Load the address of every ballot_returned entry in these elections in one query, so that
+        filter_ballot_returned_structured_json_for_local_duplicates can check each incoming entry in memory.
+        Keys: (google_civic_election_id, normalized_line1, normalized_zip), indexed by polling_location_we_vote_id
+        :param google_civic_election_id_list:
+        :return:
+        """
+        duplicate_index = LocalDuplicateIndex()
+        try:
+            ballot_returned_queryset = BallotReturned.objects.filter(
+                google_civic_election_id__in=google_civic_election_id_list)
+            ballot_returned_queryset = ballot_returned_queryset.values_list(
+                'polling_location_we_vote_id', 'google_civic_election_id', 'normalized_line1', 'normalized_zip')
+            for polling_location_we_vote_id, google_civic_election_id, normalized_line1, normalized_zip \
+                    in ballot_returned_queryset.iterator():
+                duplicate_index.add(polling_location_we_vote_id,
+                                    (google_civic_election_id, normalized_line1, normalized_zip))
+            status = 'DUPLICATE_BALLOT_RETURNED_INDEX_RETRIEVED '
+            success = True
+        except Exception as e:
+            handle_exception(e, logger=logger)
+            status = 'FAILED retrieve_possible_duplicate_ballot_returned_index ' \
+                     '{error} [type: {error_type}]'.format(error=e, error_type=type(e))
+            success = False
+
+        results = {
+            'success':          success,
+            'status':           status,
+            'duplicate_index':  duplicate_index,
+        }
+        return results
+
+
 class VoterBallotSaved(models.Model):
     """
     This is a table with a meta data about a voter's various elections they have looked at and might return to
@@ -1,9 +1,16 @@
 from unittest import mock
 from collections import namedtuple
+import os
+import random
+import unittest
 
 from django.test import TestCase
 
-from ballot.models import BallotReturned, BallotReturnedManager
+from ballot.controllers import filter_ballot_items_structured_json_for_local_duplicates, \
+    filter_ballot_returned_structured_json_for_local_duplicates
+from ballot.models import BallotItem, BallotReturned, BallotReturnedManager, retrieve_ballot_returned_location_index
+from wevote_functions.functions import calculate_great_circle_distance_miles, NearestLocationIndex
+from wevote_settings.models import GeocodedAddress, geocoded_address_memory_cache
 
 
 Location = namedtuple('Location', ['address', 'latitude', 'longitude'])
@@ -22,6 +29,7 @@ class BallotTestCase(TestCase):
                                          'polling_location_we_vote_id': 'wv01ploc43132',
                                          })
         self.ballot_manager = BallotReturnedManager()
+        geocoded_address_memory_cache.clear()
 
     def test_do_not_return_ballot_in_different_state(self):
         with mock.patch('ballot.models.get_geocoder_for_service') as mock_geopy:
@@ -85,3 +93,157 @@ class BallotTestCase(TestCase):
                                       'geocoder_quota_exceeded': False,
                                       'ballot_returned_found': True,
                                       'ballot_returned': ballot_in_jackson})
+
+
+class GeocodedAddressTestCase(TestCase):
+
+    def setUp(self):
+        BallotReturned.objects.create(google_civic_election_id=4184, latitude=34.6604854, longitude=-90.184124,
+                                      normalized_state='MS', polling_location_we_vote_id='wv01ploc43132')
+        self.ballot_manager = BallotReturnedManager()
+        geocoded_address_memory_cache.clear()
+
+    def test_each_distinct_address_is_geocoded_once(self):
+        with mock.patch('ballot.models.get_geocoder_for_service') as mock_geopy:
+            google_client = mock_geopy('google')()
+            google_client.geocode.return_value = Location(address='Jackson, MS, USA',
+                                                          latitude=32.310251, longitude=-90.3289724)
+            first_result = self.ballot_manager.find_closest_ballot_returned('Jackson, MS')
+            second_result = self.ballot_manager.find_closest_ballot_returned('jackson  MS')
+            geocoded_address_memory_cache.clear()
+            # After a restart, the address comes from the GeocodedAddress table
+            third_result = BallotReturnedManager().find_closest_ballot_returned('Jackson, MS.')
+            self.assertEqual(google_client.geocode.call_count, 1)
+        self.assertTrue(first_result['ballot_returned_found'])
+        self.assertEqual(second_result['ballot_returned'], first_result['ballot_returned'])
+        self.assertEqual(third_result['ballot_returned'], first_result['ballot_returned'])
+        self.assertEqual(GeocodedAddress.objects.get().normalized_address, 'jackson ms')
+
+    def test_addresses_the_geocoder_cannot_find_are_remembered(self):
+        with mock.patch('ballot.models.get_geocoder_for_service') as mock_geopy:
+            google_client = mock_geopy('google')()
+            google_client.geocode.return_value = None
+            self.ballot_manager.find_closest_ballot_returned('blah bal blh, OK')
+            self.ballot_manager.find_closest_ballot_returned('blah bal blh, OK')
+            self.assertEqual(google_client.geocode.call_count, 1)
+        self.assertFalse(GeocodedAddress.objects.get().location_found)
+
+
+class FilterForLocalDuplicatesTestCase(TestCase):
+
+    def setUp(self):
+        BallotItem.objects.create(google_civic_election_id=4184, polling_location_we_vote_id='wv01ploc1',
+                                  state_code='MS', ballot_item_display_name='Mayor of Coldwater',
+                                  contest_office_we_vote_id='wv01off1')
+        BallotReturned.objects.create(google_civic_election_id=4184, polling_location_we_vote_id='wv01ploc1',
+                                      normalized_line1='13247 arkabutla rd', normalized_zip='38618')
+
+    def test_ballot_items_bulk_filter_matches_per_record_filter(self):
+        structured_json = [
+            # Same polling location and display name, different case
+            {'google_civic_election_id': '4184', 'polling_location_we_vote_id': 'WV01PLOC1', 'state_code': 'MS',
+             'ballot_item_display_name': 'mayor of coldwater', 'contest_office_we_vote_id': 'wv02off9'},
+            # Without a state_code we don't filter by state
+            {'google_civic_election_id': '4184', 'polling_location_we_vote_id': 'wv01ploc1',
+             'ballot_item_display_name': 'Mayor of Coldwater'},
+            # Different polling location
+            {'google_civic_election_id': '4184', 'polling_location_we_vote_id': 'wv01ploc2', 'state_code': 'MS',
+             'ballot_item_display_name': 'Mayor of Coldwater'},
+            # Different election
+            {'google_civic_election_id': '4185', 'polling_location_we_vote_id': 'wv01ploc1', 'state_code': 'MS',
+             'ballot_item_display_name': 'Mayor of Coldwater'},
+            # Without a polling location we don't look for duplicates
+            {'google_civic_election_id': '4184', 'ballot_item_display_name': 'Mayor of Coldwater'},
+        ]
+        bulk_results = filter_ballot_items_structured_json_for_local_duplicates(structured_json)
+        per_record_results = filter_ballot_items_structured_json_for_local_duplicates(
+            structured_json, per_record_lookup=True)
+        self.assertEqual(bulk_results['duplicates_removed'], 2)
+        self.assertEqual(bulk_results['structured_json'], structured_json[2:])
+        self.assertEqual(bulk_results['structured_json'], per_record_results['structured_json'])
+
+    def test_ballot_returned_bulk_filter_matches_per_record_filter(self):
+        structured_json = [
+            # The same entry we already have is not a duplicate
+            {'google_civic_election_id': 4184, 'polling_location_we_vote_id': 'wv01ploc1',
+             'normalized_line1': '13247 arkabutla rd', 'normalized_zip': '38618'},
+            # Same address under a different polling location
+            {'google_civic_election_id': 4184, 'polling_location_we_vote_id': 'wv02ploc7',
+             'normalized_line1': '13247 Arkabutla Rd', 'normalized_zip': '38618'},
+            {'google_civic_election_id': 4184, 'polling_location_we_vote_id': 'wv02ploc8',
+             'normalized_line1': '1 main st', 'normalized_zip': '38618'},
+        ]
+        bulk_results = filter_ballot_returned_structured_json_for_local_duplicates(structured_json)
+        per_record_results = filter_ballot_returned_structured_json_for_local_duplicates(
+            structured_json, per_record_lookup=True)
+        self.assertEqual(bulk_results['duplicates_removed'], 1)
+        self.assertEqual(bulk_results['structured_json'], [structured_json[0], structured_json[2]])
+        self.assertEqual(bulk_results['structured_json'], per_record_results['structured_json'])
+
+
+class NearestBallotReturnedTestCase(TestCase):
+
+    def setUp(self):
+        self.ballot_manager = BallotReturnedManager()
+        random.seed(4184)
+        for polling_location_number in range(200):
+            BallotReturned.objects.create(
+                google_civic_election_id=4184, normalized_state='MS',
+                polling_location_we_vote_id='wv01ploc' + str(polling_location_number),
+                latitude=random.uniform(30.2, 35.0), longitude=random.uniform(-91.6, -88.1))
+
+    def test_closest_ballot_matches_sorting_every_ballot_by_distance(self):
+        ballot_returned_query = BallotReturned.objects.filter(google_civic_election_id=4184, normalized_state='MS')
+        ballot_returned_list = list(ballot_returned_query)
+        for _ in range(25):
+            latitude, longitude = random.uniform(30.2, 35.0), random.uniform(-91.6, -88.1)
+            ballot = self.ballot_manager.find_closest_ballot_returned_in_query(
+                ballot_returned_query, latitude, longitude, 4184, 'MS')
+            ballot_sorted_by_distance = sorted(ballot_returned_list, key=lambda one_ballot: (
+                calculate_great_circle_distance_miles(latitude, longitude, one_ballot.latitude, one_ballot.longitude),
+                one_ballot.id))[0]
+            self.assertEqual(ballot.id, ballot_sorted_by_distance.id)
+
+    def test_moving_a_polling_location_rebuilds_the_index(self):
+        ballot_returned_query = BallotReturned.objects.filter(google_civic_election_id=4184, normalized_state='MS')
+        # Somewhere north of every polling location
+        ballot = self.ballot_manager.find_closest_ballot_returned_in_query(
+            ballot_returned_query, 36.5, -89.8, 4184, 'MS')
+        farthest_south_ballot = ballot_returned_query.order_by('latitude')[0]
+        self.assertNotEqual(ballot.id, farthest_south_ballot.id)
+
+        farthest_south_ballot.latitude = 36.4
+        farthest_south_ballot.longitude = -89.8
+        farthest_south_ballot.save()
+        ballot = self.ballot_manager.find_closest_ballot_returned_in_query(
+            ballot_returned_query, 36.5, -89.8, 4184, 'MS')
+        self.assertEqual(ballot.id, farthest_south_ballot.id)
+
+    def test_saving_a_ballot_without_moving_it_keeps_the_index(self):
+        ballot_returned_query = BallotReturned.objects.filter(google_civic_election_id=4184, normalized_state='MS')
+        location_index = retrieve_ballot_returned_location_index(ballot_returned_query, 4184, 'MS')
+
+        ballot = ballot_returned_query.order_by('latitude')[0]
+        ballot.ballot_location_display_name = 'Coldwater'
+        ballot.save()
+        self.assertIs(retrieve_ballot_returned_location_index(ballot_returned_query, 4184, 'MS'), location_index)
+
+        ballot.latitude += 0.1
+        ballot.save()
+        self.assertIsNot(retrieve_ballot_returned_location_index(ballot_returned_query, 4184, 'MS'), location_index)
+
+    @unittest.skipUnless(os.environ.get('WE_VOTE_RUN_BENCHMARKS'), "Set WE_VOTE_RUN_BENCHMARKS to run")
+    def test_benchmark_nearest_location_index_with_100000_polling_locations(self):
+        location_list = [(location_number, random.uniform(32.5, 42.0), random.uniform(-124.4, -114.1))
+                         for location_number in range(100000)]
+        location_index = NearestLocationIndex(location_list)
+
+        address_list = [(random.uniform(32.5, 42.0), random.uniform(-124.4, -114.1)) for _ in range(1000)]
+        for latitude, longitude in address_list:
+            location_index.find_nearest(latitude, longitude)
+
+        # Check a few lookups against the distance to every polling location
+        for latitude, longitude in address_list[:10]:
+            closest_location = min(location_list, key=lambda one_location: (calculate_great_circle_distance_miles(
+                latitude, longitude, one_location[1], one_location[2]), one_location[0]))
+            self.assertEqual(location_index.find_nearest(latitude, longitude), closest_location[0])
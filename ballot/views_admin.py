@@ -17,6 +17,7 @@ from django.contrib.messages import get_messages
 from django.db.models import Q
 from django.http import HttpResponse
 from django.shortcuts import render
+from django.views.decorators.gzip import gzip_page
 from election.models import Election, ElectionManager
 from geopy.geocoders import get_geocoder_for_service
 from measure.models import ContestMeasure, ContestMeasureManager
@@ -24,7 +25,7 @@ from polling_location.models import PollingLocation, PollingLocationManager
 import time
 from voter.models import voter_has_authority
 import wevote_functions.admin
-from wevote_functions.functions import convert_to_int, positive_value_exists
+from wevote_functions.functions import convert_to_int, positive_value_exists, sync_out_json_response
 import json
 
 BALLOT_ITEMS_SYNC_URL = get_environment_variable("BALLOT_ITEMS_SYNC_URL")  # ballotItemsSyncOut
@@ -36,6 +37,7 @@ logger = wevote_functions.admin.get_logger(__name__)
 
 
 # This page does not need to be protected.
+@gzip_page
 def ballot_items_sync_out_view(request):  # ballotItemsSyncOut
     google_civic_election_id = convert_to_int(request.GET.get('google_civic_election_id', 0))
     state_code = request.GET.get('state_code', False)
@@ -59,16 +61,16 @@ def ballot_items_sync_out_view(request):  # ballotItemsSyncOut
 
         # serializer = BallotItemSerializer(ballot_item_list, many=True)
         # return Response(serializer.data)
-        ballot_item_list_dict = ballot_item_list.values('ballot_item_display_name', 'contest_office_we_vote_id',
-                                                        'contest_measure_we_vote_id', 'google_ballot_placement',
-                                                        'google_civic_election_id', 'state_code', 'local_ballot_order',
-                                                        'measure_subtitle', 'measure_url',
-                                                        'no_vote_description',
-                                                        'polling_location_we_vote_id',
-                                                        'yes_vote_description')
-        if ballot_item_list_dict:
-            ballot_item_list_json = list(ballot_item_list_dict)
-            return HttpResponse(json.dumps(ballot_item_list_json), content_type='application/json')
+        ballot_item_field_list = ['ballot_item_display_name', 'contest_office_we_vote_id',
+                                  'contest_measure_we_vote_id', 'google_ballot_placement',
+                                  'google_civic_election_id', 'state_code', 'local_ballot_order',
+                                  'measure_subtitle', 'measure_url',
+                                  'no_vote_description',
+                                  'polling_location_we_vote_id',
+                                  'yes_vote_description']
+        return sync_out_json_response(request, ballot_item_list, ballot_item_field_list,
+                                      {'success': False, 'status': 'BALLOT_ITEM_LIST_MISSING'},
+                                      updated_since_field='date_last_changed')
     except Exception as e:
         pass
 
@@ -148,6 +150,7 @@ def ballot_returned_delete_process_view(request, ballot_returned_id):
 
 
 # This page does not need to be protected.
+@gzip_page
 def ballot_returned_sync_out_view(request):  # ballotReturnedSyncOut
     google_civic_election_id = convert_to_int(request.GET.get('google_civic_election_id', 0))
     state_code = request.GET.get('state_code', '')
@@ -171,18 +174,17 @@ def ballot_returned_sync_out_view(request):  # ballotReturnedSyncOut
 
         # serializer = BallotReturnedSerializer(ballot_returned_list, many=True)
         # return Response(serializer.data)
-        if ballot_returned_list:
-            ballot_returned_list = ballot_returned_list.extra(
-                select={'election_day_text': "to_char(election_date, 'YYYY-MM-DD')"})
-            ballot_returned_list_dict = ballot_returned_list.values('election_day_text', 'election_description_text',
-                                                                    'google_civic_election_id', 'latitude', 'longitude',
-                                                                    'normalized_line1', 'normalized_line2',
-                                                                    'normalized_city', 'normalized_state',
-                                                                    'normalized_zip', 'polling_location_we_vote_id',
-                                                                    'text_for_map_search')
-            if ballot_returned_list_dict:
-                ballot_returned_list_json = list(ballot_returned_list_dict)
-                return HttpResponse(json.dumps(ballot_returned_list_json), content_type='application/json')
+        ballot_returned_list = ballot_returned_list.extra(
+            select={'election_day_text': "to_char(election_date, 'YYYY-MM-DD')"})
+        ballot_returned_field_list = ['election_day_text', 'election_description_text',
+                                      'google_civic_election_id', 'latitude', 'longitude',
+                                      'normalized_line1', 'normalized_line2',
+                                      'normalized_city', 'normalized_state',
+                                      'normalized_zip', 'polling_location_we_vote_id',
+                                      'text_for_map_search']
+        return sync_out_json_response(request, ballot_returned_list, ballot_returned_field_list,
+                                      {'success': False, 'status': 'BALLOT_RETURNED_LIST_MISSING'},
+                                      updated_since_field='date_last_changed')
     except Exception as e:
         pass
 
@@ -214,7 +216,9 @@ def ballot_items_import_from_master_server_view(request):
     google_civic_election_id = convert_to_int(request.GET.get('google_civic_election_id', 0))
     state_code = request.GET.get('state_code', '')
 
-    results = ballot_items_import_from_master_server(request, google_civic_election_id, state_code)
+    start_over = positive_value_exists(request.GET.get('start_over', False))
+    results = ballot_items_import_from_master_server(request, google_civic_election_id, state_code,
+                                                     start_over=start_over)
 
     if not results['success']:
         messages.add_message(request, messages.ERROR, results['status'])
@@ -248,7 +252,9 @@ def ballot_returned_import_from_master_server_view(request):
     state_code = request.GET.get('state_code', '')
 
     print("Importing ballot returned from master server")
-    results = ballot_returned_import_from_master_server(request, google_civic_election_id, state_code)
+    start_over = positive_value_exists(request.GET.get('start_over', False))
+    results = ballot_returned_import_from_master_server(request, google_civic_election_id, state_code,
+                                                        start_over=start_over)
 
     if not results['success']:
         messages.add_message(request, messages.ERROR, results['status'])
@@ -25,7 +25,7 @@ from twitter.models import TwitterUserManager
 import urllib.request
 import wevote_functions.admin
 from wevote_functions.functions import add_period_to_middle_name_initial, add_period_to_name_prefix_and_suffix, \
-    convert_to_political_party_constant, positive_value_exists, process_request_from_master, convert_to_int, \
+    convert_to_political_party_constant, positive_value_exists, process_pages_from_master, convert_to_int, \
     extract_twitter_handle_from_text_string, extract_website_from_url, \
     remove_period_from_middle_name_initial, remove_period_from_name_prefix_and_suffix
 
@@ -137,7 +137,7 @@ def candidates_import_from_sample_file():
     return candidates_import_from_structured_json(structured_json)
 
 
-def candidates_import_from_master_server(request, google_civic_election_id='', state_code=''):
+def candidates_import_from_master_server(request, google_civic_election_id='', state_code='', start_over=False):
     """
     Get the json data, and either create new entries or update existing
     :param request:
@@ -146,23 +146,18 @@ def candidates_import_from_master_server(request, google_civic_election_id='', s
     :return:
     """
 
-    import_results, structured_json = process_request_from_master(
+    import_results = process_pages_from_master(
         request, "Loading Candidates from We Vote Master servers",
         CANDIDATES_SYNC_URL,
         {
             "key": WE_VOTE_API_KEY,  # This comes from an environment variable
             "google_civic_election_id": str(google_civic_election_id),
             "state_code": state_code,
-        }
-    )
-
-    if import_results['success']:
-        results = filter_candidates_structured_json_for_local_duplicates(structured_json)
-        filtered_structured_json = results['structured_json']
-        duplicates_removed = results['duplicates_removed']
-
-        import_results = candidates_import_from_structured_json(filtered_structured_json)
-        import_results['duplicates_removed'] = duplicates_removed
+        },
+        import_function=candidates_import_from_structured_json,
+        filter_function=filter_candidates_structured_json_for_local_duplicates,
+        sync_name='candidates',
+        start_over=start_over)
 
     return import_results
 
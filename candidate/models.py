@@ -84,6 +84,30 @@ CANDIDATE_UNIQUE_IDENTIFIERS = [
 ]
 
 
+# The fields voterBallotItemsRetrieve needs to display a candidate, including those behind candidate_photo_url(),
+#  display_candidate_name() and political_party_display(). Used with retrieve_candidates_for_office_list.
+CANDIDATE_BALLOT_ITEM_DISPLAY_FIELDS = [
+    'candidate_name',
+    'candidate_twitter_handle',
+    'contest_office_id',
+    'contest_office_we_vote_id',
+    'facebook_profile_image_url_https',
+    'id',
+    'order_on_ballot',
+    'party',
+    'photo_url',
+    'photo_url_from_maplight',
+    'photo_url_from_vote_smart',
+    'twitter_description',
+    'twitter_followers_count',
+    'twitter_profile_image_url_https',
+    'we_vote_hosted_profile_image_url_large',
+    'we_vote_hosted_profile_image_url_medium',
+    'we_vote_hosted_profile_image_url_tiny',
+    'we_vote_id',
+]
+
+
 class CandidateCampaignListManager(models.Model):
     """
     This is a class to make it easy to retrieve lists of Candidates
@@ -141,6 +165,66 @@ class CandidateCampaignListManager(models.Model):
         }
         return results
 
+    def retrieve_candidates_for_office_list(self, office_id_list=[], office_we_vote_id_list=[], only_fields=[],
+                                            read_only=False):
+        """
+        Retrieve the candidates for every office on a ballot with one query, instead of calling
+        retrieve_all_candidates_for_office once per office. The candidates are grouped by office in memory, and each
+        office's candidates are in the same order retrieve_all_candidates_for_office returns them.
+        :param office_id_list:
+        :param office_we_vote_id_list:
+        :param only_fields: Limit the columns retrieved, like CANDIDATE_BALLOT_ITEM_DISPLAY_FIELDS. Accessing a
+         field not in this list costs another query per candidate.
+        :param read_only:
+        :return: candidate_list_by_office_id (keyed on contest_office_id as stored, a string) and
+         candidate_list_by_office_we_vote_id
+        """
+        status = ""
+        success = True
+        candidate_list_by_office_id = {}
+        candidate_list_by_office_we_vote_id = {}
+        office_id_list = [one_id for one_id in office_id_list if positive_value_exists(one_id)]
+        office_we_vote_id_list = [one_we_vote_id for one_we_vote_id in office_we_vote_id_list
+                                  if positive_value_exists(one_we_vote_id)]
+
+        if not len(office_id_list) and not len(office_we_vote_id_list):
+            status += 'RETRIEVE_CANDIDATES_FOR_OFFICE_LIST-NO_OFFICES '
+        else:
+            try:
+                if read_only:
+                    candidate_queryset = CandidateCampaign.objects.using('readonly').all()
+                else:
+                    candidate_queryset = CandidateCampaign.objects.all()
+                candidate_queryset = candidate_queryset.filter(
+                    Q(contest_office_id__in=office_id_list) |
+                    Q(contest_office_we_vote_id__in=office_we_vote_id_list))
+                if len(only_fields):
+                    # We need the office identifiers to group the candidates
+                    candidate_queryset = candidate_queryset.only(
+                        *set(only_fields) | {'contest_office_id', 'contest_office_we_vote_id'})
+                candidate_queryset = candidate_queryset.order_by('-twitter_followers_count')
+
+                for candidate in candidate_queryset:
+                    if positive_value_exists(candidate.contest_office_id):
+                        candidate_list_by_office_id.setdefault(candidate.contest_office_id, []).append(candidate)
+                    if positive_value_exists(candidate.contest_office_we_vote_id):
+                        candidate_list_by_office_we_vote_id.setdefault(
+                            candidate.contest_office_we_vote_id, []).append(candidate)
+                status += 'RETRIEVE_CANDIDATES_FOR_OFFICE_LIST-CANDIDATES_RETRIEVED '
+            except Exception as e:
+                success = False
+                status += 'FAILED retrieve_candidates_for_office_list ' \
+                          '{error} [type: {error_type}] '.format(error=e, error_type=type(e))
+                handle_exception(e, logger=logger, exception_message=status)
+
+        results = {
+            'success':                              success,
+            'status':                               status,
+            'candidate_list_by_office_id':          candidate_list_by_office_id,
+            'candidate_list_by_office_we_vote_id':  candidate_list_by_office_we_vote_id,
+        }
+        return results
+
     def retrieve_all_candidates_for_upcoming_election(self, google_civic_election_id=0, state_code='',
                                                       return_list_of_objects=False):
         candidate_list_objects = []
@@ -309,6 +393,31 @@ class CandidateCampaignListManager(models.Model):
         }
         return results
 
+    def fetch_candidate_we_vote_id_list_for_office_list(self, office_we_vote_id_list, read_only=True):
+        """
+        Retrieve the we_vote_ids of every candidate running for any of these offices, with one query
+        :param office_we_vote_id_list:
+        :param read_only:
+        :return:
+        """
+        candidate_we_vote_id_list = []
+        office_we_vote_id_list = [one_we_vote_id for one_we_vote_id in office_we_vote_id_list
+                                  if positive_value_exists(one_we_vote_id)]
+        if not len(office_we_vote_id_list):
+            return candidate_we_vote_id_list
+
+        try:
+            if read_only:
+                candidate_queryset = CandidateCampaign.objects.using('readonly').all()
+            else:
+                candidate_queryset = CandidateCampaign.objects.all()
+            candidate_queryset = candidate_queryset.filter(contest_office_we_vote_id__in=office_we_vote_id_list)
+            candidate_we_vote_id_list = list(candidate_queryset.values_list('we_vote_id', flat=True))
+        except Exception as e:
+            handle_exception(e, logger=logger)
+
+        return candidate_we_vote_id_list
+
     def is_automatic_merge_ok(self, candidate_option1, candidate_option2):
         automatic_merge_ok = True
         status = ""
@@ -1176,6 +1285,7 @@ class CandidateCampaign(models.Model):
     # Candidacy Declared, (and others for withdrawing, etc.)
     candidate_participation_status = models.CharField(verbose_name="candidate participation status",
                                                       max_length=255, null=True, blank=True)
+    date_last_changed = models.DateTimeField(verbose_name='date last changed', null=True, auto_now=True)
 
     def election(self):
         try:
@@ -2516,11 +2626,12 @@ class CandidateCampaignManager(models.Model):
             }
         return results
 
-    def update_candidate_row_entry(self, candidate_we_vote_id, update_values):
+    def update_candidate_row_entry(self, candidate_we_vote_id, update_values, existing_candidate=None):
         """
         Update CandidateCampaign table entry with matching we_vote_id
         :param candidate_we_vote_id:
         :param update_values:
+        :param existing_candidate: The entry with this we_vote_id, when the caller already retrieved it
         :return:
         """
 
@@ -2530,7 +2641,10 @@ class CandidateCampaignManager(models.Model):
         existing_candidate_entry = ''
 
         try:
-            existing_candidate_entry = CandidateCampaign.objects.get(we_vote_id__iexact=candidate_we_vote_id)
+            if existing_candidate is not None:
+                existing_candidate_entry = existing_candidate
+            else:
+                existing_candidate_entry = CandidateCampaign.objects.get(we_vote_id__iexact=candidate_we_vote_id)
             values_changed = False
 
             if existing_candidate_entry:
@@ -23,6 +23,7 @@ from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.contrib.messages import get_messages
 from django.shortcuts import render
+from django.views.decorators.gzip import gzip_page
 from election.models import ElectionManager
 from exception.models import handle_record_found_more_than_one_exception,\
     handle_record_not_found_exception, handle_record_not_saved_exception, print_to_log
@@ -40,8 +41,8 @@ from twitter.models import TwitterLinkPossibility
 from voter.models import voter_has_authority
 from voter_guide.models import VoterGuide
 import wevote_functions.admin
-from wevote_functions.functions import convert_to_int, extract_twitter_handle_from_text_string, \
-    positive_value_exists, STATE_CODE_MAP
+from wevote_functions.functions import convert_to_int, extract_twitter_handle_from_text_string, positive_value_exists, \
+    STATE_CODE_MAP, sync_out_json_response
 from wevote_settings.models import RemoteRequestHistory, \
     RETRIEVE_POSSIBLE_GOOGLE_LINKS, RETRIEVE_POSSIBLE_TWITTER_HANDLES
 from django.http import HttpResponse
@@ -54,6 +55,7 @@ logger = wevote_functions.admin.get_logger(__name__)
 
 
 # This page does not need to be protected.
+@gzip_page
 def candidates_sync_out_view(request):  # candidatesSyncOut
     google_civic_election_id = convert_to_int(request.GET.get('google_civic_election_id', 0))
     state_code = request.GET.get('state_code', '')
@@ -99,40 +101,28 @@ def candidates_sync_out_view(request):  # candidatesSyncOut
 
                 candidate_list = candidate_list.filter(final_filters)
 
-        candidate_list_dict = candidate_list.values('we_vote_id', 'maplight_id', 'vote_smart_id', 'contest_office_name',
-                                                    'contest_office_we_vote_id', 'politician_we_vote_id',
-                                                    'candidate_name', 'google_civic_candidate_name',
-                                                    'google_civic_candidate_name2', 'google_civic_candidate_name3',
-                                                    'party',
-                                                    'photo_url', 'photo_url_from_maplight',
-                                                    'photo_url_from_vote_smart', 'order_on_ballot',
-                                                    'google_civic_election_id', 'ocd_division_id', 'state_code',
-                                                    'candidate_url', 'facebook_url', 'twitter_url',
-                                                    'twitter_user_id', 'candidate_twitter_handle', 'twitter_name',
-                                                    'twitter_location', 'twitter_followers_count',
-                                                    'twitter_profile_image_url_https', 'twitter_description',
-                                                    'google_plus_url', 'youtube_url', 'candidate_email',
-                                                    'candidate_phone', 'wikipedia_page_id', 'wikipedia_page_title',
-                                                    'wikipedia_photo_url',
-                                                    'ballotpedia_candidate_id', 'ballotpedia_candidate_name',
-                                                    'ballotpedia_candidate_summary', 'ballotpedia_candidate_url',
-                                                    'ballotpedia_profile_image_url_https',
-                                                    'ballotpedia_election_id', 'ballotpedia_image_id',
-                                                    'ballotpedia_office_id', 'ballotpedia_person_id',
-                                                    'ballotpedia_race_id',
-                                                    'ballotpedia_page_title', 'ballotpedia_photo_url',
-                                                    'ballot_guide_official_statement',
-                                                    'birth_day_text', 'candidate_gender',
-                                                    'candidate_is_incumbent', 'candidate_is_top_ticket',
-                                                    'candidate_participation_status',
-                                                    'crowdpac_candidate_id',
-                                                    'we_vote_hosted_profile_image_url_large',
-                                                    'we_vote_hosted_profile_image_url_medium',
-                                                    'we_vote_hosted_profile_image_url_tiny',
-                                                    )
-        if candidate_list_dict:
-            candidate_list_json = list(candidate_list_dict)
-            return HttpResponse(json.dumps(candidate_list_json), content_type='application/json')
+        candidate_field_list = ['we_vote_id', 'maplight_id', 'vote_smart_id', 'contest_office_name',
+                                'contest_office_we_vote_id', 'politician_we_vote_id', 'candidate_name',
+                                'google_civic_candidate_name', 'google_civic_candidate_name2',
+                                'google_civic_candidate_name3', 'party', 'photo_url', 'photo_url_from_maplight',
+                                'photo_url_from_vote_smart', 'order_on_ballot', 'google_civic_election_id',
+                                'ocd_division_id', 'state_code', 'candidate_url', 'facebook_url', 'twitter_url',
+                                'twitter_user_id', 'candidate_twitter_handle', 'twitter_name', 'twitter_location',
+                                'twitter_followers_count', 'twitter_profile_image_url_https', 'twitter_description',
+                                'google_plus_url', 'youtube_url', 'candidate_email', 'candidate_phone',
+                                'wikipedia_page_id', 'wikipedia_page_title', 'wikipedia_photo_url',
+                                'ballotpedia_candidate_id', 'ballotpedia_candidate_name',
+                                'ballotpedia_candidate_summary', 'ballotpedia_candidate_url',
+                                'ballotpedia_profile_image_url_https', 'ballotpedia_election_id',
+                                'ballotpedia_image_id', 'ballotpedia_office_id', 'ballotpedia_person_id',
+                                'ballotpedia_race_id', 'ballotpedia_page_title', 'ballotpedia_photo_url',
+                                'ballot_guide_official_statement', 'birth_day_text', 'candidate_gender',
+                                'candidate_is_incumbent', 'candidate_is_top_ticket', 'candidate_participation_status',
+                                'crowdpac_candidate_id', 'we_vote_hosted_profile_image_url_large',
+                                'we_vote_hosted_profile_image_url_medium', 'we_vote_hosted_profile_image_url_tiny']
+        return sync_out_json_response(request, candidate_list, candidate_field_list,
+                                      {'success': False, 'status': 'CANDIDATE_LIST_MISSING'},
+                                      updated_since_field='date_last_changed')
     except Exception as e:
         pass
 
@@ -158,7 +148,8 @@ def candidates_import_from_master_server_view(request):
     google_civic_election_id = convert_to_int(request.GET.get('google_civic_election_id', 0))
     state_code = request.GET.get('state_code', '')
 
-    results = candidates_import_from_master_server(request, google_civic_election_id, state_code)
+    start_over = positive_value_exists(request.GET.get('start_over', False))
+    results = candidates_import_from_master_server(request, google_civic_election_id, state_code, start_over=start_over)
 
     if not results['success']:
         messages.add_message(request, messages.ERROR, results['status'])
@@ -146,8 +146,16 @@ MIDDLEWARE_CLASSES = (
     'django.middleware.security.SecurityMiddleware',
     'wevote_social.middleware.SocialMiddleware',
     'wevote_social.middleware.WeVoteSocialAuthExceptionMiddleware',
+    'voter.middleware.VoterCacheRequestMemoMiddleware',
 )
 
+CACHES = {
+    'default': {
+        'BACKEND':  'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'wevote-default',
+    },
+}
+
 AUTHENTICATION_BACKENDS = (
     'social_core.backends.facebook.FacebookOAuth2',
     'social_core.backends.google.GoogleOAuth2',
@@ -34,6 +34,9 @@ DATABASES = {
         'PASSWORD': get_environment_variable('DATABASE_PASSWORD_READONLY'),
         'HOST':     get_environment_variable('DATABASE_HOST_READONLY'),
         'PORT':     get_environment_variable('DATABASE_PORT_READONLY'),
+        'TEST': {
+            'MIRROR': 'default',  # In tests, ".using('readonly')" reads what was just written to the test database
+        },
     },
     'analytics': {
         'ENGINE':   get_environment_variable('DATABASE_ENGINE_ANALYTICS'),
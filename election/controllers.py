@@ -2,14 +2,25 @@
 # Brought to you by We Vote. Be good.
 # -*- coding: UTF-8 -*-
 
-from .models import Election, ElectionManager
+from .models import BallotRetrieveJobManager, Election, ElectionManager
+from ballot.controllers import refresh_voter_ballots_from_polling_location
 from ballot.models import BallotReturned
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from config.base import get_environment_variable
+from django.db import connection
+from django.utils.timezone import now
+from exception.models import handle_exception
 from import_export_google_civic.controllers import retrieve_from_google_civic_api_election_query, \
+    retrieve_one_ballot_from_google_civic_api, store_one_ballot_from_google_civic_api, \
     store_results_from_google_civic_api_election_query
 import json
+from polling_location.models import PollingLocation
+import time
 import wevote_functions.admin
-from wevote_functions.functions import convert_to_int, positive_value_exists, process_request_from_master
+from wevote_functions.functions import calculate_retry_backoff_seconds, convert_to_int, positive_value_exists, \
+    process_pages_from_master, TokenBucketRateLimiter
+from wevote_settings.models import BACKGROUND_JOB_CANCELED, BACKGROUND_JOB_COMPLETED, BACKGROUND_JOB_FAILED, \
+    BACKGROUND_JOB_HEARTBEAT_SECONDS
 
 logger = wevote_functions.admin.get_logger(__name__)
 
@@ -53,17 +64,14 @@ def elections_import_from_master_server(request=None):
     Get the json data, and either create new entries or update existing
     :return:
     """
-    import_results, structured_json = process_request_from_master(
+    import_results = process_pages_from_master(
         request, "Loading Election from We Vote Master servers",
         ELECTIONS_SYNC_URL, {
             "key":    WE_VOTE_API_KEY,  # This comes from an environment variable
-        }
-    )
-
-    if not import_results['success']:
-        return import_results
+        },
+        import_function=elections_import_from_structured_json)
 
-    return elections_import_from_structured_json(structured_json)
+    return import_results
 
 
 def elections_import_from_structured_json(structured_json):
@@ -258,3 +266,241 @@ def elections_sync_out_list_for_api(voter_device_id):
         'json_data': json_data,
     }
     return results
+
+
+# Google Civic error reasons that mean "try again later" rather than "there is no ballot at this address"
+GOOGLE_CIVIC_RETRYABLE_ERROR_REASONS = ['rateLimitExceeded', 'userRateLimitExceeded', 'backendError', 'internalError']
+BALLOT_RETRIEVE_JOB_MAXIMUM_ATTEMPTS = 4
+
+
+def retrieve_polling_location_query_for_ballot_retrieve(state_code):
+    """
+    The polling locations we use to build up the ballot data for one state, in id order, so that a job that is resumed
+    can pick up after the last id it finished
+    """
+    polling_location_query = PollingLocation.objects.all()
+    polling_location_query = polling_location_query.filter(state__iexact=state_code)
+    # If Google wasn't able to return ballot data in the past ignore that polling location
+    polling_location_query = polling_location_query.filter(google_response_address_not_found__isnull=True)
+    return polling_location_query.order_by('id')
+
+
+def retrieve_one_ballot_from_google_civic_api_with_retries(text_for_map_search, google_civic_election_id,
+                                                           rate_limiter,
+                                                           maximum_attempts=BALLOT_RETRIEVE_JOB_MAXIMUM_ATTEMPTS):
+    """
+    Runs in a worker thread. Waits for the shared rate limiter before every call, and retries with backoff when
+    Google tells us to slow down or the request fails outright.
+    """
+    attempts = 0
+    while True:
+        attempts += 1
+        rate_limiter.acquire()
+        try:
+            one_ballot_results = retrieve_one_ballot_from_google_civic_api(text_for_map_search,
+                                                                           google_civic_election_id)
+            retryable = False
+            error = one_ballot_results.get('structured_json', {}).get('error', {})
+            for one_error_from_google in error.get('errors', []):
+                if one_error_from_google.get('reason', '') in GOOGLE_CIVIC_RETRYABLE_ERROR_REASONS:
+                    retryable = True
+        except Exception as e:
+            # Connection failures, timeouts and responses that are not JSON
+            one_ballot_results = {
+                'success':  False,
+                'status':   "GOOGLE_CIVIC_REQUEST_EXCEPTION: " + str(e) + " ",
+            }
+            retryable = True
+        finally:
+            # retrieve_one_ballot_from_google_civic_api records an api counter entry from this thread
+            connection.close()
+
+        if not retryable or attempts >= maximum_attempts:
+            one_ballot_results['attempts'] = attempts
+            one_ballot_results['retryable_failure'] = retryable
+            return one_ballot_results
+        time.sleep(calculate_retry_backoff_seconds(attempts))
+
+
+def store_polling_location_ballot_from_google_civic(polling_location, one_ballot_results, google_civic_election_id):
+    """
+    Store the ballot retrieved for one polling location, and refresh the voter ballots copied from it
+    """
+    status = ""
+    success = False
+    ballots_refreshed = 0
+    if one_ballot_results.get('success', False):
+        one_ballot_json = one_ballot_results['structured_json']
+        store_one_ballot_results = store_one_ballot_from_google_civic_api(one_ballot_json, 0,
+                                                                          polling_location.we_vote_id)
+        status += store_one_ballot_results.get('status', '')
+        if store_one_ballot_results['success']:
+            success = True
+            if store_one_ballot_results['ballot_returned_found']:
+                ballot_returned = store_one_ballot_results['ballot_returned']
+                # Now refresh all of the other copies of this ballot
+                if positive_value_exists(polling_location.we_vote_id) \
+                        and positive_value_exists(google_civic_election_id):
+                    refresh_ballot_results = refresh_voter_ballots_from_polling_location(
+                        ballot_returned, google_civic_election_id)
+                    ballots_refreshed += refresh_ballot_results['ballots_refreshed']
+    elif positive_value_exists(one_ballot_results.get('google_response_address_not_found', False)):
+        try:
+            if not polling_location.google_response_address_not_found:
+                polling_location.google_response_address_not_found = 1
+            else:
+                polling_location.google_response_address_not_found += 1
+            polling_location.save()
+            status += "POLLING_LOCATION_ADDRESS_NOT_FOUND_UPDATED "
+        except Exception:
+            status += "POLLING_LOCATION_ADDRESS_NOT_FOUND_NOT_UPDATED "
+
+    results = {
+        'success':              success,
+        'status':               status,
+        'ballots_refreshed':    ballots_refreshed,
+    }
+    return results
+
+
+def run_ballot_retrieve_job(ballot_retrieve_job, max_workers=8, requests_per_second=10.0):
+    """
+    Retrieve ballots from Google Civic for every polling location in the job. The HTTP requests to Google run in a
+    bounded thread pool, behind one shared rate limiter. Storing the results stays on this thread. Polling locations
+    are worked through one chunk at a time, in id order. When a chunk is finished we save the id of its last polling
+    location, so a job that is killed resumes after it. Each polling location is also checkpointed as soon as it is
+    stored, so the part of a chunk that was finished is not retrieved again. While a chunk is running we keep checking
+    in, and we stop as soon as the job is canceled or claimed by another worker.
+    :param ballot_retrieve_job:
+    :param max_workers: The maximum number of requests to Google Civic in flight at once
+    :param requests_per_second: Across all of the threads
+    :return:
+    """
+    status = ""
+    job_manager = BallotRetrieveJobManager()
+    job_id = ballot_retrieve_job.id
+    worker_name = ballot_retrieve_job.worker_name
+    google_civic_election_id = ballot_retrieve_job.google_civic_election_id
+
+    counter_names = ['last_polling_location_id_done', 'polling_locations_done', 'ballots_retrieved',
+                     'ballots_not_retrieved',
+                     'ballots_with_contests_retrieved', 'polling_locations_retrieved',
+                     'ballots_with_election_administration_data', 'ballots_refreshed', 'retries']
+    # When resuming, keep counting from where the last worker stopped
+    counters = {counter_name: getattr(ballot_retrieve_job, counter_name) for counter_name in counter_names}
+
+    def save_progress(**extra_fields):
+        return job_manager.save_job_progress(job_id, worker_name, **dict(counters, **extra_fields))
+
+    try:
+        state_code = ballot_retrieve_job.state_code
+        if not positive_value_exists(state_code):
+            election_results = ElectionManager().retrieve_election(google_civic_election_id)
+            if election_results['election_found']:
+                state_code = election_results['election'].get_election_state()
+        if not positive_value_exists(state_code):
+            status += "BALLOT_RETRIEVE_JOB-STATE_CODE_MISSING "
+            save_progress(job_status=BACKGROUND_JOB_FAILED, status=status, date_completed=now())
+            return {'success': False, 'status': status}
+
+        polling_location_query = retrieve_polling_location_query_for_ballot_retrieve(state_code)
+        last_polling_location_id_in_job = ballot_retrieve_job.last_polling_location_id_in_job
+        job_fields_to_save = {'state_code': state_code}
+        if not positive_value_exists(last_polling_location_id_in_job):
+            # Fix the polling locations this job covers when it first starts, so the polling locations that drop out of
+            #  the query while we work (because Google couldn't find them) don't let others in past the import_limit
+            polling_location_id_list = list(polling_location_query.values_list('id', flat=True)[
+                                            :ballot_retrieve_job.import_limit])
+            if len(polling_location_id_list):
+                last_polling_location_id_in_job = polling_location_id_list[-1]
+            job_fields_to_save['polling_locations_total'] = len(polling_location_id_list)
+            job_fields_to_save['last_polling_location_id_in_job'] = last_polling_location_id_in_job
+        if not save_progress(**job_fields_to_save):
+            status += "BALLOT_RETRIEVE_JOB_CANCELED_OR_CLAIMED_BY_ANOTHER_WORKER "
+            return {'success': False, 'status': status}
+        already_done = job_manager.retrieve_polling_location_we_vote_ids_already_done(job_id)
+
+        rate_limiter = TokenBucketRateLimiter(requests_per_second)
+        # Only hand the pool a few batches at a time, so we can stop promptly when the job is canceled
+        chunk_size = max_workers * 4
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            while positive_value_exists(last_polling_location_id_in_job):
+                if job_manager.fetch_job_status(job_id) == BACKGROUND_JOB_CANCELED:
+                    status += "BALLOT_RETRIEVE_JOB_CANCELED "
+                    return {'success': False, 'status': status}
+
+                polling_location_list = list(polling_location_query.filter(
+                    id__gt=counters['last_polling_location_id_done'],
+                    id__lte=last_polling_location_id_in_job)[:chunk_size])
+                if not len(polling_location_list):
+                    break
+
+                future_to_polling_location = {}
+                for polling_location in polling_location_list:
+                    if polling_location.we_vote_id in already_done:
+                        # Finished by a worker that stopped before it saved the checkpoint for this chunk
+                        counters['polling_locations_done'] += 1
+                        continue
+                    text_for_map_search = polling_location.get_text_for_map_search()
+                    future = executor.submit(retrieve_one_ballot_from_google_civic_api_with_retries,
+                                             text_for_map_search, google_civic_election_id, rate_limiter)
+                    future_to_polling_location[future] = polling_location
+
+                last_heartbeat_time = time.time()
+                for future in as_completed(future_to_polling_location):
+                    polling_location = future_to_polling_location[future]
+                    one_ballot_results = future.result()
+                    store_results = store_polling_location_ballot_from_google_civic(
+                        polling_location, one_ballot_results, google_civic_election_id)
+
+                    counters['retries'] += one_ballot_results['attempts'] - 1
+                    counters['ballots_refreshed'] += store_results['ballots_refreshed']
+                    if store_results['success']:
+                        counters['ballots_retrieved'] += 1
+                    else:
+                        counters['ballots_not_retrieved'] += 1
+                    if one_ballot_results.get('contests_retrieved', False):
+                        counters['ballots_with_contests_retrieved'] += 1
+                    if one_ballot_results.get('polling_location_retrieved', False):
+                        counters['polling_locations_retrieved'] += 1
+                    if one_ballot_results.get('election_administration_data_retrieved', False):
+                        counters['ballots_with_election_administration_data'] += 1
+
+                    is_done = not one_ballot_results['retryable_failure']
+                    if is_done:
+                        counters['polling_locations_done'] += 1
+                    job_manager.save_polling_location_checkpoint(
+                        job_id, polling_location.we_vote_id, is_done, store_results['success'],
+                        one_ballot_results['attempts'],
+                        one_ballot_results.get('status', '') + store_results['status'])
+                    if time.time() - last_heartbeat_time > BACKGROUND_JOB_HEARTBEAT_SECONDS:
+                        # Only check in. The counters are saved with the checkpoint, once the whole chunk is done.
+                        if not job_manager.save_job_progress(job_id, worker_name):
+                            for future_not_started in future_to_polling_location:
+                                future_not_started.cancel()
+                            status += "BALLOT_RETRIEVE_JOB_CANCELED_OR_CLAIMED_BY_ANOTHER_WORKER "
+                            return {'success': False, 'status': status}
+                        last_heartbeat_time = time.time()
+
+                counters['last_polling_location_id_done'] = polling_location_list[-1].id
+                if not save_progress():
+                    status += "BALLOT_RETRIEVE_JOB_CANCELED_OR_CLAIMED_BY_ANOTHER_WORKER "
+                    return {'success': False, 'status': status}
+
+        status += "BALLOT_RETRIEVE_JOB_COMPLETED "
+        if not save_progress(job_status=BACKGROUND_JOB_COMPLETED, status=status, date_completed=now()):
+            # The job was canceled, or claimed by another worker, after the last chunk started
+            status += "BALLOT_RETRIEVE_JOB_CANCELED "
+            return {'success': False, 'status': status}
+        success = True
+    except Exception as e:
+        status += "BALLOT_RETRIEVE_JOB_FAILED: " + str(e) + " "
+        handle_exception(e, logger=logger, exception_message=status)
+        save_progress(job_status=BACKGROUND_JOB_FAILED, status=status, date_completed=now())
+        success = False
+
+    results = {
+        'success':  success,
+        'status':   status,
+    }
+    return results
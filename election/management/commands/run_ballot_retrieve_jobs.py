@@ -0,0 +1,46 @@
+import os
+import socket
+import time
+
+from django.core.management.base import BaseCommand
+from election.controllers import run_ballot_retrieve_job
+from election.models import BallotRetrieveJobManager
+from voter.models import clear_voter_cache_request_memo
+
+
+class Command(BaseCommand):
+    help = 'Runs queued Google Civic ballot retrieve jobs (queued from the election admin pages)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', default=False,
+                            help='Run the jobs that are waiting now, then exit instead of polling for new jobs')
+        parser.add_argument('--max-workers', type=int, default=8,
+                            help='Maximum number of requests to Google Civic in flight at once')
+        parser.add_argument('--requests-per-second', type=float, default=10.0,
+                            help='Rate limit for requests to Google Civic, across all worker threads')
+        parser.add_argument('--poll-seconds', type=int, default=10,
+                            help='How long to wait between checks for new jobs')
+
+    def handle(self, *args, **options):
+        worker_name = '{host}:{pid}'.format(host=socket.gethostname(), pid=os.getpid())
+        job_manager = BallotRetrieveJobManager()
+        self.stdout.write('Ballot retrieve worker {} started\n'.format(worker_name))
+
+        while True:
+            ballot_retrieve_job = job_manager.claim_next_job(worker_name)
+            if ballot_retrieve_job is None:
+                if options['once']:
+                    break
+                time.sleep(options['poll_seconds'])
+                continue
+
+            # Voter lookups are only remembered for one request, or here, for one job
+            clear_voter_cache_request_memo()
+
+            self.stdout.write('Running ballot retrieve job {id} for election {election} {state}\n'.format(
+                id=ballot_retrieve_job.id, election=ballot_retrieve_job.google_civic_election_id,
+                state=ballot_retrieve_job.state_code or ''))
+            results = run_ballot_retrieve_job(ballot_retrieve_job,
+                                              max_workers=options['max_workers'],
+                                              requests_per_second=options['requests_per_second'])
+            self.stdout.write('Job {id}: {status}\n'.format(id=ballot_retrieve_job.id, status=results['status']))
@@ -8,6 +8,7 @@ from django.db.models import Max, Q
 import wevote_functions.admin
 from wevote_functions.functions import convert_date_to_date_as_integer, convert_date_to_we_vote_date_string, \
     convert_to_int, extract_state_from_ocd_division_id, positive_value_exists
+from wevote_settings.models import BackgroundJob, BackgroundJobManager
 
 
 TIME_SPAN_LIST = [
@@ -606,3 +607,104 @@ def fetch_next_election_for_state(state_code):
         return election
     else:
         return Election()
+
+
+class BallotRetrieveJob(BackgroundJob):
+    """
+    A request to retrieve ballots from Google Civic for the polling locations in one election and state. Jobs are
+    queued from the admin pages and run by the run_ballot_retrieve_jobs management command, outside of any HTTP request.
+    """
+    google_civic_election_id = models.PositiveIntegerField(verbose_name="google civic election id", null=False)
+    state_code = models.CharField(verbose_name="state code", max_length=2, null=True, blank=True)
+    import_limit = models.PositiveIntegerField(verbose_name="maximum polling locations to retrieve", default=500)
+    # The job covers the polling locations with ids up to last_polling_location_id_in_job (fixed when the job first
+    #  starts), and has worked through every one up to last_polling_location_id_done
+    last_polling_location_id_in_job = models.PositiveIntegerField(default=0)
+    last_polling_location_id_done = models.PositiveIntegerField(default=0)
+
+    # Progress counters
+    polling_locations_total = models.PositiveIntegerField(default=0)
+    polling_locations_done = models.PositiveIntegerField(default=0)
+    ballots_retrieved = models.PositiveIntegerField(default=0)
+    ballots_not_retrieved = models.PositiveIntegerField(default=0)
+    ballots_with_contests_retrieved = models.PositiveIntegerField(default=0)
+    polling_locations_retrieved = models.PositiveIntegerField(default=0)
+    ballots_with_election_administration_data = models.PositiveIntegerField(default=0)
+    ballots_refreshed = models.PositiveIntegerField(default=0)
+    retries = models.PositiveIntegerField(default=0)
+
+    def percent_done(self):
+        if not positive_value_exists(self.polling_locations_total):
+            return 0
+        return int(100 * self.polling_locations_done / self.polling_locations_total)
+
+
+class BallotRetrieveJobPollingLocation(models.Model):
+    """
+    Checkpoint for one polling location within a BallotRetrieveJob, so a job that is interrupted resumes where it
+    stopped instead of calling Google Civic again for polling locations already retrieved.
+    """
+    ballot_retrieve_job_id = models.PositiveIntegerField(null=False, db_index=True)
+    polling_location_we_vote_id = models.CharField(max_length=255, null=False)
+    # Done means we have a final answer for this polling location (a stored ballot, or a response that there is no
+    #  ballot here). Polling locations that failed with retryable errors are not done, and are tried again on resume.
+    is_done = models.BooleanField(default=False)
+    success = models.BooleanField(default=False)
+    attempts = models.PositiveIntegerField(default=0)
+    status = models.TextField(null=True, blank=True)
+    date_last_changed = models.DateTimeField(null=True, auto_now=True)
+
+    class Meta:
+        unique_together = ('ballot_retrieve_job_id', 'polling_location_we_vote_id')
+
+
+class BallotRetrieveJobManager(BackgroundJobManager):
+    job_class = BallotRetrieveJob
+
+    def create_ballot_retrieve_job(self, google_civic_election_id, state_code='', import_limit=500,
+                                   requested_by_voter_we_vote_id=''):
+        status = ""
+        ballot_retrieve_job = None
+        try:
+            ballot_retrieve_job = BallotRetrieveJob.objects.create(
+                google_civic_election_id=convert_to_int(google_civic_election_id),
+                state_code=state_code,
+                import_limit=convert_to_int(import_limit),
+                requested_by_voter_we_vote_id=requested_by_voter_we_vote_id,
+            )
+            status += "BALLOT_RETRIEVE_JOB_CREATED "
+            success = True
+        except Exception as e:
+            status += "BALLOT_RETRIEVE_JOB_NOT_CREATED "
+            success = False
+            logger.error("create_ballot_retrieve_job: " + str(e))
+
+        results = {
+            'success':                      success,
+            'status':                       status,
+            'ballot_retrieve_job_created':  success,
+            'ballot_retrieve_job':          ballot_retrieve_job,
+        }
+        return results
+
+    def retrieve_ballot_retrieve_job_list(self, google_civic_election_id=0, limit=25):
+        if positive_value_exists(google_civic_election_id):
+            return self.retrieve_job_list(limit, google_civic_election_id=convert_to_int(google_civic_election_id))
+        return self.retrieve_job_list(limit)
+
+    def retrieve_polling_location_we_vote_ids_already_done(self, ballot_retrieve_job_id):
+        return set(BallotRetrieveJobPollingLocation.objects.filter(
+            ballot_retrieve_job_id=ballot_retrieve_job_id, is_done=True).values_list(
+            'polling_location_we_vote_id', flat=True))
+
+    def save_polling_location_checkpoint(self, ballot_retrieve_job_id, polling_location_we_vote_id, is_done, success,
+                                         attempts, status=''):
+        BallotRetrieveJobPollingLocation.objects.update_or_create(
+            ballot_retrieve_job_id=ballot_retrieve_job_id,
+            polling_location_we_vote_id=polling_location_we_vote_id,
+            defaults={
+                'is_done':  is_done,
+                'success':  success,
+                'attempts': attempts,
+                'status':   status,
+            })
@@ -0,0 +1,163 @@
+# election/tests.py
+# Brought to you by We Vote. Be good.
+# -*- coding: UTF-8 -*-
+
+from http.server import BaseHTTPRequestHandler, HTTPServer
+import json
+import threading
+from unittest import mock
+from urllib.parse import parse_qs, urlparse
+
+from django.test import TransactionTestCase
+
+from election.controllers import run_ballot_retrieve_job, store_polling_location_ballot_from_google_civic
+from election.models import BallotRetrieveJob, BallotRetrieveJobManager, BallotRetrieveJobPollingLocation
+from polling_location.models import PollingLocation
+from wevote_settings.models import BACKGROUND_JOB_CANCELED, BACKGROUND_JOB_COMPLETED
+
+
+GOOGLE_CIVIC_ELECTION_ID = 4184
+
+
+class StubGoogleCivicHandler(BaseHTTPRequestHandler):
+    """
+    Answers voterInfoQuery like Google Civic does. Addresses on "No Ballot St" are not found, and addresses on
+    "Busy St" are rate limited the first time they are requested.
+    """
+    addresses_requested = []
+    lock = threading.Lock()
+
+    def do_GET(self):
+        address = parse_qs(urlparse(self.path).query).get('address', [''])[0]
+        with self.lock:
+            times_requested_before = self.addresses_requested.count(address)
+            self.addresses_requested.append(address)
+
+        if 'No Ballot St' in address:
+            response_json = {'error': {'errors': [{'reason': 'notFound'}], 'code': 400}}
+        elif 'Busy St' in address and times_requested_before == 0:
+            response_json = {'error': {'errors': [{'reason': 'rateLimitExceeded'}], 'code': 403}}
+        else:
+            response_json = {
+                'election': {'id': str(GOOGLE_CIVIC_ELECTION_ID)},
+                'contests': [{'type': 'General', 'office': 'Mayor'}],
+            }
+        body = json.dumps(response_json).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class BallotRetrieveJobTestCase(TransactionTestCase):
+
+    def setUp(self):
+        StubGoogleCivicHandler.addresses_requested = []
+        self.stub_server = HTTPServer(('127.0.0.1', 0), StubGoogleCivicHandler)
+        self.stub_server_thread = threading.Thread(target=self.stub_server.serve_forever)
+        self.stub_server_thread.daemon = True
+        self.stub_server_thread.start()
+        self.stub_url = 'http://127.0.0.1:{port}/voterinfo'.format(port=self.stub_server.server_port)
+
+        for polling_location_number, line1 in enumerate(['1 Main St', '2 No Ballot St', '3 Busy St', '4 Oak St']):
+            PollingLocation.objects.create(
+                polling_location_id=str(polling_location_number),
+                we_vote_id='wv01ploc{number}'.format(number=polling_location_number),
+                location_name='Location {number}'.format(number=polling_location_number),
+                line1=line1, city='Coldwater', state='MS', zip_long='38618')
+
+        self.stored_polling_location_we_vote_ids = []
+
+        def store_one_ballot_stub(one_ballot_json, voter_id=0, polling_location_we_vote_id='', ballot_returned=None):
+            self.stored_polling_location_we_vote_ids.append(polling_location_we_vote_id)
+            return {'success': True, 'status': '', 'ballot_returned_found': False}
+
+        self.patches = [
+            mock.patch('import_export_google_civic.controllers.VOTER_INFO_URL', self.stub_url),
+            mock.patch('election.controllers.store_one_ballot_from_google_civic_api', store_one_ballot_stub),
+            mock.patch('election.controllers.calculate_retry_backoff_seconds', lambda attempt_number: 0),
+        ]
+        for one_patch in self.patches:
+            one_patch.start()
+
+    def tearDown(self):
+        for one_patch in self.patches:
+            one_patch.stop()
+        self.stub_server.shutdown()
+        self.stub_server.server_close()
+
+    def test_job_retrieves_every_polling_location_and_retries_rate_limited_requests(self):
+        job_manager = BallotRetrieveJobManager()
+        job_manager.create_ballot_retrieve_job(GOOGLE_CIVIC_ELECTION_ID, 'MS')
+        job = job_manager.claim_next_job('test')
+        results = run_ballot_retrieve_job(job, max_workers=3, requests_per_second=100)
+        self.assertTrue(results['success'], results['status'])
+
+        job = BallotRetrieveJob.objects.get(id=job.id)
+        self.assertEqual(job.job_status, BACKGROUND_JOB_COMPLETED)
+        self.assertEqual(job.polling_locations_total, 4)
+        self.assertEqual(job.polling_locations_done, 4)
+        self.assertEqual(job.ballots_retrieved, 3)
+        self.assertEqual(job.ballots_not_retrieved, 1)
+        self.assertEqual(job.retries, 1)
+        self.assertEqual(sorted(self.stored_polling_location_we_vote_ids),
+                         ['wv01ploc0', 'wv01ploc2', 'wv01ploc3'])
+        self.assertEqual(PollingLocation.objects.get(we_vote_id='wv01ploc1').google_response_address_not_found, 1)
+        self.assertEqual(BallotRetrieveJobPollingLocation.objects.filter(
+            ballot_retrieve_job_id=job.id, is_done=True).count(), 4)
+
+    def test_resumed_job_skips_polling_locations_already_checkpointed(self):
+        job_manager = BallotRetrieveJobManager()
+        job_manager.create_ballot_retrieve_job(GOOGLE_CIVIC_ELECTION_ID, 'MS')
+        job = job_manager.claim_next_job('test')
+        # A previous worker finished two polling locations before it was killed
+        job_manager.save_polling_location_checkpoint(job.id, 'wv01ploc0', True, True, 1)
+        job_manager.save_polling_location_checkpoint(job.id, 'wv01ploc3', True, True, 1)
+
+        results = run_ballot_retrieve_job(job, max_workers=2, requests_per_second=100)
+        self.assertTrue(results['success'], results['status'])
+
+        requested_addresses = ' '.join(StubGoogleCivicHandler.addresses_requested)
+        self.assertNotIn('1 Main St', requested_addresses)
+        self.assertNotIn('4 Oak St', requested_addresses)
+        self.assertEqual(BallotRetrieveJob.objects.get(id=job.id).polling_locations_done, 4)
+
+    def test_resumed_job_continues_after_the_last_polling_location_id_done(self):
+        job_manager = BallotRetrieveJobManager()
+        job_manager.create_ballot_retrieve_job(GOOGLE_CIVIC_ELECTION_ID, 'MS', import_limit=3)
+        job = job_manager.claim_next_job('test')
+        polling_location_id_list = list(PollingLocation.objects.order_by('id').values_list('id', flat=True))
+        # A previous worker finished the first two polling locations, and Google couldn't find the second one, so it
+        #  drops out of the query. The fourth polling location must still stay outside of the job.
+        BallotRetrieveJob.objects.filter(id=job.id).update(
+            last_polling_location_id_in_job=polling_location_id_list[2],
+            last_polling_location_id_done=polling_location_id_list[1],
+            polling_locations_total=3, polling_locations_done=2)
+        PollingLocation.objects.filter(id=polling_location_id_list[1]).update(google_response_address_not_found=1)
+
+        job = BallotRetrieveJob.objects.get(id=job.id)
+        results = run_ballot_retrieve_job(job, max_workers=2, requests_per_second=100)
+        self.assertTrue(results['success'], results['status'])
+        self.assertEqual(self.stored_polling_location_we_vote_ids, ['wv01ploc2'])
+        job = BallotRetrieveJob.objects.get(id=job.id)
+        self.assertEqual(job.polling_locations_done, 3)
+        self.assertEqual(job.last_polling_location_id_done, polling_location_id_list[2])
+
+    def test_job_canceled_during_its_last_chunk_stays_canceled(self):
+        job_manager = BallotRetrieveJobManager()
+        job_manager.create_ballot_retrieve_job(GOOGLE_CIVIC_ELECTION_ID, 'MS')
+        job = job_manager.claim_next_job('test')
+
+        def cancel_then_store(*args):
+            job_manager.cancel_job(job.id)
+            return store_polling_location_ballot_from_google_civic(*args)
+
+        with mock.patch('election.controllers.store_polling_location_ballot_from_google_civic',
+                        side_effect=cancel_then_store):
+            results = run_ballot_retrieve_job(job, max_workers=3, requests_per_second=100)
+        self.assertFalse(results['success'])
+        self.assertEqual(BallotRetrieveJob.objects.get(id=job.id).job_status, BACKGROUND_JOB_CANCELED)
@@ -17,6 +17,10 @@ urlpatterns = [
     url(r'^edit_process/$', views_admin.election_edit_process_view, name='election_edit_process'),
     url(r'^(?P<election_local_id>[0-9]+)/election_all_ballots_retrieve/$',
         views_admin.election_all_ballots_retrieve_view, name='election_all_ballots_retrieve'),
+    url(r'^ballot_retrieve_job_list/$',
+        views_admin.ballot_retrieve_job_list_view, name='ballot_retrieve_job_list'),
+    url(r'^ballot_retrieve_job/(?P<ballot_retrieve_job_id>[0-9]+)/cancel/$',
+        views_admin.ballot_retrieve_job_cancel_view, name='ballot_retrieve_job_cancel'),
     url(r'^(?P<election_local_id>[0-9]+)/election_one_ballot_retrieve/$',
         views_admin.election_one_ballot_retrieve_view, name='election_one_ballot_retrieve'),
     url(r'^election_migration/$', views_admin.election_migration_view, name='election_migration'),
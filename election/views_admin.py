@@ -3,7 +3,7 @@
 # -*- coding: UTF-8 -*-
 
 from .controllers import election_remote_retrieve, elections_import_from_master_server
-from .models import Election
+from .models import BallotRetrieveJobManager, Election
 from admin_tools.views import redirect_to_sign_in_page
 from analytics.models import AnalyticsManager
 from ballot.controllers import refresh_voter_ballots_from_polling_location
@@ -20,6 +20,7 @@ from django.contrib.auth.decorators import login_required
 from django.contrib.messages import get_messages
 from django.db.models import Q
 from django.shortcuts import render
+from django.views.decorators.http import require_POST
 from election.models import BallotpediaElection, ElectionManager
 from exception.models import handle_record_found_more_than_one_exception, handle_record_not_found_exception, \
     handle_record_not_saved_exception
@@ -43,11 +44,13 @@ from polling_location.models import PollingLocation
 from position.models import ANY_STANCE, PositionEntered, PositionListManager
 import pytz
 from quick_info.models import QuickInfoManager
-from wevote_settings.models import RemoteRequestHistoryManager
-from voter.models import VoterAddressManager, VoterDeviceLinkManager, voter_has_authority
+from wevote_settings.models import ApiCallHourlyCount, RemoteRequestHistoryManager
+from voter.models import fetch_voter_we_vote_id_from_voter_device_link, VoterAddressManager, \
+    VoterDeviceLinkManager, voter_has_authority
 from voter_guide.models import CANDIDATE_NUMBER_LIST, VoterGuide, VoterGuidePossibility, VoterGuideListManager
 import wevote_functions.admin
-from wevote_functions.functions import convert_to_int, positive_value_exists, STATE_CODE_MAP
+from wevote_functions.functions import convert_to_int, get_voter_api_device_id, positive_value_exists, \
+    STATE_CODE_MAP
 
 logger = wevote_functions.admin.get_logger(__name__)
 
@@ -73,9 +76,11 @@ def test_view(request):
 @login_required
 def election_all_ballots_retrieve_view(request, election_local_id=0):
     """
-    Reach out to Google and retrieve (for one election):
+    Queue a job that reaches out to Google and retrieves (for one election):
     1) Polling locations (so we can use those addresses to retrieve a representative set of ballots)
     2) Cycle through a portion of those polling locations, enough that we are caching all of the possible ballot items
+    The job is run by the run_ballot_retrieve_jobs management command. See election/controllers.py
+    run_ballot_retrieve_job.
     :param request:
     :param election_local_id:
     :return:
@@ -118,22 +123,8 @@ def election_all_ballots_retrieve_view(request, election_local_id=0):
         polling_location_count_query = polling_location_count_query.filter(
             google_response_address_not_found__isnull=True)
         polling_location_count = polling_location_count_query.count()
-
-        polling_location_query = PollingLocation.objects.all()
-        polling_location_query = polling_location_query.filter(state__iexact=state_code)
-        polling_location_query = polling_location_query.filter(
-            google_response_address_not_found__isnull=True)
-        # We used to have a limit of 500 ballots to pull per election, but now retrieve all
-        # Ordering by "location_name" creates a bit of (locational) random order
-        polling_location_list = polling_location_query.order_by('location_name')[:import_limit]
     except PollingLocation.DoesNotExist:
-        messages.add_message(request, messages.INFO,
-                             'Could not retrieve ballot data for the {election_name}. '
-                             'No polling locations exist for the state \'{state}\'. '
-                             'Data needed from VIP.'.format(
-                                 election_name=election_on_stage.election_name,
-                                 state=state_code))
-        return HttpResponseRedirect(reverse('election:election_summary', args=(election_local_id,)))
+        polling_location_count = 0
 
     if polling_location_count == 0:
         messages.add_message(request, messages.ERROR,
@@ -143,123 +134,72 @@ def election_all_ballots_retrieve_view(request, election_local_id=0):
                                  state=state_code))
         return HttpResponseRedirect(reverse('election:election_summary', args=(election_local_id,)))
 
-    ballots_retrieved = 0
-    ballots_not_retrieved = 0
-    ballots_with_contests_retrieved = 0
-    polling_locations_retrieved = 0
-    ballots_with_election_administration_data = 0
-    ballots_refreshed = 0
-    # We used to only retrieve up to 500 locations from each state, but we don't limit now
-    # # We retrieve 10% of the total polling locations, which should give us coverage of the entire election
-    # number_of_polling_locations_to_retrieve = int(.1 * polling_location_count)
-    ballot_returned_manager = BallotReturnedManager()
-    rate_limit_count = 0
-    # Step though our set of polling locations, until we find one that contains a ballot.  Some won't contain ballots
-    # due to data quality issues.
-    for polling_location in polling_location_list:
-        success = False
-        # Get the address for this polling place, and then retrieve the ballot from Google Civic API
-        results = polling_location.get_text_for_map_search_results()
-        text_for_map_search = results['text_for_map_search']
-        one_ballot_results = retrieve_one_ballot_from_google_civic_api(
-            text_for_map_search, election_on_stage.google_civic_election_id)
-        if one_ballot_results['success']:
-            one_ballot_json = one_ballot_results['structured_json']
-            store_one_ballot_results = store_one_ballot_from_google_civic_api(one_ballot_json, 0,
-                                                                              polling_location.we_vote_id)
-            if store_one_ballot_results['success']:
-                success = True
-                if store_one_ballot_results['ballot_returned_found']:
-                    ballot_returned = store_one_ballot_results['ballot_returned']
-                    ballot_returned_id = ballot_returned.id
-                    # Now refresh all of the other copies of this ballot
-                    if positive_value_exists(polling_location.we_vote_id) \
-                            and positive_value_exists(google_civic_election_id):
-                        refresh_ballot_results = refresh_voter_ballots_from_polling_location(
-                            ballot_returned, google_civic_election_id)
-                        ballots_refreshed += refresh_ballot_results['ballots_refreshed']
-                # NOTE: We don't support retrieving ballots for polling locations AND geocoding simultaneously
-                # if store_one_ballot_results['ballot_returned_found']:
-                #     ballot_returned = store_one_ballot_results['ballot_returned']
-                #     ballot_returned_results = \
-                #         ballot_returned_manager.populate_latitude_and_longitude_for_ballot_returned(ballot_returned)
-                #     if ballot_returned_results['success']:
-                #         rate_limit_count += 1
-                #         if rate_limit_count >= 10:  # Avoid problems with the geocoder rate limiting
-                #             time.sleep(1)
-                #             # After pause, reset the limit count
-                #             rate_limit_count = 0
-        else:
-            if 'google_response_address_not_found' in one_ballot_results:
-                if positive_value_exists(one_ballot_results['google_response_address_not_found']):
-                    try:
-                        if not polling_location.google_response_address_not_found:
-                            polling_location.google_response_address_not_found = 1
-                        else:
-                            polling_location.google_response_address_not_found += 1
-                        polling_location.save()
-                        print("Updated PollingLocation google_response_address_not_found: " + str(text_for_map_search))
-                    except Exception as e:
-                        print("Cannot update PollingLocation: " + str(text_for_map_search))
-
-        if success:
-            ballots_retrieved += 1
-        else:
-            ballots_not_retrieved += 1
+    # Retrieving hundreds of ballots takes far longer than an HTTP request is allowed, so we queue a job for the
+    #  run_ballot_retrieve_jobs management command, and show its progress
+    voter_api_device_id = get_voter_api_device_id(request)
+    job_results = BallotRetrieveJobManager().create_ballot_retrieve_job(
+        google_civic_election_id, state_code, import_limit,
+        requested_by_voter_we_vote_id=fetch_voter_we_vote_id_from_voter_device_link(voter_api_device_id))
+    if job_results['ballot_retrieve_job_created']:
+        messages.add_message(request, messages.INFO,
+                             'Ballot retrieve job queued for the {election_name} ({state}), covering up to '
+                             '{import_limit} of {polling_location_count} polling locations.'.format(
+                                 election_name=election_on_stage.election_name,
+                                 import_limit=import_limit,
+                                 polling_location_count=polling_location_count,
+                                 state=state_code))
+    else:
+        messages.add_message(request, messages.ERROR,
+                             'Could not queue ballot retrieve job: {status}'.format(status=job_results['status']))
+    return HttpResponseRedirect(reverse('election:ballot_retrieve_job_list', args=()) +
+                                '?google_civic_election_id=' + str(google_civic_election_id))
 
-        if one_ballot_results['contests_retrieved']:
-            ballots_with_contests_retrieved += 1
 
-        if one_ballot_results['polling_location_retrieved']:
-            polling_locations_retrieved += 1
+@login_required
+def ballot_retrieve_job_list_view(request):
+    """
+    Show the progress of the Google Civic ballot retrieve jobs
+    :param request:
+    :return:
+    """
+    # admin, partner_organization, political_data_manager, political_data_viewer, verified_volunteer
+    authority_required = {'political_data_viewer'}
+    if not voter_has_authority(request, authority_required):
+        return redirect_to_sign_in_page(request, authority_required)
 
-        if one_ballot_results['election_administration_data_retrieved']:
-            ballots_with_election_administration_data += 1
+    google_civic_election_id = convert_to_int(request.GET.get('google_civic_election_id', 0))
 
-        # We used to only retrieve up to 500 locations from each state, but we don't limit now
-        # # Break out of this loop, assuming we have a minimum number of ballots with contests retrieved
-        # #  If we don't achieve the minimum number of ballots_with_contests_retrieved, break out at the emergency level
-        # emergency = (ballots_retrieved + ballots_not_retrieved) >= (3 * number_of_polling_locations_to_retrieve)
-        # if ((ballots_retrieved + ballots_not_retrieved) >= number_of_polling_locations_to_retrieve and
-        #         ballots_with_contests_retrieved > 20) or emergency:
-        #     break
+    ballot_retrieve_job_list = BallotRetrieveJobManager().retrieve_ballot_retrieve_job_list(google_civic_election_id)
+    job_still_running = False
+    for ballot_retrieve_job in ballot_retrieve_job_list:
+        if not ballot_retrieve_job.is_finished():
+            job_still_running = True
 
-    total_retrieved = ballots_retrieved + ballots_not_retrieved
-    if ballots_retrieved > 0:
-        messages.add_message(request, messages.INFO,
-                             'Ballot data retrieved from Google Civic for the {election_name}. '
-                             '(polling_locations_retrieved: {polling_locations_retrieved}, '
-                             'ballots_with_election_administration_data: {ballots_with_election_administration_data}, '
-                             'ballots retrieved: {ballots_retrieved}, '
-                             '(with contests: {ballots_with_contests_retrieved}), '
-                             'not retrieved: {ballots_not_retrieved}, '
-                             'total: {total}), '
-                             'ballots refreshed: {ballots_refreshed}'.format(
-                                 polling_locations_retrieved=polling_locations_retrieved,
-                                 ballots_with_election_administration_data=ballots_with_election_administration_data,
-                                 ballots_refreshed=ballots_refreshed,
-                                 ballots_retrieved=ballots_retrieved,
-                                 ballots_not_retrieved=ballots_not_retrieved,
-                                 ballots_with_contests_retrieved=ballots_with_contests_retrieved,
-                                 election_name=election_on_stage.election_name,
-                                 total=total_retrieved))
+    messages_on_stage = get_messages(request)
+    template_values = {
+        'messages_on_stage':        messages_on_stage,
+        'ballot_retrieve_job_list': ballot_retrieve_job_list,
+        'google_civic_election_id': google_civic_election_id,
+        'job_still_running':        job_still_running,
+    }
+    return render(request, 'election/ballot_retrieve_job_list.html', template_values)
+
+
+@login_required
+@require_POST
+def ballot_retrieve_job_cancel_view(request, ballot_retrieve_job_id=0):
+    # admin, partner_organization, political_data_manager, political_data_viewer, verified_volunteer
+    authority_required = {'political_data_manager'}
+    if not voter_has_authority(request, authority_required):
+        return redirect_to_sign_in_page(request, authority_required)
+
+    google_civic_election_id = convert_to_int(request.POST.get('google_civic_election_id', 0))
+    if BallotRetrieveJobManager().cancel_job(convert_to_int(ballot_retrieve_job_id)):
+        messages.add_message(request, messages.INFO, 'Ballot retrieve job canceled.')
     else:
-        messages.add_message(request, messages.ERROR,
-                             'Ballot data NOT retrieved from Google Civic for the {election_name}. '
-                             '(polling_locations_retrieved: {polling_locations_retrieved}, '
-                             'ballots_with_election_administration_data: {ballots_with_election_administration_data}, '
-                             'ballots retrieved: {ballots_retrieved}, '
-                             '(with contests: {ballots_with_contests_retrieved}), '
-                             'not retrieved: {ballots_not_retrieved}, '
-                             'total: {total})'.format(
-                                 polling_locations_retrieved=polling_locations_retrieved,
-                                 ballots_with_election_administration_data=ballots_with_election_administration_data,
-                                 ballots_retrieved=ballots_retrieved,
-                                 ballots_not_retrieved=ballots_not_retrieved,
-                                 ballots_with_contests_retrieved=ballots_with_contests_retrieved,
-                                 election_name=election_on_stage.election_name,
-                                 total=total_retrieved))
-    return HttpResponseRedirect(reverse('election:election_summary', args=(election_local_id,)))
+        messages.add_message(request, messages.ERROR, 'Ballot retrieve job could not be canceled.')
+    return HttpResponseRedirect(reverse('election:ballot_retrieve_job_list', args=()) +
+                                '?google_civic_election_id=' + str(google_civic_election_id))
 
 
 @login_required
@@ -1655,6 +1595,20 @@ def election_migration_view(request):
             error = True
             status += "COULD_NOT_UPDATE_ALL_GOOGLE_CIVIC_API_COUNTER_MONTHLY "
 
+    # ########################################
+    # ApiCallHourlyCount
+    api_call_hourly_count_query = ApiCallHourlyCount.objects.filter(
+        google_civic_election_id=we_vote_election_id)
+    we_vote_api_call_hourly_count_count = api_call_hourly_count_query.count()
+    if positive_value_exists(change_now) and positive_value_exists(we_vote_api_call_hourly_count_count):
+        try:
+            ApiCallHourlyCount.objects.filter(
+                google_civic_election_id=we_vote_election_id).update(
+                google_civic_election_id=google_civic_election_id)
+        except Exception as e:
+            error = True
+            status += "COULD_NOT_UPDATE_ALL_API_CALL_HOURLY_COUNT "
+
     # ########################################
     # Measures
     measure_manager = ContestMeasureList()
@@ -2,13 +2,86 @@
 # Brought to you by We Vote. Be good.
 # -*- coding: UTF-8 -*-
 
+from django.conf import settings
 # requires an installation of the C library at https://github.com/maxmind/geoip-api-c
 from django.contrib.gis.geoip import GeoIP
+import os
+import threading
+import time
 import wevote_functions.admin
-from wevote_functions.functions import get_ip_from_headers, positive_value_exists
+from wevote_functions.functions import get_ip_from_headers, LeastRecentlyUsedCache, positive_value_exists
 
 logger = wevote_functions.admin.get_logger(__name__)
 
+# GEOIP_MMAP_CACHE in the MaxMind C library: memory map the database file, instead of reading it for every lookup
+GEOIP_MMAP_CACHE = 8
+# How often we look to see if update_geoip_data has replaced the database file
+GEOIP_DATABASE_CHECK_SECONDS = 60
+# How many IP address lookups we remember
+GEOIP_LOCATION_CACHE_SIZE = 10000
+GEOIP_LOCATION_FIELDS = ['city', 'region', 'postal_code']
+
+
+class GeoIPReader(object):
+    """
+    One GeoIP reader per process, opened the first time we need it, with the most recently looked up IP addresses.
+    voterRetrieve looks up the voter's IP address on every call, and opening the database each time was slow.
+    When update_geoip_data replaces the database file, we open the new one and forget the old lookups.
+    """
+    def __init__(self, location_cache_size=GEOIP_LOCATION_CACHE_SIZE):
+        self.lock = threading.Lock()
+        self.geoip = None
+        self.database_modified_time = None
+        self.time_last_checked = 0
+        # ip_address -> (location,), since the location is None when the IP address wasn't found
+        self.location_cache = LeastRecentlyUsedCache(max_entries=location_cache_size)
+
+    def fetch_database_modified_time(self):
+        try:
+            return os.stat(os.path.join(settings.GEOIP_PATH, settings.GEOIP_CITY)).st_mtime
+        except OSError:
+            return None
+
+    def get_geoip(self):
+        if self.geoip is not None and time.time() - self.time_last_checked < GEOIP_DATABASE_CHECK_SECONDS:
+            return self.geoip
+        with self.lock:
+            if self.geoip is None or time.time() - self.time_last_checked >= GEOIP_DATABASE_CHECK_SECONDS:
+                database_modified_time = self.fetch_database_modified_time()
+                if self.geoip is None or database_modified_time != self.database_modified_time:
+                    # Lookups already running on the old reader keep it open until they finish
+                    self.geoip = GeoIP(cache=GEOIP_MMAP_CACHE)
+                    self.database_modified_time = database_modified_time
+                    self.location_cache.clear()
+                self.time_last_checked = time.time()
+            return self.geoip
+
+    def city(self, ip_address):
+        """
+        Like GeoIP.city, but only with the fields we use
+        :param ip_address:
+        :return: dict with city, region and postal_code, or None if the IP address wasn't found
+        """
+        geoip = self.get_geoip()
+        location_cache_entry = self.location_cache.get(ip_address)
+        if location_cache_entry is not None:
+            return location_cache_entry[0]
+
+        geoip_location = geoip.city(ip_address)
+        if geoip_location is None:
+            location = None
+        else:
+            location = {field: geoip_location.get(field) for field in GEOIP_LOCATION_FIELDS}
+
+        with self.lock:
+            # Don't remember a lookup from a database that was replaced while we were looking
+            if geoip is self.geoip:
+                self.location_cache.set(ip_address, (location,))
+        return location
+
+
+geoip_reader = GeoIPReader()
+
 
 def voter_location_retrieve_from_ip_for_api(request, ip_address=''):
     """
@@ -44,8 +117,7 @@ def voter_location_retrieve_from_ip_for_api(request, ip_address=''):
 
         return response_content
 
-    g = GeoIP()
-    location = g.city(ip_address)
+    location = geoip_reader.city(ip_address)
     if location is None:
         # Consider this alternate way of responding to front end:
         # return HttpResponse('no matching location for IP address {}'.format(ip_address), status=400)
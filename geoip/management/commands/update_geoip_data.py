@@ -26,8 +26,12 @@ class Command(BaseCommand):
             if ext != '.gz':
                 raise CommandError('Something went wrong while decompressing {}'.format(dowloadpath))
             self.stdout.write('Extracting {} to {}\n'.format(dowloadpath, outfilepath))
-            with gzip.open(dowloadpath, 'rb') as infile, open(outfilepath, 'wb') as outfile:
+            # Running servers have the database memory mapped, so we never write over it. We extract next to it,
+            #  then swap the new file in, and the servers open it the next time they check (see GeoIPReader)
+            extractpath = outfilepath + '.new'
+            with gzip.open(dowloadpath, 'rb') as infile, open(extractpath, 'wb') as outfile:
                 outfile.writelines(infile)
+            os.replace(extractpath, outfilepath)
             self.stdout.write('Deleting {}\n'.format(dowloadpath))
             os.remove(dowloadpath)
             self.stdout.write('Done with {}\n'.format(path))
@@ -1,3 +1,70 @@
-from django.test import TestCase
+from django.test import SimpleTestCase, override_settings
+import os
+import tempfile
+from unittest import mock
 
-# Create your tests here.
+from geoip.controllers import GeoIPReader
+
+
+class StubGeoIP(object):
+    """
+    Stands in for django.contrib.gis.geoip.GeoIP, which needs the MaxMind C library and database
+    """
+    instances = []
+
+    def __init__(self, *args, **kwargs):
+        self.lookups = []
+        StubGeoIP.instances.append(self)
+
+    def city(self, ip_address):
+        self.lookups.append(ip_address)
+        if ip_address == '127.0.0.1':
+            return None
+        return {'city': 'Oakland', 'region': 'CA', 'postal_code': '94612', 'country_code': 'US'}
+
+
+class GeoIPReaderTestCase(SimpleTestCase):
+
+    def setUp(self):
+        StubGeoIP.instances = []
+        self.database_folder = tempfile.TemporaryDirectory()
+        self.database_path = os.path.join(self.database_folder.name, 'GeoLiteCity.dat')
+        with open(self.database_path, 'wb') as database_file:
+            database_file.write(b'first')
+        self.settings_override = override_settings(GEOIP_PATH=self.database_folder.name,
+                                                   GEOIP_CITY='GeoLiteCity.dat')
+        self.settings_override.enable()
+        self.geoip_patch = mock.patch('geoip.controllers.GeoIP', StubGeoIP)
+        self.geoip_patch.start()
+
+    def tearDown(self):
+        self.geoip_patch.stop()
+        self.settings_override.disable()
+        self.database_folder.cleanup()
+
+    def test_database_opened_once_and_lookups_remembered(self):
+        geoip_reader = GeoIPReader()
+        for count in range(3):
+            location = geoip_reader.city('108.46.177.24')
+            self.assertEqual(location, {'city': 'Oakland', 'region': 'CA', 'postal_code': '94612'})
+        self.assertIsNone(geoip_reader.city('127.0.0.1'))
+        self.assertIsNone(geoip_reader.city('127.0.0.1'))
+
+        self.assertEqual(len(StubGeoIP.instances), 1)
+        self.assertEqual(StubGeoIP.instances[0].lookups, ['108.46.177.24', '127.0.0.1'])
+
+    def test_replaced_database_is_reopened(self):
+        geoip_reader = GeoIPReader()
+        geoip_reader.city('108.46.177.24')
+
+        # Like update_geoip_data, which swaps a new file in
+        new_database_path = self.database_path + '.new'
+        with open(new_database_path, 'wb') as database_file:
+            database_file.write(b'second')
+        os.utime(new_database_path, (1, 1))
+        os.replace(new_database_path, self.database_path)
+        geoip_reader.time_last_checked = 0  # Don't wait for the next check
+
+        geoip_reader.city('108.46.177.24')
+        self.assertEqual(len(StubGeoIP.instances), 2)
+        self.assertEqual(StubGeoIP.instances[1].lookups, ['108.46.177.24'])
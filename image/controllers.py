@@ -3,29 +3,39 @@
 # -*- coding: UTF-8 -*-
 
 import requests
+import time
 import wevote_functions.admin
-from .functions import analyze_remote_url, analyze_image_file
+from .functions import analyze_remote_url, analyze_image_file, remote_host_limiter, \
+    IMAGE_DOWNLOAD_MAX_REQUESTS_PER_HOST
 from .models import WeVoteImageManager, WeVoteImage, FACEBOOK_PROFILE_IMAGE_NAME, FACEBOOK_BACKGROUND_IMAGE_NAME, \
     TWITTER_PROFILE_IMAGE_NAME, TWITTER_BACKGROUND_IMAGE_NAME, TWITTER_BANNER_IMAGE_NAME, MAPLIGHT_IMAGE_NAME, \
     VOTE_SMART_IMAGE_NAME, MASTER_IMAGE, ISSUE_IMAGE_NAME, BALLOTPEDIA_IMAGE_NAME, LINKEDIN_IMAGE_NAME, \
-    WIKIPEDIA_IMAGE_NAME
+    WIKIPEDIA_IMAGE_NAME, RESIZED_IMAGE_MAX_WORKERS, ImageCacheJobManager, IMAGE_CACHE_JOB_CANDIDATES, \
+    IMAGE_CACHE_JOB_ORGANIZATIONS, IMAGE_CACHE_JOB_VOTERS
 from ballot.controllers import choose_election_from_existing_data
-from candidate.models import CandidateCampaignManager
+from candidate.models import CandidateCampaign, CandidateCampaignManager
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from config.base import get_environment_variable
+from django.db import connection
 from django.db.models import Q
+from django.utils.timezone import now
+from exception.models import handle_exception
 from import_export_ballotpedia.controllers import retrieve_ballotpedia_candidate_image_from_api
 from import_export_facebook.models import FacebookManager
 from issue.models import IssueManager
-from organization.models import OrganizationManager
+from organization.models import Organization, OrganizationManager
 from politician.models import PoliticianManager
 from position.controllers import reset_all_position_image_details_from_candidate, \
     reset_position_for_friends_image_details_from_voter, reset_position_entered_image_details_from_organization, \
     update_all_position_details_from_candidate
 from twitter.functions import retrieve_twitter_user_info
 from twitter.models import TwitterUserManager
-from voter.models import VoterManager, VoterDeviceLinkManager, VoterAddressManager, VoterAddress, Voter
+from voter.models import clear_voter_cache_request_memo, VoterManager, VoterDeviceLinkManager, VoterAddressManager, \
+    VoterAddress, Voter
 from voter_guide.models import VoterGuideManager
 from wevote_functions.functions import positive_value_exists, convert_to_int
+from wevote_settings.models import BACKGROUND_JOB_CANCELED, BACKGROUND_JOB_COMPLETED, BACKGROUND_JOB_FAILED, \
+    BACKGROUND_JOB_HEARTBEAT_SECONDS
 
 logger = wevote_functions.admin.get_logger(__name__)
 HTTP_OK = 200
@@ -118,41 +128,6 @@ def cache_all_kind_of_images_locally_for_all_organizations():
     return cache_images_locally_for_all_organizations_results
 
 
-def cache_all_kind_of_images_locally_for_all_voters():
-    """
-    Cache all kind of images locally for all voters
-    :return:
-    """
-    cache_images_locally_for_all_voters_results = []
-
-    voter_list = Voter.objects.all()
-
-    # If there is a value in twitter_id OR facebook_id, return the voter
-    image_filters = []
-    new_filter = Q(twitter_id__isnull=False)
-    image_filters.append(new_filter)
-    new_filter = Q(facebook_id__isnull=False)
-    image_filters.append(new_filter)
-
-    # Add the first query
-    final_filters = image_filters.pop()
-
-    # ...and "OR" the remaining items in the list
-    for item in image_filters:
-        final_filters |= item
-
-    # voter_list = voter_list.filter(final_filters)
-    voter_list = voter_list.order_by('-is_admin', '-is_verified_volunteer', 'facebook_email', 'twitter_screen_name',
-                                     'last_name', 'first_name')
-    voter_list = voter_list[:200]  # Limit to 200 for now
-
-    for voter in voter_list:
-        cache_images_for_a_voter_results = cache_voter_master_images(voter.id)
-        cache_images_locally_for_all_voters_results.append(cache_images_for_a_voter_results)
-
-    return cache_images_locally_for_all_voters_results
-
-
 def cache_image_if_not_cached(google_civic_election_id, image_url_https, voter_we_vote_id=None,
                               candidate_we_vote_id=None, organization_we_vote_id=None, issue_we_vote_id=None,
                               twitter_id=None, twitter_screen_name=None,
@@ -711,8 +686,8 @@ def cache_image_locally(google_civic_election_id, image_url_https, voter_we_vote
         else:
             we_vote_image_file_location = we_vote_image_file_name
 
-        image_stored_locally = we_vote_image_manager.store_image_locally(
-            analyze_source_images_results['image_url_https'], we_vote_image_file_name)
+        image_data = analyze_source_images_results['analyze_image_url_results']['image_data']
+        image_stored_locally = image_data is not None
 
         if not image_stored_locally:
             error_results = {
@@ -729,7 +704,7 @@ def cache_image_locally(google_civic_election_id, image_url_https, voter_we_vote
 
         status += " IMAGE_STORED_LOCALLY"
         image_stored_to_aws = we_vote_image_manager.store_image_to_aws(
-            we_vote_image_file_name, we_vote_image_file_location,
+            image_data, we_vote_image_file_location,
             analyze_source_images_results['analyze_image_url_results']['image_format'])
         if not image_stored_to_aws:
             error_results = {
@@ -991,7 +966,8 @@ def analyze_source_images(twitter_id, twitter_screen_name, facebook_user_id, map
     elif kind_of_image_other_source:
         image_type = other_source
 
-    analyze_image_url_results = analyze_remote_url(image_url_https)
+    # We are about to store this image, so download all of it now
+    analyze_image_url_results = analyze_remote_url(image_url_https, retrieve_image_data=True)
     results = {
         'twitter_id':                   twitter_id,
         'twitter_screen_name':          twitter_screen_name,
@@ -1005,38 +981,6 @@ def analyze_source_images(twitter_id, twitter_screen_name, facebook_user_id, map
     return results
 
 
-def create_resized_images_for_all_organizations():
-    """
-    Create resized images for all organizations
-    :return:
-    """
-    create_all_resized_images_results = []
-    we_vote_image_list = WeVoteImage.objects.all()
-    # TODO Limit this to organizations only
-
-    for we_vote_image in we_vote_image_list:
-        # Iterate through all cached images
-        create_resized_images_results = create_resized_image_if_not_created(we_vote_image)
-        create_all_resized_images_results.append(create_resized_images_results)
-    return create_all_resized_images_results
-
-
-def create_resized_images_for_all_voters():
-    """
-    Create resized images for all voters
-    :return:
-    """
-    create_all_resized_images_results = []
-    we_vote_image_list = WeVoteImage.objects.all()
-    # TODO Limit this to voters only
-
-    for we_vote_image in we_vote_image_list:
-        # Iterate through all cached images
-        create_resized_images_results = create_resized_image_if_not_created(we_vote_image)
-        create_all_resized_images_results.append(create_resized_images_results)
-    return create_all_resized_images_results
-
-
 def delete_cached_images_for_candidate(candidate):
     original_twitter_profile_image_url_https = None
     original_twitter_profile_background_image_url_https = None
@@ -1427,6 +1371,249 @@ def cache_and_create_resized_images_for_voter(voter_id):
         return create_all_resized_images_results
 
 
+def cache_and_create_resized_images_for_candidate(candidate_id):
+    """
+    Cache the master and resized images for one candidate, from Twitter if we know the candidate's handle, and
+    otherwise from Ballotpedia
+    :param candidate_id:
+    :return:
+    """
+    # import_export_twitter.controllers imports this module, so we can't import it at the top
+    from import_export_twitter.controllers import refresh_twitter_candidate_details
+
+    status = ""
+    candidate_campaign_manager = CandidateCampaignManager()
+    candidate_results = candidate_campaign_manager.retrieve_candidate_campaign_from_id(candidate_id)
+    if not candidate_results['candidate_campaign_found']:
+        status += "CACHE_CANDIDATE_IMAGES-CANDIDATE_NOT_FOUND "
+        results = {
+            'success':  False,
+            'status':   status,
+        }
+        return results
+
+    candidate_campaign = candidate_results['candidate_campaign']
+    if positive_value_exists(candidate_campaign.candidate_twitter_handle):
+        refresh_results = refresh_twitter_candidate_details(candidate_campaign)
+    else:
+        refresh_results = retrieve_and_save_ballotpedia_candidate_images(candidate_campaign)
+    status += refresh_results['status']
+
+    results = {
+        'success':  refresh_results['success'],
+        'status':   status,
+    }
+    return results
+
+
+def entity_images_cached_today(kind_of_entity, entity_we_vote_id):
+    """
+    Have we already cached a master profile image for this entity today? If so, an image cache job can skip it.
+    :param kind_of_entity:
+    :param entity_we_vote_id:
+    :return:
+    """
+    we_vote_image_manager = WeVoteImageManager()
+    voter_we_vote_id = None
+    candidate_we_vote_id = None
+    organization_we_vote_id = None
+    if kind_of_entity == IMAGE_CACHE_JOB_CANDIDATES:
+        candidate_we_vote_id = entity_we_vote_id
+        kind_of_image_list = ['kind_of_image_twitter_profile', 'kind_of_image_ballotpedia_profile']
+    elif kind_of_entity == IMAGE_CACHE_JOB_ORGANIZATIONS:
+        organization_we_vote_id = entity_we_vote_id
+        kind_of_image_list = ['kind_of_image_twitter_profile']
+    else:
+        voter_we_vote_id = entity_we_vote_id
+        kind_of_image_list = ['kind_of_image_twitter_profile', 'kind_of_image_facebook_profile']
+
+    for kind_of_image in kind_of_image_list:
+        kind_of_image_argument = {kind_of_image: True}
+        cached_we_vote_image_results = we_vote_image_manager.retrieve_todays_cached_we_vote_image_list(
+            voter_we_vote_id=voter_we_vote_id, candidate_we_vote_id=candidate_we_vote_id,
+            organization_we_vote_id=organization_we_vote_id, kind_of_image_original=True, **kind_of_image_argument)
+        if cached_we_vote_image_results['we_vote_image_list_found']:
+            return True
+    return False
+
+
+def cache_images_for_one_entity_in_worker_thread(kind_of_entity, entity_id, entity_we_vote_id):
+    """
+    Runs on one of the run_image_cache_job worker threads. Caches the master and resized images for one candidate,
+    organization or voter, unless they were already cached today.
+    :param kind_of_entity:
+    :param entity_id:
+    :param entity_we_vote_id:
+    :return:
+    """
+    status = ""
+    try:
+        if entity_images_cached_today(kind_of_entity, entity_we_vote_id):
+            status += "IMAGES_ALREADY_CACHED_TODAY "
+            return {
+                'success':  True,
+                'skipped':  True,
+                'status':   status,
+            }
+
+        if kind_of_entity == IMAGE_CACHE_JOB_CANDIDATES:
+            cache_results = cache_and_create_resized_images_for_candidate(entity_id)
+            success = cache_results['success']
+            status += cache_results['status']
+        elif kind_of_entity == IMAGE_CACHE_JOB_ORGANIZATIONS:
+            cache_and_create_resized_images_for_organization(entity_we_vote_id)
+            success = True
+        else:
+            cache_and_create_resized_images_for_voter(entity_id)
+            success = True
+        return {
+            'success':  success,
+            'skipped':  False,
+            'status':   status,
+        }
+    except Exception as e:
+        status += "CACHE_IMAGES_FOR_ONE_ENTITY_IN_WORKER_THREAD-EXCEPTION " + str(entity_we_vote_id) + " "
+        handle_exception(e, logger=logger, exception_message=status)
+        return {
+            'success':  False,
+            'skipped':  False,
+            'status':   status,
+        }
+    finally:
+        # Django opens a database connection for each thread, which we don't want to leave open. Pool threads are
+        #  reused, so don't carry voter lookups over to the next entity either.
+        connection.close()
+        clear_voter_cache_request_memo()
+
+
+def retrieve_entity_query_for_image_cache_job(image_cache_job):
+    """
+    The (id, we_vote_id) of every entity an image cache job covers
+    :param image_cache_job:
+    :return:
+    """
+    if image_cache_job.kind_of_entity == IMAGE_CACHE_JOB_CANDIDATES:
+        entity_query = CandidateCampaign.objects.all()
+        if positive_value_exists(image_cache_job.google_civic_election_id):
+            entity_query = entity_query.filter(google_civic_election_id=image_cache_job.google_civic_election_id)
+        # Without a Twitter handle or a Ballotpedia image there is nowhere to get a photo from
+        entity_query = entity_query.filter(
+            (Q(candidate_twitter_handle__isnull=False) & ~Q(candidate_twitter_handle='')) |
+            Q(ballotpedia_image_id__gt=0))
+    elif image_cache_job.kind_of_entity == IMAGE_CACHE_JOB_ORGANIZATIONS:
+        entity_query = Organization.objects.all()
+    elif image_cache_job.kind_of_entity == IMAGE_CACHE_JOB_VOTERS:
+        entity_query = Voter.objects.all()
+        # If there is a value in twitter_id OR facebook_id, return the voter
+        entity_query = entity_query.filter(Q(twitter_id__isnull=False) | Q(facebook_id__isnull=False))
+    else:
+        return None
+    return entity_query.values_list('id', 'we_vote_id')
+
+
+def run_image_cache_job(image_cache_job, max_workers=8, max_requests_per_host=IMAGE_DOWNLOAD_MAX_REQUESTS_PER_HOST):
+    """
+    Cache the master and resized images for every entity in the job. Entities are handed to a bounded thread pool
+    one chunk at a time, in id order, and every image download goes through remote_host_limiter, so no one host
+    sees more than max_requests_per_host requests from us at once. When a chunk is finished we save the id of its
+    last entity, so a job that is killed resumes from there. While a chunk is running we keep checking in, so a slow
+    chunk isn't mistaken for a dead worker.
+    :param image_cache_job:
+    :param max_workers: The maximum number of entities being cached at once
+    :param max_requests_per_host: Across all of the threads
+    :return:
+    """
+    status = ""
+    job_manager = ImageCacheJobManager()
+    job_id = image_cache_job.id
+    worker_name = image_cache_job.worker_name
+
+    counter_names = ['last_entity_id_done', 'entities_done', 'entities_skipped', 'entities_cached', 'entities_failed',
+                     'seconds_running']
+    # When resuming, keep counting from where the last worker stopped
+    counters = {counter_name: getattr(image_cache_job, counter_name) for counter_name in counter_names}
+
+    def save_progress(**extra_fields):
+        return job_manager.save_job_progress(job_id, worker_name, **dict(counters, **extra_fields))
+
+    try:
+        entity_query = retrieve_entity_query_for_image_cache_job(image_cache_job)
+        if entity_query is None:
+            status += "IMAGE_CACHE_JOB-KIND_OF_ENTITY_NOT_RECOGNIZED "
+            save_progress(job_status=BACKGROUND_JOB_FAILED, status=status, date_completed=now())
+            return {'success': False, 'status': status}
+
+        entities_remaining = entity_query.filter(id__gt=counters['last_entity_id_done']).count()
+        if not save_progress(entities_total=counters['entities_done'] + entities_remaining):
+            status += "IMAGE_CACHE_JOB_CANCELED_OR_CLAIMED_BY_ANOTHER_WORKER "
+            return {'success': False, 'status': status}
+
+        remote_host_limiter.set_max_requests_per_host(max_requests_per_host)
+        # Only hand the pool a few entities per worker at a time, so we can stop promptly when the job is canceled
+        chunk_size = max_workers * 4
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            while True:
+                if job_manager.fetch_job_status(job_id) == BACKGROUND_JOB_CANCELED:
+                    status += "IMAGE_CACHE_JOB_CANCELED "
+                    return {'success': False, 'status': status}
+
+                entity_list = list(entity_query.filter(id__gt=counters['last_entity_id_done']).order_by('id')[
+                                   :chunk_size])
+                if not len(entity_list):
+                    break
+
+                chunk_start_time = time.time()
+                last_heartbeat_time = chunk_start_time
+                future_list = [executor.submit(cache_images_for_one_entity_in_worker_thread,
+                                               image_cache_job.kind_of_entity, entity_id, entity_we_vote_id)
+                               for entity_id, entity_we_vote_id in entity_list]
+                for future in as_completed(future_list):
+                    one_entity_results = future.result()
+                    counters['entities_done'] += 1
+                    if one_entity_results['skipped']:
+                        counters['entities_skipped'] += 1
+                    elif one_entity_results['success']:
+                        counters['entities_cached'] += 1
+                    else:
+                        counters['entities_failed'] += 1
+                    if time.time() - last_heartbeat_time > BACKGROUND_JOB_HEARTBEAT_SECONDS:
+                        # Only check in. The counters are saved with the checkpoint, once the whole chunk is done.
+                        if not job_manager.save_job_progress(job_id, worker_name):
+                            for future_not_started in future_list:
+                                future_not_started.cancel()
+                            status += "IMAGE_CACHE_JOB_CANCELED_OR_CLAIMED_BY_ANOTHER_WORKER "
+                            return {'success': False, 'status': status}
+                        last_heartbeat_time = time.time()
+
+                counters['last_entity_id_done'] = entity_list[-1][0]
+                counters['seconds_running'] += time.time() - chunk_start_time
+                if not save_progress():
+                    status += "IMAGE_CACHE_JOB_CANCELED_OR_CLAIMED_BY_ANOTHER_WORKER "
+                    return {'success': False, 'status': status}
+                logger.info("run_image_cache_job {job_id}: {entities_done} entities done, {entities_cached} cached, "
+                            "{entities_skipped} skipped, {entities_failed} failed, {per_minute:.1f} per minute".format(
+                                job_id=job_id, per_minute=60 * counters['entities_done'] / counters['seconds_running']
+                                if counters['seconds_running'] else 0, **counters))
+
+        status += "IMAGE_CACHE_JOB_COMPLETED "
+        if not save_progress(job_status=BACKGROUND_JOB_COMPLETED, status=status, date_completed=now()):
+            # The job was canceled, or claimed by another worker, after the last chunk started
+            status += "IMAGE_CACHE_JOB_CANCELED "
+            return {'success': False, 'status': status}
+        success = True
+    except Exception as e:
+        status += "IMAGE_CACHE_JOB_FAILED: " + str(e) + " "
+        handle_exception(e, logger=logger, exception_message=status)
+        save_progress(job_status=BACKGROUND_JOB_FAILED, status=status, date_completed=now())
+        success = False
+
+    results = {
+        'success':  success,
+        'status':   status,
+    }
+    return results
+
+
 def retrieve_all_images_for_one_issue(issue_we_vote_id):
     """
     Retrieve all cached images for one issue
@@ -1469,6 +1656,38 @@ def retrieve_all_images_for_one_voter(voter_id):
     return we_vote_image_list
 
 
+def create_resized_images_for_all_organizations():
+    """
+    Create resized images for all organizations
+    :return:
+    """
+    create_all_resized_images_results = []
+    we_vote_image_list = WeVoteImage.objects.all()
+    # TODO Limit this to organizations only
+
+    for we_vote_image in we_vote_image_list:
+        # Iterate through all cached images
+        create_resized_images_results = create_resized_image_if_not_created(we_vote_image)
+        create_all_resized_images_results.append(create_resized_images_results)
+    return create_all_resized_images_results
+
+
+def create_resized_images_for_all_voters():
+    """
+    Create resized images for all voters
+    :return:
+    """
+    create_all_resized_images_results = []
+    we_vote_image_list = WeVoteImage.objects.all()
+    # TODO Limit this to voters only
+
+    for we_vote_image in we_vote_image_list:
+        # Iterate through all cached images
+        create_resized_images_results = create_resized_image_if_not_created(we_vote_image)
+        create_all_resized_images_results.append(create_resized_images_results)
+    return create_all_resized_images_results
+
+
 def create_resized_image_if_not_created(we_vote_image):
     """
     Create resized images only if not created for we_vote_image object
@@ -1554,26 +1773,10 @@ def create_resized_image_if_not_created(we_vote_image):
         kind_of_image_wikipedia_profile=kind_of_image_wikipedia_profile,
         kind_of_image_other_source=kind_of_image_other_source
     )
+    resized_versions_to_create = []
     if not resized_version_exists_results['large_image_version_exists']:
         # Large version does not exist so create resize image and cache it
-        cache_resized_image_locally_results = cache_resized_image_locally(
-            google_civic_election_id, image_url_https, we_vote_parent_image_id,
-            voter_we_vote_id=voter_we_vote_id, candidate_we_vote_id=candidate_we_vote_id,
-            organization_we_vote_id=organization_we_vote_id, twitter_id=twitter_id, facebook_user_id=facebook_user_id,
-            maplight_id=maplight_id, vote_smart_id=vote_smart_id, image_format=image_format,
-            kind_of_image_twitter_profile=kind_of_image_twitter_profile,
-            kind_of_image_twitter_background=kind_of_image_twitter_background,
-            kind_of_image_twitter_banner=kind_of_image_twitter_banner,
-            kind_of_image_facebook_profile=kind_of_image_facebook_profile,
-            kind_of_image_facebook_background=kind_of_image_facebook_background,
-            kind_of_image_maplight=kind_of_image_maplight, kind_of_image_vote_smart=kind_of_image_vote_smart,
-            kind_of_image_ballotpedia_profile=kind_of_image_ballotpedia_profile,
-            kind_of_image_linkedin_profile=kind_of_image_linkedin_profile,
-            kind_of_image_wikipedia_profile=kind_of_image_wikipedia_profile,
-            kind_of_image_other_source=kind_of_image_other_source, kind_of_image_large=True,
-            image_offset_x=image_offset_x, image_offset_y=image_offset_y, other_source=other_source)
-        create_resized_image_results['cached_large_image'] = \
-            cache_resized_image_locally_results['success']
+        resized_versions_to_create.append('large')
     else:
         create_resized_image_results['cached_large_image'] = IMAGE_ALREADY_CACHED
 
@@ -1583,52 +1786,74 @@ def create_resized_image_if_not_created(we_vote_image):
             we_vote_image.kind_of_image_wikipedia_profile or we_vote_image.kind_of_image_other_source:
         if not resized_version_exists_results['medium_image_version_exists']:
             # Medium version does not exist so create resize image and cache it
-            cache_resized_image_locally_results = cache_resized_image_locally(
-                google_civic_election_id, image_url_https, we_vote_parent_image_id,
-                voter_we_vote_id=voter_we_vote_id, candidate_we_vote_id=candidate_we_vote_id,
-                organization_we_vote_id=organization_we_vote_id, twitter_id=twitter_id,
-                facebook_user_id=facebook_user_id, maplight_id=maplight_id, vote_smart_id=vote_smart_id,
-                image_format=image_format, kind_of_image_twitter_profile=kind_of_image_twitter_profile,
-                kind_of_image_twitter_background=kind_of_image_twitter_background,
-                kind_of_image_twitter_banner=kind_of_image_twitter_banner,
-                kind_of_image_facebook_profile=kind_of_image_facebook_profile,
-                kind_of_image_facebook_background=kind_of_image_facebook_background,
-                kind_of_image_maplight=kind_of_image_maplight, kind_of_image_vote_smart=kind_of_image_vote_smart,
-                kind_of_image_ballotpedia_profile=kind_of_image_ballotpedia_profile,
-                kind_of_image_linkedin_profile=kind_of_image_linkedin_profile,
-                kind_of_image_wikipedia_profile=kind_of_image_wikipedia_profile,
-                kind_of_image_other_source=kind_of_image_other_source, kind_of_image_medium=True,
-                image_offset_x=image_offset_x, image_offset_y=image_offset_y, other_source=other_source)
-            create_resized_image_results['cached_medium_image'] = \
-                cache_resized_image_locally_results['success']
+            resized_versions_to_create.append('medium')
         else:
             create_resized_image_results['cached_medium_image'] = IMAGE_ALREADY_CACHED
 
         if not resized_version_exists_results['tiny_image_version_exists']:
             # Tiny version does not exist so create resize image and cache it
-            cache_resized_image_locally_results = cache_resized_image_locally(
-                google_civic_election_id, image_url_https, we_vote_parent_image_id,
-                voter_we_vote_id=voter_we_vote_id, candidate_we_vote_id=candidate_we_vote_id,
-                organization_we_vote_id=organization_we_vote_id, twitter_id=twitter_id,
-                facebook_user_id=facebook_user_id, maplight_id=maplight_id, vote_smart_id=vote_smart_id,
-                image_format=image_format, kind_of_image_twitter_profile=kind_of_image_twitter_profile,
-                kind_of_image_twitter_background=kind_of_image_twitter_background,
-                kind_of_image_twitter_banner=kind_of_image_twitter_banner,
-                kind_of_image_facebook_profile=kind_of_image_facebook_profile,
-                kind_of_image_facebook_background=kind_of_image_facebook_background,
-                kind_of_image_maplight=kind_of_image_maplight, kind_of_image_vote_smart=kind_of_image_vote_smart,
-                kind_of_image_ballotpedia_profile=kind_of_image_ballotpedia_profile,
-                kind_of_image_linkedin_profile=kind_of_image_linkedin_profile,
-                kind_of_image_wikipedia_profile=kind_of_image_wikipedia_profile,
-                kind_of_image_other_source=kind_of_image_other_source, kind_of_image_tiny=True,
-                image_offset_x=image_offset_x, image_offset_y=image_offset_y, other_source=other_source)
-            create_resized_image_results['cached_tiny_image'] = \
-                cache_resized_image_locally_results['success']
+            resized_versions_to_create.append('tiny')
         else:
             create_resized_image_results['cached_tiny_image'] = IMAGE_ALREADY_CACHED
+
+    if len(resized_versions_to_create):
+        # Download the master image once for all of the versions. If this fails, each version tries again.
+        we_vote_image_manager = WeVoteImageManager()
+        image_data = we_vote_image_manager.retrieve_image_data_from_url(image_url_https)
+        with ThreadPoolExecutor(max_workers=RESIZED_IMAGE_MAX_WORKERS) as executor:
+            future_to_resized_version = {}
+            for resized_version in resized_versions_to_create:
+                future = executor.submit(
+                    cache_resized_image_locally_in_worker_thread,
+                    google_civic_election_id, image_url_https, we_vote_parent_image_id,
+                    voter_we_vote_id=voter_we_vote_id, candidate_we_vote_id=candidate_we_vote_id,
+                    organization_we_vote_id=organization_we_vote_id, twitter_id=twitter_id,
+                    facebook_user_id=facebook_user_id, maplight_id=maplight_id, vote_smart_id=vote_smart_id,
+                    image_format=image_format, kind_of_image_twitter_profile=kind_of_image_twitter_profile,
+                    kind_of_image_twitter_background=kind_of_image_twitter_background,
+                    kind_of_image_twitter_banner=kind_of_image_twitter_banner,
+                    kind_of_image_facebook_profile=kind_of_image_facebook_profile,
+                    kind_of_image_facebook_background=kind_of_image_facebook_background,
+                    kind_of_image_maplight=kind_of_image_maplight, kind_of_image_vote_smart=kind_of_image_vote_smart,
+                    kind_of_image_ballotpedia_profile=kind_of_image_ballotpedia_profile,
+                    kind_of_image_linkedin_profile=kind_of_image_linkedin_profile,
+                    kind_of_image_wikipedia_profile=kind_of_image_wikipedia_profile,
+                    kind_of_image_other_source=kind_of_image_other_source,
+                    kind_of_image_large=resized_version == 'large',
+                    kind_of_image_medium=resized_version == 'medium',
+                    kind_of_image_tiny=resized_version == 'tiny',
+                    image_offset_x=image_offset_x, image_offset_y=image_offset_y, other_source=other_source,
+                    image_data=image_data)
+                future_to_resized_version[future] = resized_version
+
+            for future in as_completed(future_to_resized_version):
+                resized_version = future_to_resized_version[future]
+                create_resized_image_results['cached_' + resized_version + '_image'] = future.result()['success']
     return create_resized_image_results
 
 
+def cache_resized_image_locally_in_worker_thread(*args, **kwargs):
+    """
+    Runs cache_resized_image_locally in a worker thread, so the large, medium and tiny versions of one image are
+    resized and uploaded at the same time. Each version is a different kind_of_image, so their same day image
+    versions don't collide.
+    """
+    try:
+        return cache_resized_image_locally(*args, **kwargs)
+    except Exception as e:
+        status = "CACHE_RESIZED_IMAGE_LOCALLY_IN_WORKER_THREAD-EXCEPTION "
+        handle_exception(e, logger=logger, exception_message=status)
+        return {
+            'success':  False,
+            'status':   status,
+        }
+    finally:
+        # Django opens a database connection for each thread, which we don't want to leave open. Pool threads are
+        #  reused, so don't carry voter lookups over to the next entity either.
+        connection.close()
+        clear_voter_cache_request_memo()
+
+
 def check_resized_version_exists(voter_we_vote_id=None, candidate_we_vote_id=None, organization_we_vote_id=None,
                                  image_url_https=None, kind_of_image_twitter_profile=False,
                                  kind_of_image_twitter_background=False, kind_of_image_twitter_banner=False,
@@ -1738,7 +1963,7 @@ def cache_resized_image_locally(google_civic_election_id, image_url_https, we_vo
                                 kind_of_image_linkedin_profile=False, kind_of_image_wikipedia_profile=False,
                                 kind_of_image_other_source=False,
                                 kind_of_image_original=False, kind_of_image_large=False, kind_of_image_medium=False,
-                                kind_of_image_tiny=False, image_offset_x=0, image_offset_y=0):
+                                kind_of_image_tiny=False, image_offset_x=0, image_offset_y=0, image_data=None):
     """
     Resize the image as per image version and cache the same
     :param google_civic_election_id:
@@ -1773,6 +1998,7 @@ def cache_resized_image_locally(google_civic_election_id, image_url_https, we_vo
     :param kind_of_image_tiny:
     :param image_offset_x:                      # For Facebook background
     :param image_offset_y:                      # For Facebook background
+    :param image_data:                          # The master image, if it has already been downloaded
     :return:
     """
 
@@ -1957,8 +2183,9 @@ def cache_resized_image_locally(google_civic_election_id, image_url_https, we_vo
         elif issue_we_vote_id:
             we_vote_image_file_location = issue_we_vote_id + "/" + we_vote_image_file_name
 
-        image_stored_locally = we_vote_image_manager.store_image_locally(
-                image_url_https, we_vote_image_file_name)
+        if image_data is None:
+            image_data = we_vote_image_manager.retrieve_image_data_from_url(image_url_https)
+        image_stored_locally = image_data is not None
         if not image_stored_locally:
             error_results = {
                 'success':                      success,
@@ -1973,8 +2200,9 @@ def cache_resized_image_locally(google_civic_election_id, image_url_https, we_vo
             return error_results
 
         status += " IMAGE_STORED_LOCALLY"
-        resized_image_created = we_vote_image_manager.resize_we_vote_master_image(
-            we_vote_image_file_name, image_width, image_height, image_type, image_offset_x, image_offset_y)
+        resized_image_data = we_vote_image_manager.resize_we_vote_master_image(
+            image_data, image_width, image_height, image_type, image_offset_x, image_offset_y, image_format)
+        resized_image_created = resized_image_data is not None
         if not resized_image_created:
             error_results = {
                 'success':                      success,
@@ -1989,7 +2217,7 @@ def cache_resized_image_locally(google_civic_election_id, image_url_https, we_vo
             return error_results
 
         status += " RESIZED_IMAGE_CREATED"
-        image_stored_to_aws = we_vote_image_manager.store_image_to_aws(we_vote_image_file_name,
+        image_stored_to_aws = we_vote_image_manager.store_image_to_aws(resized_image_data,
                                                                        we_vote_image_file_location, image_format)
         if not image_stored_to_aws:
             error_results = {
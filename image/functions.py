@@ -5,55 +5,149 @@
 from exception.models import handle_exception
 from io import BytesIO
 from PIL import Image
-from urllib.request import Request, urlopen
-import urllib
 import requests
+import threading
+from urllib.parse import urlparse
 import wevote_functions.admin
+from wevote_functions.functions import LeastRecentlyUsedCache
 
 logger = wevote_functions.admin.get_logger(__name__)
 
+IMAGE_DOWNLOAD_CHUNK_SIZE = 16 * 1024
+IMAGE_DOWNLOAD_TIMEOUT_SECONDS = 30
+IMAGE_REQUEST_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 6.1; WOW64) AppleWebKit/537.36 (KHTML, like Gecko) '
+                  'Chrome/36.0.1941.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.8',
+}
+# How many downloaded images we keep around, so the resize and S3 stages don't download them again
+RECENT_IMAGE_CACHE_SIZE = 16
+# How many downloads we have open at once against any one host, across all threads
+IMAGE_DOWNLOAD_MAX_REQUESTS_PER_HOST = 4
 
-def analyze_remote_url(image_url_https):
+# requests Sessions keep connections open between requests, but aren't guaranteed to be thread safe, so we keep
+#  one per thread
+image_http_sessions = threading.local()
+
+
+def get_image_http_session():
+    session = getattr(image_http_sessions, 'session', None)
+    if session is None:
+        session = requests.Session()
+        session.headers.update(IMAGE_REQUEST_HEADERS)
+        image_http_sessions.session = session
+    return session
+
+
+# The last few images we downloaded, with the ETag and Last-Modified headers they came with. When we need one of them
+#  again we ask the server whether it changed, and skip the download if it didn't.
+recent_image_cache = LeastRecentlyUsedCache(max_entries=RECENT_IMAGE_CACHE_SIZE)
+
+
+class RemoteHostConcurrencyLimiter(object):
+    """
+    One semaphore per remote host, so a pool of threads caching images doesn't open dozens of connections to the
+    same server (most of our images come from pbs.twimg.com) while the other hosts sit idle.
+    """
+    def __init__(self, max_requests_per_host=IMAGE_DOWNLOAD_MAX_REQUESTS_PER_HOST):
+        self.max_requests_per_host = max_requests_per_host
+        self.lock = threading.Lock()
+        self.semaphores = {}
+
+    def set_max_requests_per_host(self, max_requests_per_host):
+        with self.lock:
+            self.max_requests_per_host = max(1, max_requests_per_host)
+            # Downloads already holding one of the old semaphores release it when they finish
+            self.semaphores = {}
+
+    def semaphore_for_url(self, url):
+        host = urlparse(url).netloc.lower()
+        with self.lock:
+            semaphore = self.semaphores.get(host)
+            if semaphore is None:
+                semaphore = threading.BoundedSemaphore(self.max_requests_per_host)
+                self.semaphores[host] = semaphore
+            return semaphore
+
+
+remote_host_limiter = RemoteHostConcurrencyLimiter()
+
+
+def analyze_remote_url(image_url_https, retrieve_image_data=False):
     """
-    Validate url and get image properties
+    Validate url and get image properties, with one request. Pillow only needs the first bytes of an image to
+    know its size, so unless we want the image itself we stop downloading as soon as we have them.
     :param image_url_https:
+    :param retrieve_image_data: Download the whole image, and return it as image_data
     :return:
     """
     image_format = None
     image_height = None
     image_width = None
     image_url_valid = False
-    try:
-        if image_url_https is not None:
-            # urlopen(Request(image_url_https))
-            remote_url_req = urllib.request.Request(image_url_https,headers={'User-Agent': 'Mozilla/5.0 (Windows NT 6.1; WOW64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/36.0.1941.0 Safari/537.36',
-                                                                             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
-                                                                             'Accept-Charset': 'ISO-8859-1,utf-8;q=0.7,*;q=0.3',
-                                                                             'Accept-Encoding': 'none',
-                                                                             'Accept-Language': 'en-US,en;q=0.8',
-                                                                             'Connection': 'keep-alive'})
-            remote_url = urlopen(remote_url_req)
-            image_url_valid = True
-    except Exception as e:
-        image_url_valid = False
-        exception_message = "analyze_remote_url: image url {image_url_https} is not valid."\
-            .format(image_url_https=image_url_https)
-        handle_exception(e, logger=logger, exception_message=exception_message)
-
-    if image_url_valid:
+    image_data = None
+    image_not_modified = False
+    if image_url_https is not None:
         try:
-            response = requests.get(image_url_https)
-            image = Image.open(BytesIO(response.content))
+            request_headers = {}
+            recent_image = recent_image_cache.get(image_url_https)
+            if recent_image is not None:
+                # Only send the image if it changed since we downloaded it
+                if recent_image['etag']:
+                    request_headers['If-None-Match'] = recent_image['etag']
+                if recent_image['last_modified']:
+                    request_headers['If-Modified-Since'] = recent_image['last_modified']
+            with remote_host_limiter.semaphore_for_url(image_url_https):
+                response = get_image_http_session().get(image_url_https, headers=request_headers, stream=True,
+                                                        timeout=IMAGE_DOWNLOAD_TIMEOUT_SECONDS)
+                try:
+                    if response.status_code == 304 and recent_image is not None:
+                        image_not_modified = True
+                        image_data = recent_image['image_data']
+                        image = Image.open(BytesIO(image_data))
+                    else:
+                        response.raise_for_status()
+                        image = None
+                        image_buffer = BytesIO()
+                        for chunk in response.iter_content(IMAGE_DOWNLOAD_CHUNK_SIZE):
+                            image_buffer.write(chunk)
+                            if image is None:
+                                try:
+                                    # Image.open only reads the header, and fails if we don't have all of it yet
+                                    image = Image.open(BytesIO(image_buffer.getvalue()))
+                                except IOError:
+                                    pass
+                            if image is not None and not retrieve_image_data:
+                                break
+                        if image is None:
+                            image = Image.open(BytesIO(image_buffer.getvalue()))
+                        if retrieve_image_data:
+                            image_data = image_buffer.getvalue()
+                            recent_image_cache.set(image_url_https, {
+                                'image_data':       image_data,
+                                'etag':             response.headers.get('ETag'),
+                                'last_modified':    response.headers.get('Last-Modified'),
+                            })
+                finally:
+                    response.close()
             image_width, image_height = image.size
             image_format = image.format
+            image_url_valid = True
         except Exception as e:
             image_url_valid = False
+            image_data = None
+            exception_message = "analyze_remote_url: image url {image_url_https} is not valid."\
+                .format(image_url_https=image_url_https)
+            handle_exception(e, logger=logger, exception_message=exception_message)
 
     results = {
         'image_url_valid':              image_url_valid,
         'image_width':                  image_width,
         'image_height':                 image_height,
-        'image_format':                 image_format.lower() if image_format is not None else image_format
+        'image_format':                 image_format.lower() if image_format is not None else image_format,
+        'image_data':                   image_data,
+        'image_not_modified':           image_not_modified,
     }
     return results
 
@@ -0,0 +1,52 @@
+import os
+import socket
+import time
+
+from django.core.management.base import BaseCommand
+from image.controllers import run_image_cache_job
+from image.functions import IMAGE_DOWNLOAD_MAX_REQUESTS_PER_HOST
+from image.models import ImageCacheJobManager
+from voter.models import clear_voter_cache_request_memo
+
+
+class Command(BaseCommand):
+    help = 'Runs queued image cache jobs for candidates, organizations and voters (queued from the admin pages)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', default=False,
+                            help='Run the jobs that are waiting now, then exit instead of polling for new jobs')
+        parser.add_argument('--max-workers', type=int, default=8,
+                            help='Maximum number of entities having their images cached at once')
+        parser.add_argument('--max-requests-per-host', type=int, default=IMAGE_DOWNLOAD_MAX_REQUESTS_PER_HOST,
+                            help='Maximum number of image downloads in flight to any one host, across all workers')
+        parser.add_argument('--poll-seconds', type=int, default=10,
+                            help='How long to wait between checks for new jobs')
+
+    def handle(self, *args, **options):
+        worker_name = '{host}:{pid}'.format(host=socket.gethostname(), pid=os.getpid())
+        job_manager = ImageCacheJobManager()
+        self.stdout.write('Image cache worker {} started\n'.format(worker_name))
+
+        while True:
+            image_cache_job = job_manager.claim_next_job(worker_name)
+            if image_cache_job is None:
+                if options['once']:
+                    break
+                time.sleep(options['poll_seconds'])
+                continue
+
+            # Voter lookups are only remembered for one request, or here, for one job
+            clear_voter_cache_request_memo()
+
+            self.stdout.write('Running image cache job {id} for {kind_of_entity}\n'.format(
+                id=image_cache_job.id, kind_of_entity=image_cache_job.get_kind_of_entity_display().lower()))
+            results = run_image_cache_job(image_cache_job,
+                                          max_workers=options['max_workers'],
+                                          max_requests_per_host=options['max_requests_per_host'])
+            image_cache_job.refresh_from_db()
+            self.stdout.write('Job {id}: {status} {entities_done} entities in {seconds:.0f} seconds, '
+                              '{per_minute} per minute\n'.format(
+                                  id=image_cache_job.id, status=results['status'],
+                                  entities_done=image_cache_job.entities_done,
+                                  seconds=image_cache_job.seconds_running,
+                                  per_minute=image_cache_job.entities_per_minute()))
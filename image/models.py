@@ -7,12 +7,13 @@ from datetime import date
 from django.db import models
 from exception.models import handle_record_found_more_than_one_exception, handle_exception, \
     handle_record_not_saved_exception, handle_record_not_deleted_exception
+from io import BytesIO
 from PIL import Image, ImageOps
-from urllib.request import urlretrieve
-from urllib.error import HTTPError
 from wevote_functions.functions import convert_to_int, positive_value_exists
 import boto3
+import threading
 import wevote_functions.admin
+from wevote_settings.models import BackgroundJob, BackgroundJobManager
 from .functions import analyze_remote_url
 
 # naming convention stored at aws
@@ -39,6 +40,41 @@ AWS_STORAGE_SERVICE = "s3"
 
 logger = wevote_functions.admin.get_logger(__name__)
 
+# How many of the large, medium and tiny versions of one image we resize and upload at the same time
+RESIZED_IMAGE_MAX_WORKERS = 3
+
+
+class S3ClientPool(object):
+    """
+    One boto3 S3 client per process, shared by every WeVoteImageManager. Building a client reads credentials and
+    sets up a connection pool, which is slow to repeat for every image. boto3 clients (unlike sessions and
+    resources) are thread safe, so the resized image workers can share this one too.
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.client = None
+
+    def get_client(self):
+        if self.client is None:
+            with self.lock:
+                if self.client is None:
+                    self.client = boto3.client(AWS_STORAGE_SERVICE, region_name=AWS_REGION_NAME,
+                                               aws_access_key_id=AWS_ACCESS_KEY_ID,
+                                               aws_secret_access_key=AWS_SECRET_ACCESS_KEY)
+        return self.client
+
+
+s3_client_pool = S3ClientPool()
+
+IMAGE_CACHE_JOB_CANDIDATES = 'CANDIDATES'
+IMAGE_CACHE_JOB_ORGANIZATIONS = 'ORGANIZATIONS'
+IMAGE_CACHE_JOB_VOTERS = 'VOTERS'
+IMAGE_CACHE_JOB_KIND_OF_ENTITY_CHOICES = (
+    (IMAGE_CACHE_JOB_CANDIDATES,     'Candidates'),
+    (IMAGE_CACHE_JOB_ORGANIZATIONS,  'Organizations'),
+    (IMAGE_CACHE_JOB_VOTERS,         'Voters'),
+)
+
 
 class WeVoteImage(models.Model):
     """
@@ -251,10 +287,7 @@ class WeVoteImageManager(models.Model):
         :return:
         """
         try:
-
-            client = boto3.client(AWS_STORAGE_SERVICE, region_name=AWS_REGION_NAME,
-                                  aws_access_key_id=AWS_ACCESS_KEY_ID,
-                                  aws_secret_access_key=AWS_SECRET_ACCESS_KEY)
+            client = s3_client_pool.get_client()
             client.delete_object(Bucket=AWS_STORAGE_BUCKET_NAME, Key=we_vote_image_file_location)
             image_deleted_from_aws = True
         except Exception as e:
@@ -1315,23 +1348,26 @@ class WeVoteImageManager(models.Model):
         }
         return results
 
-    def resize_we_vote_master_image(self, image_local_path, image_width, image_height, image_type,
-                                    image_offset_x, image_offset_y):
+    def resize_we_vote_master_image(self, image_data, image_width, image_height, image_type,
+                                    image_offset_x, image_offset_y, image_format=''):
         """
-        Resize image and save it to the same location
+        Resize image in memory
         Note re the facebook background:  We are scaling and sizing here to match the size of the html pane on the
         client, which is driven by the aspect ratio of the twitter banner.
-        :param image_local_path:
+        :param image_data: The bytes of the master image
         :param image_width:
         :param image_height:
         :param image_type:
         :param image_offset_x:
         :param image_offset_y:
-        :return:
+        :param image_format: The file extension, like "png". Defaults to the format of the master image.
+        :return: The bytes of the resized image, or None if it couldn't be resized
         """
         try:
-            image_local_path = "/tmp/" + image_local_path
-            image = Image.open(image_local_path)
+            image = Image.open(BytesIO(image_data))
+            # Like saving to a file name, we pick the format from the extension we are going to store it under
+            Image.init()
+            pil_image_format = Image.EXTENSION.get("." + str(image_format).lower(), image.format)
             if image_type == TWITTER_BACKGROUND_IMAGE_NAME or image_type == TWITTER_BANNER_IMAGE_NAME:
                 image = image.resize((image_width, image_height), Image.ANTIALIAS)
             elif image_type == FACEBOOK_BACKGROUND_IMAGE_NAME:
@@ -1341,53 +1377,38 @@ class WeVoteImageManager(models.Model):
                                      centering=(centering_x, centering_y))
             else:
                 image = ImageOps.fit(image, (image_width, image_height), Image.ANTIALIAS, centering=(0.5, 0.5))
-            image.save(image_local_path)
-            resized_image_created = True
+            resized_image_file = BytesIO()
+            image.save(resized_image_file, pil_image_format)
+            resized_image_data = resized_image_file.getvalue()
         except Exception as e:
-            resized_image_created = False
+            resized_image_data = None
             exception_message = "resize_we_vote_master_image failed"
             handle_exception(e, logger=logger, exception_message=exception_message)
 
-        return resized_image_created
+        return resized_image_data
 
-    def store_image_locally(self, image_url_https, image_local_path):
+    def retrieve_image_data_from_url(self, image_url_https):
         """
-        Save image locally at /tmp/ folder
+        Download an image into memory. If we downloaded it moments ago and it hasn't changed, we reuse that copy.
         :param image_url_https:
-        :param image_local_path:
-        :return:
+        :return: The bytes of the image, or None if it couldn't be downloaded
         """
-        try:
-            image_local_path = "/tmp/" + image_local_path
-            urlretrieve(image_url_https, image_local_path)
-            image_stored = True
-        except HTTPError as error:  # something wrong with url
-            image_stored = False
-            exception_message = "store_image_locally failed because of http error"
-            handle_exception(error, logger=logger, exception_message=exception_message)
-        except Exception as e:
-            image_stored = False
-            exception_message = "store_image_locally failed"
-            handle_exception(e, logger=logger, exception_message=exception_message)
+        analyze_image_url_results = analyze_remote_url(image_url_https, retrieve_image_data=True)
+        return analyze_image_url_results['image_data']
 
-        return image_stored
-
-    def store_image_to_aws(self, we_vote_image_file_name, we_vote_image_file_location, image_format):
+    def store_image_to_aws(self, image_data, we_vote_image_file_location, image_format):
         """
         Upload image to aws
-        :param we_vote_image_file_name:
+        :param image_data: The bytes of the image
         :param we_vote_image_file_location:
         :param image_format:
         :return:
         """
         try:
-            client = boto3.client(AWS_STORAGE_SERVICE, region_name=AWS_REGION_NAME,
-                                  aws_access_key_id=AWS_ACCESS_KEY_ID,
-                                  aws_secret_access_key=AWS_SECRET_ACCESS_KEY)
-            upload_image_from_location = "/tmp/" + we_vote_image_file_name
+            client = s3_client_pool.get_client()
             content_type = "image/{image_format}".format(image_format=image_format)
-            client.upload_file(upload_image_from_location, AWS_STORAGE_BUCKET_NAME, we_vote_image_file_location,
-                               ExtraArgs={'ContentType': content_type})
+            client.put_object(Bucket=AWS_STORAGE_BUCKET_NAME, Key=we_vote_image_file_location, Body=image_data,
+                              ContentType=content_type)
             image_stored_to_aws = True
         except Exception as e:
             image_stored_to_aws = False
@@ -1404,12 +1425,8 @@ class WeVoteImageManager(models.Model):
         :return:
         """
         try:
-            session = boto3.session.Session(region_name=AWS_REGION_NAME,
-                                            aws_access_key_id=AWS_ACCESS_KEY_ID,
-                                            aws_secret_access_key=AWS_SECRET_ACCESS_KEY)
-            s3 = session.resource(AWS_STORAGE_SERVICE)
-            s3.Bucket(AWS_STORAGE_BUCKET_NAME).put_object(Key=we_vote_image_file_location,
-                                                          Body=image_file)
+            client = s3_client_pool.get_client()
+            client.put_object(Bucket=AWS_STORAGE_BUCKET_NAME, Key=we_vote_image_file_location, Body=image_file)
             image_stored_to_aws = True
         except Exception as e:
             image_stored_to_aws = False
@@ -1420,20 +1437,80 @@ class WeVoteImageManager(models.Model):
 
     def retrieve_image_from_aws(self, we_vote_image_file_location):
         """
-        Download image from aws
+        Download image from aws into memory
         :param we_vote_image_file_location:
-        :return:
+        :return: The bytes of the image, or None if it couldn't be retrieved
         """
         try:
-            client = boto3.client(AWS_STORAGE_SERVICE, region_name=AWS_REGION_NAME,
-                                  aws_access_key_id=AWS_ACCESS_KEY_ID,
-                                  aws_secret_access_key=AWS_SECRET_ACCESS_KEY)
-            download_image_at_location = "/tmp/" + we_vote_image_file_location
-            client.download_file(AWS_STORAGE_BUCKET_NAME, we_vote_image_file_location, download_image_at_location)
-            image_retrieved_from_aws = True
+            client = s3_client_pool.get_client()
+            response = client.get_object(Bucket=AWS_STORAGE_BUCKET_NAME, Key=we_vote_image_file_location)
+            image_data = response['Body'].read()
         except Exception as e:
-            image_retrieved_from_aws = False
+            image_data = None
             exception_message = "retrieve_image_from_aws failed"
             handle_exception(e, logger=logger, exception_message=exception_message)
 
-        return image_retrieved_from_aws
+        return image_data
+
+
+class ImageCacheJob(BackgroundJob):
+    """
+    A request to cache the master and resized images for every candidate, organization or voter. Jobs are queued
+    from the admin pages and run by the run_image_cache_jobs management command, outside of any HTTP request.
+    Entities are worked through in id order, so the id of the last entity finished is all we need to resume.
+    """
+    kind_of_entity = models.CharField(verbose_name="kind of entity", max_length=20,
+                                      choices=IMAGE_CACHE_JOB_KIND_OF_ENTITY_CHOICES,
+                                      default=IMAGE_CACHE_JOB_CANDIDATES)
+    # Only used for candidates. When set, we only cache photos for the candidates in this election
+    google_civic_election_id = models.PositiveIntegerField(verbose_name="google civic election id", default=0)
+
+    # Checkpoint: every entity with an id up to and including this one has been handled
+    last_entity_id_done = models.PositiveIntegerField(default=0)
+
+    # Progress counters
+    entities_total = models.PositiveIntegerField(default=0)
+    entities_done = models.PositiveIntegerField(default=0)
+    entities_skipped = models.PositiveIntegerField(default=0)  # Images were already cached today
+    entities_cached = models.PositiveIntegerField(default=0)
+    entities_failed = models.PositiveIntegerField(default=0)
+    # Time spent working on this job, across all of the workers that have run it
+    seconds_running = models.FloatField(default=0)
+
+    def percent_done(self):
+        if not positive_value_exists(self.entities_total):
+            return 0
+        return int(100 * self.entities_done / self.entities_total)
+
+    def entities_per_minute(self):
+        if not positive_value_exists(self.seconds_running):
+            return 0
+        return round(60 * self.entities_done / self.seconds_running, 1)
+
+
+class ImageCacheJobManager(BackgroundJobManager):
+    job_class = ImageCacheJob
+
+    def create_image_cache_job(self, kind_of_entity, google_civic_election_id=0, requested_by_voter_we_vote_id=''):
+        status = ""
+        image_cache_job = None
+        try:
+            image_cache_job = ImageCacheJob.objects.create(
+                kind_of_entity=kind_of_entity,
+                google_civic_election_id=convert_to_int(google_civic_election_id),
+                requested_by_voter_we_vote_id=requested_by_voter_we_vote_id,
+            )
+            status += "IMAGE_CACHE_JOB_CREATED "
+            success = True
+        except Exception as e:
+            status += "IMAGE_CACHE_JOB_NOT_CREATED "
+            success = False
+            logger.error("create_image_cache_job: " + str(e))
+
+        results = {
+            'success':                  success,
+            'status':                   status,
+            'image_cache_job_created':  success,
+            'image_cache_job':          image_cache_job,
+        }
+        return results
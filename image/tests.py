@@ -0,0 +1,176 @@
+# image/tests.py
+# Brought to you by We Vote. Be good.
+# -*- coding: UTF-8 -*-
+
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from io import BytesIO
+import threading
+from unittest import mock
+
+from django.test import SimpleTestCase
+from PIL import Image
+
+from image.functions import analyze_remote_url, recent_image_cache, RemoteHostConcurrencyLimiter
+from image.models import AWS_STORAGE_BUCKET_NAME, S3ClientPool, TWITTER_PROFILE_IMAGE_NAME, WeVoteImageManager
+
+
+class LocalS3StandIn(object):
+    """
+    Keeps objects in memory, and answers the few S3 client calls WeVoteImageManager makes
+    """
+    def __init__(self, *args, **kwargs):
+        self.lock = threading.Lock()
+        self.objects = {}
+
+    def put_object(self, Bucket, Key, Body, **kwargs):
+        with self.lock:
+            self.objects[(Bucket, Key)] = (Body.read() if hasattr(Body, 'read') else Body, kwargs)
+        return {}
+
+    def get_object(self, Bucket, Key):
+        return {'Body': BytesIO(self.objects[(Bucket, Key)][0])}
+
+    def delete_object(self, Bucket, Key):
+        with self.lock:
+            self.objects.pop((Bucket, Key), None)
+        return {}
+
+
+def generate_image_data(width, height, image_format):
+    image_file = BytesIO()
+    Image.new('RGB', (width, height), color=(200, 30, 30)).save(image_file, image_format)
+    return image_file.getvalue()
+
+
+class WeVoteImageManagerTestCase(SimpleTestCase):
+
+    def setUp(self):
+        self.we_vote_image_manager = WeVoteImageManager()
+        # A new pool for each test, so the client is built the first time a test needs it
+        self.s3_client_pool = S3ClientPool()
+        self.s3_client_pool_patch = mock.patch('image.models.s3_client_pool', self.s3_client_pool)
+        self.s3_client_pool_patch.start()
+        self.addCleanup(self.s3_client_pool_patch.stop)
+
+    def test_one_s3_client_is_shared(self):
+        with mock.patch('image.models.boto3.client', side_effect=LocalS3StandIn) as mock_boto3_client:
+            image_data = generate_image_data(10, 10, 'PNG')
+            threads = [threading.Thread(target=self.we_vote_image_manager.store_image_to_aws,
+                                        args=(image_data, "wv01cand1/image_{number}.png".format(number=number), "png"))
+                       for number in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            self.assertTrue(self.we_vote_image_manager.delete_image_from_aws("wv01cand1/image_0.png"))
+
+            self.assertEqual(mock_boto3_client.call_count, 1)
+            stored_objects = self.s3_client_pool.get_client().objects
+            self.assertEqual(len(stored_objects), 7)
+            self.assertEqual(stored_objects[(AWS_STORAGE_BUCKET_NAME, "wv01cand1/image_1.png")],
+                             (image_data, {'ContentType': "image/png"}))
+            self.assertEqual(self.we_vote_image_manager.retrieve_image_from_aws("wv01cand1/image_1.png"), image_data)
+
+    def test_resize_in_memory(self):
+        master_image_data = generate_image_data(400, 200, 'PNG')
+        resized_image_data = self.we_vote_image_manager.resize_we_vote_master_image(
+            master_image_data, 48, 48, TWITTER_PROFILE_IMAGE_NAME, 0, 0, "jpg")
+        resized_image = Image.open(BytesIO(resized_image_data))
+        self.assertEqual(resized_image.size, (48, 48))
+        self.assertEqual(resized_image.format, 'JPEG')
+
+        # Without a file extension we keep the format of the master image
+        resized_image_data = self.we_vote_image_manager.resize_we_vote_master_image(
+            master_image_data, 24, 24, TWITTER_PROFILE_IMAGE_NAME, 0, 0)
+        self.assertEqual(Image.open(BytesIO(resized_image_data)).format, 'PNG')
+
+    def test_resize_image_that_is_not_an_image(self):
+        self.assertIsNone(self.we_vote_image_manager.resize_we_vote_master_image(
+            b"not an image", 48, 48, TWITTER_PROFILE_IMAGE_NAME, 0, 0, "png"))
+
+
+class StubImageHandler(BaseHTTPRequestHandler):
+    """
+    Serves one image, with an ETag, and answers 304 Not Modified when asked for it with that ETag
+    """
+    image_data = b''
+    etag = '"wevote-stub-image-1"'
+    response_codes = []
+
+    def do_GET(self):
+        if self.headers.get('If-None-Match') == self.etag:
+            self.response_codes.append(304)
+            self.send_response(304)
+            self.send_header('ETag', self.etag)
+            self.end_headers()
+            return
+        self.response_codes.append(200)
+        self.send_response(200)
+        self.send_header('Content-Type', 'image/bmp')
+        self.send_header('Content-Length', str(len(self.image_data)))
+        self.send_header('ETag', self.etag)
+        self.end_headers()
+        try:
+            self.wfile.write(self.image_data)
+        except (BrokenPipeError, ConnectionResetError):
+            # analyze_remote_url hangs up once it has read the image size
+            pass
+
+    def log_message(self, *args):
+        pass
+
+
+class AnalyzeRemoteUrlTestCase(SimpleTestCase):
+
+    def setUp(self):
+        # Uncompressed, so the whole image is much bigger than its header
+        StubImageHandler.image_data = generate_image_data(800, 600, 'BMP')
+        StubImageHandler.response_codes = []
+        recent_image_cache.clear()
+        self.stub_server = HTTPServer(('127.0.0.1', 0), StubImageHandler)
+        self.stub_server_thread = threading.Thread(target=self.stub_server.serve_forever)
+        self.stub_server_thread.daemon = True
+        self.stub_server_thread.start()
+        self.image_url = 'http://127.0.0.1:{port}/profile.bmp'.format(port=self.stub_server.server_port)
+
+    def tearDown(self):
+        self.stub_server.shutdown()
+        self.stub_server.server_close()
+
+    def test_image_size_without_downloading_the_image(self):
+        results = analyze_remote_url(self.image_url)
+        self.assertTrue(results['image_url_valid'])
+        self.assertEqual((results['image_width'], results['image_height']), (800, 600))
+        self.assertEqual(results['image_format'], 'bmp')
+        self.assertIsNone(results['image_data'])
+
+    def test_unchanged_image_is_not_downloaded_again(self):
+        results = analyze_remote_url(self.image_url, retrieve_image_data=True)
+        self.assertEqual(results['image_data'], StubImageHandler.image_data)
+        self.assertFalse(results['image_not_modified'])
+
+        # Like the resize stage does after the master image is stored
+        image_data = WeVoteImageManager().retrieve_image_data_from_url(self.image_url)
+        self.assertEqual(image_data, StubImageHandler.image_data)
+        self.assertEqual(StubImageHandler.response_codes, [200, 304])
+
+    def test_url_that_is_not_an_image(self):
+        results = analyze_remote_url('http://127.0.0.1:{port}/missing.bmp'.format(port=1))
+        self.assertFalse(results['image_url_valid'])
+        self.assertIsNone(results['image_data'])
+
+
+class RemoteHostConcurrencyLimiterTestCase(SimpleTestCase):
+
+    def test_requests_are_limited_per_host(self):
+        limiter = RemoteHostConcurrencyLimiter(max_requests_per_host=2)
+        twitter_semaphore = limiter.semaphore_for_url('https://pbs.twimg.com/profile_images/1/a.jpg')
+        self.assertIs(twitter_semaphore, limiter.semaphore_for_url('https://PBS.twimg.com/profile_images/2/b.jpg'))
+        self.assertTrue(twitter_semaphore.acquire(blocking=False))
+        self.assertTrue(twitter_semaphore.acquire(blocking=False))
+        self.assertFalse(twitter_semaphore.acquire(blocking=False))
+
+        # A busy host doesn't hold up downloads from other hosts
+        facebook_semaphore = limiter.semaphore_for_url('https://graph.facebook.com/1/picture')
+        self.assertTrue(facebook_semaphore.acquire(blocking=False))
+
@@ -3,17 +3,22 @@
 # -*- coding: UTF-8 -*-
 
 from .controllers import cache_all_kind_of_images_locally_for_all_organizations, \
-    cache_all_kind_of_images_locally_for_all_voters, \
     cache_and_create_resized_images_for_organization, create_resized_images_for_all_organizations, \
     cache_and_create_resized_images_for_voter, create_resized_images_for_all_voters, \
     retrieve_all_images_for_one_candidate, retrieve_all_images_for_one_organization, retrieve_all_images_for_one_voter
+from .models import ImageCacheJobManager, IMAGE_CACHE_JOB_CANDIDATES, IMAGE_CACHE_JOB_KIND_OF_ENTITY_CHOICES, \
+    IMAGE_CACHE_JOB_VOTERS
 from admin_tools.views import redirect_to_sign_in_page
 from candidate.models import CandidateCampaignManager
+from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.contrib.messages import get_messages
+from django.core.urlresolvers import reverse
+from django.http import HttpResponseRedirect
 from django.shortcuts import render
+from django.views.decorators.http import require_POST
 from organization.models import OrganizationManager
-from voter.models import fetch_voter_id_from_voter_device_link, voter_has_authority
+from voter.models import fetch_voter_we_vote_id_from_voter_device_link, voter_has_authority
 import wevote_functions.admin
 from wevote_functions.functions import convert_to_int, get_voter_api_device_id, positive_value_exists
 
@@ -43,20 +48,7 @@ def cache_images_locally_for_all_voters_view(request):
     if not voter_has_authority(request, authority_required):
         return redirect_to_sign_in_page(request, authority_required)
 
-    voter_api_device_id = get_voter_api_device_id(request)  # We look in the cookies for voter_api_device_id
-    voter_id = fetch_voter_id_from_voter_device_link(voter_api_device_id)
-    voter_id = convert_to_int(voter_id)
-
-    messages_on_stage = get_messages(request)
-
-    cache_images_locally_for_all_voters_results = cache_all_kind_of_images_locally_for_all_voters()
-
-    template_values = {
-        'messages_on_stage':                messages_on_stage,
-        'cache_images_for_all_voters':      cache_images_locally_for_all_voters_results,
-        'voter_id_signed_in':               voter_id
-    }
-    return render(request, 'image/cache_images_locally_for_all_voters.html', template_values)
+    return queue_image_cache_job(request, IMAGE_CACHE_JOB_VOTERS)
 
 
 @login_required
@@ -182,3 +174,80 @@ def images_for_one_organization_view(request, organization_we_vote_id):
         'organization':                 organization
     }
     return render(request, 'image/images_for_one_organization.html', template_values)
+
+
+def queue_image_cache_job(request, kind_of_entity, google_civic_election_id=0):
+    """
+    Caching the images for every candidate, organization or voter takes far longer than an HTTP request is
+    allowed, so we queue a job for the run_image_cache_jobs management command, and show its progress
+    :param request:
+    :param kind_of_entity:
+    :param google_civic_election_id:
+    :return:
+    """
+    voter_api_device_id = get_voter_api_device_id(request)
+    job_results = ImageCacheJobManager().create_image_cache_job(
+        kind_of_entity, google_civic_election_id,
+        requested_by_voter_we_vote_id=fetch_voter_we_vote_id_from_voter_device_link(voter_api_device_id))
+    if job_results['image_cache_job_created']:
+        messages.add_message(request, messages.INFO, 'Image cache job queued for {kind_of_entity}.'.format(
+            kind_of_entity=job_results['image_cache_job'].get_kind_of_entity_display().lower()))
+    else:
+        messages.add_message(request, messages.ERROR,
+                             'Could not queue image cache job: {status}'.format(status=job_results['status']))
+    return HttpResponseRedirect(reverse('image:image_cache_job_list', args=()))
+
+
+@login_required
+def image_cache_job_create_view(request):
+    authority_required = {'admin'}  # admin, verified_volunteer
+    if not voter_has_authority(request, authority_required):
+        return redirect_to_sign_in_page(request, authority_required)
+
+    kind_of_entity = request.GET.get('kind_of_entity', IMAGE_CACHE_JOB_CANDIDATES)
+    google_civic_election_id = convert_to_int(request.GET.get('google_civic_election_id', 0))
+    if kind_of_entity not in dict(IMAGE_CACHE_JOB_KIND_OF_ENTITY_CHOICES):
+        messages.add_message(request, messages.ERROR, 'Unknown kind of entity: {kind_of_entity}'.format(
+            kind_of_entity=kind_of_entity))
+        return HttpResponseRedirect(reverse('image:image_cache_job_list', args=()))
+    return queue_image_cache_job(request, kind_of_entity, google_civic_election_id)
+
+
+@login_required
+def image_cache_job_list_view(request):
+    """
+    Show the progress of the image cache jobs
+    :param request:
+    :return:
+    """
+    authority_required = {'admin'}  # admin, verified_volunteer
+    if not voter_has_authority(request, authority_required):
+        return redirect_to_sign_in_page(request, authority_required)
+
+    image_cache_job_list = ImageCacheJobManager().retrieve_job_list()
+    job_still_running = False
+    for image_cache_job in image_cache_job_list:
+        if not image_cache_job.is_finished():
+            job_still_running = True
+
+    messages_on_stage = get_messages(request)
+    template_values = {
+        'messages_on_stage':        messages_on_stage,
+        'image_cache_job_list':     image_cache_job_list,
+        'job_still_running':        job_still_running,
+    }
+    return render(request, 'image/image_cache_job_list.html', template_values)
+
+
+@login_required
+@require_POST
+def image_cache_job_cancel_view(request, image_cache_job_id=0):
+    authority_required = {'admin'}  # admin, verified_volunteer
+    if not voter_has_authority(request, authority_required):
+        return redirect_to_sign_in_page(request, authority_required)
+
+    if ImageCacheJobManager().cancel_job(convert_to_int(image_cache_job_id)):
+        messages.add_message(request, messages.INFO, 'Image cache job canceled.')
+    else:
+        messages.add_message(request, messages.ERROR, 'Image cache job could not be canceled.')
+    return HttpResponseRedirect(reverse('image:image_cache_job_list', args=()))
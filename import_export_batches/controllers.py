@@ -2,18 +2,20 @@
 # Brought to you by We Vote. Be good.
 # -*- coding: UTF-8 -*-
 
-from .models import BatchManager, BatchDescription, BatchHeaderMap, BatchRow, BatchRowActionOrganization, \
-    BatchRowActionMeasure, BatchRowActionElectedOffice, BatchRowActionContestOffice, BatchRowActionPolitician, \
-    BatchRowActionCandidate, BatchRowActionPosition, BatchRowActionBallotItem, \
+from .models import BatchEntrySavepoint, BatchManager, BatchDescription, BatchHeaderMap, BatchRow, \
+    BatchRowActionOrganization, BatchRowActionMeasure, BatchRowActionElectedOffice, BatchRowActionContestOffice, \
+    BatchRowActionPolitician, BatchRowActionCandidate, BatchRowActionPosition, BatchRowActionBallotItem, \
     CLEAN_DATA_MANUALLY, POSITION, \
     IMPORT_CREATE, IMPORT_ADD_TO_EXISTING, IMPORT_DATA_ALREADY_MATCHING, IMPORT_QUERY_ERROR, \
     IMPORT_TO_BE_DETERMINED, DO_NOT_PROCESS, \
     BATCH_IMPORT_KEYS_ACCEPTED_FOR_CANDIDATES, BATCH_IMPORT_KEYS_ACCEPTED_FOR_CONTEST_OFFICES, \
     BATCH_IMPORT_KEYS_ACCEPTED_FOR_ELECTED_OFFICES, BATCH_IMPORT_KEYS_ACCEPTED_FOR_MEASURES, \
     BATCH_IMPORT_KEYS_ACCEPTED_FOR_ORGANIZATIONS, BATCH_IMPORT_KEYS_ACCEPTED_FOR_POLITICIANS, \
-    BATCH_IMPORT_KEYS_ACCEPTED_FOR_POSITIONS, BATCH_IMPORT_KEYS_ACCEPTED_FOR_BALLOT_ITEMS
+    BATCH_IMPORT_KEYS_ACCEPTED_FOR_POSITIONS, BATCH_IMPORT_KEYS_ACCEPTED_FOR_BALLOT_ITEMS, \
+    retrieve_entries_by_we_vote_id, retrieve_query_in_chunks
 from ballot.models import BallotItem, BallotReturnedManager, BallotItemManager
 from candidate.models import CandidateCampaign, CandidateCampaignListManager, CandidateCampaignManager
+from django.db import transaction
 from django.db.models import Q
 from elected_office.models import ElectedOffice, ElectedOfficeManager
 from electoral_district.controllers import retrieve_electoral_district
@@ -97,7 +99,7 @@ def create_batch_row_actions(batch_header_id, batch_row_id=0, state_code=""):
             # This is fine
             batch_header_map = BatchHeaderMap()
 
-    batch_row_list = []
+    batch_row_query = BatchRow.objects.none()
     batch_row_action_list_found = False
     if batch_header_map_found:
         try:
@@ -108,102 +110,70 @@ def create_batch_row_actions(batch_header_id, batch_row_id=0, state_code=""):
             elif positive_value_exists(state_code):
                 batch_row_query = batch_row_query.filter(state_code__iexact=state_code)
 
-            batch_row_list = list(batch_row_query)
-            if len(batch_row_list):
+            if batch_row_query.exists():
                 batch_row_action_list_found = True
         except BatchRow.DoesNotExist:
             # This is fine
             pass
 
     if batch_description_found and batch_header_map_found and batch_row_action_list_found:
-        for one_batch_row in batch_row_list:
-            if kind_of_batch == CANDIDATE:
-                results = create_batch_row_action_candidate(batch_description, batch_header_map, one_batch_row)
-
-                if results['batch_row_action_updated']:
-                    number_of_batch_actions_updated += 1
-                    success = True
-                elif results['batch_row_action_created']:
-                    # for now, do not handle batch_row_action_candidate data
-                    # batch_row_action_candidate = results['batch_row_action_candidate']
-                    number_of_batch_actions_created += 1
-                    success = True
-                    # Now check for warnings (like "this is a duplicate"). If warnings are found,
-                    # add the warning to batch_row_action_measure entry
-                    # batch_row_action_measure.kind_of_action = "TEST"
-            elif kind_of_batch == CONTEST_OFFICE:
-                results = create_batch_row_action_contest_office(batch_description, batch_header_map, one_batch_row)
-
-                if results['batch_row_action_updated']:
-                    number_of_batch_actions_updated += 1
-                    success = True
-                elif results['batch_row_action_created']:
-                    number_of_batch_actions_created += 1
-                    success = True
-            elif kind_of_batch == ELECTED_OFFICE:
-                results = create_batch_row_action_elected_office(batch_description, batch_header_map, one_batch_row)
-
-                if results['action_elected_office_updated']:
-                    number_of_batch_actions_updated += 1
-                    success = True
-                elif results['new_action_elected_office_created']:
-                    # for now, do not handle batch_row_action_elected_office data
-                    # batch_row_action_elected_office = results['batch_row_action_elected_office']
-                    number_of_batch_actions_created += 1
-                    success = True
-            elif kind_of_batch == MEASURE:
-                results = create_batch_row_action_measure(batch_description, batch_header_map, one_batch_row)
-
-                if results['batch_row_action_updated']:
-                    number_of_batch_actions_updated += 1
-                    success = True
-                elif results['batch_row_action_created']:
-                    # for now, do not handle batch_row_action_measure data
-                    # batch_row_action_measure = results['batch_row_action_measure']
-                    number_of_batch_actions_created += 1
-                    success = True
-            elif kind_of_batch == ORGANIZATION_WORD:
-                results = create_batch_row_action_organization(batch_description, batch_header_map, one_batch_row)
-
-                if results['batch_row_action_updated']:
-                    number_of_batch_actions_updated += 1
-                    success = True
-                elif results['batch_row_action_created']:
-                    number_of_batch_actions_created += 1
-                    success = True
-                else:
-                    number_of_batch_actions_failed += 1
-            elif kind_of_batch == POLITICIAN:
-                results = create_batch_row_action_politician(batch_description, batch_header_map, one_batch_row)
-
-                if results['batch_row_action_updated']:
-                    number_of_batch_actions_updated += 1
-                    success = True
-                elif results['batch_row_action_created']:
-                    # for now, do not handle batch_row_action_politician data
-                    # batch_row_action_politician = results['batch_row_action_politician']
-                    number_of_batch_actions_created += 1
-                    success = True
-            elif kind_of_batch == POSITION:
-                results = create_batch_row_action_position(batch_description, batch_header_map, one_batch_row)
-
-                if results['batch_row_action_updated']:
-                    number_of_batch_actions_updated += 1
-                    success = True
-                elif results['batch_row_action_created']:
-                    # for now, do not handle batch_row_action_politician data
-                    # batch_row_action_politician = results['batch_row_action_politician']
-                    number_of_batch_actions_created += 1
-                    success = True
-            elif kind_of_batch == IMPORT_BALLOT_ITEM:
-                results = create_batch_row_action_ballot_item(batch_description, batch_header_map, one_batch_row)
-
-                if results['batch_row_action_updated']:
-                    number_of_batch_actions_updated += 1
-                    success = True
-                elif results['batch_row_action_created']:
-                    number_of_batch_actions_created += 1
-                    success = True
+        batch_manager = BatchManager()
+        number_of_batch_rows_processed = 0
+        # Work through the rows a chunk at a time, so memory stays flat on very large batches. Each chunk is
+        #  saved in one transaction: faster than committing every row, and a chunk that fails rolls back alone.
+        #  Each row also gets a savepoint, so a database error on one row only rolls back that row.
+        for batch_row_list in retrieve_query_in_chunks(batch_row_query):
+            number_created_before_chunk = number_of_batch_actions_created
+            number_updated_before_chunk = number_of_batch_actions_updated
+            number_failed_before_chunk = number_of_batch_actions_failed
+            try:
+                with transaction.atomic():
+                    # Retrieve the BatchRowAction... entries for the whole chunk at once. The new ones are filled in
+                    #  below, and then saved together with one bulk_create.
+                    existing_results_dict = {}
+                    batch_row_ids_to_create = set()
+                    batch_row_action_list_to_create = []
+                    if kind_of_batch != ELECTED_OFFICE:
+                        chunk_results = batch_manager.retrieve_batch_row_actions_for_batch_rows(
+                            kind_of_batch, batch_description, batch_row_list)
+                        if chunk_results['success']:
+                            existing_results_dict = chunk_results['existing_results_dict']
+                            batch_row_ids_to_create = chunk_results['batch_row_ids_to_create']
+                            batch_row_action_list_to_create = chunk_results['batch_row_action_list_to_create']
+
+                    for one_batch_row in batch_row_list:
+                        # When not found in existing_results_dict, create_batch_row_action_... looks it up itself
+                        existing_results = existing_results_dict.get(one_batch_row.id)
+                        with BatchEntrySavepoint() as entry_savepoint:
+                            results = create_batch_row_action_for_one_batch_row(
+                                kind_of_batch, batch_description, batch_header_map, one_batch_row, existing_results)
+                        if entry_savepoint.database_error is not None:
+                            number_of_batch_actions_failed += 1
+                            status += "CREATE_BATCH_ROW_ACTIONS-ROW_ROLLED_BACK "
+                            handle_exception(entry_savepoint.database_error, logger=logger, exception_message=status)
+                        elif not results['success']:
+                            number_of_batch_actions_failed += 1
+                        elif one_batch_row.id in batch_row_ids_to_create or results['batch_row_action_created']:
+                            number_of_batch_actions_created += 1
+                            success = True
+                        else:
+                            number_of_batch_actions_updated += 1
+                            success = True
+                    # Saved even when a row couldn't be filled in, so its status can be reviewed
+                    batch_manager.create_batch_row_actions_in_bulk(batch_row_action_list_to_create)
+            except Exception as e:
+                number_of_batch_actions_created = number_created_before_chunk
+                number_of_batch_actions_updated = number_updated_before_chunk
+                number_of_batch_actions_failed = number_failed_before_chunk + len(batch_row_list)
+                status += "CREATE_BATCH_ROW_ACTIONS-CHUNK_ROLLED_BACK "
+                handle_exception(e, logger=logger, exception_message=status)
+
+            number_of_batch_rows_processed += len(batch_row_list)
+            logger.info("create_batch_row_actions, batch_header_id: " + str(batch_header_id) +
+                        ", batch rows processed: " + str(number_of_batch_rows_processed) +
+                        ", created: " + str(number_of_batch_actions_created) +
+                        ", updated: " + str(number_of_batch_actions_updated) +
+                        ", failed: " + str(number_of_batch_actions_failed))
 
     results = {
         'success':                          success,
@@ -213,17 +183,69 @@ def create_batch_row_actions(batch_header_id, batch_row_id=0, state_code=""):
         'batch_actions_created':            success,
         'number_of_batch_actions_created':  number_of_batch_actions_created,
         'batch_actions_updated':            update_success,
-        'number_of_batch_actions_updated':  number_of_batch_actions_updated
+        'number_of_batch_actions_updated':  number_of_batch_actions_updated,
+        'number_of_batch_actions_failed':   number_of_batch_actions_failed,
     }
     return results
 
 
-def create_batch_row_action_organization(batch_description, batch_header_map, one_batch_row):
+def create_batch_row_action_for_one_batch_row(kind_of_batch, batch_description, batch_header_map, one_batch_row,
+                                              existing_results=None):
+    """
+    Send one BatchRow to the create_batch_row_action_... function for this kind_of_batch
+    :param kind_of_batch:
+    :param batch_description:
+    :param batch_header_map:
+    :param one_batch_row:
+    :param existing_results: results of retrieve_batch_row_action_..., when already retrieved for the whole chunk.
+        Entries marked 'batch_row_action_save_deferred' are filled in but not saved.
+    :return:
+    """
+    if kind_of_batch == CANDIDATE:
+        return create_batch_row_action_candidate(
+            batch_description, batch_header_map, one_batch_row, existing_results)
+    elif kind_of_batch == CONTEST_OFFICE:
+        return create_batch_row_action_contest_office(
+            batch_description, batch_header_map, one_batch_row, existing_results)
+    elif kind_of_batch == ELECTED_OFFICE:
+        results = create_batch_row_action_elected_office(batch_description, batch_header_map, one_batch_row)
+        results['batch_row_action_updated'] = results['action_elected_office_updated']
+        results['batch_row_action_created'] = results['new_action_elected_office_created']
+        return results
+    elif kind_of_batch == MEASURE:
+        return create_batch_row_action_measure(
+            batch_description, batch_header_map, one_batch_row, existing_results)
+    elif kind_of_batch == ORGANIZATION_WORD:
+        return create_batch_row_action_organization(
+            batch_description, batch_header_map, one_batch_row, existing_results)
+    elif kind_of_batch == POLITICIAN:
+        return create_batch_row_action_politician(
+            batch_description, batch_header_map, one_batch_row, existing_results)
+    elif kind_of_batch == POSITION:
+        return create_batch_row_action_position(
+            batch_description, batch_header_map, one_batch_row, existing_results)
+    elif kind_of_batch == IMPORT_BALLOT_ITEM:
+        return create_batch_row_action_ballot_item(
+            batch_description, batch_header_map, one_batch_row, existing_results)
+
+    results = {
+        'success':                  False,
+        'status':                   "CREATE_BATCH_ROW_ACTION-KIND_OF_BATCH_NOT_SUPPORTED ",
+        'batch_row_action_created': False,
+        'batch_row_action_updated': False,
+    }
+    return results
+
+
+def create_batch_row_action_organization(batch_description, batch_header_map, one_batch_row,
+                                         existing_results=None):
     """
 
     :param batch_description:
     :param batch_header_map:
     :param one_batch_row:
+    :param existing_results: results of retrieve_batch_row_action_organization, when create_batch_row_actions
+        already retrieved them for the whole chunk
     :return:
     """
     batch_manager = BatchManager()
@@ -236,8 +258,9 @@ def create_batch_row_action_organization(batch_description, batch_header_map, on
     # Does a BatchRowActionOrganization entry already exist?
     # We want to start with the BatchRowAction... entry first so we can record our findings line by line while
     #  we are checking for existing duplicate data
-    existing_results = batch_manager.retrieve_batch_row_action_organization(
-        batch_description.batch_header_id, one_batch_row.id)
+    if existing_results is None:
+        existing_results = batch_manager.retrieve_batch_row_action_organization(
+            batch_description.batch_header_id, one_batch_row.id)
     if existing_results['batch_row_action_found']:
         batch_row_action_organization = existing_results['batch_row_action_organization']
         batch_row_action_updated = True
@@ -365,7 +388,8 @@ def create_batch_row_action_organization(batch_description, batch_header_map, on
         batch_row_action_organization.organization_type = organization_type_transformed
         batch_row_action_organization.organization_contact_name = organization_contact_name
         batch_row_action_organization.kind_of_action = kind_of_action
-        batch_row_action_organization.save()
+        if not existing_results.get('batch_row_action_save_deferred', False):
+            batch_row_action_organization.save()
         success = True
     except Exception as e:
         success = False
@@ -381,12 +405,15 @@ def create_batch_row_action_organization(batch_description, batch_header_map, on
     return results
 
 
-def create_batch_row_action_measure(batch_description, batch_header_map, one_batch_row):
+def create_batch_row_action_measure(batch_description, batch_header_map, one_batch_row,
+                                    existing_results=None):
     """
     Handle batch_row for measure type
     :param batch_description:
     :param batch_header_map:
     :param one_batch_row:
+    :param existing_results: results of retrieve_batch_row_action_measure, when create_batch_row_actions
+        already retrieved them for the whole chunk
     :return:
     """
     batch_manager = BatchManager()
@@ -404,8 +431,9 @@ def create_batch_row_action_measure(batch_description, batch_header_map, one_bat
     # Does a BatchRowActionContestOffice entry already exist?
     # We want to start with the BatchRowAction... entry first so we can record our findings line by line while
     #  we are checking for existing duplicate data
-    existing_results = batch_manager.retrieve_batch_row_action_measure(
-        batch_description.batch_header_id, one_batch_row.id)
+    if existing_results is None:
+        existing_results = batch_manager.retrieve_batch_row_action_measure(
+            batch_description.batch_header_id, one_batch_row.id)
     if existing_results['batch_row_action_found']:
         status += "BATCH_ROW_ACTION_MEASURE_FOUND "
         batch_row_action_measure = existing_results['batch_row_action_measure']
@@ -588,7 +616,8 @@ def create_batch_row_action_measure(batch_description, batch_header_map, one_bat
         batch_row_action_measure.state_code = state_code
         batch_row_action_measure.status = status
         batch_row_action_measure.kind_of_action = kind_of_action
-        batch_row_action_measure.save()
+        if not existing_results.get('batch_row_action_save_deferred', False):
+            batch_row_action_measure.save()
         success = True
     except Exception as e:
         success = False
@@ -793,12 +822,15 @@ def create_batch_row_action_elected_office(batch_description, batch_header_map,
     return results
 
 
-def create_batch_row_action_contest_office(batch_description, batch_header_map, one_batch_row):
+def create_batch_row_action_contest_office(batch_description, batch_header_map, one_batch_row,
+                                           existing_results=None):
     """
     Handle batch_row for contest office type
     :param batch_description:
     :param batch_header_map:
     :param one_batch_row:
+    :param existing_results: results of retrieve_batch_row_action_contest_office, when create_batch_row_actions
+        already retrieved them for the whole chunk
     :return:
     """
     batch_manager = BatchManager()
@@ -815,8 +847,9 @@ def create_batch_row_action_contest_office(batch_description, batch_header_map,
     # Does a BatchRowActionContestOffice entry already exist?
     # We want to start with the BatchRowAction... entry first so we can record our findings line by line while
     #  we are checking for existing duplicate data
-    existing_results = batch_manager.retrieve_batch_row_action_contest_office(
-        batch_description.batch_header_id, one_batch_row.id)
+    if existing_results is None:
+        existing_results = batch_manager.retrieve_batch_row_action_contest_office(
+            batch_description.batch_header_id, one_batch_row.id)
     if existing_results['batch_row_action_found']:
         status += "BATCH_ROW_ACTION_CONTEST_OFFICE_FOUND "
         batch_row_action_contest_office = existing_results['batch_row_action_contest_office']
@@ -1132,7 +1165,8 @@ def create_batch_row_action_contest_office(batch_description, batch_header_map,
         batch_row_action_contest_office.ocd_division_id = ocd_division_id
         batch_row_action_contest_office.state_code = state_code
         batch_row_action_contest_office.status = status
-        batch_row_action_contest_office.save()
+        if not existing_results.get('batch_row_action_save_deferred', False):
+            batch_row_action_contest_office.save()
         success = True
     except Exception as e:
         success = False
@@ -1158,12 +1192,15 @@ def create_batch_row_action_contest_office(batch_description, batch_header_map,
     return results
 
 
-def create_batch_row_action_politician(batch_description, batch_header_map, one_batch_row):
+def create_batch_row_action_politician(batch_description, batch_header_map, one_batch_row,
+                                       existing_results=None):
     """
     Handle batch_row for politician type
     :param batch_description:
     :param batch_header_map:
     :param one_batch_row:
+    :param existing_results: results of retrieve_batch_row_action_politician, when create_batch_row_actions
+        already retrieved them for the whole chunk
     :return:
     """
     batch_manager = BatchManager()
@@ -1176,8 +1213,9 @@ def create_batch_row_action_politician(batch_description, batch_header_map, one_
     # Does a BatchRowActionPolitician entry already exist?
     # We want to start with the BatchRowAction... entry first so we can record our findings line by line while
     #  we are checking for existing duplicate data
-    existing_results = batch_manager.retrieve_batch_row_action_politician(
-        batch_description.batch_header_id, one_batch_row.id)
+    if existing_results is None:
+        existing_results = batch_manager.retrieve_batch_row_action_politician(
+            batch_description.batch_header_id, one_batch_row.id)
     if existing_results['batch_row_action_found']:
         batch_row_action_politician = existing_results['batch_row_action_politician']
         batch_row_action_updated = True
@@ -1387,7 +1425,8 @@ def create_batch_row_action_politician(batch_description, batch_header_map, one_
         batch_row_action_politician.kind_of_action = kind_of_action
         batch_row_action_politician.status = status
         batch_row_action_politician.politician_we_vote_id = politician_we_vote_id
-        batch_row_action_politician.save()
+        if not existing_results.get('batch_row_action_save_deferred', False):
+            batch_row_action_politician.save()
 
         success = True
         status += "CREATE_BATCH_ROW_ACTION_POLITICIAN-BATCH_ROW_ACTION_POLITICIAN_CREATED"
@@ -1417,12 +1456,15 @@ def create_batch_row_action_politician(batch_description, batch_header_map, one_
     return results
 
 
-def create_batch_row_action_candidate(batch_description, batch_header_map, one_batch_row):
+def create_batch_row_action_candidate(batch_description, batch_header_map, one_batch_row,
+                                      existing_results=None):
     """
     Handle batch_row for candidate
     :param batch_description:
     :param batch_header_map:
     :param one_batch_row:
+    :param existing_results: results of retrieve_batch_row_action_candidate, when create_batch_row_actions
+        already retrieved them for the whole chunk
     :return:
     """
     batch_manager = BatchManager()
@@ -1439,8 +1481,9 @@ def create_batch_row_action_candidate(batch_description, batch_header_map, one_b
     # Does a BatchRowActionCandidate entry already exist?
     # We want to start with the BatchRowAction... entry first so we can record our findings line by line while
     #  we are checking for existing duplicate data
-    existing_results = batch_manager.retrieve_batch_row_action_candidate(
-        batch_description.batch_header_id, one_batch_row.id)
+    if existing_results is None:
+        existing_results = batch_manager.retrieve_batch_row_action_candidate(
+            batch_description.batch_header_id, one_batch_row.id)
     if existing_results['batch_row_action_found']:
         batch_row_action_candidate = existing_results['batch_row_action_candidate']
         batch_row_action_updated = True
@@ -1753,7 +1796,9 @@ def create_batch_row_action_candidate(batch_description, batch_header_map, one_b
         batch_row_action_candidate.photo_url = candidate_profile_image_url
         batch_row_action_candidate.state_code = state_code
         batch_row_action_candidate.status = status
-        batch_row_action_candidate.save()
+        if not existing_results.get('batch_row_action_save_deferred', False):
+            batch_row_action_candidate.save()
+        success = True
     except Exception as e:
         success = False
         status += "BATCH_ROW_ACTION_CANDIDATE_UNABLE_TO_SAVE " + str(e) + " "
@@ -1776,12 +1821,15 @@ def create_batch_row_action_candidate(batch_description, batch_header_map, one_b
     return results
 
 
-def create_batch_row_action_position(batch_description, batch_header_map, one_batch_row):
+def create_batch_row_action_position(batch_description, batch_header_map, one_batch_row,
+                                     existing_results=None):
     """
 
     :param batch_description:
     :param batch_header_map:
     :param one_batch_row:
+    :param existing_results: results of retrieve_batch_row_action_position, when create_batch_row_actions
+        already retrieved them for the whole chunk
     :return:
     """
     batch_manager = BatchManager()
@@ -1806,8 +1854,9 @@ def create_batch_row_action_position(batch_description, batch_header_map, one_ba
     # Does a BatchRowActionPosition entry already exist?
     # We want to start with the BatchRowAction... entry first so we can record our findings line by line while
     #  we are checking for existing duplicate data
-    existing_results = batch_manager.retrieve_batch_row_action_position(
-        batch_description.batch_header_id, one_batch_row.id)
+    if existing_results is None:
+        existing_results = batch_manager.retrieve_batch_row_action_position(
+            batch_description.batch_header_id, one_batch_row.id)
     if existing_results['batch_row_action_found']:
         batch_row_action_position = existing_results['batch_row_action_position']
         batch_row_action_updated = True
@@ -2110,7 +2159,8 @@ def create_batch_row_action_position(batch_description, batch_header_map, one_ba
         batch_row_action_position.organization_we_vote_id = organization_we_vote_id
         batch_row_action_position.kind_of_action = kind_of_action
         batch_row_action_position.status = status
-        batch_row_action_position.save()
+        if not existing_results.get('batch_row_action_save_deferred', False):
+            batch_row_action_position.save()
         success = True
     except Exception as e:
         success = False
@@ -2126,12 +2176,15 @@ def create_batch_row_action_position(batch_description, batch_header_map, one_ba
     return results
 
 
-def create_batch_row_action_ballot_item(batch_description, batch_header_map, one_batch_row):
+def create_batch_row_action_ballot_item(batch_description, batch_header_map, one_batch_row,
+                                        existing_results=None):
     """
     Handle batch_row for ballot_item type
     :param batch_description:
     :param batch_header_map:
     :param one_batch_row:
+    :param existing_results: results of retrieve_batch_row_action_ballot_item, when create_batch_row_actions
+        already retrieved them for the whole chunk
     :return:
     """
     batch_manager = BatchManager()
@@ -2165,8 +2218,9 @@ def create_batch_row_action_ballot_item(batch_description, batch_header_map, one
     # Does a BatchRowActionBallotItem entry already exist?
     # We want to start with the BatchRowAction... entry first so we can record our findings line by line while
     #  we are checking for existing duplicate data
-    existing_results = batch_manager.retrieve_batch_row_action_ballot_item(
-        batch_description.batch_header_id, one_batch_row.id)
+    if existing_results is None:
+        existing_results = batch_manager.retrieve_batch_row_action_ballot_item(
+            batch_description.batch_header_id, one_batch_row.id)
     if existing_results['batch_row_action_found']:
         batch_row_action_ballot_item = existing_results['batch_row_action_ballot_item']
         batch_row_action_updated = True
@@ -2380,7 +2434,8 @@ def create_batch_row_action_ballot_item(batch_description, batch_header_map, one
             batch_row_action_ballot_item.ballot_item_display_name = contest_office_name
         elif positive_value_exists(contest_measure_name):
             batch_row_action_ballot_item.ballot_item_display_name = contest_measure_name
-        batch_row_action_ballot_item.save()
+        if not existing_results.get('batch_row_action_save_deferred', False):
+            batch_row_action_ballot_item.save()
     except Exception as e:
         success = False
         status += "BATCH_ROW_ACTION_BALLOT_ITEM_UNABLE_TO_SAVE "
@@ -2487,7 +2542,7 @@ def import_elected_office_data_from_batch_row_actions(batch_header_id, batch_row
             }
             return results
 
-        if len(batch_row_action_list):
+        if batch_row_action_list.exists():
             batch_row_action_list_found = True
 
     except BatchRowActionElectedOffice.DoesNotExist:
@@ -2507,69 +2562,86 @@ def import_elected_office_data_from_batch_row_actions(batch_header_id, batch_row
         }
         return results
 
-    for one_batch_row_action in batch_row_action_list:
-
-        # Find the column in the incoming batch_row with the header == elected_office_name
-        elected_office_name = one_batch_row_action.elected_office_name
-        elected_office_name_es = one_batch_row_action.elected_office_name_es
-        if positive_value_exists(one_batch_row_action.google_civic_election_id):
-            google_civic_election_id = str(one_batch_row_action.google_civic_election_id)
-        else:
-            google_civic_election_id = str(batch_description.google_civic_election_id)
-        ctcl_uuid = one_batch_row_action.ctcl_uuid
-        elected_office_description = one_batch_row_action.elected_office_description
-        elected_office_description_es = one_batch_row_action.elected_office_description_es
-        elected_office_is_partisan = one_batch_row_action.elected_office_is_partisan
-        state_code = one_batch_row_action.state_code
-
-        # Look up ElectedOffice to see if an entry exists
-        # These five parameters are needed to look up in ElectedOffice table for a match
-        if (positive_value_exists(elected_office_name) or positive_value_exists(elected_office_name_es)) and \
-                positive_value_exists(state_code) and positive_value_exists(google_civic_election_id):
-            elected_office_manager = ElectedOfficeManager()
-            if create_entry_flag:
-                results = elected_office_manager.create_elected_office_row_entry(elected_office_name, state_code,
-                                                                                 elected_office_description, ctcl_uuid,
-                                                                                 elected_office_is_partisan,
-                                                                                 google_civic_election_id,
-                                                                                 elected_office_name_es,
-                                                                                 elected_office_description_es)
-                if results['new_elected_office_created']:
-                    number_of_elected_offices_created += 1
-                    success = True
-                    # now update BatchRowActionElectedOffice table entry
-                    try:
-                        one_batch_row_action.kind_of_action = IMPORT_ADD_TO_EXISTING
-                        new_elected_office = results['new_elected_office']
-                        one_batch_row_action.elected_office_we_vote_id = new_elected_office.we_vote_id
-                        one_batch_row_action.save()
-                    except Exception as e:
-                        success = False
-                        status += "ELECTED_OFFICE_RETRIEVE_ERROR"
-                        handle_exception(e, logger=logger, exception_message=status)
-            elif update_entry_flag:
-                elected_office_we_vote_id = one_batch_row_action.elected_office_we_vote_id
-                results = elected_office_manager.update_elected_office_row_entry(elected_office_name,
-                                                                                 state_code, elected_office_description,
-                                                                                 ctcl_uuid, elected_office_is_partisan,
-                                                                                 google_civic_election_id,
-                                                                                 elected_office_we_vote_id,
-                                                                                 elected_office_name_es,
-                                                                                 elected_office_description_es)
-                if results['elected_office_updated']:
-                    number_of_elected_offices_updated += 1
-                    success = True
-            else:
-                # This is error, it shouldn't reach here, we are handling IMPORT_CREATE or UPDATE entries only.
-                status += "IMPORT_ELECTED_OFFICE_ENTRY:NO_CREATE_OR_UPDATE_ERROR"
-                results = {
-                    'success':                              success,
-                    'status':                               status,
-                    'number_of_elected_offices_created':    number_of_elected_offices_created,
-                    'number_of_elected_offices_updated':    number_of_elected_offices_updated,
-                    'new_elected_office':                   new_elected_office,
-                }
-                return results
+    # Work through the entries a chunk at a time, each chunk in its own transaction, so a chunk that fails
+    #  rolls back alone
+    for batch_row_action_chunk in retrieve_query_in_chunks(batch_row_action_list):
+        number_created_before_chunk = number_of_elected_offices_created
+        number_updated_before_chunk = number_of_elected_offices_updated
+        try:
+            with transaction.atomic():
+                for one_batch_row_action in batch_row_action_chunk:
+                    number_created_before_entry = number_of_elected_offices_created
+                    number_updated_before_entry = number_of_elected_offices_updated
+                    with BatchEntrySavepoint() as entry_savepoint:
+                        # Find the column in the incoming batch_row with the header == elected_office_name
+                        elected_office_name = one_batch_row_action.elected_office_name
+                        elected_office_name_es = one_batch_row_action.elected_office_name_es
+                        if positive_value_exists(one_batch_row_action.google_civic_election_id):
+                            google_civic_election_id = str(one_batch_row_action.google_civic_election_id)
+                        else:
+                            google_civic_election_id = str(batch_description.google_civic_election_id)
+                        ctcl_uuid = one_batch_row_action.ctcl_uuid
+                        elected_office_description = one_batch_row_action.elected_office_description
+                        elected_office_description_es = one_batch_row_action.elected_office_description_es
+                        elected_office_is_partisan = one_batch_row_action.elected_office_is_partisan
+                        state_code = one_batch_row_action.state_code
+
+                        # Look up ElectedOffice to see if an entry exists
+                        # These five parameters are needed to look up in ElectedOffice table for a match
+                        if (positive_value_exists(elected_office_name) or
+                                positive_value_exists(elected_office_name_es)) and \
+                                positive_value_exists(state_code) and positive_value_exists(google_civic_election_id):
+                            elected_office_manager = ElectedOfficeManager()
+                            if create_entry_flag:
+                                results = elected_office_manager.create_elected_office_row_entry(
+                                    elected_office_name, state_code, elected_office_description, ctcl_uuid,
+                                    elected_office_is_partisan, google_civic_election_id, elected_office_name_es,
+                                    elected_office_description_es)
+                                if results['new_elected_office_created']:
+                                    number_of_elected_offices_created += 1
+                                    success = True
+                                    # now update BatchRowActionElectedOffice table entry
+                                    try:
+                                        one_batch_row_action.kind_of_action = IMPORT_ADD_TO_EXISTING
+                                        new_elected_office = results['new_elected_office']
+                                        one_batch_row_action.elected_office_we_vote_id = new_elected_office.we_vote_id
+                                        one_batch_row_action.save()
+                                    except Exception as e:
+                                        success = False
+                                        status += "ELECTED_OFFICE_RETRIEVE_ERROR"
+                                        handle_exception(e, logger=logger, exception_message=status)
+                            elif update_entry_flag:
+                                elected_office_we_vote_id = one_batch_row_action.elected_office_we_vote_id
+                                results = elected_office_manager.update_elected_office_row_entry(
+                                    elected_office_name, state_code, elected_office_description, ctcl_uuid,
+                                    elected_office_is_partisan, google_civic_election_id, elected_office_we_vote_id,
+                                    elected_office_name_es, elected_office_description_es)
+                                if results['elected_office_updated']:
+                                    number_of_elected_offices_updated += 1
+                                    success = True
+                            else:
+                                # This is error, it shouldn't reach here, we are handling IMPORT_CREATE or UPDATE
+                                #  entries
+                                #  only.
+                                status += "IMPORT_ELECTED_OFFICE_ENTRY:NO_CREATE_OR_UPDATE_ERROR"
+                                results = {
+                                    'success':                              success,
+                                    'status':                               status,
+                                    'number_of_elected_offices_created':    number_of_elected_offices_created,
+                                    'number_of_elected_offices_updated':    number_of_elected_offices_updated,
+                                    'new_elected_office':                   new_elected_office,
+                                }
+                                return results
+                    if entry_savepoint.database_error is not None:
+                        number_of_elected_offices_created = number_created_before_entry
+                        number_of_elected_offices_updated = number_updated_before_entry
+                        status += "IMPORT_ELECTED_OFFICE_ENTRY-ENTRY_ROLLED_BACK "
+                        handle_exception(entry_savepoint.database_error, logger=logger, exception_message=status)
+        except Exception as e:
+            number_of_elected_offices_created = number_created_before_chunk
+            number_of_elected_offices_updated = number_updated_before_chunk
+            status += "IMPORT_ELECTED_OFFICE_ENTRY-CHUNK_ROLLED_BACK "
+            handle_exception(e, logger=logger, exception_message=status)
 
     if number_of_elected_offices_created:
         status += "IMPORT_ELECTED_OFFICE_ENTRY:ELECTED_OFFICE_CREATED"
@@ -2857,7 +2929,7 @@ def import_contest_office_data_from_batch_row_actions(
             }
             return results
 
-        if len(batch_row_action_list):
+        if batch_row_action_list.exists():
             batch_row_action_list_found = True
 
     except BatchRowActionContestOffice.DoesNotExist:
@@ -2875,90 +2947,115 @@ def import_contest_office_data_from_batch_row_actions(
         }
         return results
 
-    for one_batch_row_action in batch_row_action_list:
-
-        # Find the column in the incoming batch_row with the header == contest_office_name
-        contest_office_name = one_batch_row_action.contest_office_name
-        google_civic_election_id = str(one_batch_row_action.google_civic_election_id)
-        ctcl_uuid = one_batch_row_action.ctcl_uuid
-        contest_office_votes_allowed = one_batch_row_action.number_voting_for
-        contest_office_number_elected = one_batch_row_action.number_elected
-        state_code = one_batch_row_action.state_code
-        defaults = {
-            'district_id':                      one_batch_row_action.district_id,
-            'district_name':                    one_batch_row_action.district_name,
-            'district_scope':                   one_batch_row_action.district_scope,
-            'ballotpedia_district_id':          one_batch_row_action.ballotpedia_district_id,
-            'ballotpedia_election_id':          one_batch_row_action.ballotpedia_election_id,
-            'ballotpedia_office_id':            one_batch_row_action.ballotpedia_office_id,
-            'ballotpedia_office_name':          one_batch_row_action.ballotpedia_office_name,
-            'ballotpedia_office_url':           one_batch_row_action.ballotpedia_office_url,
-            'ballotpedia_race_id':              one_batch_row_action.ballotpedia_race_id,
-            'ballotpedia_race_office_level':    one_batch_row_action.ballotpedia_race_office_level,
-            'is_ballotpedia_general_election':          one_batch_row_action.is_ballotpedia_general_election,
-            'is_ballotpedia_general_runoff_election':   one_batch_row_action.is_ballotpedia_general_runoff_election,
-            'is_ballotpedia_primary_election':          one_batch_row_action.is_ballotpedia_primary_election,
-            'is_ballotpedia_primary_runoff_election':   one_batch_row_action.is_ballotpedia_primary_runoff_election,
-        }
-
-        # These three parameters are minimum variables required for the ContestOffice table
-        if positive_value_exists(contest_office_name) and positive_value_exists(state_code) and \
-                positive_value_exists(google_civic_election_id):
-            contest_office_manager = ContestOfficeManager()
-            if create_entry_flag:
-                results = contest_office_manager.create_contest_office_row_entry(contest_office_name,
-                                                                                 contest_office_votes_allowed,
-                                                                                 ctcl_uuid,
-                                                                                 contest_office_number_elected,
-                                                                                 google_civic_election_id, state_code,
-                                                                                 defaults)
-                if results['contest_office_updated']:
-                    number_of_contest_offices_created += 1
-                    success = True
-                    # now update BatchRowActionContestOffice table entry with the results of this action
-                    try:
-                        one_batch_row_action.kind_of_action = IMPORT_ADD_TO_EXISTING
-                        contest_office = results['contest_office']
-                        one_batch_row_action.contest_office_we_vote_id = contest_office.we_vote_id
-                        one_batch_row_action.save()
-                    except Exception as e:
-                        success = False
-                        status += "CONTEST_OFFICE_RETRIEVE_ERROR"
-                        handle_exception(e, logger=logger, exception_message=status)
-            elif update_entry_flag:
-                contest_office_we_vote_id = one_batch_row_action.contest_office_we_vote_id
-                results = contest_office_manager.update_contest_office_row_entry(contest_office_name,
-                                                                                 contest_office_votes_allowed,
-                                                                                 ctcl_uuid,
-                                                                                 contest_office_number_elected,
-                                                                                 contest_office_we_vote_id,
-                                                                                 google_civic_election_id,
-                                                                                 state_code,
-                                                                                 defaults)
-                if results['contest_office_updated']:
-                    number_of_contest_offices_updated += 1
-                    success = True
-                    # now update BatchRowActionContestOffice table entry with the results of this action
-                    try:
-                        one_batch_row_action.kind_of_action = IMPORT_ADD_TO_EXISTING
-                        contest_office = results['contest_office']
-                        one_batch_row_action.contest_office_we_vote_id = contest_office.we_vote_id
-                        one_batch_row_action.save()
-                    except Exception as e:
-                        success = False
-                        status += "CONTEST_OFFICE_RETRIEVE_ERROR"
-                        handle_exception(e, logger=logger, exception_message=status)
-            else:
-                # This is error, it shouldn't reach here, we are handling IMPORT_CREATE or UPDATE entries only.
-                status += "IMPORT_CONTEST_OFFICE_ENTRY:NO_CREATE_OR_UPDATE_ERROR"
-                results = {
-                    'success':                              success,
-                    'status':                               status,
-                    'number_of_contest_offices_created':    number_of_contest_offices_created,
-                    'number_of_contest_offices_updated':    number_of_contest_offices_updated,
-                    'new_contest_office':                   new_contest_office,
-                }
-                return results
+    # Work through the entries a chunk at a time, each chunk in its own transaction, so a chunk that fails
+    #  rolls back alone
+    for batch_row_action_chunk in retrieve_query_in_chunks(batch_row_action_list):
+        number_created_before_chunk = number_of_contest_offices_created
+        number_updated_before_chunk = number_of_contest_offices_updated
+        # Retrieve the entries this chunk updates with one query
+        contest_office_by_we_vote_id = {}
+        if update_entry_flag:
+            contest_office_by_we_vote_id = retrieve_entries_by_we_vote_id(
+                ContestOffice,
+                [batch_row_action.contest_office_we_vote_id for batch_row_action in batch_row_action_chunk])
+        try:
+            with transaction.atomic():
+                for one_batch_row_action in batch_row_action_chunk:
+                    number_created_before_entry = number_of_contest_offices_created
+                    number_updated_before_entry = number_of_contest_offices_updated
+                    with BatchEntrySavepoint() as entry_savepoint:
+                        # Find the column in the incoming batch_row with the header == contest_office_name
+                        contest_office_name = one_batch_row_action.contest_office_name
+                        google_civic_election_id = str(one_batch_row_action.google_civic_election_id)
+                        ctcl_uuid = one_batch_row_action.ctcl_uuid
+                        contest_office_votes_allowed = one_batch_row_action.number_voting_for
+                        contest_office_number_elected = one_batch_row_action.number_elected
+                        state_code = one_batch_row_action.state_code
+                        defaults = {
+                            'district_id':                      one_batch_row_action.district_id,
+                            'district_name':                    one_batch_row_action.district_name,
+                            'district_scope':                   one_batch_row_action.district_scope,
+                            'ballotpedia_district_id':          one_batch_row_action.ballotpedia_district_id,
+                            'ballotpedia_election_id':          one_batch_row_action.ballotpedia_election_id,
+                            'ballotpedia_office_id':            one_batch_row_action.ballotpedia_office_id,
+                            'ballotpedia_office_name':          one_batch_row_action.ballotpedia_office_name,
+                            'ballotpedia_office_url':           one_batch_row_action.ballotpedia_office_url,
+                            'ballotpedia_race_id':              one_batch_row_action.ballotpedia_race_id,
+                            'ballotpedia_race_office_level':    one_batch_row_action.ballotpedia_race_office_level,
+                            'is_ballotpedia_general_election':
+                                one_batch_row_action.is_ballotpedia_general_election,
+                            'is_ballotpedia_general_runoff_election':
+                                one_batch_row_action.is_ballotpedia_general_runoff_election,
+                            'is_ballotpedia_primary_election':
+                                one_batch_row_action.is_ballotpedia_primary_election,
+                            'is_ballotpedia_primary_runoff_election':
+                                one_batch_row_action.is_ballotpedia_primary_runoff_election,
+                        }
+
+                        # These three parameters are minimum variables required for the ContestOffice table
+                        if positive_value_exists(contest_office_name) and positive_value_exists(state_code) and \
+                                positive_value_exists(google_civic_election_id):
+                            contest_office_manager = ContestOfficeManager()
+                            if create_entry_flag:
+                                results = contest_office_manager.create_contest_office_row_entry(
+                                    contest_office_name, contest_office_votes_allowed, ctcl_uuid,
+                                    contest_office_number_elected, google_civic_election_id, state_code, defaults)
+                                if results['contest_office_updated']:
+                                    number_of_contest_offices_created += 1
+                                    success = True
+                                    # now update BatchRowActionContestOffice table entry with the results of this action
+                                    try:
+                                        one_batch_row_action.kind_of_action = IMPORT_ADD_TO_EXISTING
+                                        contest_office = results['contest_office']
+                                        one_batch_row_action.contest_office_we_vote_id = contest_office.we_vote_id
+                                        one_batch_row_action.save()
+                                    except Exception as e:
+                                        success = False
+                                        status += "CONTEST_OFFICE_RETRIEVE_ERROR"
+                                        handle_exception(e, logger=logger, exception_message=status)
+                            elif update_entry_flag:
+                                contest_office_we_vote_id = one_batch_row_action.contest_office_we_vote_id
+                                results = contest_office_manager.update_contest_office_row_entry(
+                                    contest_office_name, contest_office_votes_allowed, ctcl_uuid,
+                                    contest_office_number_elected, contest_office_we_vote_id, google_civic_election_id,
+                                    state_code, defaults, contest_office_by_we_vote_id.get(
+                                        (contest_office_we_vote_id or '').strip().lower()))
+                                if results['contest_office_updated']:
+                                    number_of_contest_offices_updated += 1
+                                    success = True
+                                    # now update BatchRowActionContestOffice table entry with the results of this action
+                                    try:
+                                        one_batch_row_action.kind_of_action = IMPORT_ADD_TO_EXISTING
+                                        contest_office = results['contest_office']
+                                        one_batch_row_action.contest_office_we_vote_id = contest_office.we_vote_id
+                                        one_batch_row_action.save()
+                                    except Exception as e:
+                                        success = False
+                                        status += "CONTEST_OFFICE_RETRIEVE_ERROR"
+                                        handle_exception(e, logger=logger, exception_message=status)
+                            else:
+                                # This is error, it shouldn't reach here, we are handling IMPORT_CREATE or UPDATE
+                                #  entries
+                                #  only.
+                                status += "IMPORT_CONTEST_OFFICE_ENTRY:NO_CREATE_OR_UPDATE_ERROR"
+                                results = {
+                                    'success':                              success,
+                                    'status':                               status,
+                                    'number_of_contest_offices_created':    number_of_contest_offices_created,
+                                    'number_of_contest_offices_updated':    number_of_contest_offices_updated,
+                                    'new_contest_office':                   new_contest_office,
+                                }
+                                return results
+                    if entry_savepoint.database_error is not None:
+                        number_of_contest_offices_created = number_created_before_entry
+                        number_of_contest_offices_updated = number_updated_before_entry
+                        status += "IMPORT_CONTEST_OFFICE_ENTRY-ENTRY_ROLLED_BACK "
+                        handle_exception(entry_savepoint.database_error, logger=logger, exception_message=status)
+        except Exception as e:
+            number_of_contest_offices_created = number_created_before_chunk
+            number_of_contest_offices_updated = number_updated_before_chunk
+            status += "IMPORT_CONTEST_OFFICE_ENTRY-CHUNK_ROLLED_BACK "
+            handle_exception(e, logger=logger, exception_message=status)
 
     if number_of_contest_offices_created:
         status += "IMPORT_CONTEST_OFFICE_ENTRY:CONTEST_OFFICE_CREATED"
@@ -3067,7 +3164,7 @@ def import_measure_data_from_batch_row_actions(batch_header_id, batch_row_id,
             }
             return results
 
-        if len(batch_row_action_list):
+        if batch_row_action_list.exists():
             batch_row_action_list_found = True
 
     except BatchRowActionMeasure.DoesNotExist:
@@ -3087,76 +3184,101 @@ def import_measure_data_from_batch_row_actions(batch_header_id, batch_row_id,
         }
         return results
 
-    for one_batch_row_action in batch_row_action_list:
-
-        # Find the column in the incoming batch_row with the header == elected_office_name
-        measure_title = one_batch_row_action.measure_title
-        measure_subtitle = one_batch_row_action.measure_subtitle
-        if positive_value_exists(one_batch_row_action.google_civic_election_id):
-            google_civic_election_id = str(one_batch_row_action.google_civic_election_id)
-        else:
-            google_civic_election_id = str(batch_description.google_civic_election_id)
-        ctcl_uuid = one_batch_row_action.ctcl_uuid
-        measure_text = one_batch_row_action.measure_text
-        state_code = one_batch_row_action.state_code
-        defaults = {
-            'election_day_text':            one_batch_row_action.election_day_text,
-            'ballotpedia_district_id':      one_batch_row_action.ballotpedia_district_id,
-            'ballotpedia_election_id':      one_batch_row_action.ballotpedia_election_id,
-            'ballotpedia_measure_id':       one_batch_row_action.ballotpedia_measure_id,
-            'ballotpedia_measure_name':     one_batch_row_action.ballotpedia_measure_name,
-            'ballotpedia_measure_status':   one_batch_row_action.ballotpedia_measure_status,
-            'ballotpedia_measure_summary':  one_batch_row_action.ballotpedia_measure_summary,
-            'ballotpedia_measure_text':     one_batch_row_action.ballotpedia_measure_text,
-            'ballotpedia_measure_url':      one_batch_row_action.ballotpedia_measure_url,
-            'ballotpedia_yes_vote_description': one_batch_row_action.ballotpedia_yes_vote_description,
-            'ballotpedia_no_vote_description':  one_batch_row_action.ballotpedia_no_vote_description,
-            'state_code':                   one_batch_row_action.state_code,
-        }
-
-        # Look up ContestMeasure to see if an entry exists
-        # These five parameters are needed to look up in Measure table for a match
-        if positive_value_exists(measure_title) and positive_value_exists(state_code) and \
-                positive_value_exists(google_civic_election_id):
-            contest_measure_manager = ContestMeasureManager()
-            if create_entry_flag:
-                results = contest_measure_manager.create_measure_row_entry(measure_title, measure_subtitle,
-                                                                           measure_text, state_code, ctcl_uuid,
-                                                                           google_civic_election_id,
-                                                                           defaults)
-                if results['new_measure_created']:
-                    number_of_measures_created += 1
-                    success = True
-                    # now update BatchRowActionMeasure table entry
-                    try:
-                        one_batch_row_action.kind_of_action = IMPORT_ADD_TO_EXISTING
-                        new_measure = results['new_measure']
-                        one_batch_row_action.measure_we_vote_id = new_measure.we_vote_id
-                        one_batch_row_action.save()
-                    except Exception as e:
-                        success = False
-                        status += "MEASURE_RETRIEVE_ERROR"
-                        handle_exception(e, logger=logger, exception_message=status)
-            elif update_entry_flag:
-                measure_we_vote_id = one_batch_row_action.measure_we_vote_id
-                results = contest_measure_manager.update_measure_row_entry(measure_title, measure_subtitle,
-                                                                           measure_text, state_code, ctcl_uuid,
-                                                                           google_civic_election_id, measure_we_vote_id,
-                                                                           defaults)
-                if results['measure_updated']:
-                    number_of_measures_updated += 1
-                    success = True
-            else:
-                # This is error, it shouldn't reach here, we are handling IMPORT_CREATE or UPDATE entries only.
-                status += "IMPORT_MEASURE_ENTRY:NO_CREATE_OR_UPDATE_ERROR"
-                results = {
-                    'success':                      success,
-                    'status':                       status,
-                    'number_of_measures_created':   number_of_measures_created,
-                    'number_of_measures_updated':   number_of_measures_updated,
-                    'new_measure':                  new_measure,
-                }
-                return results
+    # Work through the entries a chunk at a time, each chunk in its own transaction, so a chunk that fails
+    #  rolls back alone
+    for batch_row_action_chunk in retrieve_query_in_chunks(batch_row_action_list):
+        number_created_before_chunk = number_of_measures_created
+        number_updated_before_chunk = number_of_measures_updated
+        # Retrieve the entries this chunk updates with one query
+        measure_by_we_vote_id = {}
+        if update_entry_flag:
+            measure_by_we_vote_id = retrieve_entries_by_we_vote_id(
+                ContestMeasure, [batch_row_action.measure_we_vote_id for batch_row_action in batch_row_action_chunk])
+        try:
+            with transaction.atomic():
+                for one_batch_row_action in batch_row_action_chunk:
+                    number_created_before_entry = number_of_measures_created
+                    number_updated_before_entry = number_of_measures_updated
+                    with BatchEntrySavepoint() as entry_savepoint:
+                        # Find the column in the incoming batch_row with the header == elected_office_name
+                        measure_title = one_batch_row_action.measure_title
+                        measure_subtitle = one_batch_row_action.measure_subtitle
+                        if positive_value_exists(one_batch_row_action.google_civic_election_id):
+                            google_civic_election_id = str(one_batch_row_action.google_civic_election_id)
+                        else:
+                            google_civic_election_id = str(batch_description.google_civic_election_id)
+                        ctcl_uuid = one_batch_row_action.ctcl_uuid
+                        measure_text = one_batch_row_action.measure_text
+                        state_code = one_batch_row_action.state_code
+                        defaults = {
+                            'election_day_text':            one_batch_row_action.election_day_text,
+                            'ballotpedia_district_id':      one_batch_row_action.ballotpedia_district_id,
+                            'ballotpedia_election_id':      one_batch_row_action.ballotpedia_election_id,
+                            'ballotpedia_measure_id':       one_batch_row_action.ballotpedia_measure_id,
+                            'ballotpedia_measure_name':     one_batch_row_action.ballotpedia_measure_name,
+                            'ballotpedia_measure_status':   one_batch_row_action.ballotpedia_measure_status,
+                            'ballotpedia_measure_summary':  one_batch_row_action.ballotpedia_measure_summary,
+                            'ballotpedia_measure_text':     one_batch_row_action.ballotpedia_measure_text,
+                            'ballotpedia_measure_url':      one_batch_row_action.ballotpedia_measure_url,
+                            'ballotpedia_yes_vote_description': one_batch_row_action.ballotpedia_yes_vote_description,
+                            'ballotpedia_no_vote_description':  one_batch_row_action.ballotpedia_no_vote_description,
+                            'state_code':                   one_batch_row_action.state_code,
+                        }
+
+                        # Look up ContestMeasure to see if an entry exists
+                        # These five parameters are needed to look up in Measure table for a match
+                        if positive_value_exists(measure_title) and positive_value_exists(state_code) and \
+                                positive_value_exists(google_civic_election_id):
+                            contest_measure_manager = ContestMeasureManager()
+                            if create_entry_flag:
+                                results = contest_measure_manager.create_measure_row_entry(
+                                    measure_title, measure_subtitle, measure_text, state_code, ctcl_uuid,
+                                    google_civic_election_id, defaults)
+                                if results['new_measure_created']:
+                                    number_of_measures_created += 1
+                                    success = True
+                                    # now update BatchRowActionMeasure table entry
+                                    try:
+                                        one_batch_row_action.kind_of_action = IMPORT_ADD_TO_EXISTING
+                                        new_measure = results['new_measure']
+                                        one_batch_row_action.measure_we_vote_id = new_measure.we_vote_id
+                                        one_batch_row_action.save()
+                                    except Exception as e:
+                                        success = False
+                                        status += "MEASURE_RETRIEVE_ERROR"
+                                        handle_exception(e, logger=logger, exception_message=status)
+                            elif update_entry_flag:
+                                measure_we_vote_id = one_batch_row_action.measure_we_vote_id
+                                results = contest_measure_manager.update_measure_row_entry(
+                                    measure_title, measure_subtitle, measure_text, state_code, ctcl_uuid,
+                                    google_civic_election_id, measure_we_vote_id, defaults,
+                                    measure_by_we_vote_id.get((measure_we_vote_id or '').strip().lower()))
+                                if results['measure_updated']:
+                                    number_of_measures_updated += 1
+                                    success = True
+                            else:
+                                # This is error, it shouldn't reach here, we are handling IMPORT_CREATE or UPDATE
+                                #  entries
+                                #  only.
+                                status += "IMPORT_MEASURE_ENTRY:NO_CREATE_OR_UPDATE_ERROR"
+                                results = {
+                                    'success':                      success,
+                                    'status':                       status,
+                                    'number_of_measures_created':   number_of_measures_created,
+                                    'number_of_measures_updated':   number_of_measures_updated,
+                                    'new_measure':                  new_measure,
+                                }
+                                return results
+                    if entry_savepoint.database_error is not None:
+                        number_of_measures_created = number_created_before_entry
+                        number_of_measures_updated = number_updated_before_entry
+                        status += "IMPORT_MEASURE_ENTRY-ENTRY_ROLLED_BACK "
+                        handle_exception(entry_savepoint.database_error, logger=logger, exception_message=status)
+        except Exception as e:
+            number_of_measures_created = number_created_before_chunk
+            number_of_measures_updated = number_updated_before_chunk
+            status += "IMPORT_MEASURE_ENTRY-CHUNK_ROLLED_BACK "
+            handle_exception(e, logger=logger, exception_message=status)
 
     if number_of_measures_created:
         status += "IMPORT_MEASURE_ENTRY:MEASURE_CREATED"
@@ -3262,7 +3384,7 @@ def import_candidate_data_from_batch_row_actions(batch_header_id, batch_row_id,
             }
             return results
 
-        if len(batch_row_action_list):
+        if batch_row_action_list.exists():
             batch_row_action_list_found = True
 
     except BatchRowActionCandidate.DoesNotExist:
@@ -3280,130 +3402,163 @@ def import_candidate_data_from_batch_row_actions(batch_header_id, batch_row_id,
         }
         return results
 
-    for one_batch_row_action in batch_row_action_list:
-        candidate_ctcl_person_id = one_batch_row_action.candidate_ctcl_person_id
-        if positive_value_exists(one_batch_row_action.google_civic_election_id):
-            google_civic_election_id = str(one_batch_row_action.google_civic_election_id)
-        else:
-            google_civic_election_id = str(batch_description.google_civic_election_id)
-
-        # These update values are using the field names in the CandidateCampaign class
-        update_values = {}
-        retrieve_ballotpedia_image = False
-        # We only want to add data, not remove any
-        if positive_value_exists(one_batch_row_action.ballotpedia_candidate_id):
-            update_values['ballotpedia_candidate_id'] = one_batch_row_action.ballotpedia_candidate_id
-        if positive_value_exists(one_batch_row_action.ballotpedia_candidate_name):
-            update_values['ballotpedia_candidate_name'] = one_batch_row_action.ballotpedia_candidate_name
-        if positive_value_exists(one_batch_row_action.ballotpedia_candidate_summary):
-            update_values['ballotpedia_candidate_summary'] = one_batch_row_action.ballotpedia_candidate_summary
-        if positive_value_exists(one_batch_row_action.ballotpedia_candidate_url):
-            update_values['ballotpedia_candidate_url'] = one_batch_row_action.ballotpedia_candidate_url
-        if positive_value_exists(one_batch_row_action.ballotpedia_election_id):
-            update_values['ballotpedia_election_id'] = one_batch_row_action.ballotpedia_election_id
-        if positive_value_exists(one_batch_row_action.ballotpedia_image_id):
-            update_values['ballotpedia_image_id'] = one_batch_row_action.ballotpedia_image_id
-            retrieve_ballotpedia_image = True
-        if positive_value_exists(one_batch_row_action.ballotpedia_office_id):
-            update_values['ballotpedia_office_id'] = one_batch_row_action.ballotpedia_office_id
-        if positive_value_exists(one_batch_row_action.ballotpedia_person_id):
-            update_values['ballotpedia_person_id'] = one_batch_row_action.ballotpedia_person_id
-        if positive_value_exists(one_batch_row_action.ballotpedia_race_id):
-            update_values['ballotpedia_race_id'] = one_batch_row_action.ballotpedia_race_id
-        if positive_value_exists(one_batch_row_action.birth_day_text):
-            update_values['birth_day_text'] = one_batch_row_action.birth_day_text
-        if positive_value_exists(one_batch_row_action.candidate_gender):
-            update_values['candidate_gender'] = one_batch_row_action.candidate_gender
-        if positive_value_exists(one_batch_row_action.candidate_is_incumbent):
-            update_values['candidate_is_incumbent'] = one_batch_row_action.candidate_is_incumbent
-        else:
-            update_values['candidate_is_incumbent'] = False
-        if positive_value_exists(one_batch_row_action.candidate_is_top_ticket):
-            update_values['candidate_is_top_ticket'] = one_batch_row_action.candidate_is_top_ticket
-        if positive_value_exists(one_batch_row_action.candidate_name):
-            update_values['candidate_name'] = one_batch_row_action.candidate_name
-        if positive_value_exists(one_batch_row_action.candidate_participation_status):
-            update_values['candidate_participation_status'] = one_batch_row_action.candidate_participation_status
-        if positive_value_exists(one_batch_row_action.candidate_twitter_handle):
-            update_values['candidate_twitter_handle'] = one_batch_row_action.candidate_twitter_handle
-        if positive_value_exists(one_batch_row_action.candidate_url):
-            update_values['candidate_url'] = one_batch_row_action.candidate_url
-        if positive_value_exists(one_batch_row_action.candidate_email):
-            update_values['candidate_email'] = one_batch_row_action.candidate_email
-        if positive_value_exists(one_batch_row_action.contest_office_we_vote_id):
-            update_values['contest_office_we_vote_id'] = one_batch_row_action.contest_office_we_vote_id
-        if positive_value_exists(one_batch_row_action.contest_office_id):
-            update_values['contest_office_id'] = one_batch_row_action.contest_office_id
-        if positive_value_exists(one_batch_row_action.contest_office_name):
-            update_values['contest_office_name'] = one_batch_row_action.contest_office_name
-        if positive_value_exists(one_batch_row_action.crowdpac_candidate_id):
-            update_values['crowdpac_candidate_id'] = one_batch_row_action.crowdpac_candidate_id
-        if positive_value_exists(one_batch_row_action.ctcl_uuid):
-            update_values['ctcl_uuid'] = one_batch_row_action.ctcl_uuid
-        if positive_value_exists(one_batch_row_action.facebook_url):
-            update_values['facebook_url'] = one_batch_row_action.facebook_url
-        if positive_value_exists(google_civic_election_id):
-            update_values['google_civic_election_id'] = google_civic_election_id
-        if positive_value_exists(one_batch_row_action.party):
-            update_values['party'] = one_batch_row_action.party
-        if positive_value_exists(one_batch_row_action.photo_url):
-            update_values['photo_url'] = one_batch_row_action.photo_url
-        if positive_value_exists(one_batch_row_action.state_code):
-            update_values['state_code'] = one_batch_row_action.state_code
-
-        candidate_manager = CandidateCampaignManager()
-        if create_entry_flag:
-            # These parameters are required to create a CandidateCampaign entry
-            if positive_value_exists(one_batch_row_action.candidate_name) \
-                    and positive_value_exists(google_civic_election_id) and \
-                    positive_value_exists(one_batch_row_action.state_code):
-                # Check to see if anyone else is using the Twitter handle
-
-                results = candidate_manager.create_candidate_row_entry(update_values)
-                if results['new_candidate_created']:
-                    number_of_candidates_created += 1
-                    success = True
-                    # now update BatchRowActionCandidate table entry
-                    try:
-                        one_batch_row_action.kind_of_action = IMPORT_ADD_TO_EXISTING
-                        new_candidate = results['new_candidate']
-                        one_batch_row_action.candidate_we_vote_id = new_candidate.we_vote_id
-                        one_batch_row_action.save()
-                        if positive_value_exists(retrieve_ballotpedia_image) \
-                                and not positive_value_exists(new_candidate.we_vote_hosted_profile_image_url_large):
-                            # Only run this if we have a ballotpedia_image_id and no saved profile image
-                            results = retrieve_and_save_ballotpedia_candidate_images(new_candidate)
-                            if results['success']:
-                                new_candidate = results['candidate']
-                    except Exception as e:
-                        success = False
-                        status += "CANDIDATE_RETRIEVE_ERROR"
-                        handle_exception(e, logger=logger, exception_message=status)
-        elif update_entry_flag:
-            candidate_we_vote_id = one_batch_row_action.candidate_we_vote_id
-
-            results = candidate_manager.update_candidate_row_entry(candidate_we_vote_id, update_values)
-            if results['candidate_updated']:
-                new_candidate = results['updated_candidate']
-                number_of_candidates_updated += 1
-                success = True
-                if positive_value_exists(retrieve_ballotpedia_image) \
-                        and not positive_value_exists(new_candidate.we_vote_hosted_profile_image_url_large):
-                    # Only run this if we have a ballotpedia_image_id and no saved profile image
-                    results = retrieve_and_save_ballotpedia_candidate_images(new_candidate)
-                    if results['success']:
-                        new_candidate = results['candidate']
-        else:
-            # This is error, it shouldn't reach here, we are handling IMPORT_CREATE or UPDATE entries only.
-            status += "IMPORT_CANDIDATE_ENTRY:NO_CREATE_OR_UPDATE_ERROR"
-            results = {
-                'success':                          success,
-                'status':                           status,
-                'number_of_candidates_created':     number_of_candidates_created,
-                'number_of_candidates_updated':     number_of_candidates_updated,
-                'new_candidate':                    new_candidate,
-            }
-            return results
+    # Work through the entries a chunk at a time, each chunk in its own transaction, so a chunk that fails
+    #  rolls back alone
+    for batch_row_action_chunk in retrieve_query_in_chunks(batch_row_action_list):
+        number_created_before_chunk = number_of_candidates_created
+        number_updated_before_chunk = number_of_candidates_updated
+        # Retrieve the entries this chunk updates with one query
+        candidate_by_we_vote_id = {}
+        if update_entry_flag:
+            candidate_by_we_vote_id = retrieve_entries_by_we_vote_id(
+                CandidateCampaign,
+                [batch_row_action.candidate_we_vote_id for batch_row_action in batch_row_action_chunk])
+        try:
+            with transaction.atomic():
+                for one_batch_row_action in batch_row_action_chunk:
+                    number_created_before_entry = number_of_candidates_created
+                    number_updated_before_entry = number_of_candidates_updated
+                    with BatchEntrySavepoint() as entry_savepoint:
+                        candidate_ctcl_person_id = one_batch_row_action.candidate_ctcl_person_id
+                        if positive_value_exists(one_batch_row_action.google_civic_election_id):
+                            google_civic_election_id = str(one_batch_row_action.google_civic_election_id)
+                        else:
+                            google_civic_election_id = str(batch_description.google_civic_election_id)
+
+                        # These update values are using the field names in the CandidateCampaign class
+                        update_values = {}
+                        retrieve_ballotpedia_image = False
+                        # We only want to add data, not remove any
+                        if positive_value_exists(one_batch_row_action.ballotpedia_candidate_id):
+                            update_values['ballotpedia_candidate_id'] = one_batch_row_action.ballotpedia_candidate_id
+                        if positive_value_exists(one_batch_row_action.ballotpedia_candidate_name):
+                            update_values['ballotpedia_candidate_name'] = \
+                                one_batch_row_action.ballotpedia_candidate_name
+                        if positive_value_exists(one_batch_row_action.ballotpedia_candidate_summary):
+                            update_values['ballotpedia_candidate_summary'] = \
+                                one_batch_row_action.ballotpedia_candidate_summary
+                        if positive_value_exists(one_batch_row_action.ballotpedia_candidate_url):
+                            update_values['ballotpedia_candidate_url'] = one_batch_row_action.ballotpedia_candidate_url
+                        if positive_value_exists(one_batch_row_action.ballotpedia_election_id):
+                            update_values['ballotpedia_election_id'] = one_batch_row_action.ballotpedia_election_id
+                        if positive_value_exists(one_batch_row_action.ballotpedia_image_id):
+                            update_values['ballotpedia_image_id'] = one_batch_row_action.ballotpedia_image_id
+                            retrieve_ballotpedia_image = True
+                        if positive_value_exists(one_batch_row_action.ballotpedia_office_id):
+                            update_values['ballotpedia_office_id'] = one_batch_row_action.ballotpedia_office_id
+                        if positive_value_exists(one_batch_row_action.ballotpedia_person_id):
+                            update_values['ballotpedia_person_id'] = one_batch_row_action.ballotpedia_person_id
+                        if positive_value_exists(one_batch_row_action.ballotpedia_race_id):
+                            update_values['ballotpedia_race_id'] = one_batch_row_action.ballotpedia_race_id
+                        if positive_value_exists(one_batch_row_action.birth_day_text):
+                            update_values['birth_day_text'] = one_batch_row_action.birth_day_text
+                        if positive_value_exists(one_batch_row_action.candidate_gender):
+                            update_values['candidate_gender'] = one_batch_row_action.candidate_gender
+                        if positive_value_exists(one_batch_row_action.candidate_is_incumbent):
+                            update_values['candidate_is_incumbent'] = one_batch_row_action.candidate_is_incumbent
+                        else:
+                            update_values['candidate_is_incumbent'] = False
+                        if positive_value_exists(one_batch_row_action.candidate_is_top_ticket):
+                            update_values['candidate_is_top_ticket'] = one_batch_row_action.candidate_is_top_ticket
+                        if positive_value_exists(one_batch_row_action.candidate_name):
+                            update_values['candidate_name'] = one_batch_row_action.candidate_name
+                        if positive_value_exists(one_batch_row_action.candidate_participation_status):
+                            update_values['candidate_participation_status'] = \
+                                one_batch_row_action.candidate_participation_status
+                        if positive_value_exists(one_batch_row_action.candidate_twitter_handle):
+                            update_values['candidate_twitter_handle'] = one_batch_row_action.candidate_twitter_handle
+                        if positive_value_exists(one_batch_row_action.candidate_url):
+                            update_values['candidate_url'] = one_batch_row_action.candidate_url
+                        if positive_value_exists(one_batch_row_action.candidate_email):
+                            update_values['candidate_email'] = one_batch_row_action.candidate_email
+                        if positive_value_exists(one_batch_row_action.contest_office_we_vote_id):
+                            update_values['contest_office_we_vote_id'] = one_batch_row_action.contest_office_we_vote_id
+                        if positive_value_exists(one_batch_row_action.contest_office_id):
+                            update_values['contest_office_id'] = one_batch_row_action.contest_office_id
+                        if positive_value_exists(one_batch_row_action.contest_office_name):
+                            update_values['contest_office_name'] = one_batch_row_action.contest_office_name
+                        if positive_value_exists(one_batch_row_action.crowdpac_candidate_id):
+                            update_values['crowdpac_candidate_id'] = one_batch_row_action.crowdpac_candidate_id
+                        if positive_value_exists(one_batch_row_action.ctcl_uuid):
+                            update_values['ctcl_uuid'] = one_batch_row_action.ctcl_uuid
+                        if positive_value_exists(one_batch_row_action.facebook_url):
+                            update_values['facebook_url'] = one_batch_row_action.facebook_url
+                        if positive_value_exists(google_civic_election_id):
+                            update_values['google_civic_election_id'] = google_civic_election_id
+                        if positive_value_exists(one_batch_row_action.party):
+                            update_values['party'] = one_batch_row_action.party
+                        if positive_value_exists(one_batch_row_action.photo_url):
+                            update_values['photo_url'] = one_batch_row_action.photo_url
+                        if positive_value_exists(one_batch_row_action.state_code):
+                            update_values['state_code'] = one_batch_row_action.state_code
+
+                        candidate_manager = CandidateCampaignManager()
+                        if create_entry_flag:
+                            # These parameters are required to create a CandidateCampaign entry
+                            if positive_value_exists(one_batch_row_action.candidate_name) \
+                                    and positive_value_exists(google_civic_election_id) and \
+                                    positive_value_exists(one_batch_row_action.state_code):
+                                # Check to see if anyone else is using the Twitter handle
+
+                                results = candidate_manager.create_candidate_row_entry(update_values)
+                                if results['new_candidate_created']:
+                                    number_of_candidates_created += 1
+                                    success = True
+                                    # now update BatchRowActionCandidate table entry
+                                    try:
+                                        one_batch_row_action.kind_of_action = IMPORT_ADD_TO_EXISTING
+                                        new_candidate = results['new_candidate']
+                                        one_batch_row_action.candidate_we_vote_id = new_candidate.we_vote_id
+                                        one_batch_row_action.save()
+                                        if positive_value_exists(retrieve_ballotpedia_image) and not \
+                                                positive_value_exists(
+                                                    new_candidate.we_vote_hosted_profile_image_url_large):
+                                            # Only run this if we have a ballotpedia_image_id and no saved profile image
+                                            results = retrieve_and_save_ballotpedia_candidate_images(new_candidate)
+                                            if results['success']:
+                                                new_candidate = results['candidate']
+                                    except Exception as e:
+                                        success = False
+                                        status += "CANDIDATE_RETRIEVE_ERROR"
+                                        handle_exception(e, logger=logger, exception_message=status)
+                        elif update_entry_flag:
+                            candidate_we_vote_id = one_batch_row_action.candidate_we_vote_id
+
+                            results = candidate_manager.update_candidate_row_entry(
+                                candidate_we_vote_id, update_values,
+                                candidate_by_we_vote_id.get((candidate_we_vote_id or '').strip().lower()))
+                            if results['candidate_updated']:
+                                new_candidate = results['updated_candidate']
+                                number_of_candidates_updated += 1
+                                success = True
+                                if positive_value_exists(retrieve_ballotpedia_image) and not \
+                                        positive_value_exists(new_candidate.we_vote_hosted_profile_image_url_large):
+                                    # Only run this if we have a ballotpedia_image_id and no saved profile image
+                                    results = retrieve_and_save_ballotpedia_candidate_images(new_candidate)
+                                    if results['success']:
+                                        new_candidate = results['candidate']
+                        else:
+                            # This is error, it shouldn't reach here, we are handling IMPORT_CREATE or UPDATE
+                            #  entries only.
+                            status += "IMPORT_CANDIDATE_ENTRY:NO_CREATE_OR_UPDATE_ERROR"
+                            results = {
+                                'success':                          success,
+                                'status':                           status,
+                                'number_of_candidates_created':     number_of_candidates_created,
+                                'number_of_candidates_updated':     number_of_candidates_updated,
+                                'new_candidate':                    new_candidate,
+                            }
+                            return results
+                    if entry_savepoint.database_error is not None:
+                        number_of_candidates_created = number_created_before_entry
+                        number_of_candidates_updated = number_updated_before_entry
+                        status += "IMPORT_CANDIDATE_ENTRY-ENTRY_ROLLED_BACK "
+                        handle_exception(entry_savepoint.database_error, logger=logger, exception_message=status)
+        except Exception as e:
+            number_of_candidates_created = number_created_before_chunk
+            number_of_candidates_updated = number_updated_before_chunk
+            status += "IMPORT_CANDIDATE_ENTRY-CHUNK_ROLLED_BACK "
+            handle_exception(e, logger=logger, exception_message=status)
 
     if number_of_candidates_created:
         status += "IMPORT_CANDIDATE_ENTRY:ELECTED_OFFICE_CREATED"
@@ -3512,7 +3667,7 @@ def import_politician_data_from_batch_row_actions(batch_header_id, batch_row_id,
             }
             return results
 
-        if len(batch_row_action_list):
+        if batch_row_action_list.exists():
             batch_row_action_list_found = True
 
     except BatchRowActionPolitician.DoesNotExist:
@@ -3530,78 +3685,97 @@ def import_politician_data_from_batch_row_actions(batch_header_id, batch_row_id,
         }
         return results
 
-    for one_batch_row_action in batch_row_action_list:
-
-        # Find the column in the incoming batch_row with the header == politician_name
-        politician_name = one_batch_row_action.politician_name
-        politician_first_name = one_batch_row_action.first_name
-        politician_middle_name = one_batch_row_action.middle_name
-        politician_last_name = one_batch_row_action.last_name
-        ctcl_uuid = one_batch_row_action.ctcl_uuid
-        political_party = one_batch_row_action.political_party
-        politician_email_address = one_batch_row_action.politician_email_address
-        politician_phone_number = one_batch_row_action.politician_phone_number
-        politician_twitter_handle = one_batch_row_action.politician_twitter_handle
-        politician_facebook_id = one_batch_row_action.politician_facebook_id
-        politician_googleplus_id = one_batch_row_action.politician_googleplus_id
-        politician_youtube_id = one_batch_row_action.politician_youtube_id
-        politician_website_url = one_batch_row_action.politician_url
-
-        # Look up Politician to see if an entry exists
-        # Look up in Politician table for a match
-        # TODO should below condition be OR or AND? In certain ctcl data sets, twitter_handle is not provided for
-        # politician
-        if positive_value_exists(politician_name) or positive_value_exists(politician_twitter_handle):
-            politician_manager = PoliticianManager()
-            if create_entry_flag:
-                results = politician_manager.create_politician_row_entry(politician_name, politician_first_name,
-                                                                         politician_middle_name, politician_last_name,
-                                                                         ctcl_uuid, political_party,
-                                                                         politician_email_address,
-                                                                         politician_phone_number,
-                                                                         politician_twitter_handle,
-                                                                         politician_facebook_id,
-                                                                         politician_googleplus_id,
-                                                                         politician_youtube_id, politician_website_url)
-                if results['new_politician_created']:
-                    number_of_politicians_created += 1
-                    success = True
-                    # now update BatchRowActionPolitician table entry
-                    try:
-                        one_batch_row_action.kind_of_action = IMPORT_ADD_TO_EXISTING
-                        new_politician = results['new_politician']
-                        one_batch_row_action.politician_we_vote_id = new_politician.we_vote_id
-                        one_batch_row_action.save()
-                    except Exception as e:
-                        success = False
-                        status += "POLITICIAN_RETRIEVE_ERROR "
-                        handle_exception(e, logger=logger, exception_message=status)
-            elif update_entry_flag:
-                politician_we_vote_id = one_batch_row_action.politician_we_vote_id
-                results = politician_manager.update_politician_row_entry(politician_name, politician_first_name,
-                                                                         politician_middle_name, politician_last_name,
-                                                                         ctcl_uuid,political_party,
-                                                                         politician_email_address,
-                                                                         politician_twitter_handle,
-                                                                         politician_phone_number,
-                                                                         politician_facebook_id,
-                                                                         politician_googleplus_id,
-                                                                         politician_youtube_id, politician_website_url,
-                                                                         politician_we_vote_id)
-                if results['politician_updated']:
-                    number_of_politicians_updated += 1
-                    success = True
-            else:
-                # This is error, it shouldn't reach here, we are handling IMPORT_CREATE or UPDATE entries only.
-                status += "IMPORT_POLITICIAN_ENTRY:NO_CREATE_OR_UPDATE_ERROR"
-                results = {
-                    'success':                          success,
-                    'status':                           status,
-                    'number_of_politicians_created':    number_of_politicians_created,
-                    'number_of_politicians_updated':    number_of_politicians_updated,
-                    'new_politician':                   new_politician,
-                }
-                return results
+    # Work through the entries a chunk at a time, each chunk in its own transaction, so a chunk that fails
+    #  rolls back alone
+    for batch_row_action_chunk in retrieve_query_in_chunks(batch_row_action_list):
+        number_created_before_chunk = number_of_politicians_created
+        number_updated_before_chunk = number_of_politicians_updated
+        # Retrieve the entries this chunk updates with one query
+        politician_by_we_vote_id = {}
+        if update_entry_flag:
+            politician_by_we_vote_id = retrieve_entries_by_we_vote_id(
+                Politician, [batch_row_action.politician_we_vote_id for batch_row_action in batch_row_action_chunk])
+        try:
+            with transaction.atomic():
+                for one_batch_row_action in batch_row_action_chunk:
+                    number_created_before_entry = number_of_politicians_created
+                    number_updated_before_entry = number_of_politicians_updated
+                    with BatchEntrySavepoint() as entry_savepoint:
+                        # Find the column in the incoming batch_row with the header == politician_name
+                        politician_name = one_batch_row_action.politician_name
+                        politician_first_name = one_batch_row_action.first_name
+                        politician_middle_name = one_batch_row_action.middle_name
+                        politician_last_name = one_batch_row_action.last_name
+                        ctcl_uuid = one_batch_row_action.ctcl_uuid
+                        political_party = one_batch_row_action.political_party
+                        politician_email_address = one_batch_row_action.politician_email_address
+                        politician_phone_number = one_batch_row_action.politician_phone_number
+                        politician_twitter_handle = one_batch_row_action.politician_twitter_handle
+                        politician_facebook_id = one_batch_row_action.politician_facebook_id
+                        politician_googleplus_id = one_batch_row_action.politician_googleplus_id
+                        politician_youtube_id = one_batch_row_action.politician_youtube_id
+                        politician_website_url = one_batch_row_action.politician_url
+
+                        # Look up Politician to see if an entry exists
+                        # Look up in Politician table for a match
+                        # TODO should below condition be OR or AND? In certain ctcl data sets, twitter_handle is not
+                        #  provided for politician
+                        if positive_value_exists(politician_name) or positive_value_exists(politician_twitter_handle):
+                            politician_manager = PoliticianManager()
+                            if create_entry_flag:
+                                results = politician_manager.create_politician_row_entry(
+                                    politician_name, politician_first_name, politician_middle_name,
+                                    politician_last_name, ctcl_uuid, political_party, politician_email_address,
+                                    politician_phone_number, politician_twitter_handle, politician_facebook_id,
+                                    politician_googleplus_id, politician_youtube_id, politician_website_url)
+                                if results['new_politician_created']:
+                                    number_of_politicians_created += 1
+                                    success = True
+                                    # now update BatchRowActionPolitician table entry
+                                    try:
+                                        one_batch_row_action.kind_of_action = IMPORT_ADD_TO_EXISTING
+                                        new_politician = results['new_politician']
+                                        one_batch_row_action.politician_we_vote_id = new_politician.we_vote_id
+                                        one_batch_row_action.save()
+                                    except Exception as e:
+                                        success = False
+                                        status += "POLITICIAN_RETRIEVE_ERROR "
+                                        handle_exception(e, logger=logger, exception_message=status)
+                            elif update_entry_flag:
+                                politician_we_vote_id = one_batch_row_action.politician_we_vote_id
+                                results = politician_manager.update_politician_row_entry(
+                                    politician_name, politician_first_name, politician_middle_name,
+                                    politician_last_name, ctcl_uuid, political_party, politician_email_address,
+                                    politician_twitter_handle, politician_phone_number, politician_facebook_id,
+                                    politician_googleplus_id, politician_youtube_id, politician_website_url,
+                                    politician_we_vote_id,
+                                    politician_by_we_vote_id.get((politician_we_vote_id or '').strip().lower()))
+                                if results['politician_updated']:
+                                    number_of_politicians_updated += 1
+                                    success = True
+                            else:
+                                # This is error, it shouldn't reach here, we are handling IMPORT_CREATE or UPDATE
+                                #  entries
+                                #  only.
+                                status += "IMPORT_POLITICIAN_ENTRY:NO_CREATE_OR_UPDATE_ERROR"
+                                results = {
+                                    'success':                          success,
+                                    'status':                           status,
+                                    'number_of_politicians_created':    number_of_politicians_created,
+                                    'number_of_politicians_updated':    number_of_politicians_updated,
+                                    'new_politician':                   new_politician,
+                                }
+                                return results
+                    if entry_savepoint.database_error is not None:
+                        number_of_politicians_created = number_created_before_entry
+                        number_of_politicians_updated = number_updated_before_entry
+                        status += "IMPORT_POLITICIAN_ENTRY-ENTRY_ROLLED_BACK "
+                        handle_exception(entry_savepoint.database_error, logger=logger, exception_message=status)
+        except Exception as e:
+            number_of_politicians_created = number_created_before_chunk
+            number_of_politicians_updated = number_updated_before_chunk
+            status += "IMPORT_POLITICIAN_ENTRY-CHUNK_ROLLED_BACK "
+            handle_exception(e, logger=logger, exception_message=status)
 
     if number_of_politicians_created:
         status += "IMPORT_POLITICIAN_ENTRY:POLITICIAN_CREATED"
@@ -3657,7 +3831,7 @@ def import_organization_data_from_batch_row_actions(
             }
             return results
 
-        if len(batch_row_action_list):
+        if batch_row_action_list.exists():
             batch_row_action_list_found = True
 
     except BatchRowActionOrganization.DoesNotExist:
@@ -3680,89 +3854,116 @@ def import_organization_data_from_batch_row_actions(
 
     organization_manager = OrganizationManager()
     twitter_user_manager = TwitterUserManager()
-    for one_batch_row_action in batch_row_action_list:
-        if create_entry_flag:
-            twitter_link_to_organization_exists = False
-            twitter_id_for_new_organization = 0
-            temp_org_image = ""
-            if one_batch_row_action.organization_twitter_handle:
-                twitter_retrieve_results = \
-                    twitter_user_manager.retrieve_twitter_link_to_organization_from_twitter_handle(
-                        one_batch_row_action.organization_twitter_handle)
-                if twitter_retrieve_results['twitter_link_to_organization_found']:
-                    # twitter_link_to_organization = twitter_retrieve_results['twitter_link_to_organization']
-                    twitter_link_to_organization_exists = True  # Twitter handle already taken
-                else:
-                    # If a twitter_link_to_organization is NOT found, we look up the twitter_id and use it when
-                    #  creating the org so we pull over the twitter data (like twitter_description)
-                    twitter_id_for_new_organization = twitter_user_manager.fetch_twitter_id_from_twitter_handle(
-                        one_batch_row_action.organization_twitter_handle)
-
-            results = organization_manager.create_organization(
-                one_batch_row_action.organization_name, one_batch_row_action.organization_website,
-                one_batch_row_action.organization_twitter_handle, one_batch_row_action.organization_email,
-                one_batch_row_action.organization_facebook, temp_org_image, twitter_id_for_new_organization)
-
-            if not results['organization_created']:
-                continue
-
-            number_of_organizations_created += 1
-            organization = results['organization']
-            success = True
-
-            # now update BatchRowActionOrganization table entry
-            try:
-                one_batch_row_action.kind_of_action = IMPORT_ADD_TO_EXISTING
-                one_batch_row_action.organization_we_vote_id = organization.we_vote_id
-                one_batch_row_action.save()
-            except Exception as e:
-                success = False
-                status += "BATCH_ROW_ACTION_ORGANIZATION_SAVE_ERROR "
-                handle_exception(e, logger=logger, exception_message=status)
-
-            if positive_value_exists(one_batch_row_action.organization_twitter_handle) and not \
-                    twitter_link_to_organization_exists:
-                # Create TwitterLinkToOrganization
-                if not positive_value_exists(twitter_id_for_new_organization):
-                    twitter_id_for_new_organization = twitter_user_manager.fetch_twitter_id_from_twitter_handle(
-                        one_batch_row_action.organization_twitter_handle)
-                if positive_value_exists(twitter_id_for_new_organization):
-                    results = twitter_user_manager.create_twitter_link_to_organization(
-                        twitter_id_for_new_organization, organization.we_vote_id)
-
-            try:
-                # Now update organization with additional fields
-                organization.organization_instagram_handle = one_batch_row_action.organization_instagram_handle
-                organization.organization_address = one_batch_row_action.organization_address
-                organization.organization_city = one_batch_row_action.organization_city
-                organization.organization_state = one_batch_row_action.organization_state
-                organization.organization_zip = one_batch_row_action.organization_zip
-                organization.organization_phone1 = one_batch_row_action.organization_phone1
-                organization.organization_type = one_batch_row_action.organization_type
-                organization.state_served_code = one_batch_row_action.state_served_code
-                organization.organization_contact_name = one_batch_row_action.organization_contact_name
-                organization.save()
-            except Exception as e:
-                pass
-        elif update_entry_flag:
-            pass
-            # organization_we_vote_id = one_batch_row_action.organization_we_vote_id
-            # results = organization_manager.update_organization_row_entry(organization_title, organization_subtitle,
-            #                                                            organization_text, state_code, ctcl_uuid,
-            #                                                         google_civic_election_id, organization_we_vote_id)
-            # if results['organization_updated']:
-            #     number_of_organizations_updated += 1
-            #     success = True
-        else:
-            # This is error, it shouldn't reach here, we are handling IMPORT_CREATE or UPDATE entries only.
-            status += "IMPORT_ORGANIZATION_ENTRY:NO_CREATE_OR_UPDATE_ERROR "
-            results = {
-                'success':                          success,
-                'status':                           status,
-                'number_of_organizations_created':  number_of_organizations_created,
-                'number_of_organizations_updated':  number_of_organizations_updated,
-            }
-            return results
+    # Work through the entries a chunk at a time, each chunk in its own transaction, so a chunk that fails
+    #  rolls back alone
+    for batch_row_action_chunk in retrieve_query_in_chunks(batch_row_action_list):
+        number_created_before_chunk = number_of_organizations_created
+        number_updated_before_chunk = number_of_organizations_updated
+        try:
+            with transaction.atomic():
+                for one_batch_row_action in batch_row_action_chunk:
+                    number_created_before_entry = number_of_organizations_created
+                    number_updated_before_entry = number_of_organizations_updated
+                    with BatchEntrySavepoint() as entry_savepoint:
+                        if create_entry_flag:
+                            twitter_link_to_organization_exists = False
+                            twitter_id_for_new_organization = 0
+                            temp_org_image = ""
+                            if one_batch_row_action.organization_twitter_handle:
+                                twitter_retrieve_results = \
+                                    twitter_user_manager.retrieve_twitter_link_to_organization_from_twitter_handle(
+                                        one_batch_row_action.organization_twitter_handle)
+                                if twitter_retrieve_results['twitter_link_to_organization_found']:
+                                    # twitter_link_to_organization = \
+                                    #     twitter_retrieve_results['twitter_link_to_organization']
+                                    twitter_link_to_organization_exists = True  # Twitter handle already taken
+                                else:
+                                    # If a twitter_link_to_organization is NOT found, we look up the twitter_id and use
+                                    #  it when creating the org so we pull over the twitter data (like
+                                    #  twitter_description)
+                                    twitter_id_for_new_organization = \
+                                        twitter_user_manager.fetch_twitter_id_from_twitter_handle(
+                                            one_batch_row_action.organization_twitter_handle)
+
+                            results = organization_manager.create_organization(
+                                one_batch_row_action.organization_name, one_batch_row_action.organization_website,
+                                one_batch_row_action.organization_twitter_handle,
+                                one_batch_row_action.organization_email, one_batch_row_action.organization_facebook,
+                                temp_org_image, twitter_id_for_new_organization)
+
+                            if not results['organization_created']:
+                                continue
+
+                            number_of_organizations_created += 1
+                            organization = results['organization']
+                            success = True
+
+                            # now update BatchRowActionOrganization table entry
+                            try:
+                                one_batch_row_action.kind_of_action = IMPORT_ADD_TO_EXISTING
+                                one_batch_row_action.organization_we_vote_id = organization.we_vote_id
+                                one_batch_row_action.save()
+                            except Exception as e:
+                                success = False
+                                status += "BATCH_ROW_ACTION_ORGANIZATION_SAVE_ERROR "
+                                handle_exception(e, logger=logger, exception_message=status)
+
+                            if positive_value_exists(one_batch_row_action.organization_twitter_handle) and not \
+                                    twitter_link_to_organization_exists:
+                                # Create TwitterLinkToOrganization
+                                if not positive_value_exists(twitter_id_for_new_organization):
+                                    twitter_id_for_new_organization = \
+                                        twitter_user_manager.fetch_twitter_id_from_twitter_handle(
+                                            one_batch_row_action.organization_twitter_handle)
+                                if positive_value_exists(twitter_id_for_new_organization):
+                                    results = twitter_user_manager.create_twitter_link_to_organization(
+                                        twitter_id_for_new_organization, organization.we_vote_id)
+
+                            try:
+                                # Now update organization with additional fields
+                                organization.organization_instagram_handle = \
+                                    one_batch_row_action.organization_instagram_handle
+                                organization.organization_address = one_batch_row_action.organization_address
+                                organization.organization_city = one_batch_row_action.organization_city
+                                organization.organization_state = one_batch_row_action.organization_state
+                                organization.organization_zip = one_batch_row_action.organization_zip
+                                organization.organization_phone1 = one_batch_row_action.organization_phone1
+                                organization.organization_type = one_batch_row_action.organization_type
+                                organization.state_served_code = one_batch_row_action.state_served_code
+                                organization.organization_contact_name = one_batch_row_action.organization_contact_name
+                                organization.save()
+                            except Exception as e:
+                                pass
+                        elif update_entry_flag:
+                            pass
+                            # organization_we_vote_id = one_batch_row_action.organization_we_vote_id
+                            # results = organization_manager.update_organization_row_entry(
+                            #     organization_title, organization_subtitle, organization_text, state_code, ctcl_uuid,
+                            #     google_civic_election_id, organization_we_vote_id)
+                            # if results['organization_updated']:
+                            #     number_of_organizations_updated += 1
+                            #     success = True
+                        else:
+                            # This is error, it shouldn't reach here, we are handling IMPORT_CREATE or UPDATE
+                            #  entries only.
+                            status += "IMPORT_ORGANIZATION_ENTRY:NO_CREATE_OR_UPDATE_ERROR "
+                            results = {
+                                'success':                          success,
+                                'status':                           status,
+                                'number_of_organizations_created':  number_of_organizations_created,
+                                'number_of_organizations_updated':  number_of_organizations_updated,
+                            }
+                            return results
+                    if entry_savepoint.database_error is not None:
+                        number_of_organizations_created = number_created_before_entry
+                        number_of_organizations_updated = number_updated_before_entry
+                        status += "IMPORT_ORGANIZATION_ENTRY-ENTRY_ROLLED_BACK "
+                        handle_exception(entry_savepoint.database_error, logger=logger, exception_message=status)
+        except Exception as e:
+            number_of_organizations_created = number_created_before_chunk
+            number_of_organizations_updated = number_updated_before_chunk
+            status += "IMPORT_ORGANIZATION_ENTRY-CHUNK_ROLLED_BACK "
+            handle_exception(e, logger=logger, exception_message=status)
 
     if number_of_organizations_created:
         status += "IMPORT_ORGANIZATION_ENTRY: ORGANIZATIONS_CREATED "
@@ -3817,7 +4018,7 @@ def import_position_data_from_batch_row_actions(
             }
             return results
 
-        if len(batch_row_action_list):
+        if batch_row_action_list.exists():
             batch_row_action_list_found = True
 
     except BatchRowActionPosition.DoesNotExist:
@@ -3841,75 +4042,98 @@ def import_position_data_from_batch_row_actions(
     position_manager = PositionManager()
     google_civic_election_id = 0
     unique_organization_we_vote_id_list = []
-    for one_batch_row_action in batch_row_action_list:
-        if create_entry_flag:
-            position_we_vote_id = ""
-            results = position_manager.update_or_create_position(
-                position_we_vote_id,
-                organization_we_vote_id=one_batch_row_action.organization_we_vote_id,
-                google_civic_election_id=one_batch_row_action.google_civic_election_id,
-                state_code=one_batch_row_action.state_code,
-                ballot_item_display_name=one_batch_row_action.ballot_item_display_name,
-                candidate_we_vote_id=one_batch_row_action.candidate_campaign_we_vote_id,
-                measure_we_vote_id=one_batch_row_action.contest_measure_we_vote_id,
-                stance=one_batch_row_action.stance,
-                set_as_public_position=True,
-                statement_text=one_batch_row_action.statement_text,
-                statement_html=one_batch_row_action.statement_html,
-                more_info_url=one_batch_row_action.more_info_url)
-            # office_we_vote_id = one_batch_row_action.contest_office_we_vote_id,
-
-            if not results['new_position_created']:
-                continue
-
-            # Store a list of organization voter guides we should refresh
-            if positive_value_exists(one_batch_row_action.google_civic_election_id):
-                # The election id should all be the same, so we just use the last one
-                google_civic_election_id = one_batch_row_action.google_civic_election_id
-            if positive_value_exists(one_batch_row_action.organization_we_vote_id) and \
-                    one_batch_row_action.organization_we_vote_id not in unique_organization_we_vote_id_list:
-                unique_organization_we_vote_id_list.append(one_batch_row_action.organization_we_vote_id)
-
-            number_of_positions_created += 1
-            position = results['position']
-            success = True
-
-            # now update BatchRowActionPosition table entry
-            try:
-                one_batch_row_action.kind_of_action = IMPORT_ADD_TO_EXISTING
-                one_batch_row_action.position_we_vote_id = position.we_vote_id
-                one_batch_row_action.save()
-            except Exception as e:
-                success = False
-                status += "BATCH_ROW_ACTION_POSITION_SAVE_ERROR "
-                handle_exception(e, logger=logger, exception_message=status)
-
-            # try:
-            #     # Now update position with additional fields
-            #     position.organization_instagram_handle = one_batch_row_action.organization_instagram_handle
-            #     position.organization_contact_name = one_batch_row_action.organization_contact_name
-            #     position.save()
-            # except Exception as e:
-            #     pass
-        elif update_entry_flag:
-            pass
-            # organization_we_vote_id = one_batch_row_action.organization_we_vote_id
-            # results = organization_manager.update_organization_row_entry(organization_title, organization_subtitle,
-            #                                                            organization_text, state_code, ctcl_uuid,
-            #                                                         google_civic_election_id, organization_we_vote_id)
-            # if results['organization_updated']:
-            #     number_of_organizations_updated += 1
-            #     success = True
-        else:
-            # This is error, it shouldn't reach here, we are handling IMPORT_CREATE or UPDATE entries only.
-            status += "IMPORT_POSITION_ENTRY:NO_CREATE_OR_UPDATE_ERROR "
-            results = {
-                'success':                          success,
-                'status':                           status,
-                'number_of_positions_created':  number_of_positions_created,
-                'number_of_positions_updated':  number_of_positions_updated,
-            }
-            return results
+    # Work through the entries a chunk at a time, each chunk in its own transaction, so a chunk that fails
+    #  rolls back alone
+    for batch_row_action_chunk in retrieve_query_in_chunks(batch_row_action_list):
+        number_created_before_chunk = number_of_positions_created
+        number_updated_before_chunk = number_of_positions_updated
+        try:
+            with transaction.atomic():
+                for one_batch_row_action in batch_row_action_chunk:
+                    number_created_before_entry = number_of_positions_created
+                    number_updated_before_entry = number_of_positions_updated
+                    with BatchEntrySavepoint() as entry_savepoint:
+                        if create_entry_flag:
+                            position_we_vote_id = ""
+                            results = position_manager.update_or_create_position(
+                                position_we_vote_id,
+                                organization_we_vote_id=one_batch_row_action.organization_we_vote_id,
+                                google_civic_election_id=one_batch_row_action.google_civic_election_id,
+                                state_code=one_batch_row_action.state_code,
+                                ballot_item_display_name=one_batch_row_action.ballot_item_display_name,
+                                candidate_we_vote_id=one_batch_row_action.candidate_campaign_we_vote_id,
+                                measure_we_vote_id=one_batch_row_action.contest_measure_we_vote_id,
+                                stance=one_batch_row_action.stance,
+                                set_as_public_position=True,
+                                statement_text=one_batch_row_action.statement_text,
+                                statement_html=one_batch_row_action.statement_html,
+                                more_info_url=one_batch_row_action.more_info_url)
+                            # office_we_vote_id = one_batch_row_action.contest_office_we_vote_id,
+
+                            if not results['new_position_created']:
+                                continue
+
+                            # Store a list of organization voter guides we should refresh
+                            if positive_value_exists(one_batch_row_action.google_civic_election_id):
+                                # The election id should all be the same, so we just use the last one
+                                google_civic_election_id = one_batch_row_action.google_civic_election_id
+                            if positive_value_exists(one_batch_row_action.organization_we_vote_id) and \
+                                    one_batch_row_action.organization_we_vote_id not in \
+                                    unique_organization_we_vote_id_list:
+                                unique_organization_we_vote_id_list.append(one_batch_row_action.organization_we_vote_id)
+
+                            number_of_positions_created += 1
+                            position = results['position']
+                            success = True
+
+                            # now update BatchRowActionPosition table entry
+                            try:
+                                one_batch_row_action.kind_of_action = IMPORT_ADD_TO_EXISTING
+                                one_batch_row_action.position_we_vote_id = position.we_vote_id
+                                one_batch_row_action.save()
+                            except Exception as e:
+                                success = False
+                                status += "BATCH_ROW_ACTION_POSITION_SAVE_ERROR "
+                                handle_exception(e, logger=logger, exception_message=status)
+
+                            # try:
+                            #     # Now update position with additional fields
+                            #     position.organization_instagram_handle = \
+                            #         one_batch_row_action.organization_instagram_handle
+                            #     position.organization_contact_name = one_batch_row_action.organization_contact_name
+                            #     position.save()
+                            # except Exception as e:
+                            #     pass
+                        elif update_entry_flag:
+                            pass
+                            # organization_we_vote_id = one_batch_row_action.organization_we_vote_id
+                            # results = organization_manager.update_organization_row_entry(
+                            #     organization_title, organization_subtitle, organization_text, state_code, ctcl_uuid,
+                            #     google_civic_election_id, organization_we_vote_id)
+                            # if results['organization_updated']:
+                            #     number_of_organizations_updated += 1
+                            #     success = True
+                        else:
+                            # This is error, it shouldn't reach here, we are handling IMPORT_CREATE or UPDATE
+                            #  entries only.
+                            status += "IMPORT_POSITION_ENTRY:NO_CREATE_OR_UPDATE_ERROR "
+                            results = {
+                                'success':                          success,
+                                'status':                           status,
+                                'number_of_positions_created':  number_of_positions_created,
+                                'number_of_positions_updated':  number_of_positions_updated,
+                            }
+                            return results
+                    if entry_savepoint.database_error is not None:
+                        number_of_positions_created = number_created_before_entry
+                        number_of_positions_updated = number_updated_before_entry
+                        status += "IMPORT_POSITION_ENTRY-ENTRY_ROLLED_BACK "
+                        handle_exception(entry_savepoint.database_error, logger=logger, exception_message=status)
+        except Exception as e:
+            number_of_positions_created = number_created_before_chunk
+            number_of_positions_updated = number_updated_before_chunk
+            status += "IMPORT_POSITION_ENTRY-CHUNK_ROLLED_BACK "
+            handle_exception(e, logger=logger, exception_message=status)
 
     if number_of_positions_created:
         status += "IMPORT_POSITION_ENTRY: POSITIONS_CREATED "
@@ -4207,7 +4431,7 @@ def import_ballot_item_data_from_batch_row_actions(batch_header_id, batch_row_id
             }
             return results
 
-        if len(batch_row_action_list):
+        if batch_row_action_list.exists():
             batch_row_action_list_found = True
 
     except BatchRowActionBallotItem.DoesNotExist:
@@ -4229,87 +4453,113 @@ def import_ballot_item_data_from_batch_row_actions(batch_header_id, batch_row_id
 
     office_manager = ContestOfficeManager()
     measure_manager = ContestMeasureManager()
-    for one_batch_row_action in batch_row_action_list:
-        # Find the column in the incoming batch_row with the header == ballot_item_display_name
-        ballot_item_display_name = one_batch_row_action.ballot_item_display_name
-        local_ballot_order = one_batch_row_action.local_ballot_order
-        if positive_value_exists(one_batch_row_action.google_civic_election_id):
-            google_civic_election_id = str(one_batch_row_action.google_civic_election_id)
-        else:
-            google_civic_election_id = str(batch_description.google_civic_election_id)
-        # Set this for the possible creation of BallotReturned entry
-        polling_location_we_vote_id = one_batch_row_action.polling_location_we_vote_id
-        state_code = one_batch_row_action.state_code
-        # Make sure we have both ids for office
-        if positive_value_exists(one_batch_row_action.contest_office_we_vote_id) \
-                and not positive_value_exists(one_batch_row_action.contest_office_id):
-            one_batch_row_action.contest_office_id = office_manager.fetch_contest_office_id_from_we_vote_id(
-                one_batch_row_action.contest_office_we_vote_id)
-        elif positive_value_exists(one_batch_row_action.contest_office_id) \
-                and not positive_value_exists(one_batch_row_action.contest_office_we_vote_id):
-            one_batch_row_action.contest_office_we_vote_id = office_manager.fetch_contest_office_we_vote_id_from_id(
-                one_batch_row_action.contest_office_id)
-        # Make sure we have both ids for measure
-        if positive_value_exists(one_batch_row_action.contest_measure_we_vote_id) \
-                and not positive_value_exists(one_batch_row_action.contest_measure_id):
-            one_batch_row_action.contest_measure_id = measure_manager.fetch_contest_measure_id_from_we_vote_id(
-                one_batch_row_action.contest_measure_we_vote_id)
-        elif positive_value_exists(one_batch_row_action.contest_measure_id) \
-                and not positive_value_exists(one_batch_row_action.contest_measure_we_vote_id):
-            one_batch_row_action.contest_measure_we_vote_id = measure_manager.fetch_contest_measure_we_vote_id_from_id(
-                one_batch_row_action.contest_measure_id)
-        defaults = {
-            'ballot_item_id':               one_batch_row_action.ballot_item_id,
-            'contest_office_id':            one_batch_row_action.contest_office_id,
-            'contest_measure_id':           one_batch_row_action.contest_measure_id,
-            'contest_office_we_vote_id':    one_batch_row_action.contest_office_we_vote_id,
-            'contest_measure_we_vote_id':   one_batch_row_action.contest_measure_we_vote_id,
-            'measure_subtitle':             one_batch_row_action.measure_subtitle,
-            'measure_url':                  one_batch_row_action.measure_url,
-            'no_vote_description':          one_batch_row_action.no_vote_description,
-            'polling_location_we_vote_id':  one_batch_row_action.polling_location_we_vote_id,
-            'yes_vote_description':         one_batch_row_action.yes_vote_description,
-        }
-
-        # Look up BallotItem to see if an entry exists
-        # These five parameters are needed to look up in BallotItem table for a match
-        if positive_value_exists(ballot_item_display_name) and positive_value_exists(state_code) \
-                and positive_value_exists(google_civic_election_id):
-            ballot_item_manager = BallotItemManager()
-            if create_entry_flag:
-                results = ballot_item_manager.create_ballot_item_row_entry(ballot_item_display_name,
-                                                                           local_ballot_order, state_code,
-                                                                           google_civic_election_id, defaults)
-                if results['new_ballot_item_created']:
-                    number_of_ballot_items_created += 1
-                    success = True
-                    # now update BatchRowActionBallotItem table entry
-                    try:
-                        one_batch_row_action.kind_of_action = IMPORT_ADD_TO_EXISTING
-                        new_ballot_item = results['ballot_item']
-                        one_batch_row_action.save()
-                    except Exception as e:
-                        success = False
-                        status += "BALLOT_ITEM_RETRIEVE_ERROR"
-                        handle_exception(e, logger=logger, exception_message=status)
-            elif update_entry_flag:
-                results = ballot_item_manager.update_ballot_item_row_entry(ballot_item_display_name,
-                                                                           local_ballot_order, state_code,
-                                                                           google_civic_election_id, defaults)
-                if results['ballot_item_updated']:
-                    number_of_ballot_items_updated += 1
-                    success = True
-            else:
-                # This is error, it shouldn't reach here, we are handling IMPORT_CREATE or UPDATE entries only.
-                status += "IMPORT_BALLOT_ITEM_ENTRY:NO_CREATE_OR_UPDATE_ERROR"
-                results = {
-                    'success':                          success,
-                    'status':                           status,
-                    'number_of_ballot_items_created':   number_of_ballot_items_created,
-                    'number_of_ballot_items_updated':   number_of_ballot_items_updated,
-                    'new_ballot_item':                  new_ballot_item,
-                }
-                return results
+    # Work through the entries a chunk at a time, each chunk in its own transaction, so a chunk that fails
+    #  rolls back alone
+    for batch_row_action_chunk in retrieve_query_in_chunks(batch_row_action_list):
+        number_created_before_chunk = number_of_ballot_items_created
+        number_updated_before_chunk = number_of_ballot_items_updated
+        try:
+            with transaction.atomic():
+                for one_batch_row_action in batch_row_action_chunk:
+                    number_created_before_entry = number_of_ballot_items_created
+                    number_updated_before_entry = number_of_ballot_items_updated
+                    with BatchEntrySavepoint() as entry_savepoint:
+                        # Find the column in the incoming batch_row with the header == ballot_item_display_name
+                        ballot_item_display_name = one_batch_row_action.ballot_item_display_name
+                        local_ballot_order = one_batch_row_action.local_ballot_order
+                        if positive_value_exists(one_batch_row_action.google_civic_election_id):
+                            google_civic_election_id = str(one_batch_row_action.google_civic_election_id)
+                        else:
+                            google_civic_election_id = str(batch_description.google_civic_election_id)
+                        # Set this for the possible creation of BallotReturned entry
+                        polling_location_we_vote_id = one_batch_row_action.polling_location_we_vote_id
+                        state_code = one_batch_row_action.state_code
+                        # Make sure we have both ids for office
+                        if positive_value_exists(one_batch_row_action.contest_office_we_vote_id) \
+                                and not positive_value_exists(one_batch_row_action.contest_office_id):
+                            one_batch_row_action.contest_office_id = \
+                                office_manager.fetch_contest_office_id_from_we_vote_id(
+                                    one_batch_row_action.contest_office_we_vote_id)
+                        elif positive_value_exists(one_batch_row_action.contest_office_id) \
+                                and not positive_value_exists(one_batch_row_action.contest_office_we_vote_id):
+                            one_batch_row_action.contest_office_we_vote_id = \
+                                office_manager.fetch_contest_office_we_vote_id_from_id(
+                                    one_batch_row_action.contest_office_id)
+                        # Make sure we have both ids for measure
+                        if positive_value_exists(one_batch_row_action.contest_measure_we_vote_id) \
+                                and not positive_value_exists(one_batch_row_action.contest_measure_id):
+                            one_batch_row_action.contest_measure_id = \
+                                measure_manager.fetch_contest_measure_id_from_we_vote_id(
+                                    one_batch_row_action.contest_measure_we_vote_id)
+                        elif positive_value_exists(one_batch_row_action.contest_measure_id) \
+                                and not positive_value_exists(one_batch_row_action.contest_measure_we_vote_id):
+                            one_batch_row_action.contest_measure_we_vote_id = \
+                                measure_manager.fetch_contest_measure_we_vote_id_from_id(
+                                    one_batch_row_action.contest_measure_id)
+                        defaults = {
+                            'ballot_item_id':               one_batch_row_action.ballot_item_id,
+                            'contest_office_id':            one_batch_row_action.contest_office_id,
+                            'contest_measure_id':           one_batch_row_action.contest_measure_id,
+                            'contest_office_we_vote_id':    one_batch_row_action.contest_office_we_vote_id,
+                            'contest_measure_we_vote_id':   one_batch_row_action.contest_measure_we_vote_id,
+                            'measure_subtitle':             one_batch_row_action.measure_subtitle,
+                            'measure_url':                  one_batch_row_action.measure_url,
+                            'no_vote_description':          one_batch_row_action.no_vote_description,
+                            'polling_location_we_vote_id':  one_batch_row_action.polling_location_we_vote_id,
+                            'yes_vote_description':         one_batch_row_action.yes_vote_description,
+                        }
+
+                        # Look up BallotItem to see if an entry exists
+                        # These five parameters are needed to look up in BallotItem table for a match
+                        if positive_value_exists(ballot_item_display_name) and positive_value_exists(state_code) \
+                                and positive_value_exists(google_civic_election_id):
+                            ballot_item_manager = BallotItemManager()
+                            if create_entry_flag:
+                                results = ballot_item_manager.create_ballot_item_row_entry(
+                                    ballot_item_display_name, local_ballot_order, state_code, google_civic_election_id,
+                                    defaults)
+                                if results['new_ballot_item_created']:
+                                    number_of_ballot_items_created += 1
+                                    success = True
+                                    # now update BatchRowActionBallotItem table entry
+                                    try:
+                                        one_batch_row_action.kind_of_action = IMPORT_ADD_TO_EXISTING
+                                        new_ballot_item = results['ballot_item']
+                                        one_batch_row_action.save()
+                                    except Exception as e:
+                                        success = False
+                                        status += "BALLOT_ITEM_RETRIEVE_ERROR"
+                                        handle_exception(e, logger=logger, exception_message=status)
+                            elif update_entry_flag:
+                                results = ballot_item_manager.update_ballot_item_row_entry(
+                                    ballot_item_display_name, local_ballot_order, state_code, google_civic_election_id,
+                                    defaults)
+                                if results['ballot_item_updated']:
+                                    number_of_ballot_items_updated += 1
+                                    success = True
+                            else:
+                                # This is error, it shouldn't reach here, we are handling IMPORT_CREATE or UPDATE
+                                #  entries
+                                #  only.
+                                status += "IMPORT_BALLOT_ITEM_ENTRY:NO_CREATE_OR_UPDATE_ERROR"
+                                results = {
+                                    'success':                          success,
+                                    'status':                           status,
+                                    'number_of_ballot_items_created':   number_of_ballot_items_created,
+                                    'number_of_ballot_items_updated':   number_of_ballot_items_updated,
+                                    'new_ballot_item':                  new_ballot_item,
+                                }
+                                return results
+                    if entry_savepoint.database_error is not None:
+                        number_of_ballot_items_created = number_created_before_entry
+                        number_of_ballot_items_updated = number_updated_before_entry
+                        status += "IMPORT_BALLOT_ITEM_ENTRY-ENTRY_ROLLED_BACK "
+                        handle_exception(entry_savepoint.database_error, logger=logger, exception_message=status)
+        except Exception as e:
+            number_of_ballot_items_created = number_created_before_chunk
+            number_of_ballot_items_updated = number_updated_before_chunk
+            status += "IMPORT_BALLOT_ITEM_ENTRY-CHUNK_ROLLED_BACK "
+            handle_exception(e, logger=logger, exception_message=status)
 
     if number_of_ballot_items_created or number_of_ballot_items_updated:
         if positive_value_exists(polling_location_we_vote_id) and positive_value_exists(google_civic_election_id):
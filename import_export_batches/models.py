@@ -5,7 +5,7 @@
 import codecs
 import csv
 from datetime import date
-from django.db import models
+from django.db import DatabaseError, models, transaction
 from django.utils.http import urlquote
 from election.models import ElectionManager
 from electoral_district.controllers import electoral_district_import_from_xml_data
@@ -13,6 +13,8 @@ from exception.models import handle_exception
 from import_export_ctcl.controllers import create_candidate_selection_rows, retrieve_candidate_from_candidate_selection
 import json
 import magic
+import shutil
+import tempfile
 from organization.models import ORGANIZATION_TYPE_CHOICES, UNKNOWN, alphanumeric
 from party.controllers import retrieve_all_party_names_and_ids_api, party_import_from_xml_data
 from politician.models import GENDER_CHOICES, UNKNOWN
@@ -407,6 +409,221 @@ def get_header_map_value_if_index_in_list(incoming_list, index, kind_of_batch=""
         return ""
 
 
+# create_batch_row_actions and the import_..._data_from_batch_row_actions functions work through this many
+#  rows at a time, each chunk in its own transaction
+BATCH_ROW_CHUNK_SIZE = 1000
+
+
+def retrieve_query_in_chunks(query, chunk_size=BATCH_ROW_CHUNK_SIZE):
+    """
+    Walk a BatchRow or BatchRowAction... query in id order, yielding one list of at most chunk_size entries
+    at a time. We page on id (instead of offset), so entries that drop out of the query while we work
+    (ex/ kind_of_action switching from IMPORT_CREATE to IMPORT_ADD_TO_EXISTING) don't make us skip others.
+    :param query:
+    :param chunk_size:
+    :return:
+    """
+    last_id = 0
+    while True:
+        chunk_list = list(query.filter(id__gt=last_id).order_by('id')[:chunk_size])
+        if not len(chunk_list):
+            return
+        yield chunk_list
+        if len(chunk_list) < chunk_size:
+            return
+        last_id = chunk_list[-1].id
+
+
+class BatchEntrySavepoint(object):
+    """
+    A savepoint for one entry within a chunk's transaction. Most of what we call for one entry catches its own
+    exceptions, but on PostgreSQL a failed statement still leaves the transaction unusable. Rolling back to this
+    savepoint undoes just this entry, so the entries after it (and the chunk's commit) still work. The database
+    error is kept in database_error instead of being raised.
+    """
+    def __init__(self):
+        self.atomic = transaction.atomic()
+        self.database_error = None
+
+    def __enter__(self):
+        self.atomic.__enter__()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        try:
+            # Rolls back to the savepoint when there was an exception, or when a statement failed
+            self.atomic.__exit__(exc_type, exc_value, traceback)
+        except DatabaseError as e:
+            self.database_error = e
+            return True
+        if exc_type is not None and issubclass(exc_type, DatabaseError):
+            self.database_error = exc_value
+            return True
+        return False
+
+
+def retrieve_entries_by_we_vote_id(model_class, we_vote_id_list):
+    """
+    Retrieve the entries a chunk of BatchRowAction... entries will update, with one query instead of one per entry
+    :param model_class: Like CandidateCampaign
+    :param we_vote_id_list:
+    :return: A dict of lower case we_vote_id -> entry. Look up anything missing the usual way.
+    """
+    we_vote_id_list = set(we_vote_id.strip().lower() for we_vote_id in we_vote_id_list
+                          if positive_value_exists(we_vote_id))
+    if not len(we_vote_id_list):
+        return {}
+    return {entry.we_vote_id.lower(): entry for entry in model_class.objects.filter(we_vote_id__in=we_vote_id_list)}
+
+
+class BatchRowBuffer(object):
+    """
+    Collects new BatchRow entries and saves them with bulk_create, chunk_size at a time, instead of one
+    INSERT per row. Call flush() once the last row has been added.
+    """
+
+    def __init__(self, chunk_size=BATCH_ROW_CHUNK_SIZE):
+        self.chunk_size = chunk_size
+        self.batch_row_list = []
+        self.number_of_batch_rows_saved = 0
+
+    def add(self, batch_row):
+        self.batch_row_list.append(batch_row)
+        if len(self.batch_row_list) >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        batch_row_list = self.batch_row_list
+        self.batch_row_list = []
+        if len(batch_row_list):
+            BatchRow.objects.bulk_create(batch_row_list)
+            self.number_of_batch_rows_saved += len(batch_row_list)
+
+
+# How much of a remote xml document we copy to disk at a time
+XML_DOWNLOAD_BLOCK_SIZE = 1024 * 1024
+
+
+def download_to_temporary_file(batch_uri):
+    """
+    Copy the document at batch_uri to a temporary file a block at a time, so we can read it more than once
+    without holding it in memory. The caller closes the file, which removes it.
+    :param batch_uri:
+    :return:
+    """
+    temporary_file = tempfile.TemporaryFile()
+    request = urllib.request.urlopen(batch_uri)
+    try:
+        shutil.copyfileobj(request, temporary_file, XML_DOWNLOAD_BLOCK_SIZE)
+    finally:
+        request.close()
+    temporary_file.seek(0)
+    return temporary_file
+
+
+class StreamingXmlRoot(object):
+    """
+    Stands in for the root Element of a VIP (CTCL) xml document in the store_..._xml functions, without reading
+    the whole document into memory. findall and find walk the document with iterparse and hand back the top
+    level elements with the tag asked for, one at a time, clearing each one once the caller moves on.
+    Each findall reads the document again from the start, so xml_file must be seekable.
+    """
+
+    def __init__(self, xml_file):
+        self.xml_file = xml_file
+
+    def __bool__(self):
+        # An Element is only "true" when it has children, which we can't know without reading the document
+        return True
+
+    def iterfind(self, tag):
+        self.xml_file.seek(0)
+        xml_root = None
+        depth = 0
+        for event, element in ElementTree.iterparse(self.xml_file, events=('start', 'end')):
+            if event == 'start':
+                if xml_root is None:
+                    xml_root = element
+                depth += 1
+                continue
+            depth -= 1
+            if depth == 1:
+                if element.tag == tag:
+                    yield element
+                # We are done with this top level element and everything under it
+                xml_root.clear()
+
+    def findall(self, tag):
+        return self.iterfind(tag)
+
+    def find(self, tag):
+        element_iterator = self.iterfind(tag)
+        try:
+            return next(element_iterator, None)
+        finally:
+            element_iterator.close()
+
+
+# A BatchHeaderMap maps at most this many columns (batch_header_map_000 through batch_header_map_049)
+BATCH_HEADER_MAP_COLUMN_COUNT = 50
+
+
+class BatchRowProjector(object):
+    """
+    Compiled from one BatchHeaderMap: which batch_row_NNN column holds each header name. The first time we need a
+    value from a BatchRow, we read every mapped column of that row in one pass and keep the values on the row, so the
+    rest of the values for that row are dict lookups.
+    """
+
+    def __init__(self, batch_header_map):
+        self.batch_row_attribute_name_by_header_name = {}
+        for index_number in range(BATCH_HEADER_MAP_COLUMN_COUNT):
+            index_number_string = str(index_number).zfill(3)
+            value_from_batch_header_map = getattr(batch_header_map, "batch_header_map_" + index_number_string)
+            if value_from_batch_header_map is None:
+                # We stop when we stop getting batch_header_map values
+                break
+            # If the same header is mapped twice, the first column wins
+            self.batch_row_attribute_name_by_header_name.setdefault(
+                value_from_batch_header_map.lower().strip(), "batch_row_" + index_number_string)
+
+    def project(self, one_batch_row):
+        """
+        :param one_batch_row:
+        :return: The value in one_batch_row for each header name, with strings stripped
+        """
+        values_by_header_name = {}
+        for header_name, batch_row_attribute_name in self.batch_row_attribute_name_by_header_name.items():
+            value_from_batch_row = getattr(one_batch_row, batch_row_attribute_name)
+            if isinstance(value_from_batch_row, str):
+                value_from_batch_row = value_from_batch_row.strip()
+            values_by_header_name[header_name] = value_from_batch_row
+        return values_by_header_name
+
+    def retrieve_value(self, batch_header_name_we_want, one_batch_row):
+        projected_values = getattr(one_batch_row, 'projected_values', None)
+        if projected_values is None or projected_values[0] is not self:
+            projected_values = (self, self.project(one_batch_row))
+            one_batch_row.projected_values = projected_values
+        return projected_values[1].get(batch_header_name_we_want.lower().strip(), "")
+
+    def retrieve_column_name(self, batch_header_name_we_want):
+        return self.batch_row_attribute_name_by_header_name.get(batch_header_name_we_want.lower().strip(), "")
+
+
+def get_batch_row_projector(batch_header_map):
+    """
+    The BatchRowProjector for this BatchHeaderMap, compiled the first time we need it and kept on the object
+    :param batch_header_map:
+    :return:
+    """
+    batch_row_projector = getattr(batch_header_map, 'batch_row_projector', None)
+    if batch_row_projector is None:
+        batch_row_projector = BatchRowProjector(batch_header_map)
+        batch_header_map.batch_row_projector = batch_row_projector
+    return batch_row_projector
+
+
 class BatchManager(models.Model):
 
     def __unicode__(self):
@@ -560,6 +777,7 @@ class BatchManager(models.Model):
         success = False
         status = ""
         number_of_batch_rows = 0
+        batch_row_buffer = BatchRowBuffer()
         # limit_for_testing = 5
 
         # Retrieve from JSON
@@ -723,7 +941,7 @@ class BatchManager(models.Model):
                 #     break
                 if positive_value_exists(batch_header_id):
                     try:
-                        batch_row = BatchRow.objects.create(
+                        batch_row_buffer.add(BatchRow(
                             batch_header_id=batch_header_id,
                             batch_row_000=get_value_if_index_in_list(line, 0),
                             batch_row_001=get_value_if_index_in_list(line, 1),
@@ -776,13 +994,20 @@ class BatchManager(models.Model):
                             batch_row_048=get_value_if_index_in_list(line, 48),
                             batch_row_049=get_value_if_index_in_list(line, 49),
                             batch_row_050=get_value_if_index_in_list(line, 50),
-                        )
+                        ))
                         number_of_batch_rows += 1
                     except Exception as e:
                         # Stop trying to save rows -- break out of the for loop
                         status += "EXCEPTION_BATCH_ROW "
                         break
 
+        try:
+            batch_row_buffer.flush()
+        except Exception as e:
+            status += " EXCEPTION_BATCH_ROW"
+            handle_exception(e, logger=logger, exception_message=status)
+        number_of_batch_rows = batch_row_buffer.number_of_batch_rows_saved
+
         results = {
             'success':              success,
             'status':               status,
@@ -1643,55 +1868,118 @@ class BatchManager(models.Model):
         }
         return results
 
+    def retrieve_batch_row_actions_for_batch_rows(self, kind_of_batch, batch_description, batch_row_list):
+        """
+        Retrieve the BatchRowAction... entries for a whole chunk of BatchRow entries with one query, and start
+        (without saving) the ones that don't exist yet. Each entry comes back shaped like the results of
+        retrieve_batch_row_action_..., so it can be handed to create_batch_row_action_... The new entries are
+        marked 'batch_row_action_save_deferred', so create_batch_row_action_... fills them in without saving, and
+        the caller saves them all at once with bulk_create.
+        :param kind_of_batch:
+        :param batch_description:
+        :param batch_row_list:
+        :return:
+        """
+        batch_row_action_class_and_key = {
+            CANDIDATE:          (BatchRowActionCandidate, 'batch_row_action_candidate'),
+            CONTEST_OFFICE:     (BatchRowActionContestOffice, 'batch_row_action_contest_office'),
+            IMPORT_BALLOT_ITEM: (BatchRowActionBallotItem, 'batch_row_action_ballot_item'),
+            MEASURE:            (BatchRowActionMeasure, 'batch_row_action_measure'),
+            ORGANIZATION_WORD:  (BatchRowActionOrganization, 'batch_row_action_organization'),
+            POLITICIAN:         (BatchRowActionPolitician, 'batch_row_action_politician'),
+            POSITION:           (BatchRowActionPosition, 'batch_row_action_position'),
+        }
+        success = False
+        status = ""
+        existing_results_dict = {}
+        batch_row_ids_to_create = set()
+        batch_row_action_list_to_create = []
+
+        if kind_of_batch not in batch_row_action_class_and_key:
+            status += "RETRIEVE_BATCH_ROW_ACTIONS_FOR_BATCH_ROWS-KIND_OF_BATCH_NOT_SUPPORTED "
+            results = {
+                'success':                          success,
+                'status':                           status,
+                'existing_results_dict':            existing_results_dict,
+                'batch_row_ids_to_create':          batch_row_ids_to_create,
+                'batch_row_action_list_to_create':  batch_row_action_list_to_create,
+            }
+            return results
+
+        batch_row_action_class, batch_row_action_key = batch_row_action_class_and_key[kind_of_batch]
+        batch_header_id = batch_description.batch_header_id
+        batch_row_id_list = [one_batch_row.id for one_batch_row in batch_row_list]
+        try:
+            batch_row_action_by_batch_row_id = {}
+            batch_row_action_query = batch_row_action_class.objects.filter(
+                batch_header_id=batch_header_id, batch_row_id__in=batch_row_id_list)
+            for batch_row_action in batch_row_action_query:
+                batch_row_action_by_batch_row_id[batch_row_action.batch_row_id] = batch_row_action
+
+            for batch_row_id in batch_row_id_list:
+                if batch_row_id not in batch_row_action_by_batch_row_id:
+                    batch_row_action = batch_row_action_class(batch_header_id=batch_header_id,
+                                                              batch_row_id=batch_row_id,
+                                                              batch_set_id=batch_description.batch_set_id)
+                    batch_row_action_by_batch_row_id[batch_row_id] = batch_row_action
+                    batch_row_ids_to_create.add(batch_row_id)
+                    batch_row_action_list_to_create.append(batch_row_action)
+
+            for batch_row_id, batch_row_action in batch_row_action_by_batch_row_id.items():
+                existing_results_dict[batch_row_id] = {
+                    'success':                          True,
+                    'status':                           "BATCH_ROW_ACTION_RETRIEVED_FOR_CHUNK ",
+                    'batch_row_action_found':           True,
+                    'batch_row_action_save_deferred':   batch_row_id in batch_row_ids_to_create,
+                    batch_row_action_key:               batch_row_action,
+                }
+            success = True
+            status += "BATCH_ROW_ACTIONS_RETRIEVED_FOR_BATCH_ROWS "
+        except Exception as e:
+            existing_results_dict = {}
+            batch_row_ids_to_create = set()
+            batch_row_action_list_to_create = []
+            status += "BATCH_ROW_ACTIONS_FOR_BATCH_ROWS_RETRIEVE_ERROR "
+            handle_exception(e, logger=logger, exception_message=status)
+
+        results = {
+            'success':                          success,
+            'status':                           status,
+            'existing_results_dict':            existing_results_dict,
+            'batch_row_ids_to_create':          batch_row_ids_to_create,
+            'batch_row_action_list_to_create':  batch_row_action_list_to_create,
+        }
+        return results
+
+    def create_batch_row_actions_in_bulk(self, batch_row_action_list):
+        """
+        Save the new BatchRowAction... entries started by retrieve_batch_row_actions_for_batch_rows, once they are
+        filled in, with one INSERT
+        :param batch_row_action_list: All of one BatchRowAction... class
+        :return:
+        """
+        if len(batch_row_action_list):
+            type(batch_row_action_list[0]).objects.bulk_create(batch_row_action_list)
+
     def retrieve_value_from_batch_row(self, batch_header_name_we_want, batch_header_map, one_batch_row):
-        index_number = 0
-        batch_header_name_we_want = batch_header_name_we_want.lower().strip()
-        number_of_columns = 50
-        while index_number < number_of_columns:
-            index_number_string = "00" + str(index_number)
-            index_number_string = index_number_string[-3:]
-            batch_header_map_attribute_name = "batch_header_map_" + index_number_string
-            # If this position in the batch_header_map matches the batch_header_name_we_want, then we know what column
-            # to look in within one_batch_row for the value
-            value_from_batch_header_map = getattr(batch_header_map, batch_header_map_attribute_name)
-            if value_from_batch_header_map is None:
-                # Break out when we stop getting batch_header_map values
-                return ""
-            if batch_header_name_we_want == value_from_batch_header_map.lower().strip():
-                one_batch_row_attribute_name = "batch_row_" + index_number_string
-                value_from_batch_row = getattr(one_batch_row, one_batch_row_attribute_name)
-                if isinstance(value_from_batch_row, str):
-                    return value_from_batch_row.strip()
-                else:
-                    return value_from_batch_row
-            index_number += 1
-        return ""
+        """
+        Find the column in one_batch_row that batch_header_map maps to batch_header_name_we_want
+        :param batch_header_name_we_want:
+        :param batch_header_map:
+        :param one_batch_row:
+        :return: The value in that column, or "" if no column has this header
+        """
+        return get_batch_row_projector(batch_header_map).retrieve_value(batch_header_name_we_want, one_batch_row)
 
     def retrieve_column_name_from_batch_row(self, batch_header_name_we_want, batch_header_map):
         """
         Given column name from batch_header_map, retrieve equivalent column name from batch row
+        eg: batch_header_map_000 --> measure_batch_id
         :param batch_header_name_we_want: 
         :param batch_header_map: 
         :return:
         """
-        index_number = 0
-        batch_header_name_we_want = batch_header_name_we_want.lower().strip()
-        number_of_columns = 50
-        while index_number < number_of_columns:
-            index_number_string = "00" + str(index_number)
-            index_number_string = index_number_string[-3:]
-            batch_header_map_attribute_name = "batch_header_map_" + index_number_string
-            # If this position in the batch_header_map matches the batch_header_name_we_want, then we know what column
-            # to look in within one_batch_row for the value, eg: batch_header_map_000 --> measure_batch_id
-            value_from_batch_header_map = getattr(batch_header_map, batch_header_map_attribute_name)
-            if value_from_batch_header_map is None:
-                # Break out when we stop getting batch_header_map values
-                return ""
-            if batch_header_name_we_want == value_from_batch_header_map.lower().strip():
-                one_batch_row_attribute_name = "batch_row_" + index_number_string
-                return one_batch_row_attribute_name
-            index_number += 1
-        return ""
+        return get_batch_row_projector(batch_header_map).retrieve_column_name(batch_header_name_we_want)
 
     def find_file_type(self, batch_uri):
         """
@@ -1741,30 +2029,27 @@ class BatchManager(models.Model):
         :param organization_we_vote_id:
         :return:
         """
-        # Retrieve from XML
-        request = urllib.request.urlopen(batch_uri)
-        # xml_data = request.read()
-        # xml_data = xmltodict.parse(xml_data)
-        # # xml_data_list_json = list(xml_data)
-        # structured_json = json.dumps(xml_data)
-
-        xml_tree = ElementTree.parse(request)
-        request.close()
-        xml_root = xml_tree.getroot()
+        # Retrieve from XML. We copy the document to disk and walk it one top level element at a time, so memory
+        #  use doesn't grow with the size of the feed
+        xml_file = download_to_temporary_file(batch_uri)
+        try:
+            xml_root = StreamingXmlRoot(xml_file)
 
-        if xml_root:
             if kind_of_batch == MEASURE:
-                return self.store_measure_xml(batch_uri, google_civic_election_id, organization_we_vote_id, xml_root)
+                results = self.store_measure_xml(batch_uri, google_civic_election_id, organization_we_vote_id,
+                                                 xml_root)
             elif kind_of_batch == ELECTED_OFFICE:
-                return self.store_elected_office_xml(batch_uri, google_civic_election_id, organization_we_vote_id,
-                                                     xml_root)
+                results = self.store_elected_office_xml(batch_uri, google_civic_election_id, organization_we_vote_id,
+                                                        xml_root)
             elif kind_of_batch == CONTEST_OFFICE:
-                return self.store_contest_office_xml(batch_uri, google_civic_election_id, organization_we_vote_id,
-                                                     xml_root)
+                results = self.store_contest_office_xml(batch_uri, google_civic_election_id, organization_we_vote_id,
+                                                        xml_root)
             elif kind_of_batch == CANDIDATE:
-                return self.store_candidate_xml(batch_uri, google_civic_election_id, organization_we_vote_id, xml_root)
+                results = self.store_candidate_xml(batch_uri, google_civic_election_id, organization_we_vote_id,
+                                                   xml_root)
             elif kind_of_batch == POLITICIAN:
-                return self.store_politician_xml(batch_uri, google_civic_election_id, organization_we_vote_id, xml_root)
+                results = self.store_politician_xml(batch_uri, google_civic_election_id, organization_we_vote_id,
+                                                    xml_root)
             else:
                 results = {
                     'success': False,
@@ -1773,7 +2058,9 @@ class BatchManager(models.Model):
                     'batch_saved': False,
                     'number_of_batch_rows': 0,
                 }
-                return results
+        finally:
+            xml_file.close()
+        return results
 
     def store_measure_xml(self, batch_uri, google_civic_election_id, organization_we_vote_id, xml_root, batch_set_id=0):
         """
@@ -1788,6 +2075,7 @@ class BatchManager(models.Model):
         # Process BallotMeasureContest data
 
         number_of_batch_rows = 0
+        batch_row_buffer = BatchRowBuffer()
         first_line = True
         success = True
         status = ''
@@ -1897,7 +2185,7 @@ class BatchManager(models.Model):
                          positive_value_exists(ballot_measure_name))):
 
                 try:
-                    batch_row = BatchRow.objects.create(
+                    batch_row_buffer.add(BatchRow(
                         batch_header_id=batch_header_id,
                         batch_row_000=ballot_measure_id,
                         batch_row_001=ballot_measure_subtitle,
@@ -1905,12 +2193,19 @@ class BatchManager(models.Model):
                         batch_row_003=electoral_district_id,
                         batch_row_004=ctcl_uuid,
                         batch_row_005=ballot_measure_name
-                    )
+                    ))
                     number_of_batch_rows += 1
                 except Exception as e:
                     # Stop trying to save rows -- break out of the for loop
                     status += " EXCEPTION_BATCH_ROW"
                     break
+        try:
+            batch_row_buffer.flush()
+        except Exception as e:
+            status += " EXCEPTION_BATCH_ROW"
+            handle_exception(e, logger=logger, exception_message=status)
+        number_of_batch_rows = batch_row_buffer.number_of_batch_rows_saved
+
         results = {
             'success': success,
             'status': status,
@@ -1933,6 +2228,7 @@ class BatchManager(models.Model):
         """
         # Process VIP Office data
         number_of_batch_rows = 0
+        batch_row_buffer = BatchRowBuffer()
         first_line = True
         success = False
         status = ''
@@ -2058,7 +2354,7 @@ class BatchManager(models.Model):
                     (positive_value_exists(electoral_district_id) or positive_value_exists(elected_office_name)) or \
                     positive_value_exists(elected_office_name_es):
                 try:
-                    batch_row = BatchRow.objects.create(
+                    batch_row_buffer.add(BatchRow(
                         batch_header_id=batch_header_id,
                         batch_row_000=elected_office_id,
                         batch_row_001=elected_office_name,
@@ -2068,13 +2364,20 @@ class BatchManager(models.Model):
                         batch_row_005=electoral_district_id,
                         batch_row_006=elected_office_is_partisan,
                         batch_row_007=ctcl_uuid
-                    )
+                    ))
                     number_of_batch_rows += 1
                 except Exception as e:
                     # Stop trying to save rows -- break out of the for loop
                     status += " EXCEPTION_BATCH_ROW"
                     handle_exception(e, logger=logger, exception_message=status)
                     break
+        try:
+            batch_row_buffer.flush()
+        except Exception as e:
+            status += " EXCEPTION_BATCH_ROW"
+            handle_exception(e, logger=logger, exception_message=status)
+        number_of_batch_rows = batch_row_buffer.number_of_batch_rows_saved
+
         results = {
             'success': success,
             'status': status,
@@ -2097,6 +2400,7 @@ class BatchManager(models.Model):
         """
         # Process VIP CandidateContest data
         number_of_batch_rows = 0
+        batch_row_buffer = BatchRowBuffer()
         first_line = True
         success = True
         status = ''
@@ -2257,7 +2561,7 @@ class BatchManager(models.Model):
             if positive_value_exists(contest_office_id) and positive_value_exists(ctcl_uuid) and \
                     (positive_value_exists(electoral_district_id) or positive_value_exists(contest_office_name)):
                 try:
-                    batch_row = BatchRow.objects.create(
+                    batch_row_buffer.add(BatchRow(
                         batch_header_id=batch_header_id,
                         batch_row_000=contest_office_id,
                         batch_row_001=contest_office_name,
@@ -2276,13 +2580,20 @@ class BatchManager(models.Model):
                         batch_row_014=candidate_selection_ids_dict.get('candidate_selection_id_8', ''),
                         batch_row_015=candidate_selection_ids_dict.get('candidate_selection_id_9', ''),
                         batch_row_016=candidate_selection_ids_dict.get('candidate_selection_id_10', ''),
-                    )
+                    ))
                     number_of_batch_rows += 1
                 except Exception as e:
                     # Stop trying to save rows -- break out of the for loop
                     status += " EXCEPTION_BATCH_ROW"
                     handle_exception(e, logger=logger, exception_message=status)
                     break
+        try:
+            batch_row_buffer.flush()
+        except Exception as e:
+            status += " EXCEPTION_BATCH_ROW"
+            handle_exception(e, logger=logger, exception_message=status)
+        number_of_batch_rows = batch_row_buffer.number_of_batch_rows_saved
+
         results = {
             'success': success,
             'status': status,
@@ -2305,6 +2616,7 @@ class BatchManager(models.Model):
         """
         # Process VIP Person data
         number_of_batch_rows = 0
+        batch_row_buffer = BatchRowBuffer()
         first_line = True
         success = True
         status = ''
@@ -2490,7 +2802,7 @@ class BatchManager(models.Model):
             if positive_value_exists(person_id) and positive_value_exists(ctcl_uuid) and \
                     (positive_value_exists(person_full_name) or positive_value_exists(person_first_name)):
                 try:
-                    batch_row = BatchRow.objects.create(
+                    batch_row_buffer.add(BatchRow(
                         batch_header_id=batch_header_id,
                         batch_row_000=person_id,
                         batch_row_001=person_full_name,
@@ -2506,13 +2818,20 @@ class BatchManager(models.Model):
                         batch_row_011=person_youtube_id,
                         batch_row_012=person_googleplus_id,
                         batch_row_013=ctcl_uuid,
-                    )
+                    ))
                     number_of_batch_rows += 1
                 except Exception as e:
                     # Stop trying to save rows -- break out of the for loop
                     status += " EXCEPTION_BATCH_ROW"
                     handle_exception(e, logger=logger, exception_message=status)
                     break
+        try:
+            batch_row_buffer.flush()
+        except Exception as e:
+            status += " EXCEPTION_BATCH_ROW"
+            handle_exception(e, logger=logger, exception_message=status)
+        number_of_batch_rows = batch_row_buffer.number_of_batch_rows_saved
+
         results = {
             'success': success,
             'status': status,
@@ -2535,6 +2854,7 @@ class BatchManager(models.Model):
         """
         # Process VIP Candidate data
         number_of_batch_rows = 0
+        batch_row_buffer = BatchRowBuffer()
         first_line = True
         success = True
         status = ''
@@ -2655,7 +2975,7 @@ class BatchManager(models.Model):
             if positive_value_exists(candidate_id) and positive_value_exists(ctcl_uuid) and \
                     (positive_value_exists(candidate_ctcl_person_id) or positive_value_exists(candidate_name_english)):
                 try:
-                    batch_row = BatchRow.objects.create(
+                    batch_row_buffer.add(BatchRow(
                         batch_header_id=batch_header_id,
                         batch_row_000=candidate_id,
                         batch_row_001=candidate_ctcl_person_id,
@@ -2664,7 +2984,7 @@ class BatchManager(models.Model):
                         batch_row_004=candidate_is_top_ticket,
                         batch_row_005=ctcl_uuid,
                         batch_row_006=candidate_selection_id
-                    )
+                    ))
                     number_of_batch_rows += 1
                 except Exception as e:
                     # Stop trying to save rows -- break out of the for loop
@@ -2673,6 +2993,13 @@ class BatchManager(models.Model):
                     success = False
 
                     break
+        try:
+            batch_row_buffer.flush()
+        except Exception as e:
+            status += " EXCEPTION_BATCH_ROW"
+            handle_exception(e, logger=logger, exception_message=status)
+        number_of_batch_rows = batch_row_buffer.number_of_batch_rows_saved
+
         results = {
             'success': success,
             'status': status,
@@ -2696,6 +3023,7 @@ class BatchManager(models.Model):
         # This state is not used right now. Parsing it for future reference
         # Process VIP State data
         number_of_batch_rows = 0
+        batch_row_buffer = BatchRowBuffer()
         first_line = True
         success = True
         status = ''
@@ -2773,12 +3101,12 @@ class BatchManager(models.Model):
             # check for state_id or name AND ocd_id
             if positive_value_exists(state_id) and (positive_value_exists(state_name)):
                 try:
-                    batch_row = BatchRow.objects.create(
+                    batch_row_buffer.add(BatchRow(
                         batch_header_id=batch_header_id,
                         batch_row_000=state_id,
                         batch_row_001=state_name,
                         batch_row_002=ocd_id,
-                    )
+                    ))
                     number_of_batch_rows += 1
                 except Exception as e:
                     # Stop trying to save rows -- break out of the for loop
@@ -2787,6 +3115,13 @@ class BatchManager(models.Model):
                     success = False
 
                     break
+        try:
+            batch_row_buffer.flush()
+        except Exception as e:
+            status += " EXCEPTION_BATCH_ROW"
+            handle_exception(e, logger=logger, exception_message=status)
+        number_of_batch_rows = batch_row_buffer.number_of_batch_rows_saved
+
         results = {
             'success': success,
             'status': status,
@@ -3041,27 +3376,39 @@ class BatchManager(models.Model):
         """
         import_date = date.today()
 
-        # Retrieve from XML
+        # Retrieve from XML. Each step below walks the document one top level element at a time, so memory use
+        #  doesn't grow with the size of the feed
         if batch_file:
-            xml_tree = ElementTree.parse(batch_file)
+            xml_file = batch_file
             batch_set_name = batch_file.name + " - " + str(import_date)
 
         else:
-            request = urllib.request.urlopen(batch_uri)
-            # xml_data = request.read()
-            # xml_data = xmltodict.parse(xml_data)
-            # # xml_data_list_json = list(xml_data)
-            # structured_json = json.dumps(xml_data)
-
-            xml_tree = ElementTree.parse(request)
-            request.close()
+            xml_file = download_to_temporary_file(batch_uri)
 
             # set batch_set_name as file_name
             batch_set_name_list = batch_uri.split('/')
             batch_set_name = batch_set_name_list[len(batch_set_name_list) - 1] + " - " + str(import_date)
 
-        xml_root = xml_tree.getroot()
-
+        try:
+            return self.store_batch_set_vip_xml(batch_uri, google_civic_election_id, organization_we_vote_id,
+                                                StreamingXmlRoot(xml_file), batch_set_name, import_date)
+        finally:
+            if not batch_file:
+                # Removes the temporary copy of the document
+                xml_file.close()
+
+    def store_batch_set_vip_xml(self, batch_uri, google_civic_election_id, organization_we_vote_id, xml_root,
+                                batch_set_name, import_date):
+        """
+        Creates the BatchSet, and a batch for each kind of data in the CTCL xml document
+        :param batch_uri:
+        :param google_civic_election_id:
+        :param organization_we_vote_id:
+        :param xml_root:
+        :param batch_set_name:
+        :param import_date:
+        :return:
+        """
         status = ''
         success = False
         number_of_batch_rows = 0
@@ -3091,53 +3438,49 @@ class BatchManager(models.Model):
             if continue_batch_set_processing and not skip_electoral_district:
                 electoral_district_list_found = False
                 electoral_district_item_list = xml_root.findall('ElectoralDistrict')
-                if not len(electoral_district_item_list):
-                    continue_batch_set_processing = False
+                results = electoral_district_import_from_xml_data(electoral_district_item_list)
+                if results['success']:
+                    status += "CREATE_BATCH_SET_ELECTORAL_DISTRICT_IMPORTED "
+                    number_of_batch_rows += results['saved']
+                    # TODO check this whether it should be only saved or updated Electoral districts
+                    number_of_batch_rows += results['updated']
+                    electoral_district_list_found = True
                 else:
-                    results = electoral_district_import_from_xml_data(electoral_district_item_list)
-                    if results['success']:
-                        status += "CREATE_BATCH_SET_ELECTORAL_DISTRICT_IMPORTED "
-                        number_of_batch_rows += results['saved']
-                        # TODO check this whether it should be only saved or updated Electoral districts
-                        number_of_batch_rows += results['updated']
-                        electoral_district_list_found = True
-                    else:
-                        continue_batch_set_processing = False
-                        status += results['status']
-                        status += " CREATE_BATCH_SET_ELECTORAL_DISTRICT_ERRORS "
+                    continue_batch_set_processing = False
+                    status += results['status']
+                    status += " CREATE_BATCH_SET_ELECTORAL_DISTRICT_ERRORS "
 
             # import Party
             skip_party = False  # We can set this to True during development to save time
             if continue_batch_set_processing and not skip_party:
                 party_list_found = False
                 party_item_list = xml_root.findall('Party')
-                if not len(party_item_list):
+                results = party_import_from_xml_data(party_item_list)
+                if not results['saved'] and not results['updated'] and not results['not_processed']:
                     continue_batch_set_processing = False
                     status += " CREATE_BATCH_SET-PARTY_IMPORT_ERRORS-NO_party_item_list "
+                elif results['success']:
+                    status += "CREATE_BATCH_SET_PARTY_IMPORTED"
+                    number_of_batch_rows += results['saved']
+                    number_of_batch_rows += results['updated']
+                    # TODO check this whether it should be only saved or updated Electoral districts
+                    party_list_found = True
+                    # A given data source may not always have electoral district and/or party data,
+                    # but the referenced electoral district id or party id might be already present
+                    # in the master database tables, hence commenting out below code
+                    # if not electoral_district_list_found or not party_list_found:
+                    #     results = {
+                    #         'success': False,
+                    #         'status': status,
+                    #         'batch_header_id': 0,
+                    #         'batch_saved': False,
+                    #         'number_of_batch_rows': 0,
+                    #     }
+                    #     return results
                 else:
-                    results = party_import_from_xml_data(party_item_list)
-                    if results['success']:
-                        status += "CREATE_BATCH_SET_PARTY_IMPORTED"
-                        number_of_batch_rows += results['saved']
-                        number_of_batch_rows += results['updated']
-                        # TODO check this whether it should be only saved or updated Electoral districts
-                        party_list_found = True
-                        # A given data source may not always have electoral district and/or party data,
-                        # but the referenced electoral district id or party id might be already present
-                        # in the master database tables, hence commenting out below code
-                        # if not electoral_district_list_found or not party_list_found:
-                        #     results = {
-                        #         'success': False,
-                        #         'status': status,
-                        #         'batch_header_id': 0,
-                        #         'batch_saved': False,
-                        #         'number_of_batch_rows': 0,
-                        #     }
-                        #     return results
-                    else:
-                        continue_batch_set_processing = False
-                        status += results['status']
-                        status += " CREATE_BATCH_SET-PARTY_IMPORT_ERRORS "
+                    continue_batch_set_processing = False
+                    status += results['status']
+                    status += " CREATE_BATCH_SET-PARTY_IMPORT_ERRORS "
 
             # look for different data sets in the XML - ElectedOffice, ContestOffice, Candidate, Politician, Measure
 
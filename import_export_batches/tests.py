@@ -0,0 +1,210 @@
+# import_export_batches/tests.py
+# Brought to you by We Vote. Be good.
+# -*- coding: UTF-8 -*-
+
+import csv
+from django.test import SimpleTestCase, TestCase
+import io
+import os
+import tempfile
+import time
+import tracemalloc
+import unittest
+from .controllers import create_batch_row_actions
+from .models import BATCH_IMPORT_KEYS_ACCEPTED_FOR_CANDIDATES, BatchDescription, BatchHeaderMap, BatchManager, \
+    BatchRow, BatchRowActionOrganization, StreamingXmlRoot, retrieve_query_in_chunks
+from import_export_ctcl.controllers import CTCL_SAMPLE_XML_FILE
+from voter_guide.models import ORGANIZATION_WORD
+import xml.etree.ElementTree as ElementTree
+
+
+def retrieve_value_from_batch_row_one_column_at_a_time(batch_header_name_we_want, batch_header_map, one_batch_row):
+    # How BatchManager.retrieve_value_from_batch_row used to work, to compare against
+    index_number = 0
+    batch_header_name_we_want = batch_header_name_we_want.lower().strip()
+    while index_number < 50:
+        index_number_string = ("00" + str(index_number))[-3:]
+        value_from_batch_header_map = getattr(batch_header_map, "batch_header_map_" + index_number_string)
+        if value_from_batch_header_map is None:
+            return ""
+        if batch_header_name_we_want == value_from_batch_header_map.lower().strip():
+            value_from_batch_row = getattr(one_batch_row, "batch_row_" + index_number_string)
+            if isinstance(value_from_batch_row, str):
+                return value_from_batch_row.strip()
+            return value_from_batch_row
+        index_number += 1
+    return ""
+
+
+class BatchRowProjectorTestCase(SimpleTestCase):
+
+    def setUp(self):
+        # Headers as they might come in a candidate CSV, in mixed case and with a column we don't use
+        self.header_list = [' Candidate_Name', 'STATE_CODE'] + \
+            sorted(set(BATCH_IMPORT_KEYS_ACCEPTED_FOR_CANDIDATES) - {'candidate_name', 'state_code'}) + ['notes']
+        self.batch_header_map = BatchHeaderMap()
+        for index_number, header_name in enumerate(self.header_list):
+            setattr(self.batch_header_map, "batch_header_map_" + str(index_number).zfill(3), header_name)
+        self.header_name_we_want_list = list(BATCH_IMPORT_KEYS_ACCEPTED_FOR_CANDIDATES) + ['not_in_this_batch']
+
+    def create_batch_rows_from_csv(self, number_of_rows):
+        csv_file = io.StringIO()
+        csv_writer = csv.writer(csv_file)
+        for row_number in range(number_of_rows):
+            csv_writer.writerow([' value {row} {column} '.format(row=row_number, column=column_number)
+                                 for column_number in range(len(self.header_list))])
+        csv_file.seek(0)
+        batch_row_list = []
+        for one_csv_row in csv.reader(csv_file):
+            one_batch_row = BatchRow()
+            for index_number, value in enumerate(one_csv_row):
+                setattr(one_batch_row, "batch_row_" + str(index_number).zfill(3), value)
+            batch_row_list.append(one_batch_row)
+        return batch_row_list
+
+    def test_projector_returns_the_same_values_as_looking_up_one_column_at_a_time(self):
+        batch_manager = BatchManager()
+        for one_batch_row in self.create_batch_rows_from_csv(20):
+            for header_name_we_want in self.header_name_we_want_list:
+                self.assertEqual(
+                    batch_manager.retrieve_value_from_batch_row(header_name_we_want, self.batch_header_map,
+                                                                one_batch_row),
+                    retrieve_value_from_batch_row_one_column_at_a_time(header_name_we_want, self.batch_header_map,
+                                                                       one_batch_row))
+        self.assertEqual(batch_manager.retrieve_column_name_from_batch_row('state_code', self.batch_header_map),
+                         'batch_row_001')
+
+    @unittest.skipUnless(os.environ.get('WE_VOTE_RUN_BENCHMARKS'), "Set WE_VOTE_RUN_BENCHMARKS to run")
+    def test_benchmark_100000_row_candidate_csv(self):
+        batch_row_list = self.create_batch_rows_from_csv(100000)
+
+        start_time = time.time()
+        values_one_column_at_a_time = [
+            retrieve_value_from_batch_row_one_column_at_a_time(header_name_we_want, self.batch_header_map,
+                                                               one_batch_row)
+            for one_batch_row in batch_row_list for header_name_we_want in self.header_name_we_want_list]
+        seconds_one_column_at_a_time = time.time() - start_time
+
+        batch_manager = BatchManager()
+        start_time = time.time()
+        values_with_projector = [
+            batch_manager.retrieve_value_from_batch_row(header_name_we_want, self.batch_header_map, one_batch_row)
+            for one_batch_row in batch_row_list for header_name_we_want in self.header_name_we_want_list]
+        seconds_with_projector = time.time() - start_time
+
+        self.assertEqual(values_with_projector, values_one_column_at_a_time)
+        self.assertLess(seconds_with_projector, seconds_one_column_at_a_time)
+
+
+class CreateBatchRowActionsInChunksTestCase(TestCase):
+
+    def setUp(self):
+        self.batch_header_id = 7
+        BatchDescription.objects.create(batch_header_id=self.batch_header_id, batch_name="organizations",
+                                        kind_of_batch=ORGANIZATION_WORD, google_civic_election_id=0,
+                                        batch_header_map_id=1)
+        BatchHeaderMap.objects.create(batch_header_id=self.batch_header_id,
+                                      batch_header_map_000="organization_name",
+                                      batch_header_map_001="organization_website")
+        for index_number in range(25):
+            BatchRow.objects.create(batch_header_id=self.batch_header_id,
+                                    batch_row_000="Organization " + str(index_number),
+                                    batch_row_001="https://example.org/" + str(index_number))
+
+    def test_retrieve_query_in_chunks_visits_every_row_once(self):
+        batch_row_query = BatchRow.objects.filter(batch_header_id=self.batch_header_id)
+        chunk_list = list(retrieve_query_in_chunks(batch_row_query, chunk_size=10))
+        self.assertEqual([len(one_chunk) for one_chunk in chunk_list], [10, 10, 5])
+        batch_row_id_list = [one_batch_row.id for one_chunk in chunk_list for one_batch_row in one_chunk]
+        self.assertEqual(batch_row_id_list, sorted(batch_row_query.values_list('id', flat=True)))
+
+    def test_rows_leaving_the_query_while_we_work_are_not_skipped(self):
+        batch_row_query = BatchRow.objects.filter(batch_header_id=self.batch_header_id, state_code__isnull=True)
+        number_of_batch_rows_visited = 0
+        for batch_row_chunk in retrieve_query_in_chunks(batch_row_query, chunk_size=10):
+            for one_batch_row in batch_row_chunk:
+                one_batch_row.state_code = "CA"
+                one_batch_row.save()
+                number_of_batch_rows_visited += 1
+        self.assertEqual(number_of_batch_rows_visited, 25)
+
+    def test_create_batch_row_actions_creates_then_updates(self):
+        results = create_batch_row_actions(self.batch_header_id)
+        self.assertEqual(results['number_of_batch_actions_created'], 25)
+        self.assertEqual(results['number_of_batch_actions_updated'], 0)
+        self.assertEqual(BatchRowActionOrganization.objects.filter(batch_header_id=self.batch_header_id).count(), 25)
+        batch_row_action = BatchRowActionOrganization.objects.get(
+            batch_header_id=self.batch_header_id, organization_name="Organization 3")
+        self.assertEqual(batch_row_action.organization_website, "https://example.org/3")
+
+        results = create_batch_row_actions(self.batch_header_id)
+        self.assertEqual(results['number_of_batch_actions_created'], 0)
+        self.assertEqual(results['number_of_batch_actions_updated'], 25)
+        self.assertEqual(BatchRowActionOrganization.objects.filter(batch_header_id=self.batch_header_id).count(), 25)
+
+
+# Raise this to a few million to benchmark against a multi-GB feed
+SYNTHETIC_VIP_FEED_NUMBER_OF_MEASURES = 40000
+
+
+def write_synthetic_vip_feed(xml_file, number_of_measures):
+    xml_file.write(b'<?xml version="1.0" encoding="UTF-8"?>\n<VipObject schemaVersion="5.1">\n')
+    for index_number in range(number_of_measures):
+        xml_file.write((
+            '<Party id="par{index}"><Name><Text language="en">Party {index}</Text></Name></Party>\n'
+            '<BallotMeasureContest id="bmc{index}">'
+            '<BallotSubTitle><Text language="en">Subtitle {index}</Text></BallotSubTitle>'
+            '<BallotTitle><Text language="en">Measure {index}</Text></BallotTitle>'
+            '<ElectoralDistrictId>ed{index}</ElectoralDistrictId>'
+            '<ExternalIdentifiers><ExternalIdentifier><Type>other</Type><OtherType>ctcl-uuid</OtherType>'
+            '<Value>uuid-{index}</Value></ExternalIdentifier></ExternalIdentifiers>'
+            '<Name>Measure {index}</Name></BallotMeasureContest>\n').format(index=index_number).encode('utf-8'))
+    xml_file.write(b'</VipObject>\n')
+    xml_file.flush()
+
+
+class StreamingXmlRootTestCase(SimpleTestCase):
+
+    def test_findall_and_find_match_element_tree(self):
+        xml_root = ElementTree.parse(CTCL_SAMPLE_XML_FILE).getroot()
+        with open(CTCL_SAMPLE_XML_FILE, 'rb') as xml_file:
+            streaming_xml_root = StreamingXmlRoot(xml_file)
+            for tag in ['ElectoralDistrict', 'Party', 'Office', 'CandidateContest', 'CandidateSelection', 'Person',
+                        'Candidate', 'BallotMeasureContest', 'State']:
+                self.assertEqual([ElementTree.tostring(element) for element in streaming_xml_root.findall(tag)],
+                                 [ElementTree.tostring(element) for element in xml_root.findall(tag)])
+            for tag in ['Election', 'Source', 'NotInTheFeed']:
+                element = xml_root.find(tag)
+                streaming_element = streaming_xml_root.find(tag)
+                if element is None:
+                    self.assertIsNone(streaming_element)
+                else:
+                    self.assertEqual(ElementTree.tostring(streaming_element), ElementTree.tostring(element))
+
+    def measure_peak_memory_walking_feed(self, number_of_measures, use_streaming_xml_root):
+        with tempfile.TemporaryFile() as xml_file:
+            write_synthetic_vip_feed(xml_file, number_of_measures)
+            tracemalloc.start()
+            if use_streaming_xml_root:
+                xml_root = StreamingXmlRoot(xml_file)
+            else:
+                xml_file.seek(0)
+                xml_root = ElementTree.parse(xml_file).getroot()
+            number_of_measures_found = 0
+            for one_ballot_measure in xml_root.findall('BallotMeasureContest'):
+                if one_ballot_measure.find('BallotTitle/Text') is not None:
+                    number_of_measures_found += 1
+            peak_memory = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        self.assertEqual(number_of_measures_found, number_of_measures)
+        return peak_memory
+
+    @unittest.skipUnless(os.environ.get('WE_VOTE_RUN_BENCHMARKS'), "Set WE_VOTE_RUN_BENCHMARKS to run")
+    def test_benchmark_synthetic_vip_feed(self):
+        small_feed_peak_memory = self.measure_peak_memory_walking_feed(SYNTHETIC_VIP_FEED_NUMBER_OF_MEASURES // 4, True)
+        streaming_peak_memory = self.measure_peak_memory_walking_feed(SYNTHETIC_VIP_FEED_NUMBER_OF_MEASURES, True)
+        parse_peak_memory = self.measure_peak_memory_walking_feed(SYNTHETIC_VIP_FEED_NUMBER_OF_MEASURES, False)
+
+        # Four times the feed should not need noticeably more memory when streaming
+        self.assertLess(streaming_peak_memory, small_feed_peak_memory * 2)
+        self.assertLess(streaming_peak_memory, parse_peak_memory)
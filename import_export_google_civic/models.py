@@ -4,10 +4,10 @@
 # -*- coding: UTF-8 -*-
 
 from ballot.models import BallotItem
-from datetime import date, timedelta
 from django.db import models
 import wevote_functions.admin
-from wevote_functions.functions import convert_to_int, positive_value_exists
+from wevote_functions.functions import positive_value_exists
+from wevote_settings.models import api_call_counter, API_GOOGLE_CIVIC
 
 
 logger = wevote_functions.admin.get_logger(__name__)
@@ -57,6 +57,7 @@ def fetch_google_civic_election_id_for_voter_id(voter_id):
     return google_civic_election_id
 
 
+# No longer written, calls are counted in wevote_settings.models.ApiCallHourlyCount
 class GoogleCivicApiCounter(models.Model):
     # The data and time we reached out to the Google Civic API
     datetime_of_action = models.DateTimeField(verbose_name='date and time of action', null=False, auto_now=True)
@@ -106,18 +107,13 @@ class GoogleCivicApiCounterMonthlySummary(models.Model):
 class GoogleCivicApiCounterManager(models.Model):
     def create_counter_entry(self, kind_of_action, google_civic_election_id=0):
         """
-        Create an entry that records that a call to the Google Civic Api was made.
+        Count a call to the Google Civic Api. The calls are added up in memory and saved per hour, see
+        ApiCallCounter.
         """
         try:
-            google_civic_election_id = convert_to_int(google_civic_election_id)
-
-            # TODO: We need to work out the timezone questions
-            GoogleCivicApiCounter.objects.create(
-                kind_of_action=kind_of_action,
-                google_civic_election_id=google_civic_election_id,
-            )
+            api_call_counter.count_api_call(API_GOOGLE_CIVIC, kind_of_action, google_civic_election_id)
             success = True
-            status = 'ENTRY_SAVED'
+            status = 'ENTRY_COUNTED'
         except Exception:
             success = False
             status = 'SOME_ERROR'
@@ -129,40 +125,8 @@ class GoogleCivicApiCounterManager(models.Model):
         return results
 
     def retrieve_daily_summaries(self, kind_of_action='', google_civic_election_id=0):
-        # Start with today and cycle backwards in time
-        daily_summaries = []
-        day_on_stage = date.today()  # TODO: We need to work out the timezone questions
-        number_found = 0
-        days_to_display = 30
-        maximum_attempts = 45
-        attempt_count = 0
-
-        try:
-            # Limit the number of times this runs to EITHER 1) 5 positive numbers
-            #  OR 2) 30 days in the past, whichever comes first
-            while number_found <= days_to_display and attempt_count <= maximum_attempts:
-                attempt_count += 1
-                counter_queryset = GoogleCivicApiCounter.objects.all()
-                if positive_value_exists(kind_of_action):
-                    counter_queryset = counter_queryset.filter(kind_of_action=kind_of_action)
-                if positive_value_exists(google_civic_election_id):
-                    counter_queryset = counter_queryset.filter(google_civic_election_id=google_civic_election_id)
-
-                # Find the number of these entries on that particular day
-                counter_queryset = counter_queryset.filter(datetime_of_action__contains=day_on_stage)
-                api_call_count = counter_queryset.count()
-
-                # If any api calls were found on that date, pass it out for display
-                if positive_value_exists(api_call_count):
-                    daily_summary = {
-                        'date_string': day_on_stage,
-                        'count': api_call_count,
-                    }
-                    daily_summaries.append(daily_summary)
-                    number_found += 1
-
-                day_on_stage -= timedelta(days=1)
-        except Exception:
-            pass
+        results = self.retrieve_summaries(kind_of_action, google_civic_election_id)
+        return results['daily_summaries']
 
-        return daily_summaries
+    def retrieve_summaries(self, kind_of_action='', google_civic_election_id=0):
+        return api_call_counter.retrieve_api_call_summaries(API_GOOGLE_CIVIC, kind_of_action, google_civic_election_id)
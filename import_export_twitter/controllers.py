@@ -20,7 +20,7 @@ from politician.models import PoliticianManager
 from position.controllers import update_all_position_details_from_candidate, \
     update_position_entered_details_from_organization, update_position_for_friends_details_from_voter
 from socket import timeout
-from twitter.functions import retrieve_twitter_user_info
+from twitter.functions import retrieve_twitter_user_info, retrieve_twitter_user_info_in_bulk
 from twitter.models import TwitterUserManager
 from voter.models import VoterManager
 from voter_guide.models import VoterGuideListManager
@@ -62,7 +62,14 @@ class GetOutOfLoopLocal(Exception):
     pass
 
 
-def refresh_twitter_candidate_details(candidate_campaign):
+def refresh_twitter_candidate_details(candidate_campaign, twitter_user_results=None):
+    """
+    Refresh a candidate's Twitter details and images
+    :param candidate_campaign:
+    :param twitter_user_results: Already retrieved from Twitter, shaped like the results of retrieve_twitter_user_info.
+     Batch refreshes pass these in so we don't ask Twitter about each candidate separately.
+    :return:
+    """
     status = ""
     candidate_campaign_manager = CandidateCampaignManager()
     politician_manager = PoliticianManager()
@@ -79,8 +86,11 @@ def refresh_twitter_candidate_details(candidate_campaign):
 
     if candidate_campaign.candidate_twitter_handle:
         status += "TWITTER_CANDIDATE_DETAILS-REACHING_OUT_TO_TWITTER "
-        twitter_user_id = 0
-        results = retrieve_twitter_user_info(twitter_user_id, candidate_campaign.candidate_twitter_handle)
+        if twitter_user_results is None:
+            twitter_user_id = 0
+            results = retrieve_twitter_user_info(twitter_user_id, candidate_campaign.candidate_twitter_handle)
+        else:
+            results = twitter_user_results
 
         if results['success']:
             status += "TWITTER_CANDIDATE_DETAILS_RETRIEVED_FROM_TWITTER "
@@ -133,12 +143,14 @@ def refresh_twitter_candidate_details(candidate_campaign):
     return results
 
 
-def refresh_twitter_organization_details(organization, twitter_user_id=0):
+def refresh_twitter_organization_details(organization, twitter_user_id=0, twitter_user_results=None):
     """
     This function assumes TwitterLinkToOrganization is happening outside of this function. It relies on our caching
     organization_twitter_handle in the organization object.
     :param organization:
     :param twitter_user_id:
+    :param twitter_user_results: Already retrieved from Twitter, shaped like the results of retrieve_twitter_user_info.
+     Batch refreshes pass these in so we don't ask Twitter about each organization separately.
     :return:
     """
     organization_manager = OrganizationManager()
@@ -166,12 +178,17 @@ def refresh_twitter_organization_details(organization, twitter_user_id=0):
         return results
 
     twitter_user_found = False
-    if positive_value_exists(twitter_user_id):
+    if twitter_user_results is not None:
+        status += "ORGANIZATION_TWITTER_DETAILS-ALREADY_RETRIEVED "
+        results = twitter_user_results
+        twitter_user_found = results['success']
+    elif positive_value_exists(twitter_user_id):
         status += "ORGANIZATION_TWITTER_DETAILS-REACHING_OUT_TO_TWITTER-BY_USER_ID "
         results = retrieve_twitter_user_info(twitter_user_id)
         if results['success']:
             twitter_user_found = True
-    if not twitter_user_found and positive_value_exists(organization.organization_twitter_handle):
+    if not twitter_user_found and twitter_user_results is None and \
+            positive_value_exists(organization.organization_twitter_handle):
         status += "ORGANIZATION_TWITTER_DETAILS-REACHING_OUT_TO_TWITTER-BY_HANDLE "
         # organization_twitter_handle = organization.organization_twitter_handle
         twitter_user_id_zero = 0
@@ -481,52 +498,75 @@ def refresh_twitter_data_for_organizations(state_code='', google_civic_election_
             return results
 
     organization_list = list(organization_list_query)
+    if positive_value_exists(first_retrieve_only):
+        organization_list = [organization for organization in organization_list
+                             if not positive_value_exists(organization.twitter_followers_count)]
 
+    # If we can find a twitter_id from the TwitterLinkToOrganization table, we want to use that
     twitter_user_manager = TwitterUserManager()
+    twitter_id_by_organization_we_vote_id = \
+        twitter_user_manager.retrieve_twitter_ids_for_organization_we_vote_id_list(
+            [organization.we_vote_id for organization in organization_list])
+    organizations_to_refresh = []
     for organization in organization_list:
-        # ######################################
-        # Do we have a TwitterLinkToOrganization for this org?
-        twitter_user_id_found = False
-        twitter_id = 0
-        results = twitter_user_manager.retrieve_twitter_link_to_organization_from_organization_we_vote_id(
-            organization.we_vote_id)
-        if results['twitter_link_to_organization_found']:
-            twitter_link_to_organization = results['twitter_link_to_organization']
-            twitter_id = twitter_link_to_organization.twitter_id
-            twitter_user_id_found = True
-
-        # If we can find a twitter_id from the TwitterLinkToOrganization table, we want to use that
-        if twitter_user_id_found or organization.organization_twitter_handle:
-            retrieved_twitter_data = False
-            if positive_value_exists(first_retrieve_only):
-                if not positive_value_exists(organization.twitter_followers_count):
-                    refresh_results = refresh_twitter_organization_details(organization, twitter_id)
-                    # twitter_user_id = 0
-                    # results = retrieve_twitter_user_info(twitter_user_id, organization.organization_twitter_handle)
-                    retrieved_twitter_data = refresh_results['success']
-                    organization = refresh_results['organization']
-                    number_of_twitter_accounts_queried += 1
-            else:
-                refresh_results = refresh_twitter_organization_details(organization, twitter_id)
-                # twitter_user_id = 0
-                # results = retrieve_twitter_user_info(twitter_user_id, organization.organization_twitter_handle)
-                retrieved_twitter_data = refresh_results['success']
-                organization = refresh_results['organization']
-                number_of_twitter_accounts_queried += 1
-
-            if retrieved_twitter_data:
-                number_of_organizations_updated += 1
-                # save_results = organization_manager.update_organization_twitter_details(
-                #     organization, results['twitter_json'])
-
-                # if save_results['success']:
-                update_results = update_social_media_statistics_in_other_tables(organization)
-
-    status = "ALL_ORGANIZATION_TWITTER_DATA_RETRIEVED"
+        organization_we_vote_id_lower = organization.we_vote_id.lower() if organization.we_vote_id else ''
+        if organization_we_vote_id_lower in twitter_id_by_organization_we_vote_id \
+                or positive_value_exists(organization.organization_twitter_handle):
+            twitter_id = twitter_id_by_organization_we_vote_id.get(organization_we_vote_id_lower, 0)
+            organizations_to_refresh.append((organization, convert_to_int(twitter_id)))
+
+    # Ask Twitter about up to 100 organizations per call: first by twitter_id, then by handle for the rest
+    twitter_id_results = retrieve_twitter_user_info_in_bulk(
+        twitter_user_id_list=[twitter_id for organization, twitter_id in organizations_to_refresh])
+    twitter_json_by_twitter_user_id = twitter_id_results['twitter_json_by_twitter_user_id']
+    twitter_handle_results = retrieve_twitter_user_info_in_bulk(
+        twitter_handle_list=[str(organization.organization_twitter_handle)
+                             for organization, twitter_id in organizations_to_refresh
+                             if twitter_id not in twitter_json_by_twitter_user_id and
+                             positive_value_exists(organization.organization_twitter_handle)])
+    twitter_json_by_twitter_handle = twitter_handle_results['twitter_json_by_twitter_handle']
+    number_of_twitter_api_calls = \
+        twitter_id_results['number_of_twitter_api_calls'] + twitter_handle_results['number_of_twitter_api_calls']
+    if not twitter_id_results['success'] or not twitter_handle_results['success']:
+        # Don't clear the Twitter details of organizations we just couldn't ask Twitter about
+        status += twitter_id_results['status'] + twitter_handle_results['status']
+        results = {
+            'success':                              False,
+            'status':                               status,
+            'number_of_twitter_accounts_queried':   number_of_twitter_accounts_queried,
+            'number_of_twitter_api_calls':          number_of_twitter_api_calls,
+            'number_of_organizations_updated':      number_of_organizations_updated,
+        }
+        return results
+
+    for organization, twitter_id in organizations_to_refresh:
+        twitter_json = twitter_json_by_twitter_user_id.get(twitter_id)
+        if twitter_json is None and positive_value_exists(organization.organization_twitter_handle):
+            twitter_json = twitter_json_by_twitter_handle.get(str(organization.organization_twitter_handle).lower())
+        if twitter_json is None:
+            twitter_user_results = {
+                'success':          False,
+                'twitter_user_id':  twitter_id,
+                'twitter_json':     {},
+            }
+        else:
+            twitter_user_results = {
+                'success':          True,
+                'twitter_user_id':  convert_to_int(twitter_json['id']),
+                'twitter_json':     twitter_json,
+            }
+        # This also updates the Twitter statistics in the other We Vote tables
+        refresh_results = refresh_twitter_organization_details(organization, twitter_id, twitter_user_results)
+        number_of_twitter_accounts_queried += 1
+        if refresh_results['success']:
+            number_of_organizations_updated += 1
+
+    status += "ALL_ORGANIZATION_TWITTER_DATA_RETRIEVED "
     results = {
         'success':                              True,
         'status':                               status,
         'number_of_twitter_accounts_queried':   number_of_twitter_accounts_queried,
+        'number_of_twitter_api_calls':          number_of_twitter_api_calls,
         'number_of_organizations_updated':      number_of_organizations_updated,
     }
     return results
@@ -583,8 +623,10 @@ def scrape_and_save_social_media_for_candidates_in_one_election(google_civic_ele
 
 
 def refresh_twitter_candidate_details_for_election(google_civic_election_id, state_code):
+    status = ""
     twitter_handles_added = 0
     profiles_refreshed_with_twitter_data = 0
+    candidates_to_refresh = []
 
     google_civic_election_id = convert_to_int(google_civic_election_id)
 
@@ -616,16 +658,41 @@ def refresh_twitter_candidate_details_for_election(google_civic_election_id, sta
                 candidate.save()
 
             if positive_value_exists(candidate.candidate_twitter_handle):
-                refresh_twitter_candidate_details(candidate)
-                profiles_refreshed_with_twitter_data += 1
-                refresh_candidate_results = refresh_candidate_data_from_master_tables(candidate.we_vote_id)
+                candidates_to_refresh.append(candidate)
+
+    # Ask Twitter about up to 100 candidates per call
+    twitter_handle_results = retrieve_twitter_user_info_in_bulk(
+        twitter_handle_list=[candidate.candidate_twitter_handle for candidate in candidates_to_refresh])
+    if not twitter_handle_results['success']:
+        status += twitter_handle_results['status']
+        results = {
+            'success':                              False,
+            'status':                               status,
+            'twitter_handles_added':                twitter_handles_added,
+            'profiles_refreshed_with_twitter_data': profiles_refreshed_with_twitter_data,
+            'number_of_twitter_api_calls':          twitter_handle_results['number_of_twitter_api_calls'],
+        }
+        return results
+
+    twitter_json_by_twitter_handle = twitter_handle_results['twitter_json_by_twitter_handle']
+    for candidate in candidates_to_refresh:
+        twitter_json = twitter_json_by_twitter_handle.get(candidate.candidate_twitter_handle.lower())
+        twitter_user_results = {
+            'success':          twitter_json is not None,
+            'twitter_user_id':  convert_to_int(twitter_json['id']) if twitter_json is not None else 0,
+            'twitter_json':     twitter_json if twitter_json is not None else {},
+        }
+        refresh_twitter_candidate_details(candidate, twitter_user_results)
+        profiles_refreshed_with_twitter_data += 1
+        refresh_candidate_results = refresh_candidate_data_from_master_tables(candidate.we_vote_id)
 
-    status = "CANDIDATE_SOCIAL_MEDIA_RETRIEVED"
+    status += "CANDIDATE_SOCIAL_MEDIA_RETRIEVED "
     results = {
         'success':                              True,
         'status':                               status,
         'twitter_handles_added':                twitter_handles_added,
         'profiles_refreshed_with_twitter_data': profiles_refreshed_with_twitter_data,
+        'number_of_twitter_api_calls':          twitter_handle_results['number_of_twitter_api_calls'],
     }
     return results
 
@@ -246,9 +246,11 @@ def refresh_twitter_data_for_organizations_view(request):
         number_of_twitter_accounts_queried = results['number_of_twitter_accounts_queried']
         number_of_organizations_updated = results['number_of_organizations_updated']
         messages.add_message(request, messages.INFO,
-                             "Twitter accounts queried: {number_of_twitter_accounts_queried}, "
+                             "Twitter accounts queried: {number_of_twitter_accounts_queried} "
+                             "(in {number_of_twitter_api_calls} calls to Twitter), "
                              "Organizations updated: {number_of_organizations_updated}".format(
                                  number_of_twitter_accounts_queried=number_of_twitter_accounts_queried,
+                                 number_of_twitter_api_calls=results['number_of_twitter_api_calls'],
                                  number_of_organizations_updated=number_of_organizations_updated))
 
     return HttpResponseRedirect(reverse('organization:organization_list', args=()) +
@@ -2,17 +2,18 @@
 # Brought to you by We Vote. Be good.
 # -*- coding: UTF-8 -*-
 
-from datetime import date, timedelta
 from django.db import models
 from django.db.models import Q
 from organization.models import OrganizationManager, Organization
 import wevote_functions.admin
 from wevote_functions.functions import convert_to_int, positive_value_exists
+from wevote_settings.models import api_call_counter, API_VOTE_SMART
 
 
 logger = wevote_functions.admin.get_logger(__name__)
 
 
+# No longer written, calls are counted in wevote_settings.models.ApiCallHourlyCount
 class VoteSmartApiCounter(models.Model):
     # The data and time we reached out to the Google Civic API
     datetime_of_action = models.DateTimeField(verbose_name='date and time of action', null=False, auto_now=True)
@@ -62,18 +63,13 @@ class VoteSmartApiCounterMonthlySummary(models.Model):
 class VoteSmartApiCounterManager(models.Model):
     def create_counter_entry(self, kind_of_action, google_civic_election_id=0):
         """
-        Create an entry that records that a call to the Vote Smart Api was made.
+        Count a call to the Vote Smart Api. The calls are added up in memory and saved per hour, see
+        ApiCallCounter.
         """
         try:
-            google_civic_election_id = convert_to_int(google_civic_election_id)
-
-            # TODO: We need to work out the timezone questions
-            VoteSmartApiCounter.objects.create(
-                kind_of_action=kind_of_action,
-                google_civic_election_id=google_civic_election_id,
-            )
+            api_call_counter.count_api_call(API_VOTE_SMART, kind_of_action, google_civic_election_id)
             success = True
-            status = 'ENTRY_SAVED'
+            status = 'ENTRY_COUNTED'
         except Exception:
             success = False
             status = 'SOME_ERROR'
@@ -85,42 +81,11 @@ class VoteSmartApiCounterManager(models.Model):
         return results
 
     def retrieve_daily_summaries(self, kind_of_action='', google_civic_election_id=0):
-        # Start with today and cycle backwards in time
-        daily_summaries = []
-        day_on_stage = date.today()  # TODO: We need to work out the timezone questions
-        number_found = 0
-        maximum_attempts = 30
-        attempt_count = 0
-
-        try:
-            # Limit the number of times this runs to EITHER 1) 5 positive numbers
-            #  OR 2) 30 days in the past, whichever comes first
-            while number_found <= 5 and attempt_count <= maximum_attempts:
-                attempt_count += 1
-                counter_queryset = VoteSmartApiCounter.objects.all()
-                if positive_value_exists(kind_of_action):
-                    counter_queryset = counter_queryset.filter(kind_of_action=kind_of_action)
-                if positive_value_exists(google_civic_election_id):
-                    counter_queryset = counter_queryset.filter(google_civic_election_id=google_civic_election_id)
-
-                # Find the number of these entries on that particular day
-                counter_queryset = counter_queryset.filter(datetime_of_action__contains=day_on_stage)
-                api_call_count = counter_queryset.count()
-
-                # If any api calls were found on that date, pass it out for display
-                if positive_value_exists(api_call_count):
-                    daily_summary = {
-                        'date_string': day_on_stage,
-                        'count': api_call_count,
-                    }
-                    daily_summaries.append(daily_summary)
-                    number_found += 1
-
-                day_on_stage -= timedelta(days=1)
-        except Exception:
-            pass
+        results = self.retrieve_summaries(kind_of_action, google_civic_election_id)
+        return results['daily_summaries']
 
-        return daily_summaries
+    def retrieve_summaries(self, kind_of_action='', google_civic_election_id=0):
+        return api_call_counter.retrieve_api_call_summaries(API_VOTE_SMART, kind_of_action, google_civic_election_id)
 
 
 class VoteSmartCandidateManager(models.Model):
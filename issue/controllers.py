@@ -13,7 +13,7 @@ from issue.models import OrganizationLinkToIssueList
 from position.models import ANY_STANCE, PositionListManager
 from voter.models import fetch_voter_we_vote_id_from_voter_device_link
 import wevote_functions.admin
-from wevote_functions.functions import positive_value_exists, process_request_from_master
+from wevote_functions.functions import positive_value_exists, process_pages_from_master
 
 logger = wevote_functions.admin.get_logger(__name__)
 
@@ -23,20 +23,19 @@ ORGANIZATION_LINK_TO_ISSUE_SYNC_URL = \
     get_environment_variable("ORGANIZATION_LINK_TO_ISSUE_SYNC_URL")  # organizationLinkToIssueSyncOut
 
 
-def issues_import_from_master_server(request):
+def issues_import_from_master_server(request, start_over=False):
     """
     Get the json data, and either create new entries or update existing
     :return:
     """
-    import_results, structured_json = process_request_from_master(
+    import_results = process_pages_from_master(
         request, "Loading Issues from We Vote Master servers",
         ISSUES_SYNC_URL, {
             "key": WE_VOTE_API_KEY,
-        }
-    )
-
-    if import_results['success']:
-        import_results = issues_import_from_structured_json(structured_json)
+        },
+        import_function=issues_import_from_structured_json,
+        sync_name='issues',
+        start_over=start_over)
 
     return import_results
 
@@ -653,20 +652,19 @@ def retrieve_issues_to_follow_for_api(voter_device_id, sort_formula):  # retriev
     return HttpResponse(json.dumps(json_data), content_type='application/json')
 
 
-def organization_link_to_issue_import_from_master_server(request):
+def organization_link_to_issue_import_from_master_server(request, start_over=False):
     """
     Get the json data, and either create new entries or update existing
     :return:
     """
-    import_results, structured_json = process_request_from_master(
+    import_results = process_pages_from_master(
         request, "Loading Organization's Links To Issues data from We Vote Master servers",
         ORGANIZATION_LINK_TO_ISSUE_SYNC_URL, {
             "key": WE_VOTE_API_KEY,
-        }
-    )
-
-    if import_results['success']:
-        import_results = organization_link_to_issue_import_from_structured_json(structured_json)
+        },
+        import_function=organization_link_to_issue_import_from_structured_json,
+        sync_name='organization_link_to_issue',
+        start_over=start_over)
 
     return import_results
 
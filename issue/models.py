@@ -273,6 +273,7 @@ class Issue(models.Model):
         verbose_name='we vote hosted medium image url', blank=True, null=True)
     we_vote_hosted_image_url_tiny = models.URLField(
         verbose_name='we vote hosted tiny image url', blank=True, null=True)
+    date_last_changed = models.DateTimeField(verbose_name='date last changed', null=True, auto_now=True)
 
     # We override the save function so we can auto-generate we_vote_id
     def save(self, *args, **kwargs):
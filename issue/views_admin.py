@@ -13,6 +13,7 @@ from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.contrib.messages import get_messages
 from django.shortcuts import render
+from django.views.decorators.gzip import gzip_page
 from election.models import ElectionManager
 from exception.models import handle_record_found_more_than_one_exception
 from image.controllers import cache_issue_image_master, cache_resized_image_locally, delete_cached_images_for_issue
@@ -21,7 +22,8 @@ from organization.models import OrganizationManager, OrganizationListManager
 from voter.models import voter_has_authority
 from voter_guide.models import VoterGuideListManager
 import wevote_functions.admin
-from wevote_functions.functions import convert_to_int, positive_value_exists, get_voter_device_id, STATE_CODE_MAP
+from wevote_functions.functions import convert_to_int, positive_value_exists, get_voter_device_id, STATE_CODE_MAP, \
+    sync_out_json_response
 from django.http import HttpResponse
 import json
 
@@ -34,6 +36,7 @@ logger = wevote_functions.admin.get_logger(__name__)
 
 
 # This page does not need to be protected.
+@gzip_page
 def issues_sync_out_view(request):  # issuesSyncOut
     issue_search = request.GET.get('issue_search', '')
 
@@ -60,14 +63,12 @@ def issues_sync_out_view(request):  # issuesSyncOut
 
                 issue_list = issue_list.filter(final_filters)
 
-        issue_list_dict = issue_list.values('we_vote_id', 'hide_issue',
-                                            'issue_name', 'issue_description', 'issue_image_url',
-                                            'issue_followers_count', 'linked_organization_count',
-                                            'we_vote_hosted_image_url_large', 'we_vote_hosted_image_url_medium',
-                                            'we_vote_hosted_image_url_tiny')
-        if issue_list_dict:
-            issue_list_json = list(issue_list_dict)
-            return HttpResponse(json.dumps(issue_list_json), content_type='application/json')
+        issue_field_list = ['we_vote_id', 'hide_issue', 'issue_name', 'issue_description', 'issue_image_url',
+                            'issue_followers_count', 'linked_organization_count', 'we_vote_hosted_image_url_large',
+                            'we_vote_hosted_image_url_medium', 'we_vote_hosted_image_url_tiny']
+        return sync_out_json_response(request, issue_list, issue_field_list,
+                                      {'success': False, 'status': 'ISSUES_LIST_MISSING'},
+                                      updated_since_field='date_last_changed')
     except Exception as e:
         pass
 
@@ -114,7 +115,8 @@ def issues_import_from_master_server_view(request):
     google_civic_election_id = convert_to_int(request.GET.get('google_civic_election_id', 0))
     state_code = request.GET.get('state_code', '')
 
-    results = issues_import_from_master_server(request)
+    start_over = positive_value_exists(request.GET.get('start_over', False))
+    results = issues_import_from_master_server(request, start_over=start_over)
 
     if not results['success']:
         messages.add_message(request, messages.ERROR, results['status'])
@@ -694,7 +696,8 @@ def organization_link_to_issue_import_from_master_server_view(request):
     google_civic_election_id = convert_to_int(request.GET.get('google_civic_election_id', 0))
     state_code = request.GET.get('state_code', '')
 
-    results = organization_link_to_issue_import_from_master_server(request)
+    start_over = positive_value_exists(request.GET.get('start_over', False))
+    results = organization_link_to_issue_import_from_master_server(request, start_over=start_over)
 
     if not results['success']:
         messages.add_message(request, messages.ERROR, results['status'])
@@ -711,6 +714,7 @@ def organization_link_to_issue_import_from_master_server_view(request):
 
 
 # This page does not need to be protected.
+@gzip_page
 def organization_link_to_issue_sync_out_view(request):  # organizationLinkToIssueSyncOut
     issue_search = request.GET.get('issue_search', '')
 
@@ -737,11 +741,11 @@ def organization_link_to_issue_sync_out_view(request):  # organizationLinkToIssu
         #
         #         issue_list = issue_list.filter(final_filters)
 
-        issue_list_dict = issue_list.values('issue_we_vote_id', 'organization_we_vote_id',
-                                            'link_active', 'reason_for_link', 'link_blocked', 'reason_link_is_blocked')
-        if issue_list_dict:
-            issue_list_json = list(issue_list_dict)
-            return HttpResponse(json.dumps(issue_list_json), content_type='application/json')
+        organization_link_to_issue_field_list = ['issue_we_vote_id', 'organization_we_vote_id', 'link_active',
+                                                 'reason_for_link', 'link_blocked', 'reason_link_is_blocked']
+        return sync_out_json_response(request, issue_list, organization_link_to_issue_field_list,
+                                      {'success': False, 'status': 'ORGANIZATION_LINK_TO_ISSUE_LIST_MISSING'},
+                                      updated_since_field='date_last_changed')
     except Exception as e:
         pass
 
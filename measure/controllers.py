@@ -11,7 +11,7 @@ import json
 from position.controllers import update_all_position_details_from_contest_measure
 import wevote_functions.admin
 from wevote_functions.functions import convert_state_code_to_state_text, convert_to_int, positive_value_exists, \
-    process_request_from_master
+    process_pages_from_master
 
 logger = wevote_functions.admin.get_logger(__name__)
 
@@ -63,15 +63,31 @@ def figure_out_measure_conflict_values(contest_measure1, contest_measure2):
     return contest_measure_merge_conflict_values
 
 
-def filter_measures_structured_json_for_local_duplicates(structured_json):
+def filter_measures_structured_json_for_local_duplicates(structured_json, per_record_lookup=False,
+                                                         duplicate_index=None):
     """
     With this function, we remove measures that seem to be duplicates, but have different we_vote_id's.
     :param structured_json:
+    :param per_record_lookup: Query the database once per measure, instead of loading the existing measures
+     for these elections into memory up front
+    :param duplicate_index: Built once for the whole run by the caller. Without it, we build one for these entries.
     :return:
     """
     duplicates_removed = 0
     filtered_structured_json = []
     measure_list_manager = ContestMeasureList()
+    if duplicate_index is None and not per_record_lookup:
+        google_civic_election_id_list = list(set(
+            convert_to_int(one_measure['google_civic_election_id']) for one_measure in structured_json
+            if positive_value_exists(one_measure.get('google_civic_election_id', ''))))
+        index_results = measure_list_manager.retrieve_possible_duplicate_measures_index(
+            google_civic_election_id_list)
+        if index_results['success']:
+            duplicate_index = index_results['duplicate_index']
+        else:
+            # Fall back to looking for duplicates one at a time
+            per_record_lookup = True
+
     for one_measure in structured_json:
         measure_title = one_measure['measure_title'] if 'measure_title' in one_measure else ''
         we_vote_id = one_measure['we_vote_id'] if 'we_vote_id' in one_measure else ''
@@ -84,11 +100,31 @@ def filter_measures_structured_json_for_local_duplicates(structured_json):
         # Check to see if there is an entry that matches in all critical ways, minus the we_vote_id
         we_vote_id_from_master = we_vote_id
 
-        results = measure_list_manager.retrieve_possible_duplicate_measures(
-            measure_title, google_civic_election_id, measure_url, maplight_id, vote_smart_id,
-            we_vote_id_from_master)
-
-        if results['measure_list_found']:
+        if per_record_lookup:
+            results = measure_list_manager.retrieve_possible_duplicate_measures(
+                measure_title, google_civic_election_id, measure_url, maplight_id, vote_smart_id,
+                we_vote_id_from_master)
+            duplicate_found = results['measure_list_found']
+        elif not positive_value_exists(google_civic_election_id):
+            duplicate_found = False
+        else:
+            google_civic_election_id = convert_to_int(google_civic_election_id)
+            # We want to find measures with *any* of these values
+            key_list = []
+            if positive_value_exists(measure_title):
+                key_list.append(('measure_title', google_civic_election_id, measure_title))
+            if positive_value_exists(measure_url):
+                key_list.append(('measure_url', google_civic_election_id, measure_url))
+            if positive_value_exists(maplight_id):
+                key_list.append(('maplight_id', google_civic_election_id, str(maplight_id)))
+            if positive_value_exists(vote_smart_id):
+                key_list.append(('vote_smart_id', google_civic_election_id, str(vote_smart_id)))
+            if not len(key_list):
+                # With none of these values, any other measure in this election matches
+                key_list.append(('google_civic_election_id', google_civic_election_id))
+            duplicate_found = duplicate_index.has_duplicate(key_list, we_vote_id_from_master)
+
+        if duplicate_found:
             # There seems to be a duplicate already in this database using a different we_vote_id
             duplicates_removed += 1
         else:
@@ -266,28 +302,33 @@ def measure_retrieve_for_api(measure_id, measure_we_vote_id):  # measureRetrieve
     return HttpResponse(json.dumps(json_data), content_type='application/json')
 
 
-def measures_import_from_master_server(request, google_civic_election_id, state_code=''):
+def measures_import_from_master_server(request, google_civic_election_id, state_code='', start_over=False):
     """
     Get the json data, and either create new entries or update existing
     :return:
     """
-    import_results, structured_json = process_request_from_master(
+    duplicate_index = None
+    if positive_value_exists(google_civic_election_id):
+        # One duplicate index for the whole run, instead of one for every page
+        index_results = ContestMeasureList().retrieve_possible_duplicate_measures_index(
+            [convert_to_int(google_civic_election_id)])
+        if index_results['success']:
+            duplicate_index = index_results['duplicate_index']
+
+    import_results = process_pages_from_master(
         request, "Loading Measures from We Vote Master servers",
         MEASURES_SYNC_URL, {
             "key": WE_VOTE_API_KEY,
             "google_civic_election_id": str(google_civic_election_id),
             "state_code": state_code,
-        }
-    )
-
-    if import_results['success']:
-        results = filter_measures_structured_json_for_local_duplicates(structured_json)
-        filtered_structured_json = results['structured_json']
-        duplicates_removed = results['duplicates_removed']
-
-        import_results = measures_import_from_structured_json(filtered_structured_json)
-        import_results['duplicates_removed'] = duplicates_removed
-    else:
+        },
+        import_function=measures_import_from_structured_json,
+        filter_function=filter_measures_structured_json_for_local_duplicates,
+        sync_name='measures',
+        start_over=start_over,
+        duplicate_index=duplicate_index)
+
+    if not import_results['success']:
         if "MISSING" in import_results['status']:
             import_results['status'] += ", This election may not have any measures."
 
@@ -8,7 +8,7 @@ from exception.models import handle_exception, handle_record_found_more_than_one
 from wevote_settings.models import fetch_next_we_vote_id_contest_measure_integer, \
     fetch_next_we_vote_id_measure_campaign_integer, fetch_site_unique_id_prefix
 import wevote_functions.admin
-from wevote_functions.functions import convert_to_int, extract_state_from_ocd_division_id, \
+from wevote_functions.functions import convert_to_int, extract_state_from_ocd_division_id, LocalDuplicateIndex, \
     MEASURE_TITLE_COMMON_PHRASES_TO_REMOVE_FROM_SEARCHES, MEASURE_TITLE_EQUIVALENT_MEASURE_TITLE_PAIRS, \
     positive_value_exists, \
     STATE_CODE_MAP
@@ -143,6 +143,7 @@ class ContestMeasure(models.Model):
     ballotpedia_no_vote_description = models.TextField(
         verbose_name="what a no vote means", null=True, blank=True, default=None)
     ctcl_uuid = models.CharField(verbose_name="ctcl uuid", max_length=80, null=True, blank=True)
+    date_last_changed = models.DateTimeField(verbose_name='date last changed', null=True, auto_now=True)
 
     def get_measure_state(self):
         if positive_value_exists(self.state_code):
@@ -703,7 +704,7 @@ class ContestMeasureManager(models.Model):
         return results
 
     def update_measure_row_entry(self, measure_title, measure_subtitle, measure_text, state_code, ctcl_uuid,
-                                 google_civic_election_id, measure_we_vote_id, defaults):
+                                 google_civic_election_id, measure_we_vote_id, defaults, existing_measure=None):
         """
             Update ContestMeasure table entry with matching we_vote_id 
         :param measure_title: 
@@ -714,6 +715,7 @@ class ContestMeasureManager(models.Model):
         :param google_civic_election_id: 
         :param measure_we_vote_id:  
         :param defaults:
+        :param existing_measure: The entry with this we_vote_id, when the caller already retrieved it
         :return:
         """
         success = False
@@ -722,7 +724,10 @@ class ContestMeasureManager(models.Model):
         existing_measure_entry = ''
 
         try:
-            existing_measure_entry = ContestMeasure.objects.get(we_vote_id__iexact=measure_we_vote_id)
+            if existing_measure is not None:
+                existing_measure_entry = existing_measure
+            else:
+                existing_measure_entry = ContestMeasure.objects.get(we_vote_id__iexact=measure_we_vote_id)
             if existing_measure_entry:
                 # found the existing entry, update the values
                 existing_measure_entry.measure_title = measure_title
@@ -1243,6 +1248,50 @@ class ContestMeasureList(models.Model):
         }
         return results
 
+    def retrieve_possible_duplicate_measures_index(self, google_civic_election_id_list):
+        """
+        Load the identifying values of every measure in these elections in one query, so that
+        filter_measures_structured_json_for_local_duplicates can check each incoming measure in memory.
+        Keys: ('google_civic_election_id', google_civic_election_id), plus
+        ('measure_title', google_civic_election_id, measure_title) and the same for measure_url, maplight_id and
+        vote_smart_id
+        :param google_civic_election_id_list:
+        :return:
+        """
+        duplicate_index = LocalDuplicateIndex()
+        try:
+            measure_queryset = ContestMeasure.objects.filter(
+                google_civic_election_id__in=google_civic_election_id_list)
+            measure_queryset = measure_queryset.values_list(
+                'we_vote_id', 'google_civic_election_id', 'measure_title', 'measure_url', 'maplight_id',
+                'vote_smart_id')
+            for we_vote_id, google_civic_election_id, measure_title, measure_url, maplight_id, vote_smart_id \
+                    in measure_queryset.iterator():
+                google_civic_election_id = convert_to_int(google_civic_election_id)
+                duplicate_index.add(we_vote_id, ('google_civic_election_id', google_civic_election_id))
+                if positive_value_exists(measure_title):
+                    duplicate_index.add(we_vote_id, ('measure_title', google_civic_election_id, measure_title))
+                if positive_value_exists(measure_url):
+                    duplicate_index.add(we_vote_id, ('measure_url', google_civic_election_id, measure_url))
+                if positive_value_exists(maplight_id):
+                    duplicate_index.add(we_vote_id, ('maplight_id', google_civic_election_id, str(maplight_id)))
+                if positive_value_exists(vote_smart_id):
+                    duplicate_index.add(we_vote_id, ('vote_smart_id', google_civic_election_id, str(vote_smart_id)))
+            status = 'DUPLICATE_MEASURES_INDEX_RETRIEVED '
+            success = True
+        except Exception as e:
+            handle_exception(e, logger=logger)
+            status = 'FAILED retrieve_possible_duplicate_measures_index ' \
+                     '{error} [type: {error_type}]'.format(error=e, error_type=type(e))
+            success = False
+
+        results = {
+            'success':          success,
+            'status':           status,
+            'duplicate_index':  duplicate_index,
+        }
+        return results
+
     def update_or_create_contest_measures_are_not_duplicates(self, contest_measure1_we_vote_id,
                                                              contest_measure2_we_vote_id):
         """
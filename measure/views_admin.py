@@ -18,6 +18,7 @@ from django.contrib.auth.decorators import login_required
 from django.contrib.messages import get_messages
 from django.db.models import Q
 from django.shortcuts import render
+from django.views.decorators.gzip import gzip_page
 from election.models import Election, ElectionManager
 from exception.models import handle_record_found_more_than_one_exception,\
     handle_record_not_found_exception, handle_record_not_saved_exception
@@ -25,7 +26,7 @@ from position.controllers import move_positions_to_another_measure
 from position.models import OPPOSE, PositionListManager, SUPPORT
 from voter.models import voter_has_authority
 import wevote_functions.admin
-from wevote_functions.functions import convert_to_int, positive_value_exists, STATE_CODE_MAP
+from wevote_functions.functions import convert_to_int, positive_value_exists, STATE_CODE_MAP, sync_out_json_response
 from django.http import HttpResponse
 import json
 
@@ -160,6 +161,7 @@ def find_and_merge_duplicate_measures_view(request):
 # This page does not need to be protected.
 # class MeasuresSyncOutView(APIView):
 #     def get(self, request, format=None):
+@gzip_page
 def measures_sync_out_view(request):  # measuresSyncOut
     google_civic_election_id = convert_to_int(request.GET.get('google_civic_election_id', 0))
     state_code = request.GET.get('state_code', '')
@@ -170,20 +172,16 @@ def measures_sync_out_view(request):  # measuresSyncOut
             contest_measure_query = contest_measure_query.filter(google_civic_election_id=google_civic_election_id)
         if positive_value_exists(state_code):
             contest_measure_query = contest_measure_query.filter(state_code__iexact=state_code)
-        contest_measure_list_dict = contest_measure_query.values('we_vote_id', 'maplight_id', 'vote_smart_id',
-                                                                 'measure_title', 'measure_subtitle',
-                                                                 'measure_text', 'measure_url',
-                                                                 'google_civic_election_id', 'ocd_division_id',
-                                                                 'primary_party', 'district_name',
-                                                                 'district_scope', 'district_id', 'state_code',
-                                                                 'wikipedia_page_id', 'wikipedia_page_title',
-                                                                 'wikipedia_photo_url', 'ballotpedia_page_title',
-                                                                 'ballotpedia_photo_url', 'ballotpedia_measure_url',
-                                                                 'ballotpedia_no_vote_description',
-                                                                 'ballotpedia_yes_vote_description')
-        if contest_measure_list_dict:
-            contest_measure_list_json = list(contest_measure_list_dict)
-            return HttpResponse(json.dumps(contest_measure_list_json), content_type='application/json')
+        contest_measure_field_list = ['we_vote_id', 'maplight_id', 'vote_smart_id', 'measure_title',
+                                      'measure_subtitle', 'measure_text', 'measure_url', 'google_civic_election_id',
+                                      'ocd_division_id', 'primary_party', 'district_name', 'district_scope',
+                                      'district_id', 'state_code', 'wikipedia_page_id', 'wikipedia_page_title',
+                                      'wikipedia_photo_url', 'ballotpedia_page_title', 'ballotpedia_photo_url',
+                                      'ballotpedia_measure_url', 'ballotpedia_no_vote_description',
+                                      'ballotpedia_yes_vote_description']
+        return sync_out_json_response(request, contest_measure_query, contest_measure_field_list,
+                                      {'success': False, 'status': 'CONTEST_MEASURE_LIST_MISSING'},
+                                      updated_since_field='date_last_changed')
     except Exception as e:
         pass
 
@@ -213,7 +211,8 @@ def measures_import_from_master_server_view(request):  # GET '/m/import/?google_
     if not positive_value_exists(google_civic_election_id):
         logger.error("measures_import_from_master_server_view did not receive a google_civic_election_id")
 
-    results = measures_import_from_master_server(request, google_civic_election_id, state_code)
+    start_over = positive_value_exists(request.GET.get('start_over', False))
+    results = measures_import_from_master_server(request, google_civic_election_id, state_code, start_over=start_over)
 
     if not results['success']:
         messages.add_message(request, messages.ERROR, results['status'])
@@ -14,7 +14,7 @@ import json
 from position.controllers import move_positions_to_another_office, update_all_position_details_from_contest_office
 import requests
 import wevote_functions.admin
-from wevote_functions.functions import positive_value_exists, process_request_from_master
+from wevote_functions.functions import convert_to_int, positive_value_exists, process_pages_from_master
 
 logger = wevote_functions.admin.get_logger(__name__)
 
@@ -68,28 +68,32 @@ def offices_import_from_sample_file():
     return offices_import_from_structured_json(structured_json)
 
 
-def offices_import_from_master_server(request, google_civic_election_id='', state_code=''):
+def offices_import_from_master_server(request, google_civic_election_id='', state_code='', start_over=False):
     """
     Get the json data, and either create new entries or update existing
     :return:
     """
+    duplicate_index = None
+    if positive_value_exists(google_civic_election_id):
+        # One duplicate index for the whole run, instead of one for every page
+        index_results = ContestOfficeListManager().retrieve_possible_duplicate_offices_index(
+            [convert_to_int(google_civic_election_id)])
+        if index_results['success']:
+            duplicate_index = index_results['duplicate_index']
+
     # Request json file from We Vote servers
-    import_results, structured_json = process_request_from_master(
+    import_results = process_pages_from_master(
         request, "Loading Contest Offices from We Vote Master servers",
         OFFICES_SYNC_URL, {
             "key": WE_VOTE_API_KEY,
             "google_civic_election_id": str(google_civic_election_id),
             "state_code": state_code,
-        }
-    )
-
-    if import_results['success']:
-        results = filter_offices_structured_json_for_local_duplicates(structured_json)
-        filtered_structured_json = results['structured_json']
-        duplicates_removed = results['duplicates_removed']
-
-        import_results = offices_import_from_structured_json(filtered_structured_json)
-        import_results['duplicates_removed'] = duplicates_removed
+        },
+        import_function=offices_import_from_structured_json,
+        filter_function=filter_offices_structured_json_for_local_duplicates,
+        sync_name='offices',
+        start_over=start_over,
+        duplicate_index=duplicate_index)
 
     return import_results
 
@@ -450,15 +454,29 @@ def merge_these_two_offices(contest_office1_we_vote_id, contest_office2_we_vote_
     return results
 
 
-def filter_offices_structured_json_for_local_duplicates(structured_json):
+def filter_offices_structured_json_for_local_duplicates(structured_json, per_record_lookup=False, duplicate_index=None):
     """
     With this function, we remove offices that seem to be duplicates, but have different we_vote_id's
     :param structured_json:
+    :param per_record_lookup: Query the database once per office, instead of loading the existing offices
+     for these elections into memory up front
+    :param duplicate_index: Built once for the whole run by the caller. Without it, we build one for these entries.
     :return:
     """
     office_manager_list = ContestOfficeListManager()
     duplicates_removed = 0
     filtered_structured_json = []
+    if duplicate_index is None and not per_record_lookup:
+        google_civic_election_id_list = list(set(
+            convert_to_int(one_office['google_civic_election_id']) for one_office in structured_json
+            if positive_value_exists(one_office.get('google_civic_election_id', 0))))
+        index_results = office_manager_list.retrieve_possible_duplicate_offices_index(google_civic_election_id_list)
+        if index_results['success']:
+            duplicate_index = index_results['duplicate_index']
+        else:
+            # Fall back to looking for duplicates one at a time
+            per_record_lookup = True
+
     for one_office in structured_json:
         google_civic_election_id = one_office['google_civic_election_id'] \
             if 'google_civic_election_id' in one_office else 0
@@ -486,10 +504,18 @@ def filter_offices_structured_json_for_local_duplicates(structured_json):
         # Check to see if there is an entry that matches in all critical ways, minus the we_vote_id
         we_vote_id_from_master = we_vote_id
 
-        results = office_manager_list.retrieve_possible_duplicate_offices(google_civic_election_id, state_code,
-                                                                          office_name, we_vote_id_from_master)
+        if per_record_lookup:
+            results = office_manager_list.retrieve_possible_duplicate_offices(google_civic_election_id, state_code,
+                                                                              office_name, we_vote_id_from_master)
+            duplicate_found = results['office_list_found']
+        elif positive_value_exists(state_code):
+            duplicate_found = duplicate_index.has_duplicate(
+                [(convert_to_int(google_civic_election_id), state_code, office_name)], we_vote_id_from_master)
+        else:
+            duplicate_found = duplicate_index.has_duplicate(
+                [(convert_to_int(google_civic_election_id), office_name)], we_vote_id_from_master)
 
-        if results['office_list_found']:
+        if duplicate_found:
             # There seems to be a duplicate already in this database using a different we_vote_id
             duplicates_removed += 1
         else:
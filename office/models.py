@@ -8,8 +8,8 @@ from exception.models import handle_exception, handle_record_found_more_than_one
 from wevote_settings.models import fetch_next_we_vote_id_contest_office_integer, fetch_site_unique_id_prefix, \
     fetch_next_we_vote_id_elected_office_integer
 import wevote_functions.admin
-from wevote_functions.functions import convert_to_int, extract_state_from_ocd_division_id, positive_value_exists, \
-    OFFICE_NAME_COMMON_PHRASES_TO_REMOVE_FROM_SEARCHES, OFFICE_NAME_EQUIVALENT_PHRASE_PAIRS, \
+from wevote_functions.functions import convert_to_int, extract_state_from_ocd_division_id, LocalDuplicateIndex, \
+    positive_value_exists, OFFICE_NAME_COMMON_PHRASES_TO_REMOVE_FROM_SEARCHES, OFFICE_NAME_EQUIVALENT_PHRASE_PAIRS, \
     OFFICE_NAME_EQUIVALENT_DISTRICT_PHRASE_PAIRS, STATE_CODE_MAP
 
 
@@ -151,6 +151,7 @@ class ContestOffice(models.Model):
     ctcl_uuid = models.CharField(verbose_name="ctcl uuid", max_length=80, null=True, blank=True)
     elected_office_name = models.CharField(verbose_name="name of the elected office", max_length=255, null=True,
                                            blank=True, default=None)
+    date_last_changed = models.DateTimeField(verbose_name='date last changed', null=True, auto_now=True)
 
     def get_office_state(self):
         if positive_value_exists(self.state_code):
@@ -798,7 +799,7 @@ class ContestOfficeManager(models.Model):
     def update_contest_office_row_entry(self, contest_office_name, contest_office_votes_allowed, ctcl_uuid,
                                         contest_office_number_elected, contest_office_we_vote_id,
                                         google_civic_election_id, state_code,
-                                        defaults):
+                                        defaults, existing_contest_office=None):
         """
         Update ContestOffice table entry with matching we_vote_id 
         :param contest_office_name: 
@@ -809,6 +810,7 @@ class ContestOfficeManager(models.Model):
         :param google_civic_election_id:
         :param state_code:
         :param defaults:
+        :param existing_contest_office: The entry with contest_office_we_vote_id, when the caller already retrieved it
         :return:
         """
 
@@ -821,7 +823,10 @@ class ContestOfficeManager(models.Model):
         contest_office_found = False
 
         try:
-            if positive_value_exists(contest_office_we_vote_id):
+            if existing_contest_office is not None:
+                existing_office_entry = existing_contest_office
+                contest_office_found = True
+            elif positive_value_exists(contest_office_we_vote_id):
                 existing_office_entry = ContestOffice.objects.get(we_vote_id__iexact=contest_office_we_vote_id)
                 contest_office_found = True
             elif positive_value_exists(ctcl_uuid):
@@ -1098,6 +1103,38 @@ class ContestOfficeListManager(models.Model):
         }
         return results
 
+    def retrieve_possible_duplicate_offices_index(self, google_civic_election_id_list):
+        """
+        Load the identifying values of every office in these elections in one query, so that
+        filter_offices_structured_json_for_local_duplicates can check each incoming office in memory.
+        Keys: (google_civic_election_id, office_name) and (google_civic_election_id, state_code, office_name)
+        :param google_civic_election_id_list:
+        :return:
+        """
+        duplicate_index = LocalDuplicateIndex()
+        try:
+            office_queryset = ContestOffice.objects.filter(google_civic_election_id__in=google_civic_election_id_list)
+            office_queryset = office_queryset.values_list('we_vote_id', 'google_civic_election_id', 'state_code',
+                                                          'office_name')
+            for we_vote_id, google_civic_election_id, state_code, office_name in office_queryset.iterator():
+                google_civic_election_id = convert_to_int(google_civic_election_id)
+                duplicate_index.add(we_vote_id, (google_civic_election_id, office_name))
+                duplicate_index.add(we_vote_id, (google_civic_election_id, state_code, office_name))
+            status = 'DUPLICATE_OFFICES_INDEX_RETRIEVED '
+            success = True
+        except Exception as e:
+            handle_exception(e, logger=logger)
+            status = 'FAILED retrieve_possible_duplicate_offices_index ' \
+                     '{error} [type: {error_type}]'.format(error=e, error_type=type(e))
+            success = False
+
+        results = {
+            'success':          success,
+            'status':           status,
+            'duplicate_index':  duplicate_index,
+        }
+        return results
+
     def retrieve_contest_offices_from_non_unique_identifiers(
             self, contest_office_name, google_civic_election_id, incoming_state_code, district_id='', district_name='',
             ballotpedia_race_id=0, ignore_office_we_vote_id_list=[]):
@@ -18,6 +18,7 @@ from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.contrib.messages import get_messages
 from django.shortcuts import render
+from django.views.decorators.gzip import gzip_page
 from django.db.models import Q
 from election.models import Election, ElectionManager
 from exception.models import handle_record_found_more_than_one_exception,\
@@ -26,7 +27,7 @@ from position.controllers import move_positions_to_another_office
 from position.models import OPPOSE, PositionListManager, SUPPORT
 from voter.models import voter_has_authority
 import wevote_functions.admin
-from wevote_functions.functions import convert_to_int, positive_value_exists, STATE_CODE_MAP
+from wevote_functions.functions import convert_to_int, positive_value_exists, STATE_CODE_MAP, sync_out_json_response
 from django.http import HttpResponse
 import json
 
@@ -80,6 +81,7 @@ def compare_two_offices_for_merge_view(request):
 # NOTE: @login_required() throws an error. Needs to be figured out if we ever want to secure this page.
 # class OfficesSyncOutView(APIView):
 #     def get(self, request, format=None):
+@gzip_page
 def offices_sync_out_view(request):  # officesSyncOut
     google_civic_election_id = convert_to_int(request.GET.get('google_civic_election_id', 0))
     state_code = request.GET.get('state_code', '')
@@ -93,23 +95,19 @@ def offices_sync_out_view(request):  # officesSyncOut
         # serializer = ContestOfficeSerializer(contest_office_list, many=True)
         # return Response(serializer.data)
         # get the data using values_list
-        contest_office_list_dict = contest_office_list.values('we_vote_id', 'office_name', 'google_civic_election_id',
-                                                              'ocd_division_id', 'maplight_id',
-                                                              'ballotpedia_id', 'ballotpedia_office_id',
-                                                              'ballotpedia_office_name', 'ballotpedia_office_url',
-                                                              'ballotpedia_race_id', 'ballotpedia_race_office_level',
-                                                              'google_ballot_placement',
-                                                              'google_civic_office_name', 'google_civic_office_name2',
-                                                              'google_civic_office_name3', 'google_civic_office_name4',
-                                                              'google_civic_office_name5',
-                                                              'wikipedia_id', 'number_voting_for', 'number_elected',
-                                                              'state_code', 'primary_party', 'district_name',
-                                                              'district_scope', 'district_id', 'contest_level0',
-                                                              'contest_level1', 'contest_level2',
-                                                              'electorate_specifications', 'special', 'state_code')
-        if contest_office_list_dict:
-            contest_office_list_json = list(contest_office_list_dict)
-            return HttpResponse(json.dumps(contest_office_list_json), content_type='application/json')
+        contest_office_field_list = ['we_vote_id', 'office_name', 'google_civic_election_id', 'ocd_division_id',
+                                     'maplight_id', 'ballotpedia_id', 'ballotpedia_office_id',
+                                     'ballotpedia_office_name', 'ballotpedia_office_url', 'ballotpedia_race_id',
+                                     'ballotpedia_race_office_level', 'google_ballot_placement',
+                                     'google_civic_office_name', 'google_civic_office_name2',
+                                     'google_civic_office_name3', 'google_civic_office_name4',
+                                     'google_civic_office_name5', 'wikipedia_id', 'number_voting_for',
+                                     'number_elected', 'state_code', 'primary_party', 'district_name',
+                                     'district_scope', 'district_id', 'contest_level0', 'contest_level1',
+                                     'contest_level2', 'electorate_specifications', 'special', 'state_code']
+        return sync_out_json_response(request, contest_office_list, contest_office_field_list,
+                                      {'success': False, 'status': 'CONTEST_OFFICE_MISSING'},
+                                      updated_since_field='date_last_changed')
     except ContestOffice.DoesNotExist:
         pass
 
@@ -135,7 +133,8 @@ def offices_import_from_master_server_view(request):
     google_civic_election_id = convert_to_int(request.GET.get('google_civic_election_id', 0))
     state_code = request.GET.get('state_code', '')
 
-    results = offices_import_from_master_server(request, google_civic_election_id, state_code)
+    start_over = positive_value_exists(request.GET.get('start_over', False))
+    results = offices_import_from_master_server(request, google_civic_election_id, state_code, start_over=start_over)
 
     if not results['success']:
         messages.add_message(request, messages.ERROR, results['status'])
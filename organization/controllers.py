@@ -25,7 +25,7 @@ from voter.models import fetch_voter_id_from_voter_device_link, VoterManager, Vo
 from voter_guide.models import VoterGuide, VoterGuideManager, VoterGuideListManager
 import wevote_functions.admin
 from wevote_functions.functions import convert_to_int, extract_twitter_handle_from_text_string, positive_value_exists, \
-    process_request_from_master
+    process_pages_from_master
 import tweepy
 import re
 
@@ -700,44 +700,55 @@ def organizations_import_from_sample_file():  # TODO FINISH BUILDING/TESTING THI
     return organizations_import_from_structured_json(structured_json)
 
 
-def organizations_import_from_master_server(request, state_code=''):
+def organizations_import_from_master_server(request, state_code='', start_over=False):
     """
     Get the json data, and either create new entries or update existing
     :return:
     """
-    import_results, structured_json = process_request_from_master(
+    duplicate_index = None
+    # One duplicate index for the whole run, instead of one for every page
+    index_results = OrganizationListManager().retrieve_possible_duplicate_organizations_index()
+    if index_results['success']:
+        duplicate_index = index_results['duplicate_index']
+
+    import_results = process_pages_from_master(
         request, "Loading Organizations from We Vote Master servers",
         ORGANIZATIONS_SYNC_URL, {
             "key":               WE_VOTE_API_KEY,  # This comes from an environment variable
             "format":            'json',
             "state_served_code": state_code,
-        }
-    )
-
-    if import_results['success']:
-        results = filter_organizations_structured_json_for_local_duplicates(structured_json)
-        filtered_structured_json = results['structured_json']
-        duplicates_removed = results['duplicates_removed']
-
-        # filtered_structured_json = structured_json
-        # duplicates_removed = 0
-
-        import_results = organizations_import_from_structured_json(filtered_structured_json)
-        import_results['duplicates_removed'] = duplicates_removed
+        },
+        import_function=organizations_import_from_structured_json,
+        filter_function=filter_organizations_structured_json_for_local_duplicates,
+        sync_name='organizations',
+        start_over=start_over,
+        duplicate_index=duplicate_index)
 
     return import_results
 
 
-def filter_organizations_structured_json_for_local_duplicates(structured_json):
+def filter_organizations_structured_json_for_local_duplicates(structured_json, per_record_lookup=False,
+                                                              duplicate_index=None):
     """
     With this function, we remove candidates that seem to be duplicates, but have different we_vote_id's.
     We do not check to see if we have a matching office this routine -- that is done elsewhere.
     :param structured_json:
+    :param per_record_lookup: Query the database once per organization, instead of loading the existing
+     organizations into memory up front
+    :param duplicate_index: Built once for the whole run by the caller. Without it, we build one for these entries.
     :return:
     """
     duplicates_removed = 0
     filtered_structured_json = []
     organization_list_manager = OrganizationListManager()
+    if duplicate_index is None and not per_record_lookup:
+        index_results = organization_list_manager.retrieve_possible_duplicate_organizations_index()
+        if index_results['success']:
+            duplicate_index = index_results['duplicate_index']
+        else:
+            # Fall back to looking for duplicates one at a time
+            per_record_lookup = True
+
     for one_organization in structured_json:
         organization_name = one_organization['organization_name'] if 'organization_name' in one_organization else ''
         we_vote_id = one_organization['we_vote_id'] if 'we_vote_id' in one_organization else ''
@@ -748,10 +759,25 @@ def filter_organizations_structured_json_for_local_duplicates(structured_json):
         # Check to see if there is an entry that matches in all critical ways, minus the we_vote_id
         we_vote_id_from_master = we_vote_id
 
-        results = organization_list_manager.retrieve_possible_duplicate_organizations(
-            organization_name, organization_twitter_handle, vote_smart_id, we_vote_id_from_master)
-
-        if results['organization_list_found']:
+        if per_record_lookup:
+            results = organization_list_manager.retrieve_possible_duplicate_organizations(
+                organization_name, organization_twitter_handle, vote_smart_id, we_vote_id_from_master)
+            duplicate_found = results['organization_list_found']
+        else:
+            # We want to find organizations with *any* of these values
+            key_list = []
+            if positive_value_exists(organization_name):
+                key_list.append(('organization_name', organization_name))
+            if positive_value_exists(organization_twitter_handle):
+                key_list.append(('organization_twitter_handle', organization_twitter_handle))
+            if positive_value_exists(vote_smart_id):
+                key_list.append(('vote_smart_id', convert_to_int(vote_smart_id)))
+            if not len(key_list):
+                # With none of these values, any other organization matches
+                key_list.append(('all',))
+            duplicate_found = duplicate_index.has_duplicate(key_list, we_vote_id_from_master)
+
+        if duplicate_found:
             # There seems to be a duplicate already in this database using a different we_vote_id
             duplicates_removed += 1
         else:
@@ -13,7 +13,8 @@ from import_export_facebook.models import FacebookManager
 from twitter.functions import retrieve_twitter_user_info
 from twitter.models import TwitterLinkToOrganization, TwitterLinkToVoter, TwitterUserManager
 from voter.models import VoterManager
-from wevote_functions.functions import convert_to_int, extract_twitter_handle_from_text_string, positive_value_exists
+from wevote_functions.functions import convert_to_int, extract_twitter_handle_from_text_string, LocalDuplicateIndex, \
+    positive_value_exists
 from wevote_settings.models import fetch_next_we_vote_id_org_integer, fetch_site_unique_id_prefix
 
 
@@ -1975,6 +1976,43 @@ class OrganizationListManager(models.Manager):
         }
         return results
 
+    def retrieve_possible_duplicate_organizations_index(self):
+        """
+        Load the identifying values of every organization in one query, so that
+        filter_organizations_structured_json_for_local_duplicates can check each incoming organization in memory.
+        Keys: ('organization_name', organization_name), ('organization_twitter_handle', organization_twitter_handle),
+        ('vote_smart_id', vote_smart_id), and ('all',) for every organization
+        :return:
+        """
+        duplicate_index = LocalDuplicateIndex()
+        try:
+            organization_queryset = Organization.objects.values_list(
+                'we_vote_id', 'organization_name', 'organization_twitter_handle', 'vote_smart_id')
+            for we_vote_id, organization_name, organization_twitter_handle, vote_smart_id \
+                    in organization_queryset.iterator():
+                duplicate_index.add(we_vote_id, ('all',))
+                if positive_value_exists(organization_name):
+                    duplicate_index.add(we_vote_id, ('organization_name', organization_name))
+                if positive_value_exists(organization_twitter_handle):
+                    duplicate_index.add(we_vote_id, ('organization_twitter_handle', organization_twitter_handle))
+                if positive_value_exists(vote_smart_id):
+                    duplicate_index.add(we_vote_id, ('vote_smart_id', convert_to_int(vote_smart_id)))
+            status = 'DUPLICATE_ORGANIZATIONS_INDEX_RETRIEVED '
+            success = True
+        except Exception as e:
+            handle_exception(e, logger=logger,
+                             exception_message="exception thrown in retrieve_possible_duplicate_organizations_index")
+            status = 'FAILED retrieve_possible_duplicate_organizations_index ' \
+                     '{error} [type: {error_type}]'.format(error=e, error_type=type(e))
+            success = False
+
+        results = {
+            'success':          success,
+            'status':           status,
+            'duplicate_index':  duplicate_index,
+        }
+        return results
+
     def retrieve_organizations_by_organization_we_vote_id_list(self, list_of_organization_we_vote_ids):
         organization_list = []
         organization_list_found = False
@@ -14,6 +14,7 @@ from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.contrib.messages import get_messages
 from django.shortcuts import render
+from django.views.decorators.gzip import gzip_page
 from exception.models import handle_record_found_more_than_one_exception,\
     handle_record_not_deleted_exception, handle_record_not_found_exception
 from election.models import Election, ElectionManager
@@ -32,7 +33,7 @@ from voter.models import retrieve_voter_authority, voter_has_authority, VoterMan
 from voter_guide.models import VoterGuideManager
 import wevote_functions.admin
 from wevote_functions.functions import convert_to_int, extract_twitter_handle_from_text_string, positive_value_exists, \
-    STATE_CODE_MAP
+    STATE_CODE_MAP, sync_out_json_response
 from django.http import HttpResponse
 import json
 
@@ -103,6 +104,7 @@ def organization_retrieve_tweets_view(request, organization_we_vote_id):
 
 
 # This page does not need to be protected.
+@gzip_page
 def organizations_sync_out_view(request):  # organizationsSyncOut
     state_served_code = request.GET.get('state_served_code', '')
 
@@ -110,30 +112,23 @@ def organizations_sync_out_view(request):  # organizationsSyncOut
         organization_list = Organization.objects.using('readonly').all()
         if positive_value_exists(state_served_code):
             organization_list = organization_list.filter(state_served_code__iexact=state_served_code)
-        organization_list_dict = organization_list.values(
-            'we_vote_id', 'organization_name', 'organization_type',
-            'organization_description', 'state_served_code',
-            'organization_website', 'organization_email',
-            'organization_image', 'organization_twitter_handle',
-            'twitter_user_id', 'twitter_followers_count',
-            'twitter_description', 'twitter_location', 'twitter_name',
-            'twitter_profile_image_url_https',
-            'twitter_profile_background_image_url_https',
-            'twitter_profile_banner_url_https', 'organization_facebook',
-            'vote_smart_id', 'organization_contact_name',
-            'organization_address', 'organization_city',
-            'organization_state', 'organization_zip',
-            'organization_phone1', 'organization_phone2',
-            'organization_fax', 'wikipedia_page_title',
-            'wikipedia_page_id', 'wikipedia_photo_url',
-            'wikipedia_thumbnail_url', 'wikipedia_thumbnail_width',
-            'wikipedia_thumbnail_height', 'ballotpedia_page_title',
-            'ballotpedia_photo_url', 'we_vote_hosted_profile_image_url_large',
-            'we_vote_hosted_profile_image_url_medium', 'we_vote_hosted_profile_image_url_tiny'
-        )
-        if organization_list_dict:
-            organization_list_json = list(organization_list_dict)
-            return HttpResponse(json.dumps(organization_list_json), content_type='application/json')
+        organization_field_list = ['we_vote_id', 'organization_name', 'organization_type', 'organization_description',
+                                   'state_served_code', 'organization_website', 'organization_email',
+                                   'organization_image', 'organization_twitter_handle', 'twitter_user_id',
+                                   'twitter_followers_count', 'twitter_description', 'twitter_location',
+                                   'twitter_name', 'twitter_profile_image_url_https',
+                                   'twitter_profile_background_image_url_https', 'twitter_profile_banner_url_https',
+                                   'organization_facebook', 'vote_smart_id', 'organization_contact_name',
+                                   'organization_address', 'organization_city', 'organization_state',
+                                   'organization_zip', 'organization_phone1', 'organization_phone2',
+                                   'organization_fax', 'wikipedia_page_title', 'wikipedia_page_id',
+                                   'wikipedia_photo_url', 'wikipedia_thumbnail_url', 'wikipedia_thumbnail_width',
+                                   'wikipedia_thumbnail_height', 'ballotpedia_page_title', 'ballotpedia_photo_url',
+                                   'we_vote_hosted_profile_image_url_large', 'we_vote_hosted_profile_image_url_medium',
+                                   'we_vote_hosted_profile_image_url_tiny']
+        return sync_out_json_response(request, organization_list, organization_field_list,
+                                      {'success': False, 'status': 'ORGANIZATION_LIST_MISSING'},
+                                      updated_since_field='date_last_changed')
     except Exception as e:
         pass
 
@@ -159,7 +154,8 @@ def organizations_import_from_master_server_view(request):
     google_civic_election_id = convert_to_int(request.GET.get('google_civic_election_id', 0))
     state_code = request.GET.get('state_code', '')
 
-    results = organizations_import_from_master_server(request, state_code)
+    start_over = positive_value_exists(request.GET.get('start_over', False))
+    results = organizations_import_from_master_server(request, state_code, start_over=start_over)
 
     if not results['success']:
         messages.add_message(request, messages.ERROR, results['status'])
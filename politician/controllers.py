@@ -5,7 +5,7 @@
 from politician.models import Politician, PoliticianManager
 from config.base import get_environment_variable
 import wevote_functions.admin
-from wevote_functions.functions import positive_value_exists, process_request_from_master, convert_to_int
+from wevote_functions.functions import positive_value_exists, process_pages_from_master, convert_to_int
 
 logger = wevote_functions.admin.get_logger(__name__)
 
@@ -13,7 +13,7 @@ WE_VOTE_API_KEY = get_environment_variable("WE_VOTE_API_KEY")
 POLITICIANS_SYNC_URL = get_environment_variable("POLITICIANS_SYNC_URL")  # politiciansSyncOut
 
 
-def politicians_import_from_master_server(request, state_code=''):
+def politicians_import_from_master_server(request, state_code='', start_over=False):
     """
     Get the json data, and either create new entries or update existing
     :param request:
@@ -21,18 +21,16 @@ def politicians_import_from_master_server(request, state_code=''):
     :return:
     """
 
-    import_results, structured_json = process_request_from_master(
+    import_results = process_pages_from_master(
         request, "Loading Politicians from We Vote Master servers",
         POLITICIANS_SYNC_URL,
         {
             "key": WE_VOTE_API_KEY,  # This comes from an environment variable
             "state_code": state_code,
-        }
-    )
-
-    if import_results['success']:
-        import_results = politicians_import_from_structured_json(structured_json)
-        import_results['duplicates_removed'] = 0
+        },
+        import_function=politicians_import_from_structured_json,
+        sync_name='politicians',
+        start_over=start_over)
 
     return import_results
 
@@ -118,6 +118,7 @@ class Politician(models.Model):
                                              unique=False)
     politician_email_address = models.CharField(verbose_name='politician email address', max_length=80, null=True,
                                                 unique=False)
+    date_last_changed = models.DateTimeField(verbose_name='date last changed', null=True, auto_now=True)
 
     # We override the save function so we can auto-generate we_vote_id
     def save(self, *args, **kwargs):
@@ -596,7 +597,7 @@ class PoliticianManager(models.Model):
                                     politician_last_name, ctcl_uuid,political_party, politician_email_address,
                                     politician_twitter_handle, politician_phone_number, politician_facebook_id,
                                     politician_googleplus_id, politician_youtube_id, politician_website_url,
-                                    politician_we_vote_id):
+                                    politician_we_vote_id, existing_politician=None):
         """
         Update Politician table entry with matching we_vote_id
         :param politician_name: 
@@ -613,6 +614,7 @@ class PoliticianManager(models.Model):
         :param politician_youtube_id: 
         :param politician_website_url: 
         :param politician_we_vote_id: 
+        :param existing_politician: The entry with this we_vote_id, when the caller already retrieved it
         :return: 
         """
 
@@ -624,7 +626,10 @@ class PoliticianManager(models.Model):
         existing_politician_entry = ''
 
         try:
-            existing_politician_entry = Politician.objects.get(we_vote_id__iexact=politician_we_vote_id)
+            if existing_politician is not None:
+                existing_politician_entry = existing_politician
+            else:
+                existing_politician_entry = Politician.objects.get(we_vote_id__iexact=politician_we_vote_id)
             if existing_politician_entry:
                 # found the existing entry, update the values
                 existing_politician_entry.politician_name = politician_name
@@ -18,6 +18,7 @@ from django.contrib.messages import get_messages
 from django.http import HttpResponse
 import json
 from django.shortcuts import render
+from django.views.decorators.gzip import gzip_page
 from election.models import Election, ElectionManager
 from exception.models import handle_record_found_more_than_one_exception,\
     handle_record_not_found_exception, handle_record_not_saved_exception, print_to_log
@@ -27,10 +28,8 @@ from position.models import PositionEntered, PositionListManager
 from voter.models import voter_has_authority
 import wevote_functions.admin
 from wevote_functions.functions import convert_to_int, convert_to_political_party_constant, \
-    extract_first_name_from_full_name, \
-    extract_middle_name_from_full_name, \
-    extract_last_name_from_full_name, extract_twitter_handle_from_text_string, \
-    positive_value_exists, STATE_CODE_MAP
+    extract_first_name_from_full_name, extract_middle_name_from_full_name, extract_last_name_from_full_name, \
+    extract_twitter_handle_from_text_string, positive_value_exists, STATE_CODE_MAP, sync_out_json_response
 
 POLITICIANS_SYNC_URL = get_environment_variable("POLITICIANS_SYNC_URL")  # politiciansSyncOut
 WE_VOTE_SERVER_ROOT_URL = get_environment_variable("WE_VOTE_SERVER_ROOT_URL")
@@ -53,7 +52,8 @@ def politicians_import_from_master_server_view(request):
     google_civic_election_id = convert_to_int(request.GET.get('google_civic_election_id', 0))
     state_code = request.GET.get('state_code', '')
 
-    results = politicians_import_from_master_server(request, state_code)
+    start_over = positive_value_exists(request.GET.get('start_over', False))
+    results = politicians_import_from_master_server(request, state_code, start_over=start_over)
 
     if not results['success']:
         messages.add_message(request, messages.ERROR, results['status'])
@@ -659,6 +659,7 @@ def politician_delete_process_view(request):  # TODO DALE Transition fully to po
 
 
 # This page does not need to be protected.
+@gzip_page
 def politicians_sync_out_view(request):  # politiciansSyncOut
     state_code = request.GET.get('state_code', '')
     politician_search = request.GET.get('politician_search', '')
@@ -694,21 +695,20 @@ def politicians_sync_out_view(request):  # politiciansSyncOut
 
                 politician_query = politician_query.filter(final_filters)
 
-        politician_query = politician_query.values(
-            'we_vote_id', 'first_name', 'middle_name', 'last_name',
-            'politician_name', 'google_civic_candidate_name', 'full_name_assembled', 'gender',
-            'birth_date', 'bioguide_id', 'thomas_id', 'lis_id', 'govtrack_id',
-            'opensecrets_id', 'vote_smart_id', 'fec_id', 'cspan_id',
-            'wikipedia_id', 'ballotpedia_id', 'house_history_id',
-            'maplight_id', 'washington_post_id', 'icpsr_id',
-            'political_party', 'state_code', 'politician_url',
-            'politician_twitter_handle',
-            'we_vote_hosted_profile_image_url_large', 'we_vote_hosted_profile_image_url_medium',
-            'we_vote_hosted_profile_image_url_tiny', 'ctcl_uuid', 'politician_facebook_id',
-            'politician_phone_number', 'politician_googleplus_id', 'politician_youtube_id', 'politician_email_address')
-        if politician_query:
-            politician_list_json = list(politician_query)
-            return HttpResponse(json.dumps(politician_list_json), content_type='application/json')
+        politician_field_list = ['we_vote_id', 'first_name', 'middle_name', 'last_name', 'politician_name',
+                                 'google_civic_candidate_name', 'full_name_assembled', 'gender', 'birth_date',
+                                 'bioguide_id', 'thomas_id', 'lis_id', 'govtrack_id', 'opensecrets_id',
+                                 'vote_smart_id', 'fec_id', 'cspan_id', 'wikipedia_id', 'ballotpedia_id',
+                                 'house_history_id', 'maplight_id', 'washington_post_id', 'icpsr_id',
+                                 'political_party', 'state_code', 'politician_url', 'politician_twitter_handle',
+                                 'we_vote_hosted_profile_image_url_large',
+                                 'we_vote_hosted_profile_image_url_medium',
+                                 'we_vote_hosted_profile_image_url_tiny', 'ctcl_uuid', 'politician_facebook_id',
+                                 'politician_phone_number', 'politician_googleplus_id', 'politician_youtube_id',
+                                 'politician_email_address']
+        return sync_out_json_response(request, politician_query, politician_field_list,
+                                      {'success': False, 'status': 'POLITICIAN_LIST_MISSING'},
+                                      updated_since_field='date_last_changed')
     except Exception as e:
         pass
 
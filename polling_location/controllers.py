@@ -9,7 +9,7 @@ import glob
 import json
 import requests
 import wevote_functions.admin
-from wevote_functions.functions import positive_value_exists, process_request_from_master
+from wevote_functions.functions import positive_value_exists, process_pages_from_master
 import xml.etree.ElementTree as MyElementTree
 
 logger = wevote_functions.admin.get_logger(__name__)
@@ -18,39 +18,61 @@ WE_VOTE_API_KEY = get_environment_variable("WE_VOTE_API_KEY")
 POLLING_LOCATIONS_SYNC_URL = get_environment_variable("POLLING_LOCATIONS_SYNC_URL")  # pollingLocationsSyncOut
 
 
-def polling_locations_import_from_master_server(request, state_code):
+def polling_locations_import_from_master_server(request, state_code, start_over=False):
     """
     Get the json data, and either create new entries or update existing
     :return:
     """
-    import_results, structured_json = process_request_from_master(
+    duplicate_index = None
+    if positive_value_exists(state_code):
+        # One duplicate index for the whole run, instead of one for every page. Every polling location in the run is
+        #  in this state, so we don't need to add the zip codes on each page.
+        index_results = PollingLocationListManager().retrieve_possible_duplicate_polling_locations_index(
+            [state_code], [])
+        if index_results['success']:
+            duplicate_index = index_results['duplicate_index']
+
+    import_results = process_pages_from_master(
         request, "Loading Polling Locations from We Vote Master servers",
         POLLING_LOCATIONS_SYNC_URL, {
             "key":    WE_VOTE_API_KEY,  # This comes from an environment variable
             "state":  state_code,
-        }
-    )
-
-    if import_results['success']:
-        results = filter_polling_locations_structured_json_for_local_duplicates(structured_json)
-        filtered_structured_json = results['structured_json']
-        duplicates_removed = results['duplicates_removed']
-
-        import_results = polling_locations_import_from_structured_json(filtered_structured_json)
-        import_results['duplicates_removed'] = duplicates_removed
+        },
+        import_function=polling_locations_import_from_structured_json,
+        filter_function=filter_polling_locations_structured_json_for_local_duplicates,
+        sync_name='polling_locations',
+        start_over=start_over,
+        duplicate_index=duplicate_index)
 
     return import_results
 
 
-def filter_polling_locations_structured_json_for_local_duplicates(structured_json):
+def filter_polling_locations_structured_json_for_local_duplicates(structured_json, per_record_lookup=False,
+                                                                  duplicate_index=None):
     """
     With this function, we remove polling_locations that seem to be duplicates, but have different we_vote_id's.
     :param structured_json:
+    :param per_record_lookup: Query the database once per polling location, instead of loading the existing
+     polling locations for these states and zip codes into memory up front
+    :param duplicate_index: Built once for the whole run by the caller. Without it, we build one for these entries.
     :return:
     """
     duplicates_removed = 0
     filtered_structured_json = []
     polling_location_list_manager = PollingLocationListManager()
+    if duplicate_index is None and not per_record_lookup:
+        state_list = list(set(one_polling_location['state'] for one_polling_location in structured_json
+                              if positive_value_exists(one_polling_location.get('state', ''))))
+        zip_long_list = list(set(one_polling_location['zip_long'] for one_polling_location in structured_json
+                                 if positive_value_exists(one_polling_location.get('zip_long', ''))))
+        index_results = polling_location_list_manager.retrieve_possible_duplicate_polling_locations_index(
+            state_list, zip_long_list)
+        if index_results['success']:
+            duplicate_index = index_results['duplicate_index']
+        else:
+            # Fall back to looking for duplicates one at a time
+            per_record_lookup = True
+
     for one_polling_location in structured_json:
         polling_location_id = one_polling_location['polling_location_id'] \
             if 'polling_location_id' in one_polling_location else ''
@@ -63,11 +85,26 @@ def filter_polling_locations_structured_json_for_local_duplicates(structured_jso
         # Check to see if there is an entry that matches in all critical ways, minus the we_vote_id
         we_vote_id_from_master = we_vote_id
 
-        results = polling_location_list_manager.retrieve_possible_duplicate_polling_locations(
-            polling_location_id, state, location_name, line1, zip_long,
-            we_vote_id_from_master)
+        key_list = []
+        if not per_record_lookup:
+            # We want to find polling locations with *any* of these values
+            if positive_value_exists(polling_location_id) and positive_value_exists(state):
+                key_list.append(('polling_location_id', polling_location_id, state))
+            if positive_value_exists(location_name) and positive_value_exists(state):
+                key_list.append(('location_name', location_name, state))
+            if not len(key_list) and positive_value_exists(line1) and positive_value_exists(zip_long):
+                key_list.append(('line1', line1, zip_long))
+
+        if len(key_list):
+            duplicate_found = duplicate_index.has_duplicate(key_list, we_vote_id_from_master)
+        else:
+            # Entries without these values are rare, so we look them up the slow way
+            results = polling_location_list_manager.retrieve_possible_duplicate_polling_locations(
+                polling_location_id, state, location_name, line1, zip_long,
+                we_vote_id_from_master)
+            duplicate_found = results['polling_location_list_found']
 
-        if results['polling_location_list_found']:
+        if duplicate_found:
             # There seems to be a duplicate already in this database using a different we_vote_id
             duplicates_removed += 1
         else:
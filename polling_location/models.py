@@ -5,12 +5,14 @@
 from config.base import get_environment_variable
 from django.db import models
 from django.db.models import Q
+from django.db.models.functions import Upper
 from exception.models import handle_record_found_more_than_one_exception
 from geopy.geocoders import get_geocoder_for_service
 from geopy.exc import GeocoderQuotaExceeded
 import wevote_functions.admin
-from wevote_functions.functions import extract_zip_formatted_from_zip9, positive_value_exists
-from wevote_settings.models import fetch_next_we_vote_id_polling_location_integer, fetch_site_unique_id_prefix
+from wevote_functions.functions import extract_zip_formatted_from_zip9, LocalDuplicateIndex, positive_value_exists
+from wevote_settings.models import fetch_next_we_vote_id_polling_location_integer, fetch_site_unique_id_prefix, \
+    GEOCODER_SOURCE_GOOGLE, GeocodedAddressManager
 
 
 GOOGLE_MAPS_API_KEY = get_environment_variable("GOOGLE_MAPS_API_KEY")
@@ -46,6 +48,7 @@ class PollingLocation(models.Model):
         verbose_name="how many times Google can't find address", default=None, null=True)
 
     use_for_bulk_retrieve = models.BooleanField(verbose_name="this provides geographical coverage", default=False)
+    date_last_changed = models.DateTimeField(verbose_name='date last changed', null=True, auto_now=True)
 
     def get_formatted_zip(self):
         return extract_zip_formatted_from_zip9(self.zip_long)
@@ -212,10 +215,6 @@ class PollingLocationManager(models.Model):
         status = ""
         latitude = None
         longitude = None
-        # We try to use existing google_client
-        if not hasattr(self, 'google_client') or not self.google_client:
-            self.google_client = get_geocoder_for_service('google')(GOOGLE_MAPS_API_KEY)
-
         if not hasattr(polling_location, "line1"):
             results = {
                 'status':                   "POPULATE_LATITUDE_AND_LONGITUDE-NOT_A_POLLING_LOCATION_OBJECT ",
@@ -253,8 +252,17 @@ class PollingLocationManager(models.Model):
             polling_location.city,
             polling_location.state,
             polling_location.zip_long)
+        geocoded_address_manager = GeocodedAddressManager()
+        geocoded_address_results = geocoded_address_manager.retrieve_geocoded_address(full_ballot_address)
         try:
-            location = self.google_client.geocode(full_ballot_address, sensor=False)
+            if geocoded_address_results['geocoded_address_found']:
+                location = geocoded_address_results['location']
+            else:
+                # We try to use existing google_client
+                if not hasattr(self, 'google_client') or not self.google_client:
+                    self.google_client = get_geocoder_for_service('google')(GOOGLE_MAPS_API_KEY)
+                location = self.google_client.geocode(full_ballot_address, sensor=False)
+                geocoded_address_manager.save_geocoded_address(full_ballot_address, location, GEOCODER_SOURCE_GOOGLE)
         except GeocoderQuotaExceeded:
             status += "GeocoderQuotaExceeded "
             results = {
@@ -502,3 +510,43 @@ class PollingLocationListManager(models.Model):
         }
         return results
 
+    def retrieve_possible_duplicate_polling_locations_index(self, state_list, zip_long_list):
+        """
+        Load the identifying values of the polling locations in these states, or at these zip codes, in one query,
+        so that filter_polling_locations_structured_json_for_local_duplicates can check each incoming polling location
+        in memory.
+        Keys: ('polling_location_id', polling_location_id, state), ('location_name', location_name, state) and
+        ('line1', line1, zip_long)
+        :param state_list:
+        :param zip_long_list:
+        :return:
+        """
+        duplicate_index = LocalDuplicateIndex()
+        try:
+            polling_location_queryset = PollingLocation.objects.annotate(state_upper=Upper('state'))
+            polling_location_queryset = polling_location_queryset.filter(
+                Q(state_upper__in=[state.upper() for state in state_list]) | Q(zip_long__in=zip_long_list))
+            polling_location_queryset = polling_location_queryset.values_list(
+                'we_vote_id', 'polling_location_id', 'location_name', 'line1', 'state', 'zip_long')
+            for we_vote_id, polling_location_id, location_name, line1, state, zip_long \
+                    in polling_location_queryset.iterator():
+                if positive_value_exists(state):
+                    if positive_value_exists(polling_location_id):
+                        duplicate_index.add(we_vote_id, ('polling_location_id', polling_location_id, state))
+                    if positive_value_exists(location_name):
+                        duplicate_index.add(we_vote_id, ('location_name', location_name, state))
+                if positive_value_exists(line1) and positive_value_exists(zip_long):
+                    duplicate_index.add(we_vote_id, ('line1', line1, zip_long))
+            status = 'DUPLICATE_POLLING_LOCATIONS_INDEX_RETRIEVED '
+            success = True
+        except Exception as e:
+            status = 'FAILED retrieve_possible_duplicate_polling_locations_index ' \
+                     '{error} [type: {error_type}]'.format(error=e, error_type=type(e))
+            success = False
+
+        results = {
+            'success':          success,
+            'status':           status,
+            'duplicate_index':  duplicate_index,
+        }
+        return results
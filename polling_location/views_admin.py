@@ -14,10 +14,11 @@ from django.contrib.auth.decorators import login_required
 from django.contrib.messages import get_messages
 from django.db.models import Q
 from django.shortcuts import render
+from django.views.decorators.gzip import gzip_page
 from exception.models import handle_record_found_more_than_one_exception
 from voter.models import voter_has_authority
 from wevote_functions.functions import convert_state_code_to_state_text, convert_to_float, convert_to_int, \
-    positive_value_exists
+    positive_value_exists, sync_out_json_response
 import wevote_functions.admin
 from django.http import HttpResponse
 import json
@@ -90,6 +91,7 @@ STATE_LIST_IMPORT = {
 
 
 # This page does not need to be protected.
+@gzip_page
 def polling_locations_sync_out_view(request):  # pollingLocationsSyncOut
     state = request.GET.get('state', '')
 
@@ -98,16 +100,12 @@ def polling_locations_sync_out_view(request):  # pollingLocationsSyncOut
         if positive_value_exists(state):
             polling_location_list = polling_location_list.filter(state__iexact=state)
 
-        polling_location_list_dict = polling_location_list.values('we_vote_id', 'city', 'directions_text',
-                                                                  'latitude', 'longitude',
-                                                                  'line1', 'line2', 'location_name',
-                                                                  'polling_hours_text',
-                                                                  'polling_location_id', 'state',
-                                                                  'use_for_bulk_retrieve',
-                                                                  'zip_long')
-        if polling_location_list_dict:
-            polling_location_list_json = list(polling_location_list_dict)
-            return HttpResponse(json.dumps(polling_location_list_json), content_type='application/json')
+        polling_location_field_list = ['we_vote_id', 'city', 'directions_text', 'latitude', 'longitude', 'line1',
+                                       'line2', 'location_name', 'polling_hours_text', 'polling_location_id', 'state',
+                                       'use_for_bulk_retrieve', 'zip_long']
+        return sync_out_json_response(request, polling_location_list, polling_location_field_list,
+                                      {'success': False, 'status': 'POLLING_LOCATION_LIST_MISSING'},
+                                      updated_since_field='date_last_changed')
     except Exception as e:
         pass
 
@@ -138,7 +136,8 @@ def polling_locations_import_from_master_server_view(request):
     google_civic_election_id = convert_to_int(request.GET.get('google_civic_election_id', 0))
     state_code = request.GET.get('state_code', '')
 
-    results = polling_locations_import_from_master_server(request, state_code)
+    start_over = positive_value_exists(request.GET.get('start_over', False))
+    results = polling_locations_import_from_master_server(request, state_code, start_over=start_over)
 
     if not results['success']:
         messages.add_message(request, messages.ERROR, results['status'])
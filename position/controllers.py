@@ -24,7 +24,7 @@ import json
 from voter.models import fetch_voter_id_from_voter_device_link, VoterManager
 from voter_guide.models import ORGANIZATION, VOTER, VoterGuideManager
 import wevote_functions.admin
-from wevote_functions.functions import is_voter_device_id_valid, positive_value_exists, process_request_from_master, \
+from wevote_functions.functions import is_voter_device_id_valid, positive_value_exists, process_pages_from_master, \
     convert_to_int, is_link_to_video, is_speaker_type_organization, is_speaker_type_public_figure
 
 logger = wevote_functions.admin.get_logger(__name__)
@@ -231,10 +231,16 @@ def add_position_network_count_entries_for_one_friend(voter_id, friend_voter_we_
 
 
 def calculate_positions_count_for_all_ballot_items_for_api(  # positionsCountForAllBallotItems
-        voter_device_id, google_civic_election_id=0):
+        voter_device_id, google_civic_election_id=0, use_bulk_recompute=False):
     """
     We want to return a JSON file with the list of the support and oppose counts from the orgs, friends and
     public figures the voter follows, and be caching the results as we look them up
+    :param voter_device_id:
+    :param google_civic_election_id:
+    :param use_bulk_recompute: Retrieve the positions for the whole ballot in two queries, and replace the
+     position_network_score entries with one bulk delete and one bulk insert, instead of working ballot item by
+     ballot item
+    :return:
     """
     status = "CALCULATE_POSITIONS_COUNT_FOR_ALL_BALLOT_ITEMS "
     support_or_oppose_exists = False
@@ -304,6 +310,49 @@ def calculate_positions_count_for_all_ballot_items_for_api(  # positionsCountFor
     # Add yourself as a friend so your opinions show up
     friends_we_vote_id_list.append(voter_we_vote_id)
 
+    if positive_value_exists(use_bulk_recompute):
+        status += "BULK_RECOMPUTE "
+        office_we_vote_id_list = []
+        measure_we_vote_id_list = []
+        for one_ballot_item in ballot_item_list:
+            if one_ballot_item.is_contest_office():
+                office_we_vote_id_list.append(one_ballot_item.contest_office_we_vote_id)
+            elif one_ballot_item.is_contest_measure():
+                measure_we_vote_id_list.append(one_ballot_item.contest_measure_we_vote_id)
+        candidate_we_vote_id_list = \
+            candidate_list_object.fetch_candidate_we_vote_id_list_for_office_list(office_we_vote_id_list)
+
+        # Public Positions
+        retrieve_public_positions_now = True  # The alternate is positions for friends-only
+        public_results = position_list_manager.retrieve_all_positions_for_ballot_item_list(
+            retrieve_public_positions_now, candidate_we_vote_id_list, measure_we_vote_id_list,
+            organizations_followed_we_vote_id_list=organizations_followed_by_voter_by_we_vote_id,
+            read_only=True)
+        status += public_results['status']
+
+        # Friend's-only Positions
+        retrieve_public_positions_now = False  # Return friends-only positions counts
+        friends_results = position_list_manager.retrieve_all_positions_for_ballot_item_list(
+            retrieve_public_positions_now, candidate_we_vote_id_list, measure_we_vote_id_list,
+            friends_we_vote_id_list=friends_we_vote_id_list,
+            read_only=True)
+        status += friends_results['status']
+
+        replace_results = position_manager.replace_position_network_scores_for_voter(
+            voter_id, voter_we_vote_id, google_civic_election_id,
+            candidate_we_vote_id_list, measure_we_vote_id_list,
+            public_results['position_list_by_ballot_item_we_vote_id'],
+            friends_results['position_list_by_ballot_item_we_vote_id'])
+        status += replace_results['status']
+
+        json_data = {
+            'success':                  replace_results['success'],
+            'status':                   status,
+            'google_civic_election_id': google_civic_election_id,
+            'support_or_oppose_exists': replace_results['support_or_oppose_exists'],
+        }
+        return json_data
+
     # ballot_item_list is populated with contest_office and contest_measure entries
     for one_ballot_item in ballot_item_list:
         # Retrieve all positions for each ballot item
@@ -530,17 +579,21 @@ def count_for_all_ballot_items_from_position_network_score_for_api(  # positions
         status += results['status']
         ballot_item_list = results['ballot_item_list']
 
+    # Retrieve the candidates for every office on this ballot at once
+    office_we_vote_id_list = [one_ballot_item.contest_office_we_vote_id for one_ballot_item in ballot_item_list
+                              if one_ballot_item.is_contest_office()]
+    candidate_results = candidate_list_manager.retrieve_candidates_for_office_list(
+        office_we_vote_id_list=office_we_vote_id_list, only_fields=['we_vote_id'], read_only=read_only)
+    candidate_list_by_office_we_vote_id = candidate_results['candidate_list_by_office_we_vote_id']
+
     # ballot_item_list is populated with contest_office and contest_measure entries
     support_or_oppose_exists = False
     for one_ballot_item in ballot_item_list:
         # Retrieve all positions for each ballot item
         if one_ballot_item.is_contest_office():
-            results = candidate_list_manager.retrieve_all_candidates_for_office(
-                0, one_ballot_item.contest_office_we_vote_id, read_only)
-            success = results['success']
-            candidate_list = results['candidate_list']
+            candidate_list = candidate_list_by_office_we_vote_id.get(one_ballot_item.contest_office_we_vote_id, [])
 
-            if success:
+            if len(candidate_list):
                 # Loop through all candidates under this office
                 for candidate in candidate_list:
                     support_count_for_one_ballot_item = 0
@@ -3035,28 +3088,23 @@ def positions_import_from_sample_file(request=None):  # , load_from_uri=False
     return positions_import_from_structured_json(request, structured_json)
 
 
-def positions_import_from_master_server(request, google_civic_election_id=''):
+def positions_import_from_master_server(request, google_civic_election_id='', start_over=False):
     """
     Get the json data, and either create new entries or update existing
     :return:
     """
 
-    import_results, structured_json = process_request_from_master(
+    import_results = process_pages_from_master(
         request, "Loading Positions from We Vote Master servers",
         POSITIONS_SYNC_URL, {
             "key":                      WE_VOTE_API_KEY,  # This comes from an environment variable
             "format":                   'json',
             "google_civic_election_id": str(google_civic_election_id),
-        }
-    )
-
-    if import_results['success']:
-        results = filter_positions_structured_json_for_local_duplicates(structured_json)
-        filtered_structured_json = results['structured_json']
-        duplicates_removed = results['duplicates_removed']
-
-        import_results = positions_import_from_structured_json(filtered_structured_json)
-        import_results['duplicates_removed'] = duplicates_removed
+        },
+        import_function=positions_import_from_structured_json,
+        filter_function=filter_positions_structured_json_for_local_duplicates,
+        sync_name='positions',
+        start_over=start_over)
 
     return import_results
 
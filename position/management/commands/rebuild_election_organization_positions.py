@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+from position.models import ElectionOrganizationPositionsManager, PositionEntered
+from wevote_functions.functions import convert_to_int, positive_value_exists
+
+
+class Command(BaseCommand):
+    help = 'Recounts the organizations with public positions in each election (ElectionOrganizationPositions), ' \
+           'which voterGuidesToFollowRetrieve uses, and marks each election as indexed. Run once after deploying ' \
+           'ElectionOrganizationPositionsIndexed, and after positions are changed without calling save().'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--google-civic-election-id', type=int, default=0,
+                            help='Only rebuild this election')
+
+    def handle(self, *args, **options):
+        if positive_value_exists(options['google_civic_election_id']):
+            google_civic_election_id_list = [options['google_civic_election_id']]
+        else:
+            google_civic_election_id_list = sorted(set(
+                convert_to_int(google_civic_election_id) for google_civic_election_id in
+                PositionEntered.objects.order_by().values_list('google_civic_election_id', flat=True).distinct()))
+
+        election_organization_positions_manager = ElectionOrganizationPositionsManager()
+        for google_civic_election_id in google_civic_election_id_list:
+            if not positive_value_exists(google_civic_election_id):
+                continue
+            results = election_organization_positions_manager.rebuild_election_organization_positions(
+                google_civic_election_id)
+            self.stdout.write('Election {id}: {count} organizations {status}\n'.format(
+                id=google_civic_election_id, count=len(results['election_organization_positions_list']),
+                status=results['status']))
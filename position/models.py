@@ -7,8 +7,11 @@ from analytics.models import ACTION_POSITION_TAKEN, AnalyticsManager
 from candidate.models import CandidateCampaign, CandidateCampaignManager
 from ballot.controllers import figure_out_google_civic_election_id_voter_is_watching
 from django.core.exceptions import ObjectDoesNotExist, MultipleObjectsReturned
-from django.db import models
-from django.db.models import Q
+from django.db import models, transaction
+from django.db.models import Case, Count, IntegerField, Max, Q, Sum, When
+from django.db.models.functions import Lower
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
 from election.models import Election
 from exception.models import handle_exception, handle_record_found_more_than_one_exception,\
     handle_record_not_found_exception, handle_record_not_saved_exception, print_to_log
@@ -234,6 +237,8 @@ class PositionEntered(models.Model):
 
     class Meta:
         ordering = ('date_entered',)
+        # For recounting one organization's positions in one election (ElectionOrganizationPositions)
+        index_together = [('google_civic_election_id', 'organization_we_vote_id')]
 
     # We override the save function so we can auto-generate we_vote_id
     def save(self, *args, **kwargs):
@@ -2007,6 +2012,252 @@ class PositionListManager(models.Model):
             position_list_filtered = []
             return position_list_filtered
 
+    def retrieve_all_positions_for_ballot_item_list(self, retrieve_public_positions,
+                                                    candidate_we_vote_id_list=[], measure_we_vote_id_list=[],
+                                                    friends_we_vote_id_list=False,
+                                                    organizations_followed_we_vote_id_list=False,
+                                                    most_recent_only=True, read_only=False):
+        """
+        Set-based version of retrieve_all_positions_for_candidate_campaign and
+        retrieve_all_positions_for_contest_measure. Instead of one query per ballot item, we retrieve the positions
+        for every candidate and measure on a ballot with one query, and then group them by ballot item in memory.
+        We do not attempt to retrieve public positions and friend's-only positions in the same call.
+        :param retrieve_public_positions:
+        :param candidate_we_vote_id_list:
+        :param measure_we_vote_id_list:
+        :param friends_we_vote_id_list:
+        :param organizations_followed_we_vote_id_list:
+        :param most_recent_only:
+        :param read_only:
+        :return: position_list_by_ballot_item_we_vote_id, keyed on the lower case candidate or measure we_vote_id
+        """
+        status = ""
+        position_list_by_ballot_item_we_vote_id = {}
+        # Look for ballot item we_vote_ids case insensitive, like the one-ballot-item functions
+        candidate_we_vote_id_list = [one_we_vote_id.lower() for one_we_vote_id in candidate_we_vote_id_list
+                                     if positive_value_exists(one_we_vote_id)]
+        measure_we_vote_id_list = [one_we_vote_id.lower() for one_we_vote_id in measure_we_vote_id_list
+                                   if positive_value_exists(one_we_vote_id)]
+
+        if retrieve_public_positions:
+            speaker_we_vote_id_list = organizations_followed_we_vote_id_list
+        else:
+            speaker_we_vote_id_list = friends_we_vote_id_list
+        if not len(candidate_we_vote_id_list) and not len(measure_we_vote_id_list):
+            status += "RETRIEVE_POSITIONS_FOR_BALLOT_ITEM_LIST-NO_BALLOT_ITEMS "
+        elif type(speaker_we_vote_id_list) is not list or len(speaker_we_vote_id_list) == 0:
+            # Unlike the one-ballot-item functions, we never retrieve positions from all speakers here
+            status += "RETRIEVE_POSITIONS_FOR_BALLOT_ITEM_LIST-NO_SPEAKERS "
+        else:
+            try:
+                if retrieve_public_positions:
+                    position_class = PositionEntered
+                else:
+                    position_class = PositionForFriends
+                if read_only:
+                    position_list_query = position_class.objects.using('readonly').order_by('date_entered')
+                else:
+                    position_list_query = position_class.objects.order_by('date_entered')
+
+                position_list_query = position_list_query.annotate(
+                    candidate_campaign_we_vote_id_lower=Lower('candidate_campaign_we_vote_id'),
+                    contest_measure_we_vote_id_lower=Lower('contest_measure_we_vote_id')).filter(
+                    Q(candidate_campaign_we_vote_id_lower__in=candidate_we_vote_id_list) |
+                    Q(contest_measure_we_vote_id_lower__in=measure_we_vote_id_list))
+                # Look for speaker we_vote_ids case insensitive, like the one-ballot-item functions
+                speaker_we_vote_id_list = [one_we_vote_id.lower() for one_we_vote_id in speaker_we_vote_id_list
+                                           if positive_value_exists(one_we_vote_id)]
+                if retrieve_public_positions:
+                    position_list_query = position_list_query.annotate(
+                        organization_we_vote_id_lower=Lower('organization_we_vote_id')).filter(
+                        organization_we_vote_id_lower__in=speaker_we_vote_id_list)
+                else:
+                    position_list_query = position_list_query.annotate(
+                        voter_we_vote_id_lower=Lower('voter_we_vote_id')).filter(
+                        voter_we_vote_id_lower__in=speaker_we_vote_id_list)
+
+                for one_position in position_list_query:
+                    if positive_value_exists(one_position.candidate_campaign_we_vote_id):
+                        ballot_item_we_vote_id = one_position.candidate_campaign_we_vote_id.lower()
+                    else:
+                        ballot_item_we_vote_id = one_position.contest_measure_we_vote_id.lower()
+                    if ballot_item_we_vote_id not in position_list_by_ballot_item_we_vote_id:
+                        position_list_by_ballot_item_we_vote_id[ballot_item_we_vote_id] = []
+                    position_list_by_ballot_item_we_vote_id[ballot_item_we_vote_id].append(one_position)
+                status += "RETRIEVE_POSITIONS_FOR_BALLOT_ITEM_LIST-RETRIEVED "
+            except Exception as e:
+                status += "RETRIEVE_POSITIONS_FOR_BALLOT_ITEM_LIST-FAILED "
+                handle_record_not_found_exception(e, logger=logger)
+
+        # If we have multiple positions for one org, we only want to show the most recent.
+        if most_recent_only:
+            for ballot_item_we_vote_id, position_list in position_list_by_ballot_item_we_vote_id.items():
+                if len(position_list) > 1:
+                    position_list_by_ballot_item_we_vote_id[ballot_item_we_vote_id] = \
+                        self.remove_older_positions_for_each_org(position_list)
+
+        results = {
+            'success':                                  True,
+            'status':                                   status,
+            'position_list_by_ballot_item_we_vote_id':  position_list_by_ballot_item_we_vote_id,
+        }
+        return results
+
+    def fetch_positions_count_for_ballot_item_list(self, retrieve_public_positions,
+                                                   candidate_we_vote_id_list=[], measure_we_vote_id_list=[],
+                                                   friends_we_vote_id_list=False,
+                                                   organizations_followed_we_vote_id_list=False,
+                                                   read_only=True):
+        """
+        Set-based version of fetch_positions_count_for_candidate_campaign (for candidates) and the length of
+        retrieve_all_positions_for_contest_measure with most_recent_only (for measures), for SUPPORT and OPPOSE.
+        Instead of four COUNT queries per ballot item, we count every candidate and measure on a ballot with one
+        query grouped by candidate, and one grouped by measure and stance.
+        We do not attempt to count public positions and friend's-only positions in the same call.
+        :param retrieve_public_positions:
+        :param candidate_we_vote_id_list:
+        :param measure_we_vote_id_list:
+        :param friends_we_vote_id_list:
+        :param organizations_followed_we_vote_id_list:
+        :param read_only:
+        :return: support_count_by_ballot_item_we_vote_id and oppose_count_by_ballot_item_we_vote_id, keyed on the
+         lower case candidate or measure we_vote_id
+        """
+        status = ""
+        success = True
+        support_count_by_ballot_item_we_vote_id = {}
+        oppose_count_by_ballot_item_we_vote_id = {}
+        # Look for ballot item we_vote_ids case insensitive, like the one-ballot-item functions
+        candidate_we_vote_id_list = [one_we_vote_id.lower() for one_we_vote_id in candidate_we_vote_id_list
+                                     if positive_value_exists(one_we_vote_id)]
+        measure_we_vote_id_list = [one_we_vote_id.lower() for one_we_vote_id in measure_we_vote_id_list
+                                   if positive_value_exists(one_we_vote_id)]
+
+        if retrieve_public_positions:
+            # False means all public positions, while an empty list means the voter doesn't follow anyone
+            speaker_we_vote_id_list = organizations_followed_we_vote_id_list
+            no_speakers = type(speaker_we_vote_id_list) is list and len(speaker_we_vote_id_list) == 0
+        else:
+            speaker_we_vote_id_list = friends_we_vote_id_list
+            no_speakers = not speaker_we_vote_id_list
+        if not len(candidate_we_vote_id_list) and not len(measure_we_vote_id_list):
+            status += "FETCH_POSITIONS_COUNT_FOR_BALLOT_ITEM_LIST-NO_BALLOT_ITEMS "
+        elif no_speakers:
+            status += "FETCH_POSITIONS_COUNT_FOR_BALLOT_ITEM_LIST-NO_SPEAKERS "
+        else:
+            try:
+                if retrieve_public_positions:
+                    position_class = PositionEntered
+                else:
+                    position_class = PositionForFriends
+                if read_only:
+                    position_list_query = position_class.objects.using('readonly').all()
+                else:
+                    position_list_query = position_class.objects.all()
+                if speaker_we_vote_id_list is not False:
+                    # Look for we_vote_id case insensitive, like the one-ballot-item functions
+                    we_vote_id_filter = Q()
+                    for we_vote_id in speaker_we_vote_id_list:
+                        if retrieve_public_positions:
+                            we_vote_id_filter |= Q(organization_we_vote_id__iexact=we_vote_id)
+                        else:
+                            we_vote_id_filter |= Q(voter_we_vote_id__iexact=we_vote_id)
+                    position_list_query = position_list_query.filter(we_vote_id_filter)
+
+                if len(candidate_we_vote_id_list):
+                    if retrieve_public_positions:
+                        # Include Vote Smart Ratings, like fetch_positions_count_for_candidate_campaign
+                        support_filter = Q(stance=SUPPORT) | (Q(stance=PERCENT_RATING) &
+                                                              Q(vote_smart_rating_integer__gte=66))
+                        oppose_filter = Q(stance=OPPOSE) | (Q(stance=PERCENT_RATING) &
+                                                            Q(vote_smart_rating_integer__lte=33))
+                    else:
+                        support_filter = Q(stance=SUPPORT)
+                        oppose_filter = Q(stance=OPPOSE)
+                    candidate_count_query = position_list_query.annotate(
+                        candidate_campaign_we_vote_id_lower=Lower('candidate_campaign_we_vote_id')).filter(
+                        candidate_campaign_we_vote_id_lower__in=candidate_we_vote_id_list)
+                    candidate_count_query = candidate_count_query.filter(support_filter | oppose_filter)
+                    candidate_count_query = candidate_count_query.order_by().values(
+                        'candidate_campaign_we_vote_id').annotate(
+                        support_count=Sum(Case(When(support_filter, then=1), default=0,
+                                               output_field=IntegerField())),
+                        oppose_count=Sum(Case(When(oppose_filter, then=1), default=0,
+                                              output_field=IntegerField())))
+                    for one_count in candidate_count_query:
+                        ballot_item_we_vote_id = one_count['candidate_campaign_we_vote_id'].lower()
+                        support_count_by_ballot_item_we_vote_id[ballot_item_we_vote_id] = \
+                            support_count_by_ballot_item_we_vote_id.get(ballot_item_we_vote_id, 0) + \
+                            one_count['support_count']
+                        oppose_count_by_ballot_item_we_vote_id[ballot_item_we_vote_id] = \
+                            oppose_count_by_ballot_item_we_vote_id.get(ballot_item_we_vote_id, 0) + \
+                            one_count['oppose_count']
+
+                if len(measure_we_vote_id_list):
+                    # Measures don't have PERCENT_RATING data, so we match the stance exactly
+                    measure_position_query = position_list_query.annotate(
+                        contest_measure_we_vote_id_lower=Lower('contest_measure_we_vote_id')).filter(
+                        contest_measure_we_vote_id_lower__in=measure_we_vote_id_list, stance__in=[SUPPORT, OPPOSE])
+                    count_by_measure_and_stance = {}
+                    measure_count_query = measure_position_query.order_by().values(
+                        'contest_measure_we_vote_id', 'stance').annotate(position_count=Count('id'))
+                    for one_count in measure_count_query:
+                        measure_and_stance = (one_count['contest_measure_we_vote_id'].lower(), one_count['stance'])
+                        count_by_measure_and_stance[measure_and_stance] = \
+                            count_by_measure_and_stance.get(measure_and_stance, 0) + one_count['position_count']
+
+                    # remove_older_positions_for_each_org keeps only one position for an organization with more than
+                    #  one Vote Smart time span position on a measure and stance. These are rare, so we look them up
+                    #  separately and correct the counts.
+                    time_span_count_by_measure_stance_and_org = {}
+                    time_span_position_query = measure_position_query.exclude(vote_smart_time_span__isnull=True)
+                    time_span_position_query = time_span_position_query.exclude(vote_smart_time_span='')
+                    for one_position in time_span_position_query.order_by().values(
+                            'contest_measure_we_vote_id', 'stance', 'organization_we_vote_id',
+                            'vote_smart_time_span'):
+                        if positive_value_exists(one_position['organization_we_vote_id']) and \
+                                positive_value_exists(one_position['vote_smart_time_span']):
+                            measure_stance_and_org = (one_position['contest_measure_we_vote_id'].lower(),
+                                                      one_position['stance'],
+                                                      one_position['organization_we_vote_id'])
+                            time_span_count_by_measure_stance_and_org[measure_stance_and_org] = \
+                                time_span_count_by_measure_stance_and_org.get(measure_stance_and_org, 0) + 1
+                    organization_we_vote_ids_to_correct = set(
+                        measure_stance_and_org[2] for measure_stance_and_org, time_span_count
+                        in time_span_count_by_measure_stance_and_org.items() if time_span_count > 1)
+                    if len(organization_we_vote_ids_to_correct):
+                        org_count_query = measure_position_query.filter(
+                            organization_we_vote_id__in=list(organization_we_vote_ids_to_correct))
+                        org_count_query = org_count_query.order_by().values(
+                            'contest_measure_we_vote_id', 'stance', 'organization_we_vote_id').annotate(
+                            position_count=Count('id'))
+                        for one_count in org_count_query:
+                            measure_stance_and_org = (one_count['contest_measure_we_vote_id'].lower(),
+                                                      one_count['stance'], one_count['organization_we_vote_id'])
+                            if time_span_count_by_measure_stance_and_org.get(measure_stance_and_org, 0) > 1:
+                                # Only the newest of this organization's positions is counted
+                                measure_and_stance = measure_stance_and_org[:2]
+                                count_by_measure_and_stance[measure_and_stance] -= one_count['position_count'] - 1
+
+                    for (ballot_item_we_vote_id, stance), position_count in count_by_measure_and_stance.items():
+                        if stance == SUPPORT:
+                            support_count_by_ballot_item_we_vote_id[ballot_item_we_vote_id] = position_count
+                        else:
+                            oppose_count_by_ballot_item_we_vote_id[ballot_item_we_vote_id] = position_count
+                status += "FETCH_POSITIONS_COUNT_FOR_BALLOT_ITEM_LIST-COUNTED "
+            except Exception as e:
+                success = False
+                status += "FETCH_POSITIONS_COUNT_FOR_BALLOT_ITEM_LIST-FAILED "
+                handle_record_not_found_exception(e, logger=logger)
+
+        results = {
+            'success':                                  success,
+            'status':                                   status,
+            'support_count_by_ballot_item_we_vote_id':  support_count_by_ballot_item_we_vote_id,
+            'oppose_count_by_ballot_item_we_vote_id':   oppose_count_by_ballot_item_we_vote_id,
+        }
+        return results
+
     def retrieve_all_positions_for_contest_office(self, retrieve_public_positions,
                                                   contest_office_id, contest_office_we_vote_id,
                                                   stance_we_are_looking_for,
@@ -5944,6 +6195,117 @@ class PositionManager(models.Model):
         }
         return results
 
+    def replace_position_network_scores_for_voter(self, viewing_voter_id, viewing_voter_we_vote_id,
+                                                  google_civic_election_id,
+                                                  candidate_we_vote_id_list, measure_we_vote_id_list,
+                                                  public_position_list_by_ballot_item_we_vote_id,
+                                                  friends_position_list_by_ballot_item_we_vote_id):
+        """
+        Set-based alternative to calling delete_position_network_scores_for_voter_one_ballot_item and
+        update_or_create_position_network_score for every ballot item. We delete every prior score for these ballot
+        items with one query, and insert the new scores with one bulk_create, all inside of one transaction.
+        :param viewing_voter_id: The voter who needs to see the network score
+        :param viewing_voter_we_vote_id: The voter who needs to see the network score
+        :param google_civic_election_id:
+        :param candidate_we_vote_id_list: Every candidate on the voter's ballot
+        :param measure_we_vote_id_list: Every measure on the voter's ballot
+        :param public_position_list_by_ballot_item_we_vote_id: From retrieve_all_positions_for_ballot_item_list
+        :param friends_position_list_by_ballot_item_we_vote_id: From retrieve_all_positions_for_ballot_item_list
+        :return:
+        """
+        status = ""
+        success = False
+        support_or_oppose_exists = False
+        position_network_scores_created = 0
+
+        if not positive_value_exists(viewing_voter_id) or not positive_value_exists(viewing_voter_we_vote_id):
+            status += "REPLACE_POSITION_NETWORK_SCORES-MISSING_VOTER_ID "
+            results = {
+                'success':                          success,
+                'status':                           status,
+                'support_or_oppose_exists':         support_or_oppose_exists,
+                'position_network_scores_created':  position_network_scores_created,
+            }
+            return results
+
+        candidate_we_vote_id_lower_set = set(one_we_vote_id.lower() for one_we_vote_id in candidate_we_vote_id_list
+                                             if positive_value_exists(one_we_vote_id))
+        measure_we_vote_id_lower_set = set(one_we_vote_id.lower() for one_we_vote_id in measure_we_vote_id_list
+                                           if positive_value_exists(one_we_vote_id))
+
+        # Key on (speaker, ballot item) so that, as with update_or_create, the newest position from a speaker wins
+        position_network_score_dict = {}
+        for ballot_item_we_vote_id in candidate_we_vote_id_lower_set | measure_we_vote_id_lower_set:
+            is_candidate = ballot_item_we_vote_id in candidate_we_vote_id_lower_set
+            for is_public_position, position_list_by_ballot_item_we_vote_id in \
+                    ((True, public_position_list_by_ballot_item_we_vote_id),
+                     (False, friends_position_list_by_ballot_item_we_vote_id)):
+                for one_position in position_list_by_ballot_item_we_vote_id.get(ballot_item_we_vote_id, []):
+                    if one_position.is_support_or_positive_rating():
+                        is_support = True
+                    elif one_position.is_oppose_or_negative_rating():
+                        is_support = False
+                    else:
+                        # If not support or oppose, continue to next position
+                        continue
+                    if is_public_position:
+                        organization_we_vote_id = one_position.organization_we_vote_id
+                        friend_voter_we_vote_id = None
+                        speaker_we_vote_id = organization_we_vote_id
+                    else:
+                        organization_we_vote_id = None
+                        friend_voter_we_vote_id = one_position.voter_we_vote_id
+                        speaker_we_vote_id = friend_voter_we_vote_id
+                    if not positive_value_exists(speaker_we_vote_id):
+                        continue
+
+                    speaker_display_name = one_position.speaker_display_name
+                    # If we are saving the voter's own position, and they have a fabricated name, replace with "You"
+                    if friend_voter_we_vote_id and viewing_voter_we_vote_id == friend_voter_we_vote_id:
+                        if speaker_display_name and speaker_display_name.startswith("Voter-"):
+                            speaker_display_name = "You"
+
+                    score_key = (is_public_position, speaker_we_vote_id.lower(), ballot_item_we_vote_id)
+                    position_network_score_dict[score_key] = PositionNetworkScore(
+                        viewing_voter_id=viewing_voter_id,
+                        viewing_voter_we_vote_id=viewing_voter_we_vote_id,
+                        google_civic_election_id=google_civic_election_id,
+                        organization_we_vote_id=organization_we_vote_id,
+                        friend_voter_we_vote_id=friend_voter_we_vote_id,
+                        speaker_display_name=speaker_display_name,
+                        candidate_we_vote_id=one_position.candidate_campaign_we_vote_id if is_candidate else None,
+                        measure_we_vote_id=None if is_candidate else one_position.contest_measure_we_vote_id,
+                        is_support=is_support,
+                        is_oppose=not is_support,
+                    )
+                    support_or_oppose_exists = True
+
+        try:
+            with transaction.atomic():
+                score_queryset = PositionNetworkScore.objects.filter(
+                    Q(viewing_voter_id=viewing_voter_id) | Q(viewing_voter_we_vote_id=viewing_voter_we_vote_id))
+                score_queryset = score_queryset.filter(
+                    Q(candidate_we_vote_id__in=candidate_we_vote_id_list) |
+                    Q(measure_we_vote_id__in=measure_we_vote_id_list))
+                score_queryset.delete()
+
+                PositionNetworkScore.objects.bulk_create(list(position_network_score_dict.values()))
+            position_network_scores_created = len(position_network_score_dict)
+            status += "POSITION_NETWORK_SCORES_REPLACED "
+            success = True
+        except Exception as e:
+            support_or_oppose_exists = False
+            status += "UNABLE_TO_REPLACE_POSITION_NETWORK_SCORES "
+            handle_exception(e, logger=logger, exception_message=status)
+
+        results = {
+            'success':                          success,
+            'status':                           status,
+            'support_or_oppose_exists':         support_or_oppose_exists,
+            'position_network_scores_created':  position_network_scores_created,
+        }
+        return results
+
     def update_position_image_urls_from_candidate(self, position_object, candidate_campaign):
         """
         Update position_object with candidate image urls
@@ -7601,3 +7963,228 @@ class PositionMetricsManager(models.Model):
         total_positions_count = position_entered_count + position_for_friends_count
 
         return total_positions_count
+
+
+class ElectionOrganizationPositions(models.Model):
+    """
+    One row for each organization with public positions (PositionEntered) in an election, kept up to date as
+    positions are saved and deleted. voterGuidesToFollowRetrieve uses this instead of loading every position in
+    the election.
+    """
+    google_civic_election_id = models.PositiveIntegerField(
+        verbose_name="google civic election id", null=False, db_index=True)
+    organization_we_vote_id = models.CharField(
+        verbose_name="we vote permanent id for the organization", max_length=255, null=False)
+    organization_id = models.BigIntegerField(null=True, blank=True)
+    public_positions_count = models.PositiveIntegerField(verbose_name="number of public positions", default=0)
+    date_last_position_changed = models.DateTimeField(verbose_name="date a position last changed", null=True)
+
+    class Meta:
+        unique_together = ('google_civic_election_id', 'organization_we_vote_id')
+
+
+class ElectionOrganizationPositionsIndexed(models.Model):
+    """
+    One row for each election whose ElectionOrganizationPositions were built from all of its positions. Signals only
+    keep an indexed election current, so an election without this row is rebuilt the next time it is asked for.
+    """
+    google_civic_election_id = models.PositiveIntegerField(
+        verbose_name="google civic election id", null=False, unique=True)
+    date_indexed = models.DateTimeField(verbose_name="date the election was indexed", null=True, auto_now=True)
+
+
+class ElectionOrganizationPositionsManager(models.Model):
+
+    def __unicode__(self):
+        return "ElectionOrganizationPositionsManager"
+
+    @staticmethod
+    def public_positions_from_organizations_query(google_civic_election_id):
+        """
+        The public positions that count toward ElectionOrganizationPositions: the same ones voterGuidesToFollowRetrieve
+        used to find by loading every position in the election
+        :param google_civic_election_id:
+        :return:
+        """
+        return PositionEntered.objects.filter(google_civic_election_id=str(google_civic_election_id)) \
+            .filter(organization_id__gt=0) \
+            .exclude(organization_we_vote_id__isnull=True) \
+            .exclude(organization_we_vote_id='')
+
+    def update_election_organization_positions(self, google_civic_election_id, organization_we_vote_id):
+        """
+        Recount one organization's public positions in one election. Called every time a position is saved or deleted.
+        :param google_civic_election_id:
+        :param organization_we_vote_id:
+        :return:
+        """
+        status = ""
+        google_civic_election_id = convert_to_int(google_civic_election_id)
+        if not positive_value_exists(google_civic_election_id) or \
+                not positive_value_exists(organization_we_vote_id):
+            results = {
+                'success':  False,
+                'status':   "UPDATE_ELECTION_ORGANIZATION_POSITIONS-MISSING_ELECTION_OR_ORGANIZATION ",
+            }
+            return results
+
+        try:
+            summary = self.public_positions_from_organizations_query(google_civic_election_id) \
+                .filter(organization_we_vote_id=organization_we_vote_id) \
+                .aggregate(positions_count=Count('id'), latest_organization_id=Max('organization_id'),
+                           latest_date_last_changed=Max('date_last_changed'))
+            if summary['positions_count']:
+                ElectionOrganizationPositions.objects.update_or_create(
+                    google_civic_election_id=google_civic_election_id,
+                    organization_we_vote_id=organization_we_vote_id,
+                    defaults={
+                        'organization_id':              summary['latest_organization_id'],
+                        'public_positions_count':       summary['positions_count'],
+                        'date_last_position_changed':   summary['latest_date_last_changed'],
+                    })
+                status += "ELECTION_ORGANIZATION_POSITIONS_UPDATED "
+            else:
+                ElectionOrganizationPositions.objects.filter(
+                    google_civic_election_id=google_civic_election_id,
+                    organization_we_vote_id=organization_we_vote_id).delete()
+                status += "ELECTION_ORGANIZATION_POSITIONS_REMOVED "
+            success = True
+        except Exception as e:
+            success = False
+            status += "UPDATE_ELECTION_ORGANIZATION_POSITIONS_FAILED " + str(e) + " "
+            handle_exception(e, logger=logger, exception_message=status)
+
+        results = {
+            'success':  success,
+            'status':   status,
+        }
+        return results
+
+    def rebuild_election_organization_positions(self, google_civic_election_id):
+        """
+        Recount every organization's public positions in this election with one grouped query
+        :param google_civic_election_id:
+        :return:
+        """
+        status = ""
+        google_civic_election_id = convert_to_int(google_civic_election_id)
+        election_organization_positions_list = []
+        if not positive_value_exists(google_civic_election_id):
+            results = {
+                'success':                                  False,
+                'status':                                   "REBUILD_ELECTION_ORGANIZATION_POSITIONS-MISSING_ELECTION ",
+                'election_organization_positions_list':     election_organization_positions_list,
+            }
+            return results
+
+        try:
+            summary_list = self.public_positions_from_organizations_query(google_civic_election_id) \
+                .order_by() \
+                .values('organization_we_vote_id') \
+                .annotate(positions_count=Count('id'), latest_organization_id=Max('organization_id'),
+                          latest_date_last_changed=Max('date_last_changed'))
+            for one_summary in summary_list:
+                election_organization_positions_list.append(ElectionOrganizationPositions(
+                    google_civic_election_id=google_civic_election_id,
+                    organization_we_vote_id=one_summary['organization_we_vote_id'],
+                    organization_id=one_summary['latest_organization_id'],
+                    public_positions_count=one_summary['positions_count'],
+                    date_last_position_changed=one_summary['latest_date_last_changed']))
+            with transaction.atomic():
+                ElectionOrganizationPositions.objects.filter(google_civic_election_id=google_civic_election_id).delete()
+                ElectionOrganizationPositions.objects.bulk_create(election_organization_positions_list)
+                ElectionOrganizationPositionsIndexed.objects.update_or_create(
+                    google_civic_election_id=google_civic_election_id)
+            success = True
+            status += "ELECTION_ORGANIZATION_POSITIONS_REBUILT "
+        except Exception as e:
+            success = False
+            status += "REBUILD_ELECTION_ORGANIZATION_POSITIONS_FAILED " + str(e) + " "
+            handle_exception(e, logger=logger, exception_message=status)
+
+        results = {
+            'success':                                  success,
+            'status':                                   status,
+            'election_organization_positions_list':     election_organization_positions_list,
+        }
+        return results
+
+    def retrieve_election_organization_positions_list(self, google_civic_election_id):
+        """
+        The organizations with public positions in this election. An election that hasn't been indexed yet (it has no
+        ElectionOrganizationPositionsIndexed row) is indexed the first time it is asked for.
+        :param google_civic_election_id:
+        :return:
+        """
+        status = ""
+        google_civic_election_id = convert_to_int(google_civic_election_id)
+        election_indexed = False
+        try:
+            election_indexed = ElectionOrganizationPositionsIndexed.objects.filter(
+                google_civic_election_id=google_civic_election_id).exists()
+            election_organization_positions_list = []
+            if election_indexed:
+                election_organization_positions_list = list(
+                    ElectionOrganizationPositions.objects.filter(google_civic_election_id=google_civic_election_id))
+            success = True
+        except Exception as e:
+            election_organization_positions_list = []
+            success = False
+            status += "RETRIEVE_ELECTION_ORGANIZATION_POSITIONS_FAILED " + str(e) + " "
+            handle_exception(e, logger=logger, exception_message=status)
+
+        if success and not election_indexed:
+            results = self.rebuild_election_organization_positions(google_civic_election_id)
+            success = results['success']
+            status += results['status']
+            election_organization_positions_list = results['election_organization_positions_list']
+
+        results = {
+            'success':                                  success,
+            'status':                                   status,
+            'election_organization_positions_list':     election_organization_positions_list,
+        }
+        return results
+
+
+@receiver(pre_save, sender=PositionEntered)
+def remember_position_election_organization_signal(sender, instance, **kwargs):
+    # If this save moves the position to another election or organization, the old one needs to be recounted too
+    instance.election_organization_before_save = None
+    if instance.pk:
+        instance.election_organization_before_save = PositionEntered.objects.filter(id=instance.pk) \
+            .values_list('google_civic_election_id', 'organization_we_vote_id', 'organization_id').first()
+
+
+@receiver(post_save, sender=PositionEntered)
+def save_position_election_organization_signal(sender, instance, created, **kwargs):
+    election_organization = (instance.google_civic_election_id, instance.organization_we_vote_id)
+    election_organization_before_save = getattr(instance, 'election_organization_before_save', None)
+    if not created and election_organization_before_save and \
+            election_organization_before_save[:2] == election_organization and \
+            positive_value_exists(election_organization_before_save[2]) == positive_value_exists(
+                instance.organization_id):
+        # Most saves don't change which public positions an organization has, so the count stays the same
+        if positive_value_exists(instance.organization_id):
+            ElectionOrganizationPositions.objects.filter(
+                google_civic_election_id=convert_to_int(instance.google_civic_election_id),
+                organization_we_vote_id=instance.organization_we_vote_id).update(
+                date_last_position_changed=instance.date_last_changed)
+        return
+
+    election_organization_list = [election_organization]
+    if election_organization_before_save and election_organization_before_save[:2] not in election_organization_list:
+        election_organization_list.append(election_organization_before_save[:2])
+    election_organization_positions_manager = ElectionOrganizationPositionsManager()
+    for google_civic_election_id, organization_we_vote_id in election_organization_list:
+        if positive_value_exists(google_civic_election_id) and positive_value_exists(organization_we_vote_id):
+            election_organization_positions_manager.update_election_organization_positions(
+                google_civic_election_id, organization_we_vote_id)
+
+
+@receiver(post_delete, sender=PositionEntered)
+def delete_position_election_organization_signal(sender, instance, **kwargs):
+    if positive_value_exists(instance.google_civic_election_id) and \
+            positive_value_exists(instance.organization_we_vote_id):
+        ElectionOrganizationPositionsManager().update_election_organization_positions(
+            instance.google_civic_election_id, instance.organization_we_vote_id)
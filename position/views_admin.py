@@ -16,6 +16,7 @@ from django.contrib.auth.decorators import login_required
 from django.contrib.messages import get_messages
 from django.http import HttpResponseRedirect
 from django.shortcuts import render
+from django.views.decorators.gzip import gzip_page
 from django.db import (IntegrityError)
 from django.db.models import Q
 from election.models import ElectionManager
@@ -25,7 +26,7 @@ from measure.controllers import push_contest_measure_data_to_other_table_caches
 from office.controllers import push_contest_office_data_to_other_table_caches
 from voter.models import voter_has_authority
 import wevote_functions.admin
-from wevote_functions.functions import convert_to_int, positive_value_exists
+from wevote_functions.functions import convert_to_int, positive_value_exists, sync_out_json_response
 from django.http import HttpResponse
 import json
 
@@ -36,6 +37,7 @@ logger = wevote_functions.admin.get_logger(__name__)
 
 
 # This page does not need to be protected.
+@gzip_page
 def positions_sync_out_view(request):  # positionsSyncOut
     google_civic_election_id = convert_to_int(request.GET.get('google_civic_election_id', 0))
 
@@ -63,23 +65,20 @@ def positions_sync_out_view(request):  # positionsSyncOut
         position_list_query = position_list_query.extra(
             select={'date_last_changed': "to_char(date_last_changed, 'YYYY-MM-DD HH24:MI:SS')"})
 
-        position_list_dict = position_list_query.values(
-            'we_vote_id', 'ballot_item_display_name', 'ballot_item_image_url_https',
-            'ballot_item_twitter_handle', 'speaker_display_name',
-            'speaker_image_url_https', 'speaker_twitter_handle', 'date_entered',
-            'date_last_changed', 'organization_we_vote_id', 'voter_we_vote_id',
-            'public_figure_we_vote_id', 'google_civic_election_id', 'state_code',
-            'vote_smart_rating_id', 'vote_smart_time_span', 'vote_smart_rating',
-            'vote_smart_rating_name', 'contest_office_we_vote_id',
-            'candidate_campaign_we_vote_id', 'google_civic_candidate_name',
-            'politician_we_vote_id', 'contest_measure_we_vote_id', 'stance',
-            'statement_text', 'statement_html', 'more_info_url', 'from_scraper',
-            'organization_certified', 'volunteer_certified', 'voter_entering_position',
-            'tweet_source_id', 'twitter_user_entered_position')
-
-        if position_list_dict:
-            position_list_json = list(position_list_dict)
-            return HttpResponse(json.dumps(position_list_json), content_type='application/json')
+        position_field_list = ['we_vote_id', 'ballot_item_display_name', 'ballot_item_image_url_https',
+                               'ballot_item_twitter_handle', 'speaker_display_name', 'speaker_image_url_https',
+                               'speaker_twitter_handle', 'date_entered', 'date_last_changed',
+                               'organization_we_vote_id', 'voter_we_vote_id', 'public_figure_we_vote_id',
+                               'google_civic_election_id', 'state_code', 'vote_smart_rating_id',
+                               'vote_smart_time_span', 'vote_smart_rating', 'vote_smart_rating_name',
+                               'contest_office_we_vote_id', 'candidate_campaign_we_vote_id',
+                               'google_civic_candidate_name', 'politician_we_vote_id', 'contest_measure_we_vote_id',
+                               'stance', 'statement_text', 'statement_html', 'more_info_url', 'from_scraper',
+                               'organization_certified', 'volunteer_certified', 'voter_entering_position',
+                               'tweet_source_id', 'twitter_user_entered_position']
+        return sync_out_json_response(request, position_list_query, position_field_list,
+                                      {'success': False, 'status': 'POSITION_LIST_MISSING'},
+                                      updated_since_field='date_last_changed')
     except Exception as e:
         handle_record_not_found_exception(e, logger=logger)
 
@@ -110,7 +109,8 @@ def positions_import_from_master_server_view(request):
         return HttpResponseRedirect(reverse('admin_tools:sync_dashboard', args=()) + "?google_civic_election_id=" +
                                     str(google_civic_election_id) + "&state_code=" + str(state_code))
 
-    results = positions_import_from_master_server(request, google_civic_election_id)
+    start_over = positive_value_exists(request.GET.get('start_over', False))
+    results = positions_import_from_master_server(request, google_civic_election_id, start_over=start_over)
 
     if not results['success']:
         messages.add_message(request, messages.ERROR, results['status'])
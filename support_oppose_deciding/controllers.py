@@ -11,7 +11,7 @@ from django.http import HttpResponse
 from follow.models import FollowOrganizationList
 import json
 from position.controllers import update_or_create_position_network_score_wrapper
-from position.models import ANY_STANCE, FRIENDS_ONLY, SUPPORT, OPPOSE, PositionManager, PositionListManager, PUBLIC_ONLY
+from position.models import ANY_STANCE, SUPPORT, OPPOSE, PositionManager, PositionListManager
 from voter.models import fetch_voter_id_from_voter_device_link, VoterManager
 import wevote_functions.admin
 from wevote_functions.functions import convert_to_int, is_voter_device_id_valid, positive_value_exists
@@ -383,109 +383,55 @@ def positions_count_for_all_ballot_items_for_api(  # positionsCountForAllBallotI
     # Add yourself as a friend so your opinions show up
     friends_we_vote_id_list.append(voter_we_vote_id)
 
-    # ballot_item_list is populated with contest_office and contest_measure entries
+    # ballot_item_list is populated with contest_office and contest_measure entries. We collect every candidate and
+    #  measure first, so we can count the positions for all of them at once instead of four queries per ballot item.
+    ballot_item_we_vote_id_list = []
+    candidate_we_vote_id_list = []
+    measure_we_vote_id_list = []
+    office_we_vote_id_list = [one_ballot_item.contest_office_we_vote_id for one_ballot_item in ballot_item_list
+                              if one_ballot_item.is_contest_office()]
+    candidate_results = candidate_list_object.retrieve_candidates_for_office_list(
+        office_we_vote_id_list=office_we_vote_id_list, only_fields=['we_vote_id'], read_only=read_only)
+    candidate_list_by_office_we_vote_id = candidate_results['candidate_list_by_office_we_vote_id']
     for one_ballot_item in ballot_item_list:
-        # Retrieve all positions for each ballot item
         if one_ballot_item.is_contest_office():
-            results = candidate_list_object.retrieve_all_candidates_for_office(
-                0, one_ballot_item.contest_office_we_vote_id, read_only)
-            success = results['success']
-            candidate_list = results['candidate_list']
-
-            if success:
-                for candidate in candidate_list:
-                    # Loop through all candidates under this office
-
-                    # Public Positions
-                    public_support_count_for_one_ballot_item = \
-                        position_list_manager.fetch_positions_count_for_candidate_campaign(
-                            0,
-                            candidate.we_vote_id,
-                            SUPPORT,
-                            PUBLIC_ONLY,
-                            organizations_followed_we_vote_id_list=organizations_followed_by_voter_by_we_vote_id
-                        )
-                    public_oppose_count_for_one_ballot_item = \
-                        position_list_manager.fetch_positions_count_for_candidate_campaign(
-                            0,
-                            candidate.we_vote_id,
-                            OPPOSE,
-                            PUBLIC_ONLY,
-                            organizations_followed_we_vote_id_list=organizations_followed_by_voter_by_we_vote_id
-                        )
-
-                    # Friend's-only Positions
-                    friends_only_support_count_for_one_ballot_item = \
-                        position_list_manager.fetch_positions_count_for_candidate_campaign(
-                            0,
-                            candidate.we_vote_id,
-                            SUPPORT,
-                            FRIENDS_ONLY,
-                            friends_we_vote_id_list=friends_we_vote_id_list
-                        )
-                    friends_only_oppose_count_for_one_ballot_item = \
-                        position_list_manager.fetch_positions_count_for_candidate_campaign(
-                            0,
-                            candidate.we_vote_id,
-                            OPPOSE,
-                            FRIENDS_ONLY,
-                            friends_we_vote_id_list=friends_we_vote_id_list
-                        )
-
-                    support_count_for_one_ballot_item = public_support_count_for_one_ballot_item + \
-                        friends_only_support_count_for_one_ballot_item
-                    oppose_count_for_one_ballot_item = public_oppose_count_for_one_ballot_item + \
-                        friends_only_oppose_count_for_one_ballot_item
-
-                    one_ballot_item_results = {
-                        'ballot_item_we_vote_id': candidate.we_vote_id,
-                        'support_count': support_count_for_one_ballot_item,
-                        'oppose_count': oppose_count_for_one_ballot_item,
-                    }
-                    position_counts_list_results.append(one_ballot_item_results)
+            for candidate in candidate_list_by_office_we_vote_id.get(one_ballot_item.contest_office_we_vote_id, []):
+                # Loop through all candidates under this office
+                ballot_item_we_vote_id_list.append(candidate.we_vote_id)
+                candidate_we_vote_id_list.append(candidate.we_vote_id)
         elif one_ballot_item.is_contest_measure():
-            # Public Positions
-            retrieve_public_positions_now = True  # The alternate is positions for friends-only
-            most_recent_only = True
-            public_support_positions_list_for_one_ballot_item = \
-                position_list_manager.retrieve_all_positions_for_contest_measure(
-                    retrieve_public_positions_now, 0, one_ballot_item.contest_measure_we_vote_id,
-                    SUPPORT, most_recent_only,
-                    organizations_followed_we_vote_id_list=organizations_followed_by_voter_by_we_vote_id,
-                    read_only=True)
-            public_oppose_positions_list_for_one_ballot_item = \
-                position_list_manager.retrieve_all_positions_for_contest_measure(
-                    retrieve_public_positions_now, 0, one_ballot_item.contest_measure_we_vote_id,
-                    OPPOSE, most_recent_only,
-                    organizations_followed_we_vote_id_list=organizations_followed_by_voter_by_we_vote_id,
-                    read_only=True)
-
-            # Friend's-only Positions
-            retrieve_public_positions_now = False  # Return friends-only positions counts
-            most_recent_only = True
-            friends_support_positions_list_for_one_ballot_item = \
-                position_list_manager.retrieve_all_positions_for_contest_measure(
-                    retrieve_public_positions_now, 0, one_ballot_item.contest_measure_we_vote_id,
-                    SUPPORT, most_recent_only, friends_we_vote_id_list, read_only=True)
-            friends_oppose_positions_list_for_one_ballot_item = \
-                position_list_manager.retrieve_all_positions_for_contest_measure(
-                    retrieve_public_positions_now, 0, one_ballot_item.contest_measure_we_vote_id,
-                    OPPOSE, most_recent_only, friends_we_vote_id_list, read_only=True)
-
-            support_positions_list_for_one_ballot_item = public_support_positions_list_for_one_ballot_item + \
-                friends_support_positions_list_for_one_ballot_item
-            oppose_positions_list_for_one_ballot_item = public_oppose_positions_list_for_one_ballot_item + \
-                friends_oppose_positions_list_for_one_ballot_item
-
-            one_ballot_item_results = {
-                'ballot_item_we_vote_id': one_ballot_item.contest_measure_we_vote_id,
-                'support_count': len(support_positions_list_for_one_ballot_item),
-                'oppose_count': len(oppose_positions_list_for_one_ballot_item),
-            }
-            position_counts_list_results.append(one_ballot_item_results)
-        else:
-            # Skip the rest of this loop
-            continue
+            ballot_item_we_vote_id_list.append(one_ballot_item.contest_measure_we_vote_id)
+            measure_we_vote_id_list.append(one_ballot_item.contest_measure_we_vote_id)
+
+    # Public Positions
+    retrieve_public_positions_now = True  # The alternate is positions for friends-only
+    public_count_results = position_list_manager.fetch_positions_count_for_ballot_item_list(
+        retrieve_public_positions_now, candidate_we_vote_id_list, measure_we_vote_id_list,
+        organizations_followed_we_vote_id_list=organizations_followed_by_voter_by_we_vote_id,
+        read_only=read_only)
+    status += public_count_results['status']
+
+    # Friend's-only Positions
+    retrieve_public_positions_now = False  # Return friends-only positions counts
+    friends_count_results = position_list_manager.fetch_positions_count_for_ballot_item_list(
+        retrieve_public_positions_now, candidate_we_vote_id_list, measure_we_vote_id_list,
+        friends_we_vote_id_list=friends_we_vote_id_list, read_only=read_only)
+    status += friends_count_results['status']
+
+    for ballot_item_we_vote_id in ballot_item_we_vote_id_list:
+        ballot_item_we_vote_id_lower = ballot_item_we_vote_id.lower() if ballot_item_we_vote_id else ""
+        support_count_for_one_ballot_item = \
+            public_count_results['support_count_by_ballot_item_we_vote_id'].get(ballot_item_we_vote_id_lower, 0) + \
+            friends_count_results['support_count_by_ballot_item_we_vote_id'].get(ballot_item_we_vote_id_lower, 0)
+        oppose_count_for_one_ballot_item = \
+            public_count_results['oppose_count_by_ballot_item_we_vote_id'].get(ballot_item_we_vote_id_lower, 0) + \
+            friends_count_results['oppose_count_by_ballot_item_we_vote_id'].get(ballot_item_we_vote_id_lower, 0)
+        one_ballot_item_results = {
+            'ballot_item_we_vote_id': ballot_item_we_vote_id,
+            'support_count': support_count_for_one_ballot_item,
+            'oppose_count': oppose_count_for_one_ballot_item,
+        }
+        position_counts_list_results.append(one_ballot_item_results)
 
     json_data = {
         'success':                  True,
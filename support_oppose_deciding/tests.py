@@ -0,0 +1,126 @@
+# support_oppose_deciding/tests.py
+# Brought to you by We Vote. Be good.
+# -*- coding: UTF-8 -*-
+
+from django.test import TransactionTestCase
+
+from position.models import FRIENDS_ONLY, OPPOSE, PERCENT_RATING, PositionEntered, PositionForFriends, \
+    PositionListManager, PUBLIC_ONLY, SUPPORT
+
+
+class PositionsCountForBallotItemListTestCase(TransactionTestCase):
+    """
+    The counts for a whole ballot must match the counts we used to retrieve one candidate or measure at a time.
+    TransactionTestCase so the positions we save are visible to the 'readonly' test database mirror.
+    """
+    candidate_we_vote_id_list = ['wv01cand1', 'wv01cand2', 'wv01cand3']
+    measure_we_vote_id_list = ['wv01meas1', 'wv01meas2']
+    organizations_followed_we_vote_id_list = ['wv01org1', 'wv01org2', 'wv01org3']
+    friends_we_vote_id_list = ['wv01voter1', 'wv01voter2']
+
+    def setUp(self):
+        public_positions = [
+            ('wv01org1', 'wv01cand1', '', SUPPORT, None, ''),
+            ('wv01org2', 'wv01cand1', '', OPPOSE, None, ''),
+            ('wv01org3', 'wv01cand1', '', PERCENT_RATING, 80, ''),
+            ('wv01org3', 'wv01cand2', '', PERCENT_RATING, 20, ''),
+            ('wv01org2', 'wv01cand2', '', PERCENT_RATING, 50, ''),
+            ('wv01org9', 'wv01cand2', '', SUPPORT, None, ''),  # Not followed
+            # Only the newest of org1's Vote Smart positions counts
+            ('wv01org1', '', 'wv01meas1', SUPPORT, None, '2014'),
+            ('wv01org1', '', 'wv01meas1', SUPPORT, None, '2016'),
+            ('wv01org1', '', 'wv01meas1', SUPPORT, None, ''),
+            ('wv01org2', '', 'wv01meas1', SUPPORT, None, '2016'),
+            ('wv01org2', '', 'wv01meas1', SUPPORT, None, ''),
+            ('wv01org3', '', 'wv01meas1', OPPOSE, None, ''),
+            ('wv01org3', '', 'wv01meas2', OPPOSE, None, '2012'),
+            ('wv01org3', '', 'wv01meas2', OPPOSE, None, '2012'),
+        ]
+        for number, (organization_we_vote_id, candidate_we_vote_id, measure_we_vote_id, stance,
+                     vote_smart_rating_integer, vote_smart_time_span) in enumerate(public_positions):
+            PositionEntered.objects.create(
+                we_vote_id='wv01pos{number}'.format(number=number),
+                organization_we_vote_id=organization_we_vote_id,
+                candidate_campaign_we_vote_id=candidate_we_vote_id,
+                contest_measure_we_vote_id=measure_we_vote_id,
+                stance=stance,
+                vote_smart_rating_integer=vote_smart_rating_integer,
+                vote_smart_time_span=vote_smart_time_span)
+
+        friends_positions = [
+            ('wv01voter1', 'wv01cand2', '', SUPPORT),
+            ('wv01voter2', 'wv01cand2', '', SUPPORT),
+            ('wv01voter2', 'wv01cand3', '', OPPOSE),
+            ('wv01voter3', 'wv01cand3', '', OPPOSE),  # Not a friend
+            ('wv01voter1', '', 'wv01meas2', SUPPORT),
+        ]
+        for number, (voter_we_vote_id, candidate_we_vote_id, measure_we_vote_id, stance) in \
+                enumerate(friends_positions):
+            PositionForFriends.objects.create(
+                we_vote_id='wv01posf{number}'.format(number=number),
+                voter_we_vote_id=voter_we_vote_id,
+                candidate_campaign_we_vote_id=candidate_we_vote_id,
+                contest_measure_we_vote_id=measure_we_vote_id,
+                stance=stance)
+
+    def test_counts_match_one_ballot_item_at_a_time(self):
+        position_list_manager = PositionListManager()
+        public_count_results = position_list_manager.fetch_positions_count_for_ballot_item_list(
+            True, self.candidate_we_vote_id_list, self.measure_we_vote_id_list,
+            organizations_followed_we_vote_id_list=self.organizations_followed_we_vote_id_list)
+        friends_count_results = position_list_manager.fetch_positions_count_for_ballot_item_list(
+            False, self.candidate_we_vote_id_list, self.measure_we_vote_id_list,
+            friends_we_vote_id_list=self.friends_we_vote_id_list)
+        self.assertTrue(public_count_results['success'])
+        self.assertTrue(friends_count_results['success'])
+
+        for candidate_we_vote_id in self.candidate_we_vote_id_list:
+            for stance, count_key in ((SUPPORT, 'support_count_by_ballot_item_we_vote_id'),
+                                      (OPPOSE, 'oppose_count_by_ballot_item_we_vote_id')):
+                public_count = position_list_manager.fetch_positions_count_for_candidate_campaign(
+                    0, candidate_we_vote_id, stance, PUBLIC_ONLY,
+                    organizations_followed_we_vote_id_list=self.organizations_followed_we_vote_id_list)
+                friends_count = position_list_manager.fetch_positions_count_for_candidate_campaign(
+                    0, candidate_we_vote_id, stance, FRIENDS_ONLY,
+                    friends_we_vote_id_list=self.friends_we_vote_id_list)
+                self.assertEqual(public_count_results[count_key].get(candidate_we_vote_id, 0), public_count)
+                self.assertEqual(friends_count_results[count_key].get(candidate_we_vote_id, 0), friends_count)
+
+        for measure_we_vote_id in self.measure_we_vote_id_list:
+            for stance, count_key in ((SUPPORT, 'support_count_by_ballot_item_we_vote_id'),
+                                      (OPPOSE, 'oppose_count_by_ballot_item_we_vote_id')):
+                public_position_list = position_list_manager.retrieve_all_positions_for_contest_measure(
+                    True, 0, measure_we_vote_id, stance, True,
+                    organizations_followed_we_vote_id_list=self.organizations_followed_we_vote_id_list,
+                    read_only=True)
+                friends_position_list = position_list_manager.retrieve_all_positions_for_contest_measure(
+                    False, 0, measure_we_vote_id, stance, True, self.friends_we_vote_id_list, read_only=True)
+                self.assertEqual(public_count_results[count_key].get(measure_we_vote_id, 0),
+                                 len(public_position_list))
+                self.assertEqual(friends_count_results[count_key].get(measure_we_vote_id, 0),
+                                 len(friends_position_list))
+
+        # Spot check the counts, so the test fails loudly if both versions drift together
+        self.assertEqual(public_count_results['support_count_by_ballot_item_we_vote_id']['wv01cand1'], 2)
+        self.assertEqual(public_count_results['oppose_count_by_ballot_item_we_vote_id']['wv01cand2'], 1)
+        self.assertEqual(public_count_results['support_count_by_ballot_item_we_vote_id']['wv01meas1'], 3)
+        self.assertEqual(public_count_results['oppose_count_by_ballot_item_we_vote_id']['wv01meas2'], 1)
+        self.assertEqual(friends_count_results['support_count_by_ballot_item_we_vote_id']['wv01cand2'], 2)
+        self.assertEqual(friends_count_results['oppose_count_by_ballot_item_we_vote_id']['wv01cand3'], 1)
+
+    def test_no_speakers_means_no_counts(self):
+        position_list_manager = PositionListManager()
+        results = position_list_manager.fetch_positions_count_for_ballot_item_list(
+            True, self.candidate_we_vote_id_list, self.measure_we_vote_id_list,
+            organizations_followed_we_vote_id_list=[])
+        self.assertEqual(results['support_count_by_ballot_item_we_vote_id'], {})
+        self.assertEqual(results['oppose_count_by_ballot_item_we_vote_id'], {})
+
+    def test_ballot_item_we_vote_ids_match_case_insensitive(self):
+        PositionEntered.objects.create(we_vote_id='wv01posupper', organization_we_vote_id='wv01org2',
+                                       candidate_campaign_we_vote_id='WV01CAND3', stance=SUPPORT)
+        results = PositionListManager().fetch_positions_count_for_ballot_item_list(
+            True, ['wv01Cand3'], ['WV01MEAS1'],
+            organizations_followed_we_vote_id_list=self.organizations_followed_we_vote_id_list)
+        self.assertEqual(results['support_count_by_ballot_item_we_vote_id']['wv01cand3'], 1)
+        self.assertEqual(results['support_count_by_ballot_item_we_vote_id']['wv01meas1'], 3)
@@ -4,9 +4,10 @@
 
 from config.base import get_environment_variable
 from exception.models import handle_exception
+import threading
 import tweepy
 import wevote_functions.admin
-from wevote_functions.functions import positive_value_exists
+from wevote_functions.functions import convert_to_int, positive_value_exists
 
 logger = wevote_functions.admin.get_logger(__name__)
 
@@ -17,6 +18,31 @@ TWITTER_CONSUMER_KEY = get_environment_variable("TWITTER_CONSUMER_KEY")
 TWITTER_CONSUMER_SECRET = get_environment_variable("TWITTER_CONSUMER_SECRET")
 TWITTER_ACCESS_TOKEN = get_environment_variable("TWITTER_ACCESS_TOKEN")
 TWITTER_ACCESS_TOKEN_SECRET = get_environment_variable("TWITTER_ACCESS_TOKEN_SECRET")
+# The most users Twitter's users/lookup endpoint returns in one call
+TWITTER_USERS_LOOKUP_MAXIMUM = 100
+
+
+class TwitterApiClientPool(object):
+    """
+    One tweepy client per process, so the OAuth handler and HTTP connection are set up once. We use it from admin
+    page requests, so when we run out of requests the client fails right away with a RateLimitError, instead of
+    holding the request open for up to 15 minutes waiting for the next rate limit window.
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.client = None
+
+    def get_client(self):
+        if self.client is None:
+            with self.lock:
+                if self.client is None:
+                    auth = tweepy.OAuthHandler(TWITTER_CONSUMER_KEY, TWITTER_CONSUMER_SECRET)
+                    auth.set_access_token(TWITTER_ACCESS_TOKEN, TWITTER_ACCESS_TOKEN_SECRET)
+                    self.client = tweepy.API(auth, wait_on_rate_limit=False, compression=True)
+        return self.client
+
+
+twitter_api_client_pool = TwitterApiClientPool()
 
 
 def retrieve_twitter_user_info(twitter_user_id, twitter_handle=''):
@@ -79,3 +105,64 @@ def retrieve_twitter_user_info(twitter_user_id, twitter_handle=''):
         'twitter_json':         twitter_json,
     }
     return results
+
+
+def retrieve_twitter_user_info_in_bulk(twitter_user_id_list=[], twitter_handle_list=[]):
+    """
+    Retrieve many Twitter users with Twitter's users/lookup endpoint, 100 per call, instead of one call per user.
+    Users that Twitter doesn't return (suspended, deleted or renamed) are simply missing from the results.
+    If we run out of Twitter requests part way through, we stop and return success False.
+    :param twitter_user_id_list:
+    :param twitter_handle_list:
+    :return:
+    """
+    status = ""
+    success = True
+    twitter_json_by_twitter_user_id = {}
+    twitter_json_by_twitter_handle = {}
+    number_of_twitter_api_calls = 0
+
+    twitter_user_id_list = list(set(convert_to_int(twitter_user_id) for twitter_user_id in twitter_user_id_list
+                                    if positive_value_exists(twitter_user_id)))
+    twitter_handle_list = list(set(twitter_handle.lower() for twitter_handle in twitter_handle_list
+                                   if positive_value_exists(twitter_handle) and
+                                   twitter_handle.lower() not in ('false', 'none')))
+    lookup_list = [('user_ids', twitter_user_id_list[index:index + TWITTER_USERS_LOOKUP_MAXIMUM])
+                   for index in range(0, len(twitter_user_id_list), TWITTER_USERS_LOOKUP_MAXIMUM)]
+    lookup_list += [('screen_names', twitter_handle_list[index:index + TWITTER_USERS_LOOKUP_MAXIMUM])
+                    for index in range(0, len(twitter_handle_list), TWITTER_USERS_LOOKUP_MAXIMUM)]
+
+    api = twitter_api_client_pool.get_client()
+    for lookup_by, one_lookup_list in lookup_list:
+        try:
+            number_of_twitter_api_calls += 1
+            twitter_user_list = api.lookup_users(**{lookup_by: one_lookup_list})
+        except tweepy.RateLimitError as rate_limit_error:
+            success = False
+            status += "TWITTER_RATE_LIMIT_ERROR "
+            handle_exception(rate_limit_error, logger=logger, exception_message=status)
+            break
+        except tweepy.error.TweepError as error_instance:
+            if error_instance.api_code == 17:
+                # "No user matches for specified terms", which just means none of this batch still exists
+                continue
+            success = False
+            status += "TWITTER_BULK_RETRIEVE_FAILED: " + str(error_instance.reason) + " "
+            handle_exception(error_instance, logger=logger, exception_message=status)
+            break
+        for twitter_user in twitter_user_list:
+            twitter_json = twitter_user._json
+            twitter_json_by_twitter_user_id[convert_to_int(twitter_json['id'])] = twitter_json
+            twitter_json_by_twitter_handle[twitter_json['screen_name'].lower()] = twitter_json
+
+    if success:
+        status += "TWITTER_BULK_RETRIEVE_SUCCESSFUL "
+    results = {
+        'success':                          success,
+        'status':                           status,
+        'number_of_twitter_api_calls':      number_of_twitter_api_calls,
+        'twitter_json_by_twitter_user_id':  twitter_json_by_twitter_user_id,
+        'twitter_json_by_twitter_handle':   twitter_json_by_twitter_handle,
+    }
+    return results
+
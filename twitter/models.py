@@ -7,6 +7,7 @@ import tweepy
 import wevote_functions.admin
 from config.base import get_environment_variable
 from django.db import models
+from django.db.models.functions import Lower
 from exception.models import handle_record_found_more_than_one_exception
 from twitter.functions import retrieve_twitter_user_info
 from wevote_functions.functions import convert_to_int, generate_random_string, positive_value_exists
@@ -439,6 +440,27 @@ class TwitterUserManager(models.Model):
         }
         return results
 
+    def retrieve_twitter_ids_for_organization_we_vote_id_list(self, organization_we_vote_id_list):
+        """
+        The twitter_id from TwitterLinkToOrganization for many organizations with one query
+        :param organization_we_vote_id_list:
+        :return: dict of twitter_id by lower case organization_we_vote_id
+        """
+        twitter_id_by_organization_we_vote_id = {}
+        organization_we_vote_id_list = [organization_we_vote_id.lower()
+                                        for organization_we_vote_id in organization_we_vote_id_list
+                                        if positive_value_exists(organization_we_vote_id)]
+        if not len(organization_we_vote_id_list):
+            return twitter_id_by_organization_we_vote_id
+
+        twitter_link_query = TwitterLinkToOrganization.objects.annotate(
+            organization_we_vote_id_lower=Lower('organization_we_vote_id')).filter(
+            organization_we_vote_id_lower__in=organization_we_vote_id_list)
+        for organization_we_vote_id, twitter_id in twitter_link_query.values_list('organization_we_vote_id',
+                                                                                   'twitter_id'):
+            twitter_id_by_organization_we_vote_id[organization_we_vote_id.lower()] = twitter_id
+        return twitter_id_by_organization_we_vote_id
+
     def retrieve_twitter_link_to_voter_from_twitter_user_id(self, twitter_user_id):
         return self.retrieve_twitter_link_to_voter(twitter_user_id)
 
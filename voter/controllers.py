@@ -1,7 +1,8 @@
 # voter/controllers.py
 # Brought to you by We Vote. Be good.
 # -*- coding: UTF-8 -*-
-from .models import BALLOT_ADDRESS, fetch_voter_id_from_voter_device_link, Voter, VoterAddressManager, \
+from .models import BALLOT_ADDRESS, fetch_voter_id_from_voter_device_link, \
+    invalidate_voter_device_link_cache, invalidate_voter_device_link_cache_for_voter, Voter, VoterAddressManager, \
     VoterDeviceLink, VoterDeviceLinkManager, VoterManager
 from django.http import HttpResponse
 from analytics.controllers import move_analytics_info_to_another_voter
@@ -1627,6 +1628,11 @@ def voter_merge_two_accounts_for_api(  # voterMergeTwoAccounts
     else:
         status += "VOTER_DEVICE_LINK_NOT_UPDATED "
 
+    # Look up the device links for either account again for the rest of this request
+    invalidate_voter_device_link_cache(voter_device_id)
+    invalidate_voter_device_link_cache_for_voter(voter.id)
+    invalidate_voter_device_link_cache_for_voter(new_owner_voter.id)
+
     # Data healing scripts
     repair_results = position_list_manager.repair_all_positions_for_voter(new_owner_voter.id)
     status += repair_results['status']
@@ -2520,6 +2526,9 @@ def voter_sign_out_for_api(voter_device_id, sign_out_all_devices=False):  # vote
         results = voter_device_link_manager.delete_voter_device_link(voter_device_id)
     status += results['status']
 
+    # Make sure the rest of this request no longer resolves this voter_device_id
+    invalidate_voter_device_link_cache(voter_device_id)
+
     results = {
         'success':  results['success'],
         'status':   status,
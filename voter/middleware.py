@@ -0,0 +1,20 @@
+# voter/middleware.py
+# Brought to you by We Vote. Be good.
+# -*- coding: UTF-8 -*-
+
+from voter.models import clear_voter_cache_request_memo
+
+
+class VoterCacheRequestMemoMiddleware(object):
+    """
+    The voter lookup cache keeps a memo for the life of one request, so that a controller that resolves the same
+    voter_device_id several times only goes to the database once. Start and end every
+    request with an empty memo, since worker threads are reused between requests.
+    """
+    def process_request(self, request):
+        clear_voter_cache_request_memo()
+        return None
+
+    def process_response(self, request, response):
+        clear_voter_cache_request_memo()
+        return response
@@ -13,8 +13,9 @@ from twitter.models import TwitterUserManager
 from validate_email import validate_email
 import wevote_functions.admin
 from wevote_functions.functions import extract_state_code_from_address_string, convert_to_int, \
-    generate_voter_device_id, get_voter_api_device_id, positive_value_exists
+    generate_voter_device_id, get_voter_api_device_id, LeastRecentlyUsedCache, positive_value_exists
 from wevote_settings.models import fetch_next_we_vote_id_voter_integer, fetch_site_unique_id_prefix
+import threading
 
 
 logger = wevote_functions.admin.get_logger(__name__)
@@ -1963,7 +1964,11 @@ class VoterDeviceLinkManager(models.Model):
 
         try:
             if positive_value_exists(voter_id):
+                voter_device_id_list = list(VoterDeviceLink.objects.filter(voter_id=voter_id).values_list(
+                    'voter_device_id', flat=True))
                 VoterDeviceLink.objects.filter(voter_id=voter_id).delete()
+                for one_voter_device_id in voter_device_id_list:
+                    invalidate_voter_device_link_cache(one_voter_device_id)
                 status = "DELETE_ALL_VOTER_DEVICE_LINKS_SUCCESSFUL"
                 success = True
             else:
@@ -1983,6 +1988,7 @@ class VoterDeviceLinkManager(models.Model):
         try:
             if positive_value_exists(voter_device_id):
                 VoterDeviceLink.objects.filter(voter_device_id=voter_device_id).delete()
+                invalidate_voter_device_link_cache(voter_device_id)
                 status = "DELETE_VOTER_DEVICE_LINK_SUCCESSFUL"
                 success = True
             else:
@@ -2141,6 +2147,8 @@ class VoterDeviceLinkManager(models.Model):
                 if positive_value_exists(state_code):
                     voter_device_link.state_code = state_code
                 voter_device_link.save()
+                if voter_object and positive_value_exists(voter_object.id):
+                    invalidate_voter_device_link_cache(voter_device_link.voter_device_id)
 
                 voter_device_link_id = voter_device_link.id
             else:
@@ -2165,32 +2173,127 @@ class VoterDeviceLinkManager(models.Model):
         return results
 
 
+# Voter lookup cache
+# voter_device_id -> voter_id, and voter_id <-> voter_we_vote_id, are looked up several times in almost every API call.
+# We remember them for the life of one request (see voter.middleware). Nothing is kept between requests, since a
+# per-process cache can't be cleared in the other worker processes when a device link changes.
+# Code that runs outside of a request (management commands, background jobs and their worker threads) clears the
+# memo between units of work. In case one doesn't, the memo is also limited in size, and entries expire quickly.
+VOTER_DEVICE_LINK_CACHE_PREFIX = 'voter_device_link:'
+VOTER_WE_VOTE_ID_CACHE_PREFIX = 'voter_we_vote_id:'
+VOTER_ID_CACHE_PREFIX = 'voter_id:'
+VOTER_CACHE_REQUEST_MEMO_MAX_ENTRIES = 1000
+VOTER_CACHE_REQUEST_MEMO_TIMEOUT_SECONDS = 60
+
+voter_cache_request_memo = threading.local()
+
+
+def get_voter_cache_request_memo():
+    if not hasattr(voter_cache_request_memo, 'values'):
+        voter_cache_request_memo.values = LeastRecentlyUsedCache(
+            max_entries=VOTER_CACHE_REQUEST_MEMO_MAX_ENTRIES, timeout_seconds=VOTER_CACHE_REQUEST_MEMO_TIMEOUT_SECONDS)
+    return voter_cache_request_memo.values
+
+
+def clear_voter_cache_request_memo():
+    get_voter_cache_request_memo().clear()
+
+
+def fetch_from_voter_cache(cache_key):
+    return get_voter_cache_request_memo().get(cache_key)
+
+
+def save_to_voter_cache(cache_key, value):
+    get_voter_cache_request_memo().set(cache_key, value)
+
+
+def delete_from_voter_cache(cache_key_list):
+    memo = get_voter_cache_request_memo()
+    for cache_key in cache_key_list:
+        memo.delete(cache_key)
+
+
+def invalidate_voter_device_link_cache(voter_device_id):
+    """
+    Call whenever a voter_device_id is deleted or pointed at a different voter
+    :param voter_device_id:
+    :return:
+    """
+    if positive_value_exists(voter_device_id):
+        delete_from_voter_cache([VOTER_DEVICE_LINK_CACHE_PREFIX + voter_device_id])
+
+
+def invalidate_voter_device_link_cache_for_voter(voter_id):
+    """
+    Forget every voter_device_id -> voter_id entry that points at this voter, as well as the voter's cached
+    we_vote_id. Call when signing a voter out of all devices, or when merging a voter into another account.
+    :param voter_id:
+    :return:
+    """
+    if not positive_value_exists(voter_id):
+        return
+    cache_key_list = [VOTER_WE_VOTE_ID_CACHE_PREFIX + str(voter_id)]
+    try:
+        voter_device_id_list = VoterDeviceLink.objects.filter(voter_id=voter_id).values_list(
+            'voter_device_id', flat=True)
+        cache_key_list += [VOTER_DEVICE_LINK_CACHE_PREFIX + voter_device_id
+                           for voter_device_id in voter_device_id_list]
+    except Exception as e:
+        handle_exception(e, logger=logger)
+    delete_from_voter_cache(cache_key_list)
+
+
 # This method *just* returns the voter_id or 0
 def fetch_voter_id_from_voter_device_link(voter_device_id):
+    if not positive_value_exists(voter_device_id):
+        return 0
+    cache_key = VOTER_DEVICE_LINK_CACHE_PREFIX + voter_device_id
+    voter_id = fetch_from_voter_cache(cache_key)
+    if positive_value_exists(voter_id):
+        return voter_id
+
     voter_device_link_manager = VoterDeviceLinkManager()
     results = voter_device_link_manager.retrieve_voter_device_link_from_voter_device_id(voter_device_id)
     if results['voter_device_link_found']:
         voter_device_link = results['voter_device_link']
+        save_to_voter_cache(cache_key, voter_device_link.voter_id)
         return voter_device_link.voter_id
     return 0
 
 
 # This method *just* returns the voter_id or 0
 def fetch_voter_id_from_voter_we_vote_id(we_vote_id):
+    if not positive_value_exists(we_vote_id):
+        return 0
+    cache_key = VOTER_ID_CACHE_PREFIX + we_vote_id.strip().lower()
+    voter_id = fetch_from_voter_cache(cache_key)
+    if positive_value_exists(voter_id):
+        return voter_id
+
     voter_manager = VoterManager()
     results = voter_manager.retrieve_voter_by_we_vote_id(we_vote_id)
     if results['voter_found']:
         voter = results['voter']
+        save_to_voter_cache(cache_key, voter.id)
         return voter.id
     return 0
 
 
 # This method *just* returns the voter_we_vote_id or ""
 def fetch_voter_we_vote_id_from_voter_id(voter_id):
+    if not positive_value_exists(voter_id):
+        return ""
+    cache_key = VOTER_WE_VOTE_ID_CACHE_PREFIX + str(voter_id)
+    voter_we_vote_id = fetch_from_voter_cache(cache_key)
+    if positive_value_exists(voter_we_vote_id):
+        return voter_we_vote_id
+
     voter_manager = VoterManager()
     results = voter_manager.retrieve_voter_by_id(voter_id)
     if results['voter_found']:
         voter = results['voter']
+        if positive_value_exists(voter.we_vote_id):
+            save_to_voter_cache(cache_key, voter.we_vote_id)
         return voter.we_vote_id
     return ""
 
@@ -2211,17 +2314,10 @@ def fetch_voter_we_vote_id_from_voter_id(voter_id):
 
 
 def fetch_voter_we_vote_id_from_voter_device_link(voter_device_id):
-    voter_device_link_manager = VoterDeviceLinkManager()
-    results = voter_device_link_manager.retrieve_voter_device_link_from_voter_device_id(voter_device_id)
-    if results['voter_device_link_found']:
-        voter_device_link = results['voter_device_link']
-        voter_id = voter_device_link.voter_id
-        voter_manager = VoterManager()
-        results = voter_manager.retrieve_voter_by_id(voter_id)
-        if results['voter_found']:
-            voter = results['voter']
-            return voter.we_vote_id
-        return ""
+    voter_id = fetch_voter_id_from_voter_device_link(voter_device_id)
+    if positive_value_exists(voter_id):
+        return fetch_voter_we_vote_id_from_voter_id(voter_id)
+    return ""
 
 
 def retrieve_voter_authority(request):
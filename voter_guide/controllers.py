@@ -16,7 +16,7 @@ from organization.controllers import organization_follow_or_unfollow_or_ignore,
 from organization.models import OrganizationManager, OrganizationListManager, INDIVIDUAL
 from pledge_to_vote.models import PledgeToVoteManager
 from position.controllers import retrieve_ballot_item_we_vote_ids_for_organizations_to_follow
-from position.models import ANY_STANCE, INFORMATION_ONLY, OPPOSE, \
+from position.models import ANY_STANCE, ElectionOrganizationPositionsManager, INFORMATION_ONLY, OPPOSE, \
     PositionEntered, PositionManager, PositionListManager, SUPPORT
 from voter.models import fetch_voter_id_from_voter_device_link, fetch_voter_we_vote_id_from_voter_device_link, \
     fetch_voter_we_vote_id_from_voter_id, VoterManager
@@ -24,7 +24,7 @@ from voter_guide.models import CANDIDATE_NUMBER_LIST, VoterGuide, VoterGuideList
     VoterGuidePossibilityManager
 import wevote_functions.admin
 from wevote_functions.functions import convert_to_int, is_voter_device_id_valid, positive_value_exists, \
-    process_request_from_master, is_link_to_video
+    process_pages_from_master, is_link_to_video
 
 logger = wevote_functions.admin.get_logger(__name__)
 
@@ -579,42 +579,53 @@ def move_voter_guides_to_another_voter(from_voter_we_vote_id, to_voter_we_vote_i
     return results
 
 
-def voter_guides_import_from_master_server(request, google_civic_election_id):
+def voter_guides_import_from_master_server(request, google_civic_election_id, start_over=False):
     """
     Get the json data, and either create new entries or update existing
     :return:
     """
-    import_results, structured_json = process_request_from_master(
+    import_results = process_pages_from_master(
         request, "Loading Voter Guides from We Vote Master servers",
         VOTER_GUIDES_SYNC_URL, {
             "key":                      WE_VOTE_API_KEY,  # This comes from an environment variable
             "format":                   'json',
             "google_civic_election_id": str(google_civic_election_id),
-        }
-    )
-
-    if import_results['success']:
-        # results = filter_voter_guides_structured_json_for_local_duplicates(structured_json)
-        # filtered_structured_json = results['structured_json']
-        # duplicates_removed = results['duplicates_removed']
-        filtered_structured_json = structured_json
-        duplicates_removed = 0
-
-        import_results = voter_guides_import_from_structured_json(filtered_structured_json)
-        import_results['duplicates_removed'] = duplicates_removed
+        },
+        import_function=voter_guides_import_from_structured_json,
+        # filter_function=filter_voter_guides_structured_json_for_local_duplicates,
+        sync_name='voter_guides',
+        start_over=start_over)
 
     return import_results
 
 
-def filter_voter_guides_structured_json_for_local_duplicates(structured_json):
+def filter_voter_guides_structured_json_for_local_duplicates(structured_json, per_record_lookup=False):
     """
     With this function, we remove voter_guides that seem to be duplicates, but have different we_vote_id's.
     :param structured_json:
+    :param per_record_lookup: Query the database once per voter guide, instead of loading the existing voter guides
+     for these elections and time spans into memory up front
     :return:
     """
     duplicates_removed = 0
     filtered_structured_json = []
     voter_guide_list_manager = VoterGuideListManager()
+    duplicate_index = None
+    if not per_record_lookup:
+        google_civic_election_id_list = list(set(
+            convert_to_int(one_voter_guide['google_civic_election_id']) for one_voter_guide in structured_json
+            if positive_value_exists(one_voter_guide.get('google_civic_election_id', ''))))
+        vote_smart_time_span_list = list(set(
+            one_voter_guide['vote_smart_time_span'] for one_voter_guide in structured_json
+            if positive_value_exists(one_voter_guide.get('vote_smart_time_span', ''))))
+        index_results = voter_guide_list_manager.retrieve_possible_duplicate_voter_guides_index(
+            google_civic_election_id_list, vote_smart_time_span_list)
+        if index_results['success']:
+            duplicate_index = index_results['duplicate_index']
+        else:
+            # Fall back to looking for duplicates one at a time
+            per_record_lookup = True
+
     for one_voter_guide in structured_json:
         we_vote_id = one_voter_guide['we_vote_id'] if 'we_vote_id' in one_voter_guide else ''
         google_civic_election_id = one_voter_guide['google_civic_election_id'] \
@@ -630,13 +641,35 @@ def filter_voter_guides_structured_json_for_local_duplicates(structured_json):
         # Check to see if there is an entry that matches in all critical ways, minus the we_vote_id
         we_vote_id_from_master = we_vote_id
 
-        results = voter_guide_list_manager.retrieve_possible_duplicate_voter_guides(
-            google_civic_election_id, vote_smart_time_span,
-            organization_we_vote_id, public_figure_we_vote_id,
-            twitter_handle,
-            we_vote_id_from_master)
-
-        if results['voter_guide_list_found']:
+        if positive_value_exists(google_civic_election_id):
+            scope = ('google_civic_election_id', convert_to_int(google_civic_election_id))
+        elif positive_value_exists(vote_smart_time_span):
+            scope = ('vote_smart_time_span', vote_smart_time_span)
+        else:
+            # Voter guides without an election or time span are compared with every voter guide, the slow way
+            scope = None
+
+        if per_record_lookup or scope is None:
+            results = voter_guide_list_manager.retrieve_possible_duplicate_voter_guides(
+                google_civic_election_id, vote_smart_time_span,
+                organization_we_vote_id, public_figure_we_vote_id,
+                twitter_handle,
+                we_vote_id_from_master)
+            duplicate_found = results['voter_guide_list_found']
+        else:
+            # We want to find voter guides with *any* of these values
+            key_list = []
+            if positive_value_exists(organization_we_vote_id):
+                key_list.append(scope + ('organization_we_vote_id', organization_we_vote_id))
+            if positive_value_exists(public_figure_we_vote_id):
+                key_list.append(scope + ('public_figure_we_vote_id', public_figure_we_vote_id))
+            if positive_value_exists(twitter_handle):
+                key_list.append(scope + ('twitter_handle', twitter_handle))
+            if not len(key_list):
+                key_list.append(scope)
+            duplicate_found = duplicate_index.has_duplicate(key_list, we_vote_id_from_master)
+
+        if duplicate_found:
             # There seems to be a duplicate already in this database using a different we_vote_id
             duplicates_removed += 1
         else:
@@ -1338,14 +1371,23 @@ def retrieve_voter_guides_to_follow_by_election_for_api(voter_id, google_civic_e
     organizations_ignored_by_voter = \
         follow_organization_list_manager.retrieve_ignore_organization_by_voter_id_simple_id_array(voter_id)
 
-    position_list_manager = PositionListManager()
     if positive_value_exists(google_civic_election_id):
-        # This method finds all ballot_items in this election, and then retrieves *all* positions by any org or person
-        # about each ballot_item. This will pick up We Vote positions or Vote Smart ratings, regardless of what time
-        # period they were entered for.
-        public_only = True  # Do not return positions that are from friends only since we only want public positions
-        all_positions_list_for_election = position_list_manager.retrieve_all_positions_for_election(
-            google_civic_election_id, ANY_STANCE, public_only)
+        # Instead of loading every public position in this election, we use the organizations with public positions
+        # in this election, which are kept up to date in ElectionOrganizationPositions as positions are saved.
+        election_organization_positions_manager = ElectionOrganizationPositionsManager()
+        election_organization_results = \
+            election_organization_positions_manager.retrieve_election_organization_positions_list(
+                google_civic_election_id)
+        if not election_organization_results['success']:
+            voter_guide_list = []
+            results = {
+                'success':                      False,
+                'status':                       election_organization_results['status'],
+                'voter_guide_list_found':       False,
+                'voter_guide_list':             voter_guide_list,
+            }
+            return results
+        election_organization_positions_list = election_organization_results['election_organization_positions_list']
     else:
         voter_guide_list = []
         results = {
@@ -1356,17 +1398,25 @@ def retrieve_voter_guides_to_follow_by_election_for_api(voter_id, google_civic_e
         }
         return results
 
+    # We want to retrieve a list of organization_we_vote_id's (not followed or ignored) that have a position
+    # in this election. For speed we only retrieve full voter_guide data for the limited list that we need
+    organization_ids_followed_or_ignored_by_voter = \
+        set(organizations_followed_by_voter) | set(organizations_ignored_by_voter)
     if filter_voter_guides_by_issue and organization_we_vote_id_list_for_voter_issues is not None:
-        all_positions_list_for_election = position_list_manager.remove_positions_unrelated_to_issues(
-            all_positions_list_for_election, organization_we_vote_id_list_for_voter_issues)
-
-    positions_list_minus_ignored = position_list_manager.remove_positions_ignored_by_voter(
-        all_positions_list_for_election, organizations_ignored_by_voter)
-
-    positions_list_minus_ignored_and_followed = position_list_manager.calculate_positions_not_followed_by_voter(
-        positions_list_minus_ignored, organizations_followed_by_voter)
+        organization_we_vote_ids_for_voter_issues = set(organization_we_vote_id_list_for_voter_issues)
+    else:
+        organization_we_vote_ids_for_voter_issues = None
+    # This is a list of orgs that the voter isn't following or ignoring
+    org_list_found_by_google_civic_election_id = []
+    for one_election_organization in election_organization_positions_list:
+        if one_election_organization.organization_id in organization_ids_followed_or_ignored_by_voter:
+            continue
+        if organization_we_vote_ids_for_voter_issues is not None and \
+                one_election_organization.organization_we_vote_id not in organization_we_vote_ids_for_voter_issues:
+            continue
+        org_list_found_by_google_civic_election_id.append(one_election_organization.organization_we_vote_id)
 
-    if not len(positions_list_minus_ignored_and_followed):
+    if not len(org_list_found_by_google_civic_election_id):
         # If no positions are found, exit
         voter_guide_list = []
         results = {
@@ -1377,99 +1427,21 @@ def retrieve_voter_guides_to_follow_by_election_for_api(voter_id, google_civic_e
         }
         return results
 
-    # We want to retrieve an ordered list of organization_we_vote_id's (not followed or ignored) that have a position
-    # in this election. For speed we only retrieve full voter_guide data for the limited list that we need
+    # Retrieve the voter_guides stored by org and google_civic_election_id. (We used to follow this with a search
+    # by org & vote_smart_time_span, but every position found for this election has a google_civic_election_id, so
+    # that search never found an org that wasn't already in this list.)
     voter_guide_list_manager = VoterGuideListManager()
-    # This is a list of orgs that the voter isn't following or ignoring
-    org_list_found_by_google_civic_election_id = []
-    for one_position in positions_list_minus_ignored_and_followed:
-        if positive_value_exists(one_position.organization_we_vote_id) and \
-                positive_value_exists(one_position.google_civic_election_id):
-            # Make sure we haven't already recorded that we want to retrieve the voter_guide for this org
-            if one_position.organization_we_vote_id in org_list_found_by_google_civic_election_id:
-                continue
-            org_list_found_by_google_civic_election_id.append(one_position.organization_we_vote_id)
-
-    # status += " len(org_list_found_by_google_civic_election_id): " + \
-    #           str(len(org_list_found_by_google_civic_election_id))
-
-    # First, retrieve the voter_guides stored by org and google_civic_election_id
-    if positive_value_exists(len(org_list_found_by_google_civic_election_id)):
-        voter_guide_results = voter_guide_list_manager.retrieve_voter_guides_to_follow_by_election(
-            google_civic_election_id, org_list_found_by_google_civic_election_id, search_string,
-            start_retrieve_at_this_number,
-            maximum_number_to_retrieve, sort_by, sort_order)
+    voter_guide_results = voter_guide_list_manager.retrieve_voter_guides_to_follow_by_election(
+        google_civic_election_id, org_list_found_by_google_civic_election_id, search_string,
+        start_retrieve_at_this_number,
+        maximum_number_to_retrieve, sort_by, sort_order)
 
-        status += " " + voter_guide_results['status'] + " "
+    status += " " + voter_guide_results['status'] + " "
 
-        if voter_guide_results['voter_guide_list_found']:
-            voter_guide_list_from_election_id = voter_guide_results['voter_guide_list']
-            list_from_election_id_found = True
-        else:
-            voter_guide_list_from_election_id = []
-            list_from_election_id_found = False
-    else:
-        voter_guide_list_from_election_id = []
-        list_from_election_id_found = False
-
-    # Second, retrieve the voter_guides stored by org & vote_smart_time_span
-    # All positions were found above with position_list_manager.retrieve_all_positions_for_election
-    # We give precedence to full voter guides from above, where we have an actual position of an org (as opposed to
-    # Vote Smart ratings)
-    maximum_number_of_guides_to_retrieve_by_time_span = \
-        maximum_number_to_retrieve - len(voter_guide_list_from_election_id)
-    if positive_value_exists(maximum_number_of_guides_to_retrieve_by_time_span):
-        org_list_found_by_time_span = []
-        orgs_we_need_found_by_position_and_time_span_list_of_dicts = []
-        for one_position in positions_list_minus_ignored_and_followed:
-            # If this was a position found that was based on vote_smart_time_span...
-            #  (That is, ignore the positions already retrieved based on google_civic_election_id)
-            if positive_value_exists(one_position.organization_we_vote_id) and \
-                    positive_value_exists(one_position.vote_smart_time_span):
-                # This shouldn't be possible, but we have it here for safety
-                org_found_by_election_id_above = one_position.organization_we_vote_id in \
-                    org_list_found_by_google_civic_election_id
-                # If we already recorded that we want to look for this org under a different time span...
-                org_found_by_different_time_span = one_position.organization_we_vote_id in \
-                    org_list_found_by_time_span
-                # Don't record that we want to look for a voter guide by this org we_vote_id or time span
-                if org_found_by_election_id_above or org_found_by_different_time_span:
-                    continue
-
-                org_list_found_by_time_span.append(one_position.organization_we_vote_id)
-                one_position_dict = {'organization_we_vote_id': one_position.organization_we_vote_id,
-                                     'vote_smart_time_span': one_position.vote_smart_time_span}
-                orgs_we_need_found_by_position_and_time_span_list_of_dicts.append(one_position_dict)
-
-        voter_guide_time_span_results = voter_guide_list_manager.retrieve_voter_guides_to_follow_by_time_span(
-            orgs_we_need_found_by_position_and_time_span_list_of_dicts,
-            search_string,
-            maximum_number_of_guides_to_retrieve_by_time_span, sort_by, sort_order)
-
-        if voter_guide_time_span_results['voter_guide_list_found']:
-            voter_guide_list_from_time_span = voter_guide_time_span_results['voter_guide_list']
-            list_from_time_span_found = True
-        else:
-            voter_guide_list_from_time_span = []
-            list_from_time_span_found = False
-    else:
-        voter_guide_list_from_time_span = []
-        list_from_time_span_found = False
-
-    # Merge these two lists
-    if list_from_election_id_found and list_from_time_span_found:
-        voter_guide_list = list(chain(voter_guide_list_from_election_id, voter_guide_list_from_time_span))
-    elif list_from_election_id_found:
-        voter_guide_list = list(voter_guide_list_from_election_id)
-    elif list_from_time_span_found:
-        voter_guide_list = list(voter_guide_list_from_time_span)
+    if voter_guide_results['voter_guide_list_found']:
+        voter_guide_list = list(voter_guide_results['voter_guide_list'])
     else:
         voter_guide_list = []
-    # IFF we wanted to sort here:
-    # voter_guide_list = sorted(
-    #     chain(voter_guide_list_from_election_id, voter_guide_list_from_time_span),
-    #     key=attrgetter(sort_by))
-    # But we don't, we just want to combine them with existing order
 
     status += 'SUCCESSFUL_RETRIEVE_OF_VOTER_GUIDES_BY_ELECTION '
     success = True
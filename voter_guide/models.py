@@ -4,6 +4,7 @@
 
 from django.db import models
 from django.db.models import Q
+from django.db.models.functions import Upper
 from election.models import ElectionManager, TIME_SPAN_LIST
 from exception.models import handle_exception, handle_record_not_found_exception, \
     handle_record_found_more_than_one_exception
@@ -13,7 +14,7 @@ from organization.models import Organization, OrganizationManager, \
     POLITICAL_ACTION_COMMITTEE, PUBLIC_FIGURE, UNKNOWN, ORGANIZATION_TYPE_CHOICES
 from pledge_to_vote.models import PledgeToVoteManager
 import wevote_functions.admin
-from wevote_functions.functions import convert_to_int, convert_to_str, positive_value_exists
+from wevote_functions.functions import convert_to_int, convert_to_str, LocalDuplicateIndex, positive_value_exists
 from wevote_settings.models import fetch_site_unique_id_prefix, fetch_next_we_vote_id_voter_guide_integer
 
 logger = wevote_functions.admin.get_logger(__name__)
@@ -1545,6 +1546,55 @@ class VoterGuideListManager(models.Model):
         return results
 
 
+    def retrieve_possible_duplicate_voter_guides_index(self, google_civic_election_id_list, vote_smart_time_span_list):
+        """
+        Load the identifying values of the voter guides for these elections or time spans in one query, so that
+        filter_voter_guides_structured_json_for_local_duplicates can check each incoming voter guide in memory.
+        Every key starts with the scope: ('google_civic_election_id', google_civic_election_id) or
+        ('vote_smart_time_span', vote_smart_time_span), followed by ('organization_we_vote_id', value),
+        ('public_figure_we_vote_id', value), ('twitter_handle', value) or nothing
+        :param google_civic_election_id_list:
+        :param vote_smart_time_span_list:
+        :return:
+        """
+        duplicate_index = LocalDuplicateIndex()
+        try:
+            voter_guide_queryset = VoterGuide.objects.annotate(vote_smart_time_span_upper=Upper('vote_smart_time_span'))
+            voter_guide_queryset = voter_guide_queryset.filter(
+                Q(google_civic_election_id__in=google_civic_election_id_list) |
+                Q(vote_smart_time_span_upper__in=[time_span.upper() for time_span in vote_smart_time_span_list]))
+            voter_guide_queryset = voter_guide_queryset.values_list(
+                'we_vote_id', 'google_civic_election_id', 'vote_smart_time_span', 'organization_we_vote_id',
+                'public_figure_we_vote_id', 'twitter_handle')
+            for we_vote_id, google_civic_election_id, vote_smart_time_span, organization_we_vote_id, \
+                    public_figure_we_vote_id, twitter_handle in voter_guide_queryset.iterator():
+                scope_list = [('google_civic_election_id', google_civic_election_id)]
+                if positive_value_exists(vote_smart_time_span):
+                    scope_list.append(('vote_smart_time_span', vote_smart_time_span))
+                for scope in scope_list:
+                    duplicate_index.add(we_vote_id, scope)
+                    if positive_value_exists(organization_we_vote_id):
+                        duplicate_index.add(we_vote_id, scope + ('organization_we_vote_id', organization_we_vote_id))
+                    if positive_value_exists(public_figure_we_vote_id):
+                        duplicate_index.add(we_vote_id, scope + ('public_figure_we_vote_id', public_figure_we_vote_id))
+                    if positive_value_exists(twitter_handle):
+                        duplicate_index.add(we_vote_id, scope + ('twitter_handle', twitter_handle))
+            status = 'DUPLICATE_VOTER_GUIDES_INDEX_RETRIEVED '
+            success = True
+        except Exception as e:
+            handle_exception(e, logger=logger)
+            status = 'FAILED retrieve_possible_duplicate_voter_guides_index ' \
+                     '{error} [type: {error_type}]'.format(error=e, error_type=type(e))
+            success = False
+
+        results = {
+            'success':          success,
+            'status':           status,
+            'duplicate_index':  duplicate_index,
+        }
+        return results
+
+
 class VoterGuidePossibilityManager(models.Manager):
     """
     A class for working with the VoterGuidePossibility model
@@ -0,0 +1,104 @@
+# voter_guide/tests.py
+# Brought to you by We Vote. Be good.
+# -*- coding: UTF-8 -*-
+
+from django.test import TestCase
+import os
+from position.models import ANY_STANCE, ElectionOrganizationPositions, ElectionOrganizationPositionsManager, \
+    PositionEntered, PositionListManager, SUPPORT
+import unittest
+
+
+GOOGLE_CIVIC_ELECTION_ID = 4184
+
+
+class ElectionOrganizationPositionsTestCase(TestCase):
+
+    def test_saving_and_deleting_positions_keeps_the_election_organizations_current(self):
+        position = PositionEntered.objects.create(
+            we_vote_id='wv01pos1', google_civic_election_id=str(GOOGLE_CIVIC_ELECTION_ID), organization_id=11,
+            organization_we_vote_id='wv01org11', stance=SUPPORT)
+        PositionEntered.objects.create(
+            we_vote_id='wv01pos2', google_civic_election_id=str(GOOGLE_CIVIC_ELECTION_ID), organization_id=11,
+            organization_we_vote_id='wv01org11', stance=SUPPORT)
+        election_organization = ElectionOrganizationPositions.objects.get(
+            google_civic_election_id=GOOGLE_CIVIC_ELECTION_ID, organization_we_vote_id='wv01org11')
+        self.assertEqual(election_organization.public_positions_count, 2)
+        self.assertEqual(election_organization.organization_id, 11)
+
+        # Moving a position to another organization recounts both organizations
+        position.organization_id = 12
+        position.organization_we_vote_id = 'wv01org12'
+        position.save()
+        self.assertEqual(ElectionOrganizationPositions.objects.get(
+            google_civic_election_id=GOOGLE_CIVIC_ELECTION_ID,
+            organization_we_vote_id='wv01org11').public_positions_count, 1)
+        self.assertEqual(ElectionOrganizationPositions.objects.get(
+            google_civic_election_id=GOOGLE_CIVIC_ELECTION_ID,
+            organization_we_vote_id='wv01org12').public_positions_count, 1)
+
+        position.delete()
+        self.assertFalse(ElectionOrganizationPositions.objects.filter(
+            google_civic_election_id=GOOGLE_CIVIC_ELECTION_ID, organization_we_vote_id='wv01org12').exists())
+
+    def test_election_without_index_is_rebuilt_even_after_a_position_is_saved(self):
+        # Positions saved before ElectionOrganizationPositions existed, which send no signals
+        PositionEntered.objects.bulk_create([
+            PositionEntered(we_vote_id='wv01pos' + str(organization_id),
+                            google_civic_election_id=str(GOOGLE_CIVIC_ELECTION_ID), organization_id=organization_id,
+                            organization_we_vote_id='wv01org' + str(organization_id), stance=SUPPORT)
+            for organization_id in range(1, 4)])
+        # The first save after a deploy adds one row, which must not count as the election being indexed
+        PositionEntered.objects.create(
+            we_vote_id='wv01pos4', google_civic_election_id=str(GOOGLE_CIVIC_ELECTION_ID), organization_id=4,
+            organization_we_vote_id='wv01org4', stance=SUPPORT)
+        self.assertEqual(ElectionOrganizationPositions.objects.filter(
+            google_civic_election_id=GOOGLE_CIVIC_ELECTION_ID).count(), 1)
+
+        results = ElectionOrganizationPositionsManager().retrieve_election_organization_positions_list(
+            GOOGLE_CIVIC_ELECTION_ID)
+        self.assertEqual(len(results['election_organization_positions_list']), 4)
+
+    @unittest.skipUnless(os.environ.get('WE_VOTE_RUN_BENCHMARKS'), "Set WE_VOTE_RUN_BENCHMARKS to run")
+    def test_benchmark_organizations_to_follow_with_50000_positions_in_one_election(self):
+        """
+        Finding the organizations a voter doesn't follow or ignore from ElectionOrganizationPositions gives the same
+        organizations as loading every position in the election (how voterGuidesToFollowRetrieve used to work)
+        :return:
+        """
+        number_of_positions = 50000
+        number_of_organizations = 2000
+        PositionEntered.objects.bulk_create([
+            PositionEntered(
+                we_vote_id='wv01pos' + str(position_number),
+                google_civic_election_id=str(GOOGLE_CIVIC_ELECTION_ID),
+                organization_id=(position_number % number_of_organizations) + 1,
+                organization_we_vote_id='wv01org' + str((position_number % number_of_organizations) + 1),
+                stance=SUPPORT)
+            for position_number in range(number_of_positions)], batch_size=5000)
+        # bulk_create doesn't send post_save, so index this election the way a deploy would
+        ElectionOrganizationPositionsManager().rebuild_election_organization_positions(GOOGLE_CIVIC_ELECTION_ID)
+        organizations_followed_by_voter = list(range(1, 200))
+        organizations_ignored_by_voter = list(range(1900, 2001))
+
+        position_list_manager = PositionListManager()
+        all_positions_list_for_election = position_list_manager.retrieve_all_positions_for_election(
+            GOOGLE_CIVIC_ELECTION_ID, ANY_STANCE, True)
+        positions_list_minus_ignored = position_list_manager.remove_positions_ignored_by_voter(
+            all_positions_list_for_election, organizations_ignored_by_voter)
+        positions_list_minus_ignored_and_followed = position_list_manager.calculate_positions_not_followed_by_voter(
+            positions_list_minus_ignored, organizations_followed_by_voter)
+        organization_we_vote_ids_from_positions = \
+            set(one_position.organization_we_vote_id for one_position in positions_list_minus_ignored_and_followed)
+
+        results = ElectionOrganizationPositionsManager().retrieve_election_organization_positions_list(
+            GOOGLE_CIVIC_ELECTION_ID)
+        organization_ids_followed_or_ignored = \
+            set(organizations_followed_by_voter) | set(organizations_ignored_by_voter)
+        organization_we_vote_ids_from_index = set(
+            one_election_organization.organization_we_vote_id
+            for one_election_organization in results['election_organization_positions_list']
+            if one_election_organization.organization_id not in organization_ids_followed_or_ignored)
+
+        self.assertEqual(organization_we_vote_ids_from_index, organization_we_vote_ids_from_positions)
+        self.assertEqual(len(organization_we_vote_ids_from_index), number_of_organizations - 199 - 101)
@@ -18,6 +18,7 @@ from django.core.urlresolvers import reverse
 from django.contrib.messages import get_messages
 from django.http import HttpResponseRedirect
 from django.shortcuts import render
+from django.views.decorators.gzip import gzip_page
 from election.models import Election, ElectionManager, TIME_SPAN_LIST
 from import_export_batches.models import BATCH_HEADER_MAP_FOR_POSITIONS, BatchManager, POSITION
 from import_export_twitter.controllers import refresh_twitter_organization_details, scrape_social_media_from_one_site
@@ -27,7 +28,7 @@ from position.models import PositionEntered, PositionForFriends, PositionListMan
 from twitter.models import TwitterUserManager
 from voter.models import voter_has_authority, VoterManager
 from wevote_functions.functions import convert_to_int, extract_twitter_handle_from_text_string, positive_value_exists, \
-    STATE_CODE_MAP, get_voter_device_id, get_voter_api_device_id
+    STATE_CODE_MAP, get_voter_device_id, get_voter_api_device_id, sync_out_json_response
 from django.http import HttpResponse
 import json
 
@@ -525,6 +526,7 @@ def break_up_text_into_possible_candidates_list(ballot_items, starting_candidate
 
 
 # This page does not need to be protected.
+@gzip_page
 def voter_guides_sync_out_view(request):  # voterGuidesSyncOut
     google_civic_election_id = convert_to_int(request.GET.get('google_civic_election_id', 0))
 
@@ -537,20 +539,15 @@ def voter_guides_sync_out_view(request):  # voterGuidesSyncOut
         # return Response(serializer.data)
         voter_guide_list = voter_guide_list.extra(
             select={'last_updated': "to_char(last_updated, 'YYYY-MM-DD HH24:MI:SS')"})
-        voter_guide_list_dict = voter_guide_list.values('we_vote_id', 'display_name', 'google_civic_election_id',
-                                                        'election_day_text',
-                                                        'image_url', 'last_updated', 'organization_we_vote_id',
-                                                        'owner_we_vote_id', 'pledge_count', 'pledge_goal',
-                                                        'public_figure_we_vote_id',
-                                                        'twitter_description', 'twitter_followers_count',
-                                                        'twitter_handle', 'vote_smart_time_span',
-                                                        'voter_guide_owner_type',
-                                                        'we_vote_hosted_profile_image_url_large',
-                                                        'we_vote_hosted_profile_image_url_medium',
-                                                        'we_vote_hosted_profile_image_url_tiny')
-        if voter_guide_list_dict:
-            voter_guide_list_list_json = list(voter_guide_list_dict)
-            return HttpResponse(json.dumps(voter_guide_list_list_json), content_type='application/json')
+        voter_guide_field_list = ['we_vote_id', 'display_name', 'google_civic_election_id', 'election_day_text',
+                                  'image_url', 'last_updated', 'organization_we_vote_id', 'owner_we_vote_id',
+                                  'pledge_count', 'pledge_goal', 'public_figure_we_vote_id', 'twitter_description',
+                                  'twitter_followers_count', 'twitter_handle', 'vote_smart_time_span',
+                                  'voter_guide_owner_type', 'we_vote_hosted_profile_image_url_large',
+                                  'we_vote_hosted_profile_image_url_medium', 'we_vote_hosted_profile_image_url_tiny']
+        return sync_out_json_response(request, voter_guide_list, voter_guide_field_list,
+                                      {'success': False, 'status': 'VOTER_GUIDE_LIST_MISSING'},
+                                      updated_since_field='last_updated')
     except Exception as e:
         pass
 
@@ -576,7 +573,8 @@ def voter_guides_import_from_master_server_view(request):
     google_civic_election_id = convert_to_int(request.GET.get('google_civic_election_id', 0))
     state_code = request.GET.get('state_code', '')
 
-    results = voter_guides_import_from_master_server(request, google_civic_election_id)
+    start_over = positive_value_exists(request.GET.get('start_over', False))
+    results = voter_guides_import_from_master_server(request, google_civic_election_id, start_over=start_over)
 
     if not results['success']:
         messages.add_message(request, messages.ERROR, results['status'])
@@ -2,17 +2,27 @@
 # Brought to you by We Vote. Be good.
 # -*- coding: UTF-8 -*-
 
+from collections import OrderedDict
 import datetime
+import math
 from nameparser import HumanName
+from operator import itemgetter
 import random
 import re
 import string
 import sys
+import threading
+import time
 import types
 import wevote_functions.admin
 import json
 import requests
+from requests.adapters import HTTPAdapter
+from requests.packages.urllib3.util.retry import Retry
 from django.contrib import messages
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
 
 # We don't want to include the actual constants from organization/models.py, since that can cause include conflicts
 CORPORATION = 'C'
@@ -463,6 +473,239 @@ class LocalSwitch(object):
             return False
 
 
+class TokenBucketRateLimiter(object):
+    """
+    Thread-safe token bucket, so a pool of threads can share one limit on calls to a remote API.
+    Tokens refill at rate_per_second, and up to `capacity` tokens can be saved up for a burst.
+    """
+    def __init__(self, rate_per_second, capacity=None):
+        self.rate_per_second = float(rate_per_second)
+        self.capacity = float(capacity if capacity else max(1.0, rate_per_second))
+        self.tokens = self.capacity
+        self.last_refill = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self, tokens=1):
+        """
+        Block until `tokens` tokens are available, and then take them
+        :param tokens:
+        :return: The number of seconds we waited
+        """
+        seconds_waited = 0.0
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.last_refill) * self.rate_per_second)
+                self.last_refill = now
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return seconds_waited
+                seconds_to_wait = (tokens - self.tokens) / self.rate_per_second
+            time.sleep(seconds_to_wait)
+            seconds_waited += seconds_to_wait
+
+
+def calculate_retry_backoff_seconds(attempt_number, base_seconds=1.0, maximum_seconds=60.0):
+    """
+    Exponential backoff with "full jitter", so a pool of workers that failed together does not retry together
+    :param attempt_number: 1 for the first retry
+    :param base_seconds:
+    :param maximum_seconds:
+    :return:
+    """
+    return random.uniform(0, min(maximum_seconds, base_seconds * (2 ** (attempt_number - 1))))
+
+
+class LocalDuplicateIndex(object):
+    """
+    In-memory index of the identifying values of rows that already exist in this database, so that we can check
+    every entry coming in from the master server for a local duplicate without one query per entry.
+    Each key is a tuple like (google_civic_election_id, office_name). String values are compared case-insensitively,
+    like the __iexact filters in the retrieve_possible_duplicate_* functions.
+    """
+    def __init__(self):
+        self.we_vote_ids_by_key = {}
+
+    @staticmethod
+    def normalize_value(value):
+        if isinstance(value, str):
+            return value.lower()
+        return value
+
+    def normalize_key(self, key):
+        return tuple(self.normalize_value(value) for value in key)
+
+    def add(self, we_vote_id, key):
+        """
+        Remember that a local row with this we_vote_id has this key
+        :param we_vote_id: The identifier we ignore when the entry from master is the same row
+        :param key:
+        :return:
+        """
+        self.we_vote_ids_by_key.setdefault(self.normalize_key(key), set()).add(self.normalize_value(we_vote_id))
+
+    def has_duplicate(self, key_list, we_vote_id_from_master=''):
+        """
+        Is there a local row matching *any* of these keys, with a we_vote_id other than we_vote_id_from_master?
+        :param key_list:
+        :param we_vote_id_from_master:
+        :return:
+        """
+        we_vote_id_from_master = self.normalize_value(we_vote_id_from_master)
+        for key in key_list:
+            we_vote_ids = self.we_vote_ids_by_key.get(self.normalize_key(key))
+            if not we_vote_ids:
+                continue
+            if not positive_value_exists(we_vote_id_from_master) or we_vote_ids - {we_vote_id_from_master}:
+                return True
+        return False
+
+    def __len__(self):
+        return len(self.we_vote_ids_by_key)
+
+
+class LeastRecentlyUsedCache(object):
+    """
+    A dict for one process, limited to max_entries. When it is full, the entry used longest ago is dropped.
+    Entries can also expire after timeout_seconds. Safe to share between threads.
+    """
+
+    def __init__(self, max_entries=10000, timeout_seconds=None):
+        self.max_entries = max_entries
+        self.timeout_seconds = timeout_seconds
+        self.entries = OrderedDict()  # key -> (time the entry expires or None, value)
+        self.lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return default
+            expires_at, value = entry
+            if expires_at is not None and expires_at <= time.time():
+                del self.entries[key]
+                return default
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, timeout_seconds=None):
+        if timeout_seconds is None:
+            timeout_seconds = self.timeout_seconds
+        expires_at = time.time() + timeout_seconds if timeout_seconds is not None else None
+        with self.lock:
+            self.entries[key] = (expires_at, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def delete(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def __len__(self):
+        return len(self.entries)
+
+
+EARTH_RADIUS_MILES = 3958.8
+
+
+def calculate_great_circle_distance_miles(latitude1, longitude1, latitude2, longitude2):
+    """
+    Distance between two points along the surface of the earth (haversine formula)
+    :return:
+    """
+    latitude1_radians = math.radians(latitude1)
+    latitude2_radians = math.radians(latitude2)
+    half_latitude_difference = math.radians(latitude2 - latitude1) / 2
+    half_longitude_difference = math.radians(longitude2 - longitude1) / 2
+    haversine = math.sin(half_latitude_difference) ** 2 + \
+        math.cos(latitude1_radians) * math.cos(latitude2_radians) * math.sin(half_longitude_difference) ** 2
+    return 2 * EARTH_RADIUS_MILES * math.asin(min(1.0, math.sqrt(haversine)))
+
+
+class NearestLocationIndex(object):
+    """
+    Find the closest of a fixed list of locations (by great-circle distance) without looking at every one.
+    This is a k-d tree over the locations' positions on a unit sphere. The straight-line distance between two points
+    on the sphere grows with the great-circle distance between them, so the closest point in the tree is also the
+    closest along the surface of the earth. When two locations are exactly as close, the lower key wins.
+    """
+
+    def __init__(self, location_list):
+        """
+        :param location_list: (key, latitude, longitude) for each location, like a BallotReturned id and its
+         latitude and longitude
+        """
+        self.node_point = []
+        self.node_left = []
+        self.node_right = []
+        point_list = [self.convert_to_unit_vector(latitude, longitude) + (key, )
+                      for key, latitude, longitude in location_list]
+        self.root_node = self.build_tree(point_list, 0)
+
+    def __len__(self):
+        return len(self.node_point)
+
+    @staticmethod
+    def convert_to_unit_vector(latitude, longitude):
+        latitude_radians = math.radians(latitude)
+        longitude_radians = math.radians(longitude)
+        return (math.cos(latitude_radians) * math.cos(longitude_radians),
+                math.cos(latitude_radians) * math.sin(longitude_radians),
+                math.sin(latitude_radians))
+
+    def build_tree(self, point_list, depth):
+        if not point_list:
+            return -1
+        axis = depth % 3
+        point_list.sort(key=itemgetter(axis))
+        median = len(point_list) // 2
+        node = len(self.node_point)
+        self.node_point.append(point_list[median])
+        self.node_left.append(-1)
+        self.node_right.append(-1)
+        self.node_left[node] = self.build_tree(point_list[:median], depth + 1)
+        self.node_right[node] = self.build_tree(point_list[median + 1:], depth + 1)
+        return node
+
+    def find_nearest(self, latitude, longitude):
+        """
+        :param latitude:
+        :param longitude:
+        :return: The key of the closest location, or None if there aren't any locations
+        """
+        target = self.convert_to_unit_vector(latitude, longitude)
+        # Squared straight-line distance and key of the closest location found so far
+        best = [float('inf'), None]
+
+        def search(node, depth):
+            if node < 0:
+                return
+            point = self.node_point[node]
+            squared_distance = (point[0] - target[0]) ** 2 + (point[1] - target[1]) ** 2 + \
+                (point[2] - target[2]) ** 2
+            if squared_distance < best[0] or (squared_distance == best[0] and point[3] < best[1]):
+                best[0] = squared_distance
+                best[1] = point[3]
+            axis = depth % 3
+            axis_difference = target[axis] - point[axis]
+            if axis_difference < 0:
+                near_node, far_node = self.node_left[node], self.node_right[node]
+            else:
+                near_node, far_node = self.node_right[node], self.node_left[node]
+            search(near_node, depth + 1)
+            # Only look on the other side of the split if something there could be as close
+            if axis_difference ** 2 <= best[0]:
+                search(far_node, depth + 1)
+
+        search(self.root_node, 0)
+        return best[1]
+
+
 # This is how we make sure a variable is a boolean
 def convert_to_bool(value):
     if value is True:
@@ -934,6 +1177,93 @@ def get_maximum_number_to_retrieve_from_request(request):
     return maximum_number_to_retrieve
 
 
+# How many rows a *SyncOut endpoint reads from the database at a time
+SYNC_OUT_CHUNK_SIZE = 1000
+
+
+def parse_sync_out_updated_since(updated_since_text):
+    """
+    Accepts "YYYY-MM-DD" or "YYYY-MM-DD HH:MM:SS" (optionally with a timezone offset)
+    :param updated_since_text:
+    :return: A timezone-aware datetime, or None if the text can't be parsed
+    """
+    updated_since_text = updated_since_text.strip().replace(' ', 'T', 1) if updated_since_text else ''
+    try:
+        updated_since = parse_datetime(updated_since_text)
+        if updated_since is None:
+            updated_since_date = parse_date(updated_since_text)
+            if updated_since_date is None:
+                return None
+            updated_since = datetime.datetime.combine(updated_since_date, datetime.time())
+    except ValueError:
+        return None
+    if timezone.is_naive(updated_since):
+        updated_since = timezone.make_aware(updated_since, timezone.get_current_timezone())
+    return updated_since
+
+
+def sync_out_json_response(request, queryset, field_list, missing_json_data, updated_since_field=''):
+    """
+    Return the rows for one of the *SyncOut endpoints as a JSON list. Instead of building the whole list in memory
+    we stream it, reading the database in chunks of SYNC_OUT_CHUNK_SIZE rows ordered by id.
+    Optional GET variables:
+      after_id: Only return rows with an id greater than this (keyset pagination)
+      limit: Return at most this many rows
+      updated_since: Only return rows changed on or after this date or date and time. Ignored for tables that
+        don't track when rows change (no updated_since_field).
+    When after_id or limit is used, every row includes its "id" so the caller can ask for the next page, and an
+    empty page comes back as []. Otherwise an empty result comes back as missing_json_data, like it always has.
+    Wrap the view in gzip_page to compress the stream for callers that accept it.
+    :param request:
+    :param queryset: Already filtered by the view
+    :param field_list: The values to return for each row
+    :param missing_json_data:
+    :param updated_since_field: The auto_now field on this model, like 'date_last_changed'
+    :return:
+    """
+    after_id = convert_to_int(request.GET.get('after_id', 0))
+    limit = convert_to_int(request.GET.get('limit', 0))
+    paginated = 'after_id' in request.GET or 'limit' in request.GET
+    updated_since = parse_sync_out_updated_since(request.GET.get('updated_since', ''))
+    if updated_since is not None and positive_value_exists(updated_since_field):
+        queryset = queryset.filter(**{updated_since_field + '__gte': updated_since})
+
+    value_list = ['id'] + [field_name for field_name in field_list if field_name != 'id']
+
+    def retrieve_chunk(last_id, rows_sent):
+        chunk_size = SYNC_OUT_CHUNK_SIZE
+        if limit > 0:
+            chunk_size = min(chunk_size, limit - rows_sent)
+            if chunk_size <= 0:
+                return []
+        return list(queryset.filter(id__gt=last_id).order_by('id').values(*value_list)[:chunk_size])
+
+    def generate_json(first_chunk):
+        yield '['
+        chunk = first_chunk
+        rows_sent = 0
+        while chunk:
+            last_id = chunk[-1]['id']
+            if not paginated:
+                for one_row in chunk:
+                    del one_row['id']
+            yield (',' if rows_sent else '') + ','.join(json.dumps(one_row, default=str) for one_row in chunk)
+            rows_sent += len(chunk)
+            chunk_size_requested = len(chunk)
+            chunk = retrieve_chunk(last_id, rows_sent) if chunk_size_requested == SYNC_OUT_CHUNK_SIZE else []
+        yield ']'
+
+    try:
+        first_chunk = retrieve_chunk(after_id, 0)
+    except Exception as e:
+        logger.error("sync_out_json_response could not retrieve rows: " + str(e))
+        first_chunk = []
+        paginated = False
+    if not first_chunk and not paginated:
+        return HttpResponse(json.dumps(missing_json_data), content_type='application/json')
+    return StreamingHttpResponse(generate_json(first_chunk), content_type='application/json')
+
+
 # http://stackoverflow.com/questions/1622793/django-cookies-how-can-i-set-them
 def set_cookie(response, cookie_name, cookie_value, days_expire=None):
     if days_expire is None:
@@ -1175,6 +1505,36 @@ def convert_state_code_to_utc_offset(state_code):
     return UTC_OFFSET_MAP.get(state_code, None)
 
 
+# How many rows we ask the We Vote Master server for at a time, and hand to the import functions at once
+MASTER_SERVER_SYNC_PAGE_SIZE = 2000
+# (connect, read) timeouts in seconds for requests to the We Vote Master server
+MASTER_SERVER_REQUEST_TIMEOUT = (10, 300)
+# updated_since comes from our clock, but the master stamps date_last_changed with its own, so we reach back this
+# far to pick up rows changed while our clock ran ahead of the master's. Re-importing a few rows is harmless.
+MASTER_SERVER_SYNC_UPDATED_SINCE_MARGIN_SECONDS = 3600
+
+master_server_session = None
+master_server_session_lock = threading.Lock()
+
+
+def get_master_server_session():
+    """
+    One requests.Session per process, so every request to the We Vote Master server reuses pooled connections.
+    Connection errors and 5xx responses are retried with backoff.
+    :return:
+    """
+    global master_server_session
+    with master_server_session_lock:
+        if master_server_session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8,
+                                  max_retries=Retry(total=3, backoff_factor=2, status_forcelist=(500, 502, 503, 504)))
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            master_server_session = session
+    return master_server_session
+
+
 def process_request_from_master(request, message_text, get_url, get_params):
     """
 
@@ -1190,9 +1550,9 @@ def process_request_from_master(request, message_text, get_url, get_params):
     logger.info(message_text)
     print(message_text)  # Please don't remove this line
 
-    response = requests.get(get_url, params=get_params)
+    response = get_master_server_session().get(get_url, params=get_params, timeout=MASTER_SERVER_REQUEST_TIMEOUT)
 
-    structured_json = json.loads(response.text)
+    structured_json = response.json()
     if 'success' in structured_json and not structured_json['success']:
         import_results = {
             'success': False,
@@ -1213,6 +1573,145 @@ def process_request_from_master(request, message_text, get_url, get_params):
     return import_results, structured_json
 
 
+def add_up_page_import_results(import_results, page_results):
+    """
+    Add the counts ('saved', 'updated', 'not_processed' and so on) from importing one page into import_results
+    :param import_results:
+    :param page_results:
+    :return:
+    """
+    for key, value in page_results.items():
+        if isinstance(value, int) and not isinstance(value, bool):
+            import_results[key] = import_results.get(key, 0) + value
+    if page_results.get('success', True):
+        import_results['status'] = page_results.get('status', '')
+    else:
+        import_results['success'] = False
+        import_results['status'] = page_results.get('status', '')
+
+
+def process_pages_from_master(request, message_text, get_url, get_params, import_function, filter_function=None,
+                              sync_name='', page_size=MASTER_SERVER_SYNC_PAGE_SIZE, start_over=False,
+                              duplicate_index=None):
+    """
+    Like process_request_from_master, but instead of holding the whole table in memory, we ask the *SyncOut
+    endpoint for page_size rows at a time (after_id and limit) and filter and import each page as it arrives.
+    When sync_name is set, the id of the last row imported is saved after every page in a MasterServerSyncCheckpoint
+    for this table, election and state, so a run that dies part way through resumes where it stopped. Once a run
+    finishes, the next one only asks for the rows changed since it started (updated_since), less
+    MASTER_SERVER_SYNC_UPDATED_SINCE_MARGIN_SECONDS to allow for clock skew between the two servers.
+    :param request:
+    :param message_text:
+    :param get_url:
+    :param get_params:
+    :param import_function: Like offices_import_from_structured_json
+    :param filter_function: Like filter_offices_structured_json_for_local_duplicates
+    :param sync_name: Name for the checkpoint, like 'offices'. Without it, every run starts from the beginning.
+    :param page_size:
+    :param start_over: Ignore the checkpoint and pull every row again
+    :param duplicate_index: A LocalDuplicateIndex built once for the whole run, and handed to filter_function with
+     every page. Without it, filter_function builds an index for each page.
+    :return: import_results, with the counts from each page added up
+    """
+    # wevote_settings.models imports this module, so we can't import it at the top
+    from wevote_settings.models import MasterServerSyncCheckpointManager
+
+    google_civic_election_id = get_params.get('google_civic_election_id', 0)
+    state_code = get_params.get('state_code', get_params.get('state', get_params.get('state_served_code', '')))
+    if 'google_civic_election_id' in get_params:
+        message_text += " for google_civic_election_id " + str(google_civic_election_id)
+    messages.add_message(request, messages.INFO, message_text)
+    logger.info(message_text)
+    print(message_text)  # Please don't remove this line
+
+    checkpoint_manager = MasterServerSyncCheckpointManager()
+    checkpoint = None
+    after_id = 0
+    updated_since = None
+    if positive_value_exists(sync_name):
+        results = checkpoint_manager.retrieve_master_server_sync_checkpoint(
+            sync_name, google_civic_election_id, state_code)
+        if results['success']:
+            checkpoint = results['checkpoint']
+            after_id, updated_since = checkpoint_manager.start_master_server_sync(checkpoint, start_over)
+            if updated_since is not None:
+                updated_since -= datetime.timedelta(seconds=MASTER_SERVER_SYNC_UPDATED_SINCE_MARGIN_SECONDS)
+            if positive_value_exists(after_id):
+                print("... resuming after id " + str(after_id))  # Please don't remove this line
+
+    import_results = {
+        'success':              True,
+        'status':               "",
+        'duplicates_removed':   0,
+    }
+    session = get_master_server_session()
+    items_returned = 0
+    pages_imported = 0
+    while True:
+        page_params = dict(get_params)
+        page_params['after_id'] = after_id
+        page_params['limit'] = page_size
+        if updated_since is not None:
+            page_params['updated_since'] = updated_since.isoformat()
+        try:
+            response = session.get(get_url, params=page_params, timeout=MASTER_SERVER_REQUEST_TIMEOUT)
+            structured_json = response.json()
+        except Exception as e:
+            import_results['success'] = False
+            import_results['status'] += "FAILED_TO_GET_JSON_FROM_MASTER_SERVER: " + str(e) + " "
+            break
+
+        if isinstance(structured_json, dict):
+            # On error, you get something like: {'success': False, 'status': 'BALLOT_ITEM_LIST_MISSING'}
+            import_results['success'] = False
+            import_results['status'] += "Error: " + str(structured_json.get('status', '')) + " "
+            break
+        if not structured_json:
+            break
+
+        # A master server that doesn't page yet ignores after_id and limit, and sends every row without its id
+        master_server_pages = 'id' in structured_json[-1]
+        last_id = structured_json[-1]['id'] if master_server_pages else after_id
+        page_item_count = len(structured_json)
+        items_returned += page_item_count
+
+        if filter_function is not None:
+            if duplicate_index is not None:
+                results = filter_function(structured_json, duplicate_index=duplicate_index)
+            else:
+                results = filter_function(structured_json)
+            structured_json = results['structured_json']
+            import_results['duplicates_removed'] += results['duplicates_removed']
+        page_results = import_function(structured_json)
+        pages_imported += 1
+        add_up_page_import_results(import_results, page_results)
+        if not import_results['success']:
+            # Leave the checkpoint before this page, so the next run tries it again
+            break
+
+        if checkpoint is not None:
+            checkpoint_manager.save_master_server_sync_checkpoint(
+                checkpoint, last_id=last_id, records_imported=page_item_count)
+        after_id = last_id
+        if not master_server_pages or page_item_count < page_size:
+            break
+
+    if import_results['success']:
+        if not pages_imported:
+            # Nothing new on the master server. Still hand back the same counts (all zero) the import function would.
+            add_up_page_import_results(import_results, import_function([]))
+        if checkpoint is not None:
+            checkpoint_manager.save_master_server_sync_checkpoint(checkpoint, is_complete=True)
+
+    if 'google_civic_election_id' in get_params:
+        print("... the master server returned " + str(items_returned) + " items.  Election " +
+              str(google_civic_election_id))  # Please don't remove this line
+    else:
+        print("... the master server returned " + str(items_returned) + " items.")  # Please don't remove this line
+
+    return import_results
+
+
 def add_period_to_middle_name_initial(name):
     modified_name = name.replace(' A ', ' A. ')
     modified_name = modified_name.replace(' B ', ' B. ')
@@ -2,12 +2,21 @@
 # Brought to you by We Vote. Be good.
 # -*- coding: UTF-8 -*-
 
-from django.db import models
-from exception.models import handle_record_found_more_than_one_exception,\
+import atexit
+import os
+from collections import namedtuple, OrderedDict
+from datetime import timedelta
+from django.db import connection, IntegrityError, models, transaction
+from django.db.models import F, Q, Sum
+from django.utils.timezone import localtime, now
+from exception.models import handle_exception, handle_record_found_more_than_one_exception,\
     handle_record_not_saved_exception
+import re
 import string
+import threading
 import wevote_functions.admin
-from wevote_functions.functions import convert_to_int, generate_random_string, positive_value_exists
+from wevote_functions.functions import convert_to_int, generate_random_string, LeastRecentlyUsedCache, \
+    positive_value_exists
 
 
 RETRIEVE_POSSIBLE_FACEBOOK_PHOTOS = 'RETRIEVE_POSSIBLE_FACEBOOK_PHOTOS'
@@ -22,6 +31,22 @@ KIND_OF_ACTION_CHOICES = (
     (STOP_BULK_SEARCH_TWITTER_LINK_POSSIBILITY, 'Stop search for Bulk twitter links'),
 )
 
+# How many we_vote_id integers each process reserves from WeVoteSetting in one database round trip
+WE_VOTE_ID_INTEGER_BLOCK_SIZE = 1000
+
+GEOCODER_SOURCE_GOOGLE = 'google'
+GEOCODER_SOURCE_GOOGLE_WITHOUT_KEY = 'google_without_key'
+# How long we trust what each geocoder told us about an address
+GEOCODER_CACHE_TIMEOUT_DAYS_BY_SOURCE = {
+    GEOCODER_SOURCE_GOOGLE:             180,
+    GEOCODER_SOURCE_GOOGLE_WITHOUT_KEY: 30,
+}
+GEOCODER_CACHE_TIMEOUT_DAYS_DEFAULT = 30
+# Addresses the geocoder couldn't find are asked about again sooner
+GEOCODER_CACHE_NOT_FOUND_TIMEOUT_DAYS = 1
+# Addresses remembered in each process, in front of the GeocodedAddress table
+GEOCODER_CACHE_MAX_ENTRIES_IN_MEMORY = 20000
+
 logger = wevote_functions.admin.get_logger(__name__)
 
 
@@ -149,12 +174,80 @@ class WeVoteSettingsManager(models.Model):
             we_vote_setting.string_value = setting_value
         return we_vote_setting
 
+
+class WeVoteIdIntegerAllocator(object):
+    """
+    Hands out we_vote_id integers from blocks reserved in WeVoteSetting. Each block is reserved with
+    SELECT ... FOR UPDATE, so concurrent processes never receive overlapping blocks. Within a process, integers are
+    served from memory. Integers in a block that is not used up before the process exits are skipped, never reused.
+    When called inside a transaction we only reserve one integer and keep nothing in memory: if that transaction
+    rolls back, the reservation rolls back with it, and a block held in memory would hand out integers again.
+    """
+    def __init__(self, block_size=WE_VOTE_ID_INTEGER_BLOCK_SIZE):
+        self.block_size = block_size
+        self.lock = threading.Lock()
+        # setting_name -> [next_integer_to_hand_out, last_integer_reserved]
+        self.reserved_blocks = {}
+
+    def fetch_next_integer(self, we_vote_id_last_setting_name):
+        if connection.in_atomic_block:
+            block = self.reserve_block(we_vote_id_last_setting_name, block_size=1)
+            return block[0]
+        with self.lock:
+            block = self.reserved_blocks.get(we_vote_id_last_setting_name)
+            if block is None or block[0] > block[1]:
+                block = self.reserve_block(we_vote_id_last_setting_name)
+                self.reserved_blocks[we_vote_id_last_setting_name] = block
+            next_integer = block[0]
+            block[0] += 1
+            return next_integer
+
+    def reserve_block(self, we_vote_id_last_setting_name, block_size=0):
+        """
+        Move the stored "last integer" forward by block_size, and return the range we now own
+        :param we_vote_id_last_setting_name:
+        :param block_size: Defaults to self.block_size
+        :return: [first_integer_in_block, last_integer_in_block]
+        """
+        if not positive_value_exists(block_size):
+            block_size = self.block_size
+        if not WeVoteSetting.objects.filter(name=we_vote_id_last_setting_name).exists():
+            WeVoteSetting.objects.create(
+                name=we_vote_id_last_setting_name,
+                value_type=WeVoteSetting.INTEGER,
+                integer_value=0,
+                boolean_value=False,
+            )
+
+        with transaction.atomic():
+            # If two processes created this setting at the same moment there can be more than one row. We lock all
+            #  of them and move them forward together, so the new block starts past every integer already reserved.
+            we_vote_setting_list = list(
+                WeVoteSetting.objects.select_for_update().filter(name=we_vote_id_last_setting_name))
+            last_integer_reserved = max(convert_to_int(we_vote_setting.integer_value)
+                                        for we_vote_setting in we_vote_setting_list)
+            for we_vote_setting in we_vote_setting_list:
+                we_vote_setting.value_type = WeVoteSetting.INTEGER
+                we_vote_setting.integer_value = last_integer_reserved + block_size
+                we_vote_setting.save()
+        return [last_integer_reserved + 1, last_integer_reserved + block_size]
+
+
+we_vote_id_integer_allocator = WeVoteIdIntegerAllocator()
+
+# site_unique_id_prefix does not change once it has been set, so we only look it up once per process
+site_unique_id_prefix_cached = ''
+
 # site_unique_id_prefix
 # we_vote_id_last_org_integer
 # we_vote_id_last_position_integer
 
 
 def fetch_site_unique_id_prefix():
+    global site_unique_id_prefix_cached
+    if positive_value_exists(site_unique_id_prefix_cached):
+        return site_unique_id_prefix_cached
+
     we_vote_settings_manager = WeVoteSettingsManager()
     site_unique_id_prefix = we_vote_settings_manager.fetch_setting('site_unique_id_prefix')
 
@@ -173,16 +266,12 @@ def fetch_site_unique_id_prefix():
         we_vote_settings_manager.save_setting('site_unique_id_prefix', site_unique_id_prefix)
         # TODO Each We Vote site needs to keep a local copy of site_unique_id_prefix's that are in use, AND
         # TODO Each We Vote site also needs to publish site_unique_id_prefix's in use by that organization
+    site_unique_id_prefix_cached = site_unique_id_prefix
     return site_unique_id_prefix
 
 
 def fetch_next_we_vote_id_integer(we_vote_id_last_setting_name):
-    we_vote_settings_manager = WeVoteSettingsManager()
-    we_vote_id_last_integer = we_vote_settings_manager.fetch_setting(we_vote_id_last_setting_name)
-    we_vote_id_next_integer = convert_to_int(we_vote_id_last_integer)
-    we_vote_id_next_integer += 1
-    we_vote_settings_manager.save_setting(we_vote_id_last_setting_name, we_vote_id_next_integer)
-    return we_vote_id_next_integer
+    return we_vote_id_integer_allocator.fetch_next_integer(we_vote_id_last_setting_name)
 
 
 def fetch_next_we_vote_id_ballot_returned_integer():
@@ -358,3 +447,594 @@ class RemoteRequestHistoryManager(models.Model):
             'remote_request_history_list_found': remote_request_history_list_found,
         }
         return results
+
+
+API_BALLOTPEDIA = 'BALLOTPEDIA'
+API_GOOGLE_CIVIC = 'GOOGLE_CIVIC'
+API_VOTE_SMART = 'VOTE_SMART'
+API_NAME_CHOICES = (
+    (API_BALLOTPEDIA,   'Ballotpedia'),
+    (API_GOOGLE_CIVIC,  'Google Civic'),
+    (API_VOTE_SMART,    'Vote Smart'),
+)
+# Calls are counted in memory, and added to ApiCallHourlyCount at most this long after they were made
+API_CALL_COUNTER_FLUSH_SECONDS = 60
+# How far back the daily, weekly and monthly summaries look
+API_CALL_SUMMARY_DAYS = 90
+
+
+class ApiCallHourlyCount(models.Model):
+    """
+    How many calls we made to an outside API in one hour, for one kind of call and election. We used to save one
+    GoogleCivicApiCounter, BallotpediaApiCounter or VoteSmartApiCounter row for every call.
+    """
+    api_name = models.CharField(verbose_name="which api", max_length=50, choices=API_NAME_CHOICES, null=False)
+    kind_of_action = models.CharField(verbose_name="kind of call", max_length=50, default='', null=False, blank=True)
+    google_civic_election_id = models.PositiveIntegerField(
+        verbose_name="google civic election id", default=0, null=False)
+    # The start of the hour, in UTC
+    hour_of_action = models.DateTimeField(verbose_name='hour of action', null=False, db_index=True)
+    api_call_count = models.PositiveIntegerField(verbose_name="number of calls", default=0, null=False)
+
+    class Meta:
+        unique_together = ('api_name', 'kind_of_action', 'google_civic_election_id', 'hour_of_action')
+
+
+class ApiCallCounter(object):
+    """
+    Counts calls to outside APIs in this process, and adds them to ApiCallHourlyCount in one UPDATE per
+    (api, kind_of_action, election, hour) instead of inserting a row per call. The counts are saved every
+    flush_seconds by a background thread, with its own database connection, so the caller never waits on the save
+    and it is never part of the caller's transaction.
+    """
+
+    def __init__(self, flush_seconds=API_CALL_COUNTER_FLUSH_SECONDS):
+        self.flush_seconds = flush_seconds
+        self.lock = threading.Lock()
+        self.api_call_counts = {}
+        self.stopping = threading.Event()
+        self.flusher_thread = None
+        self.flusher_process_id = None
+        # Don't lose the last minute of counts when a worker process is recycled
+        atexit.register(self.stop)
+
+    def count_api_call(self, api_name, kind_of_action, google_civic_election_id=0):
+        hour_of_action = now().replace(minute=0, second=0, microsecond=0)
+        counter_key = (api_name, kind_of_action if kind_of_action else '', convert_to_int(google_civic_election_id),
+                       hour_of_action)
+        self.start_flusher_if_needed()
+        with self.lock:
+            self.api_call_counts[counter_key] = self.api_call_counts.get(counter_key, 0) + 1
+
+    def start_flusher_if_needed(self):
+        # Servers that fork workers after importing our code don't inherit the flusher thread, so each process
+        #  starts its own
+        if self.flusher_process_id == os.getpid() and self.flusher_thread.is_alive():
+            return
+        with self.lock:
+            if self.flusher_process_id == os.getpid() and self.flusher_thread.is_alive():
+                return
+            if self.flusher_process_id != os.getpid():
+                # Calls counted in the parent process before the fork belong to the parent
+                self.api_call_counts = {}
+            self.stopping.clear()
+            self.flusher_thread = threading.Thread(target=self.flush_until_stopped, name='api_call_counter_flusher')
+            self.flusher_thread.daemon = True
+            self.flusher_process_id = os.getpid()
+            self.flusher_thread.start()
+
+    def flush_until_stopped(self):
+        try:
+            while not self.stopping.wait(self.flush_seconds):
+                self.flush()
+                # Don't hold a connection open while we wait for the next flush
+                connection.close()
+            self.flush()
+        finally:
+            connection.close()
+
+    def stop(self, timeout_seconds=10):
+        """
+        Save what is left, and stop the flusher thread. Called when the process exits.
+        :param timeout_seconds:
+        :return:
+        """
+        self.stopping.set()
+        if self.flusher_thread is not None and self.flusher_process_id == os.getpid():
+            self.flusher_thread.join(timeout_seconds)
+
+    def flush(self):
+        """
+        Add what we have counted so far to ApiCallHourlyCount
+        :return:
+        """
+        with self.lock:
+            api_call_counts = self.api_call_counts
+            self.api_call_counts = {}
+
+        for counter_key, api_call_count in api_call_counts.items():
+            try:
+                self.add_to_api_call_hourly_count(counter_key, api_call_count)
+            except Exception as e:
+                handle_exception(e, logger=logger, exception_message="API_CALL_HOURLY_COUNT_NOT_SAVED ")
+                # Try again with the next flush
+                with self.lock:
+                    self.api_call_counts[counter_key] = self.api_call_counts.get(counter_key, 0) + api_call_count
+
+    @staticmethod
+    def add_to_api_call_hourly_count(counter_key, api_call_count):
+        api_name, kind_of_action, google_civic_election_id, hour_of_action = counter_key
+        hourly_count_query = ApiCallHourlyCount.objects.filter(
+            api_name=api_name, kind_of_action=kind_of_action, google_civic_election_id=google_civic_election_id,
+            hour_of_action=hour_of_action)
+        if hourly_count_query.update(api_call_count=F('api_call_count') + api_call_count):
+            return
+        try:
+            with transaction.atomic():
+                ApiCallHourlyCount.objects.create(
+                    api_name=api_name, kind_of_action=kind_of_action,
+                    google_civic_election_id=google_civic_election_id, hour_of_action=hour_of_action,
+                    api_call_count=api_call_count)
+        except IntegrityError:
+            # Another process created this hour first
+            hourly_count_query.update(api_call_count=F('api_call_count') + api_call_count)
+
+    def retrieve_api_call_summaries(self, api_name, kind_of_action='', google_civic_election_id=0,
+                                    days_to_display=30):
+        """
+        Calls per day, week and month, all from one query grouped by hour. Newest first.
+        :param api_name:
+        :param kind_of_action:
+        :param google_civic_election_id:
+        :param days_to_display: The most recent days with calls to list
+        :return:
+        """
+        status = ""
+        daily_counts = OrderedDict()
+        weekly_counts = OrderedDict()
+        monthly_counts = OrderedDict()
+
+        # So the calls this process made in the last minute show up too
+        self.flush()
+        try:
+            hourly_count_query = ApiCallHourlyCount.objects.filter(
+                api_name=api_name, hour_of_action__gte=now() - timedelta(days=API_CALL_SUMMARY_DAYS))
+            if positive_value_exists(kind_of_action):
+                hourly_count_query = hourly_count_query.filter(kind_of_action=kind_of_action)
+            if positive_value_exists(google_civic_election_id):
+                hourly_count_query = hourly_count_query.filter(google_civic_election_id=google_civic_election_id)
+            hourly_count_query = hourly_count_query.values('hour_of_action').annotate(
+                api_call_count=Sum('api_call_count')).order_by('-hour_of_action')
+            for hourly_count in hourly_count_query:
+                # We Vote uses Pacific Time for TIME_ZONE
+                day_of_action = localtime(hourly_count['hour_of_action']).date()
+                year_of_action, week_of_action, weekday = day_of_action.isocalendar()
+                daily_counts[day_of_action] = daily_counts.get(day_of_action, 0) + hourly_count['api_call_count']
+                weekly_counts[(year_of_action, week_of_action)] = \
+                    weekly_counts.get((year_of_action, week_of_action), 0) + hourly_count['api_call_count']
+                monthly_counts[(day_of_action.year, day_of_action.month)] = \
+                    monthly_counts.get((day_of_action.year, day_of_action.month), 0) + hourly_count['api_call_count']
+            success = True
+        except Exception as e:
+            success = False
+            status += "API_CALL_SUMMARIES_NOT_RETRIEVED "
+            handle_exception(e, logger=logger, exception_message=status)
+
+        results = {
+            'success':              success,
+            'status':               status,
+            'daily_summaries':      [{'date_string': day_of_action, 'count': count}
+                                     for day_of_action, count in list(daily_counts.items())[:days_to_display]],
+            'weekly_summaries':     [{'year': year_of_action, 'week': week_of_action, 'count': count}
+                                     for (year_of_action, week_of_action), count in weekly_counts.items()],
+            'monthly_summaries':    [{'year': year_of_action, 'month': month_of_action, 'count': count}
+                                     for (year_of_action, month_of_action), count in monthly_counts.items()],
+        }
+        return results
+
+
+api_call_counter = ApiCallCounter()
+
+
+class MasterServerSyncCheckpoint(models.Model):
+    """
+    How far we got the last time we pulled one table from the We Vote Master server, for one election and state.
+    If an import dies part way through, the next run picks up after last_id instead of starting over. Once an import
+    finishes, the next run only asks for the rows changed since this one started.
+    """
+    sync_name = models.CharField(verbose_name="which SyncOut endpoint", max_length=50, null=False, db_index=True)
+    google_civic_election_id = models.PositiveIntegerField(
+        verbose_name="google civic election id", default=0, null=False)
+    state_code = models.CharField(verbose_name="state code", max_length=2, default='', null=False, blank=True)
+    # The id (on the master server) of the last row we imported
+    last_id = models.PositiveIntegerField(verbose_name="last id imported", default=0, null=False)
+    records_imported = models.PositiveIntegerField(verbose_name="records imported", default=0, null=False)
+    is_complete = models.BooleanField(verbose_name="the last import finished", default=False)
+    date_started = models.DateTimeField(verbose_name="date this import started", null=True)
+    # When the last import that finished was started. Rows changed after this still need to be pulled.
+    date_last_completed_import_started = models.DateTimeField(
+        verbose_name="date the last finished import started", null=True)
+    date_last_changed = models.DateTimeField(verbose_name="date last changed", null=True, auto_now=True)
+
+    class Meta:
+        unique_together = ('sync_name', 'google_civic_election_id', 'state_code')
+
+
+class MasterServerSyncCheckpointManager(models.Model):
+
+    def __unicode__(self):
+        return "MasterServerSyncCheckpointManager"
+
+    def retrieve_master_server_sync_checkpoint(self, sync_name, google_civic_election_id=0, state_code=''):
+        """
+        Retrieve the checkpoint for this table, election and state, creating it if needed
+        :param sync_name:
+        :param google_civic_election_id:
+        :param state_code:
+        :return:
+        """
+        status = ""
+        checkpoint = None
+        try:
+            checkpoint, created = MasterServerSyncCheckpoint.objects.get_or_create(
+                sync_name=sync_name,
+                google_civic_election_id=convert_to_int(google_civic_election_id),
+                state_code=(state_code or '').lower())
+            success = True
+            status += "MASTER_SERVER_SYNC_CHECKPOINT_CREATED " if created else "MASTER_SERVER_SYNC_CHECKPOINT_FOUND "
+        except Exception as e:
+            success = False
+            status += "MASTER_SERVER_SYNC_CHECKPOINT_NOT_RETRIEVED " + str(e) + " "
+            handle_exception(e, logger=logger, exception_message=status)
+
+        results = {
+            'success':      success,
+            'status':       status,
+            'checkpoint':   checkpoint,
+        }
+        return results
+
+    def start_master_server_sync(self, checkpoint, start_over=False):
+        """
+        Get the checkpoint ready for a new run. An unfinished run is resumed unless start_over is True.
+        :param checkpoint:
+        :param start_over:
+        :return: The after_id and updated_since to ask the master server for
+        """
+        if start_over:
+            checkpoint.date_last_completed_import_started = None
+        if start_over or checkpoint.is_complete or not checkpoint.date_started:
+            checkpoint.last_id = 0
+            checkpoint.records_imported = 0
+            checkpoint.is_complete = False
+            checkpoint.date_started = now()
+        self.save_master_server_sync_checkpoint(checkpoint)
+        return checkpoint.last_id, checkpoint.date_last_completed_import_started
+
+    def save_master_server_sync_checkpoint(self, checkpoint, last_id=None, records_imported=0, is_complete=False):
+        """
+        Record that the rows up to last_id have been imported
+        :param checkpoint:
+        :param last_id:
+        :param records_imported: Added to the records already imported in this run
+        :param is_complete:
+        :return:
+        """
+        status = ""
+        try:
+            if last_id is not None:
+                checkpoint.last_id = last_id
+            checkpoint.records_imported += records_imported
+            if is_complete:
+                checkpoint.is_complete = True
+                checkpoint.date_last_completed_import_started = checkpoint.date_started
+            checkpoint.save()
+            success = True
+            status += "MASTER_SERVER_SYNC_CHECKPOINT_SAVED "
+        except Exception as e:
+            success = False
+            status += "MASTER_SERVER_SYNC_CHECKPOINT_NOT_SAVED " + str(e) + " "
+            handle_exception(e, logger=logger, exception_message=status)
+
+        results = {
+            'success':  success,
+            'status':   status,
+        }
+        return results
+
+
+BACKGROUND_JOB_QUEUED = 'QUEUED'
+BACKGROUND_JOB_RUNNING = 'RUNNING'
+BACKGROUND_JOB_COMPLETED = 'COMPLETED'
+BACKGROUND_JOB_FAILED = 'FAILED'
+BACKGROUND_JOB_CANCELED = 'CANCELED'
+BACKGROUND_JOB_STATUS_CHOICES = (
+    (BACKGROUND_JOB_QUEUED,     'Queued'),
+    (BACKGROUND_JOB_RUNNING,    'Running'),
+    (BACKGROUND_JOB_COMPLETED,  'Completed'),
+    (BACKGROUND_JOB_FAILED,     'Failed'),
+    (BACKGROUND_JOB_CANCELED,   'Canceled'),
+)
+BACKGROUND_JOB_FINISHED_STATUSES = (BACKGROUND_JOB_COMPLETED, BACKGROUND_JOB_FAILED, BACKGROUND_JOB_CANCELED)
+
+# If a running job has not checked in for this long, we assume its worker was killed and let another worker resume it
+BACKGROUND_JOB_STALE_SECONDS = 600
+# How often a worker checks in while it is running a job. Well under BACKGROUND_JOB_STALE_SECONDS.
+BACKGROUND_JOB_HEARTBEAT_SECONDS = 30
+
+
+class BackgroundJob(models.Model):
+    """
+    The queue and progress fields shared by the long-running jobs we queue from the admin pages, and run with a
+    management command outside of any HTTP request (BallotRetrieveJob and ImageCacheJob, for example).
+    """
+    job_status = models.CharField(verbose_name="job status", max_length=10, choices=BACKGROUND_JOB_STATUS_CHOICES,
+                                  default=BACKGROUND_JOB_QUEUED)
+    status = models.TextField(verbose_name="last status message", null=True, blank=True)
+    requested_by_voter_we_vote_id = models.CharField(max_length=255, null=True, blank=True)
+    # Which worker is running the job, and when it last checked in
+    worker_name = models.CharField(max_length=255, null=True, blank=True)
+    date_created = models.DateTimeField(verbose_name='date created', null=True, auto_now_add=True)
+    date_started = models.DateTimeField(verbose_name='date started', null=True, blank=True)
+    date_last_heartbeat = models.DateTimeField(verbose_name='date of last heartbeat', null=True, blank=True)
+    date_completed = models.DateTimeField(verbose_name='date completed', null=True, blank=True)
+
+    class Meta:
+        abstract = True
+
+    def is_finished(self):
+        return self.job_status in BACKGROUND_JOB_FINISHED_STATUSES
+
+
+class BackgroundJobManager(models.Model):
+    """
+    Queue operations for one kind of BackgroundJob. Subclasses set job_class.
+    """
+    job_class = None
+
+    class Meta:
+        abstract = True
+
+    def retrieve_job_list(self, limit=25, **filters):
+        return list(self.job_class.objects.filter(**filters).order_by('-id')[:limit])
+
+    def claim_next_job(self, worker_name):
+        """
+        Take the oldest queued job, or a running job whose worker has stopped checking in. SELECT ... FOR UPDATE with
+        a status change means two workers never claim the same job.
+        :param worker_name:
+        :return: The job, or None
+        """
+        stale_before = now() - timedelta(seconds=BACKGROUND_JOB_STALE_SECONDS)
+        with transaction.atomic():
+            job_query = self.job_class.objects.select_for_update().filter(
+                Q(job_status=BACKGROUND_JOB_QUEUED) |
+                Q(job_status=BACKGROUND_JOB_RUNNING, date_last_heartbeat__lt=stale_before))
+            job = job_query.order_by('id').first()
+            if job is None:
+                return None
+            if job.date_started is None:
+                job.date_started = now()
+            job.job_status = BACKGROUND_JOB_RUNNING
+            job.worker_name = worker_name
+            job.date_last_heartbeat = now()
+            job.save()
+        return job
+
+    def cancel_job(self, job_id):
+        updated_count = self.job_class.objects.filter(
+            id=job_id, job_status__in=[BACKGROUND_JOB_QUEUED, BACKGROUND_JOB_RUNNING]).update(
+            job_status=BACKGROUND_JOB_CANCELED, date_completed=now())
+        return positive_value_exists(updated_count)
+
+    def fetch_job_status(self, job_id):
+        return self.job_class.objects.filter(id=job_id).values_list('job_status', flat=True).first()
+
+    def save_job_progress(self, job_id, worker_name, **fields):
+        """
+        Check in, and save the progress counters passed in. A job is only updated while it is still running on this
+        worker, so a worker that finishes just after the job was canceled does not overwrite CANCELED, and a worker
+        that was thought dead, and whose job was claimed by another worker, does not overwrite the new worker's
+        progress.
+        :param job_id:
+        :param worker_name: The worker_name the job was claimed with
+        :param fields:
+        :return: True if the job was updated. When False, the worker should stop working on the job.
+        """
+        updated_count = self.job_class.objects.filter(
+            id=job_id, worker_name=worker_name, job_status=BACKGROUND_JOB_RUNNING).update(
+            date_last_heartbeat=now(), **fields)
+        return positive_value_exists(updated_count)
+
+
+# Looks enough like a geopy Location for the code that uses geocoder results
+GeocodedLocation = namedtuple('GeocodedLocation', ['address', 'latitude', 'longitude', 'raw'])
+
+geocoded_address_memory_cache = LeastRecentlyUsedCache(max_entries=GEOCODER_CACHE_MAX_ENTRIES_IN_MEMORY)
+
+
+class GeocodedAddress(models.Model):
+    """
+    What the geocoder told us about an address, so we only pay for each distinct address once
+    """
+    # Lower case, with punctuation and extra spaces removed (see normalize_address_for_geocoder_cache)
+    normalized_address = models.CharField(verbose_name="address as entered, normalized", max_length=255,
+                                          null=False, unique=True)
+    geocoder_source = models.CharField(verbose_name="geocoder used", max_length=50, default=GEOCODER_SOURCE_GOOGLE)
+    # False if the geocoder couldn't find this address
+    location_found = models.BooleanField(default=False)
+    latitude = models.FloatField(null=True)
+    longitude = models.FloatField(null=True)
+    formatted_address = models.CharField(verbose_name="address returned by the geocoder", max_length=255,
+                                         null=True, blank=True)
+    state_code = models.CharField(verbose_name="state code", max_length=2, null=True, blank=True)
+    postal_code = models.CharField(verbose_name="zip code", max_length=20, null=True, blank=True)
+    date_geocoded = models.DateTimeField(verbose_name="date geocoded", null=True, auto_now=True)
+    date_expires = models.DateTimeField(verbose_name="ask the geocoder again after", null=True, db_index=True)
+
+
+def normalize_address_for_geocoder_cache(address_text):
+    if not positive_value_exists(address_text):
+        return ''
+    return re.sub(r'[^\w#]+', ' ', address_text.lower()).strip()
+
+
+class GeocodedAddressManager(models.Model):
+
+    def __unicode__(self):
+        return "GeocodedAddressManager"
+
+    def retrieve_geocoded_address(self, address_text):
+        """
+        Look for this address in memory, then in the GeocodedAddress table
+        :param address_text:
+        :return: geocoded_address_found is True if we already asked the geocoder about this address. location is None
+         if the geocoder couldn't find it.
+        """
+        status = ""
+        location = None
+        geocoded_address_found = False
+        normalized_address = normalize_address_for_geocoder_cache(address_text)
+        if not positive_value_exists(normalized_address) or len(normalized_address) > 255:
+            results = {
+                'success':                  False,
+                'status':                   "GEOCODED_ADDRESS-ADDRESS_CANNOT_BE_CACHED ",
+                'geocoded_address_found':   geocoded_address_found,
+                'location':                 location,
+            }
+            return results
+
+        memory_cache_entry = geocoded_address_memory_cache.get(normalized_address)
+        if memory_cache_entry is not None:
+            results = {
+                'success':                  True,
+                'status':                   "GEOCODED_ADDRESS_FOUND_IN_MEMORY ",
+                'geocoded_address_found':   True,
+                'location':                 memory_cache_entry[0],
+            }
+            return results
+
+        try:
+            geocoded_address = GeocodedAddress.objects.filter(
+                normalized_address=normalized_address, date_expires__gt=now()).first()
+            if geocoded_address is not None:
+                geocoded_address_found = True
+                location = self.convert_geocoded_address_to_location(geocoded_address)
+                self.remember_geocoded_address_in_memory(normalized_address, location, geocoded_address.date_expires)
+                status += "GEOCODED_ADDRESS_FOUND "
+            else:
+                status += "GEOCODED_ADDRESS_NOT_FOUND "
+            success = True
+        except Exception as e:
+            success = False
+            status += "GEOCODED_ADDRESS_NOT_RETRIEVED " + str(e) + " "
+            handle_exception(e, logger=logger, exception_message=status)
+
+        results = {
+            'success':                  success,
+            'status':                   status,
+            'geocoded_address_found':   geocoded_address_found,
+            'location':                 location,
+        }
+        return results
+
+    def save_geocoded_address(self, address_text, location, geocoder_source=GEOCODER_SOURCE_GOOGLE):
+        """
+        Remember what the geocoder told us about this address
+        :param address_text:
+        :param location: The geopy Location, or None if the geocoder couldn't find the address
+        :param geocoder_source:
+        :return:
+        """
+        status = ""
+        normalized_address = normalize_address_for_geocoder_cache(address_text)
+        if not positive_value_exists(normalized_address) or len(normalized_address) > 255:
+            results = {
+                'success':  False,
+                'status':   "GEOCODED_ADDRESS-ADDRESS_CANNOT_BE_CACHED ",
+            }
+            return results
+
+        if location is None:
+            timeout_days = GEOCODER_CACHE_NOT_FOUND_TIMEOUT_DAYS
+            defaults = {
+                'location_found':       False,
+                'latitude':             None,
+                'longitude':            None,
+                'formatted_address':    None,
+                'state_code':           None,
+                'postal_code':          None,
+            }
+        else:
+            timeout_days = GEOCODER_CACHE_TIMEOUT_DAYS_BY_SOURCE.get(
+                geocoder_source, GEOCODER_CACHE_TIMEOUT_DAYS_DEFAULT)
+            address_component_list = []
+            raw = getattr(location, 'raw', None)
+            if isinstance(raw, dict):
+                address_component_list = raw.get('address_components', [])
+            state_code = None
+            postal_code = None
+            for one_address_component in address_component_list:
+                if 'administrative_area_level_1' in one_address_component.get('types', []):
+                    state_code = one_address_component.get('short_name', '')[:2] or None
+                elif 'postal_code' in one_address_component.get('types', []):
+                    postal_code = one_address_component.get('long_name', '')[:20] or None
+            defaults = {
+                'location_found':       True,
+                'latitude':             location.latitude,
+                'longitude':            location.longitude,
+                'formatted_address':    (location.address or '')[:255],
+                'state_code':           state_code,
+                'postal_code':          postal_code,
+            }
+        date_expires = now() + timedelta(days=timeout_days)
+        defaults['geocoder_source'] = geocoder_source
+        defaults['date_expires'] = date_expires
+
+        try:
+            geocoded_address, created = GeocodedAddress.objects.update_or_create(
+                normalized_address=normalized_address, defaults=defaults)
+            self.remember_geocoded_address_in_memory(
+                normalized_address, self.convert_geocoded_address_to_location(geocoded_address), date_expires)
+            success = True
+            status += "GEOCODED_ADDRESS_SAVED "
+        except Exception as e:
+            success = False
+            status += "GEOCODED_ADDRESS_NOT_SAVED " + str(e) + " "
+            handle_exception(e, logger=logger, exception_message=status)
+
+        results = {
+            'success':  success,
+            'status':   status,
+        }
+        return results
+
+    @staticmethod
+    def remember_geocoded_address_in_memory(normalized_address, location, date_expires):
+        timeout_seconds = max(0, (date_expires - now()).total_seconds())
+        # Wrapped in a tuple so an address the geocoder couldn't find (None) is still remembered
+        geocoded_address_memory_cache.set(normalized_address, (location, ), timeout_seconds)
+
+    @staticmethod
+    def convert_geocoded_address_to_location(geocoded_address):
+        if not geocoded_address.location_found:
+            return None
+        address_component_list = []
+        if positive_value_exists(geocoded_address.state_code):
+            address_component_list.append({
+                'long_name':    geocoded_address.state_code,
+                'short_name':   geocoded_address.state_code,
+                'types':        ['administrative_area_level_1', 'political'],
+            })
+        if positive_value_exists(geocoded_address.postal_code):
+            address_component_list.append({
+                'long_name':    geocoded_address.postal_code,
+                'short_name':   geocoded_address.postal_code,
+                'types':        ['postal_code'],
+            })
+        raw = {
+            'formatted_address':    geocoded_address.formatted_address,
+            'address_components':   address_component_list,
+        }
+        return GeocodedLocation(geocoded_address.formatted_address, geocoded_address.latitude,
+                                geocoded_address.longitude, raw)
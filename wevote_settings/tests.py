@@ -0,0 +1,229 @@
+# wevote_settings/tests.py
+# Brought to you by We Vote. Be good.
+# -*- coding: UTF-8 -*-
+
+from django.db import connection, IntegrityError, transaction
+from django.test import SimpleTestCase, TestCase, TransactionTestCase
+from http.server import BaseHTTPRequestHandler, HTTPServer
+import json
+import threading
+from unittest import mock
+from urllib.parse import parse_qs, urlparse
+from wevote_functions.functions import LocalDuplicateIndex, process_pages_from_master
+from .models import ApiCallCounter, API_GOOGLE_CIVIC, API_VOTE_SMART, MasterServerSyncCheckpoint, \
+    WeVoteIdIntegerAllocator, WeVoteSetting
+
+
+class WeVoteIdIntegerAllocatorTestCase(TransactionTestCase):
+
+    def test_concurrent_allocators_never_hand_out_the_same_integer(self):
+        """
+        Each allocator stands in for one gunicorn worker process. They all reserve small blocks from the same
+        WeVoteSetting row at the same time, and none of the integers they hand out may collide.
+        Requires a database with row locking (PostgreSQL), as in production.
+        :return:
+        """
+        setting_name = 'we_vote_id_last_stress_test_integer'
+        number_of_workers = 16
+        integers_per_worker = 250
+        handed_out_by_worker = [[] for _ in range(number_of_workers)]
+        errors = []
+
+        def worker(worker_number):
+            # A small block size forces many concurrent block reservations
+            allocator = WeVoteIdIntegerAllocator(block_size=7)
+            try:
+                for _ in range(integers_per_worker):
+                    handed_out_by_worker[worker_number].append(allocator.fetch_next_integer(setting_name))
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connection.close()
+
+        thread_list = [threading.Thread(target=worker, args=(worker_number,))
+                       for worker_number in range(number_of_workers)]
+        for one_thread in thread_list:
+            one_thread.start()
+        for one_thread in thread_list:
+            one_thread.join()
+
+        self.assertEqual(errors, [])
+        all_integers = [one_integer for worker_integers in handed_out_by_worker for one_integer in worker_integers]
+        self.assertEqual(len(all_integers), number_of_workers * integers_per_worker)
+        self.assertEqual(len(set(all_integers)), len(all_integers), "The same we_vote_id integer was handed out twice")
+        for we_vote_setting in WeVoteSetting.objects.filter(name=setting_name):
+            self.assertGreaterEqual(we_vote_setting.integer_value, max(all_integers))
+
+    def test_integers_are_served_from_memory_within_a_block(self):
+        setting_name = 'we_vote_id_last_block_test_integer'
+        allocator = WeVoteIdIntegerAllocator(block_size=1000)
+        first_integer = allocator.fetch_next_integer(setting_name)
+        for expected_integer in range(first_integer + 1, first_integer + 10):
+            self.assertEqual(allocator.fetch_next_integer(setting_name), expected_integer)
+        # Only one block has been reserved
+        self.assertEqual(WeVoteSetting.objects.get(name=setting_name).integer_value, first_integer + 999)
+
+    def test_integer_handed_out_in_rolled_back_transaction_is_not_handed_out_again(self):
+        setting_name = 'we_vote_id_last_rollback_test_integer'
+        allocator = WeVoteIdIntegerAllocator(block_size=1000)
+        handed_out_list = []
+        try:
+            with transaction.atomic():
+                handed_out_list.append(allocator.fetch_next_integer(setting_name))
+                raise IntegrityError("Roll back the caller's transaction")
+        except IntegrityError:
+            pass
+        # The reservation was rolled back, and nothing was kept in memory, so the next integer is reserved again
+        self.assertEqual(allocator.reserved_blocks, {})
+        handed_out_list.append(allocator.fetch_next_integer(setting_name))
+        handed_out_list.append(allocator.fetch_next_integer(setting_name))
+        self.assertEqual(handed_out_list[1] + 1, handed_out_list[2])
+        self.assertEqual(WeVoteSetting.objects.get(name=setting_name).integer_value, handed_out_list[1] + 999)
+
+
+class FakeMasterServerHandler(BaseHTTPRequestHandler):
+    """
+    Answers like a *SyncOut endpoint, with rows that have the ids 1 through 5
+    """
+    requests_received = []
+
+    def do_GET(self):
+        query = parse_qs(urlparse(self.path).query)
+        self.requests_received.append(query)
+        after_id = int(query.get('after_id', ['0'])[0])
+        limit = int(query.get('limit', ['0'])[0])
+        row_list = [{'id': one_id, 'we_vote_id': 'wv01off' + str(one_id)} for one_id in range(1, 6)
+                    if one_id > after_id]
+        if limit:
+            row_list = row_list[:limit]
+        body = json.dumps(row_list).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class ProcessPagesFromMasterTestCase(TestCase):
+
+    def setUp(self):
+        FakeMasterServerHandler.requests_received = []
+        self.fake_master_server = HTTPServer(('127.0.0.1', 0), FakeMasterServerHandler)
+        self.fake_master_server_thread = threading.Thread(target=self.fake_master_server.serve_forever)
+        self.fake_master_server_thread.daemon = True
+        self.fake_master_server_thread.start()
+        self.sync_url = 'http://127.0.0.1:{port}/apis/v1/officesSyncOut/'.format(
+            port=self.fake_master_server.server_port)
+        self.messages_patch = mock.patch('wevote_functions.functions.messages')
+        self.messages_patch.start()
+        self.imported_we_vote_ids = []
+
+    def tearDown(self):
+        self.messages_patch.stop()
+        self.fake_master_server.shutdown()
+        self.fake_master_server.server_close()
+
+    def import_offices(self, structured_json):
+        self.imported_we_vote_ids += [one_office['we_vote_id'] for one_office in structured_json]
+        return {'success': True, 'status': 'OFFICES_IMPORT_PROCESS_COMPLETE', 'saved': len(structured_json),
+                'updated': 0, 'not_processed': 0}
+
+    def process_pages(self, import_function, filter_function=None):
+        return process_pages_from_master(
+            None, "Loading Contest Offices", self.sync_url, {'google_civic_election_id': '4184', 'state_code': 'CA'},
+            import_function=import_function, filter_function=filter_function, sync_name='offices', page_size=2)
+
+    def test_every_page_is_imported_and_the_counts_are_added_up(self):
+        def filter_offices(structured_json):
+            filtered_structured_json = [one_office for one_office in structured_json if one_office['id'] != 4]
+            return {'structured_json': filtered_structured_json,
+                    'duplicates_removed': len(structured_json) - len(filtered_structured_json)}
+
+        import_results = self.process_pages(self.import_offices, filter_offices)
+        self.assertTrue(import_results['success'], import_results['status'])
+        self.assertEqual(import_results['saved'], 4)
+        self.assertEqual(import_results['duplicates_removed'], 1)
+        self.assertEqual(self.imported_we_vote_ids, ['wv01off1', 'wv01off2', 'wv01off3', 'wv01off5'])
+        self.assertEqual([query['after_id'] for query in FakeMasterServerHandler.requests_received],
+                         [['0'], ['2'], ['4']])
+
+        checkpoint = MasterServerSyncCheckpoint.objects.get(
+            sync_name='offices', google_civic_election_id=4184, state_code='ca')
+        self.assertTrue(checkpoint.is_complete)
+        self.assertEqual(checkpoint.last_id, 5)
+
+    def test_the_duplicate_index_for_the_run_is_handed_to_the_filter_with_every_page(self):
+        duplicate_index = LocalDuplicateIndex()
+        duplicate_index.add('wv01off99', ('wv01off4 name',))
+        duplicate_index_list = []
+
+        def filter_offices(structured_json, duplicate_index=None):
+            duplicate_index_list.append(duplicate_index)
+            filtered_structured_json = [one_office for one_office in structured_json
+                                        if not duplicate_index.has_duplicate([(one_office['we_vote_id'] + ' name',)])]
+            return {'structured_json': filtered_structured_json,
+                    'duplicates_removed': len(structured_json) - len(filtered_structured_json)}
+
+        import_results = process_pages_from_master(
+            None, "Loading Contest Offices", self.sync_url, {'google_civic_election_id': '4184', 'state_code': 'CA'},
+            import_function=self.import_offices, filter_function=filter_offices, sync_name='offices', page_size=2,
+            duplicate_index=duplicate_index)
+        self.assertTrue(import_results['success'], import_results['status'])
+        self.assertEqual(import_results['duplicates_removed'], 1)
+        self.assertEqual(self.imported_we_vote_ids, ['wv01off1', 'wv01off2', 'wv01off3', 'wv01off5'])
+        self.assertEqual(duplicate_index_list, [duplicate_index] * 3)
+
+    def test_an_interrupted_import_resumes_after_the_last_page_imported(self):
+        def import_offices_then_stop(structured_json):
+            if structured_json[0]['id'] > 2:
+                raise RuntimeError("Import stopped part way through")
+            return self.import_offices(structured_json)
+
+        with self.assertRaises(RuntimeError):
+            self.process_pages(import_offices_then_stop)
+        self.assertEqual(MasterServerSyncCheckpoint.objects.get(sync_name='offices').last_id, 2)
+
+        FakeMasterServerHandler.requests_received = []
+        import_results = self.process_pages(self.import_offices)
+        self.assertTrue(import_results['success'], import_results['status'])
+        self.assertEqual(self.imported_we_vote_ids, ['wv01off1', 'wv01off2', 'wv01off3', 'wv01off4', 'wv01off5'])
+        self.assertEqual(FakeMasterServerHandler.requests_received[0]['after_id'], ['2'])
+
+        # Once an import has finished, the next one only asks for what changed since
+        FakeMasterServerHandler.requests_received = []
+        self.process_pages(self.import_offices)
+        self.assertEqual(FakeMasterServerHandler.requests_received[0]['after_id'], ['0'])
+        self.assertIn('updated_since', FakeMasterServerHandler.requests_received[0])
+
+
+class ApiCallCounterTestCase(SimpleTestCase):
+
+    def test_calls_are_added_up_before_they_are_saved(self):
+        api_call_counter = ApiCallCounter(flush_seconds=3600)
+        saved_counts = {}
+        with mock.patch.object(ApiCallCounter, 'add_to_api_call_hourly_count',
+                               side_effect=lambda counter_key, count: saved_counts.update({counter_key[:3]: count})):
+            for count in range(5):
+                api_call_counter.count_api_call(API_GOOGLE_CIVIC, 'ballot', '4162')
+            api_call_counter.count_api_call(API_GOOGLE_CIVIC, 'election')
+            api_call_counter.count_api_call(API_VOTE_SMART, 'State.getStateIDs')
+            self.assertEqual(saved_counts, {})
+
+            api_call_counter.flush()
+        self.assertEqual(saved_counts, {
+            (API_GOOGLE_CIVIC, 'ballot', 4162): 5,
+            (API_GOOGLE_CIVIC, 'election', 0): 1,
+            (API_VOTE_SMART, 'State.getStateIDs', 0): 1,
+        })
+
+    def test_counts_are_saved_in_the_background_without_another_call(self):
+        api_call_counter = ApiCallCounter(flush_seconds=0.01)
+        counts_saved = threading.Event()
+        with mock.patch.object(ApiCallCounter, 'add_to_api_call_hourly_count',
+                               side_effect=lambda counter_key, count: counts_saved.set()):
+            api_call_counter.count_api_call(API_GOOGLE_CIVIC, 'ballot')
+            self.assertTrue(counts_saved.wait(5))
+            api_call_counter.stop()